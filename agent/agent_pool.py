@@ -0,0 +1,209 @@
+"""
+Zdieľaný agent pre viac súbežných sedení v jednom procese
+
+Namiesto jedného LegalAssistantAgent (s vlastnými nástrojmi, LLM klientom a
+executorom) na každé sedenie drží proces jednu nemennú sadu nástrojov a jeden
+executor. Stav požiadavky (session id, história) sa odovzdáva explicitne a
+história je v zdieľanom session store, takže súbežné otázky sa neovplyvňujú.
+
+Počet súbežne spracovaných otázok obmedzuje semafor:
+- LEGAL_MAX_CONCURRENCY  max. súbežných otázok v procese (predvolene 8)
+"""
+
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from agent.session_store import DEFAULT_SESSION_ID, SessionStore, get_session_store
+
+
+class PoolBusyError(RuntimeError):
+    """Žiadny voľný slot na spracovanie otázky v rámci časového limitu"""
+
+
+class PoolStream:
+    """
+    Udalosti streamovanej otázky, ktoré držia slot poolu
+
+    Generátor sa nedá zatvoriť, kým iné vlákno čaká na jeho ďalší krok
+    ("generator already executing"). cancel() preto pri rozbehnutom kroku iba
+    označí stream a generátor (a s ním slot) sa zatvorí hneď po návrate kroku.
+    """
+
+    def __init__(self, events: Iterator[Dict[str, Any]]):
+        self._events = events
+        self._lock = threading.Lock()
+        self._running = False
+        self._cancelled = False
+        self._closed = False
+
+    def __iter__(self) -> "PoolStream":
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._cancelled:
+                raise StopIteration
+            self._running = True
+        try:
+            return next(self._events)
+        finally:
+            with self._lock:
+                self._running = False
+                cancelled = self._cancelled
+            if cancelled:
+                self._close()
+
+    def cancel(self):
+        """Ukončí stream a uvoľní slot - hneď, alebo po dobehnutí práve bežiaceho kroku"""
+        with self._lock:
+            self._cancelled = True
+            if self._running:
+                return
+        self._close()
+
+    close = cancel
+
+    def _close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._events.close()
+
+
+class AgentPool:
+    """Jeden zdieľaný agent na proces + limit súbežných požiadaviek"""
+
+    def __init__(self, agent_factory: Optional[Callable[..., Any]] = None,
+                 session_store: Optional[SessionStore] = None,
+                 max_concurrency: Optional[int] = None, **agent_kwargs):
+        """
+        Args:
+            agent_factory: Funkcia vytvárajúca agenta (predvolene LegalAssistantAgent)
+            session_store: Zdieľaná história (predvolene get_session_store() z prostredia)
+            max_concurrency: Max. súbežných otázok (predvolene LEGAL_MAX_CONCURRENCY alebo 8)
+            **agent_kwargs: Parametre agenta (model, llm, tool_loading...)
+        """
+        if agent_factory is None:
+            from agent.legal_agent import LegalAssistantAgent
+            agent_factory = LegalAssistantAgent
+
+        self.session_store = session_store if session_store is not None else get_session_store()
+        self.max_concurrency = max_concurrency or int(os.getenv("LEGAL_MAX_CONCURRENCY", "8"))
+        self.agent = agent_factory(session_store=self.session_store, **agent_kwargs)
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiting = 0
+        self._completed = 0
+        self._rejected = 0
+
+    @property
+    def tools(self) -> List:
+        return self.agent.tools
+
+    def ask(self, question: str, session_id: str = DEFAULT_SESSION_ID,
+            timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Položí otázku zdieľanému agentovi v rámci danej session
+
+        Args:
+            question: Otázka používateľa
+            session_id: Identifikátor konverzácie
+            timeout: Max. čakanie na voľný slot v sekundách (None = bez limitu)
+
+        Raises:
+            PoolBusyError: Ak sa slot neuvoľní do timeout
+        """
+        queue_ms = self._acquire(timeout)
+        try:
+            result = self.agent.ask(question, session_id=session_id)
+            result["queue_ms"] = queue_ms
+            return result
+        finally:
+            self._release()
+
+    def ask_stream(self, question: str, session_id: str = DEFAULT_SESSION_ID,
+                   timeout: Optional[float] = None) -> "PoolStream":
+        """Streamovaná verzia ask - slot je obsadený až do poslednej udalosti alebo cancel()"""
+        return PoolStream(self._stream_events(question, session_id, timeout))
+
+    def _stream_events(self, question: str, session_id: str,
+                       timeout: Optional[float]) -> Iterator[Dict[str, Any]]:
+        queue_ms = self._acquire(timeout)
+        try:
+            yield {"type": "queued", "queue_ms": queue_ms}
+            yield from self.agent.ask_stream(question, session_id=session_id)
+        finally:
+            self._release()
+
+    def _acquire(self, timeout: Optional[float]) -> float:
+        """Počká na voľný slot, vráti čas čakania v ms"""
+        with self._lock:
+            self._waiting += 1
+        wait_start = time.perf_counter()
+        acquired = self._slots.acquire(timeout=timeout) if timeout is not None else self._slots.acquire()
+        queue_ms = round((time.perf_counter() - wait_start) * 1000, 1)
+        with self._lock:
+            self._waiting -= 1
+            if not acquired:
+                self._rejected += 1
+            else:
+                self._active += 1
+        if not acquired:
+            raise PoolBusyError(f"Všetkých {self.max_concurrency} slotov je obsadených")
+        return queue_ms
+
+    def _release(self):
+        self._slots.release()
+        with self._lock:
+            self._active -= 1
+            self._completed += 1
+
+    def get_tool(self, name: str) -> Optional[Any]:
+        """Nástroj zdieľaného agenta podľa názvu (lenivé proxy sa rozbalí)"""
+        for tool in self.agent.tools:
+            if tool.name == name:
+                return tool.get_tool() if hasattr(tool, "get_tool") else tool
+        return None
+
+    @property
+    def ready(self) -> bool:
+        """Či sú nástroje zahriate a pool môže odpovedať bez čakania na načítanie"""
+        return getattr(self.agent, "tools_ready", True)
+
+    def reset_memory(self, session_id: str = DEFAULT_SESSION_ID):
+        """Vymaže históriu jednej session"""
+        self.session_store.reset(session_id)
+
+    def get_conversation_history(self, session_id: str = DEFAULT_SESSION_ID) -> List[Dict]:
+        """Posledné výmeny jednej session"""
+        return self.session_store.turns(session_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Aktuálne vyťaženie poolu"""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                "waiting": self._waiting,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+
+_pool: Optional[AgentPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_agent_pool(**kwargs) -> AgentPool:
+    """Vráti zdieľaný pool procesu (vytvorí ho pri prvom volaní)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = AgentPool(**kwargs)
+    return _pool
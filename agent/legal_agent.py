@@ -3,58 +3,159 @@ AI Právny Asistent - ReAct Agent
 """
 
 import os
-from typing import List, Dict, Any
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional
 from dotenv import load_dotenv
 
-# Imports pre LangChain
-from langchain.agents import create_react_agent, AgentExecutor
-from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain.memory import ConversationBufferWindowMemory
-
-# Import nástrojov
-from agent.tools.search_tools import get_search_tools
-from agent.tools.database_tools import get_database_tools  
-from agent.tools.legal_tools import get_legal_tools
-from agent.tools.enhanced_vector_search import get_enhanced_search_tool
+# LangChain, nástroje a ich ťažké závislosti (chromadb, sentence_transformers, tavily)
+# sa importujú až pri vytváraní agenta - import modulu je tak rýchly
+from agent.scratchpad import ScratchpadCompressor
+from agent.session_store import DEFAULT_SESSION_ID, InMemorySessionStore, SessionStore
+from agent.tracing import get_tracer
 
 load_dotenv()
 
+# Režimy načítania nástrojov: "eager" (všetko hneď), "lazy" (pri prvom použití),
+# "background" (proxy hneď, backend sa zahrieva vo vlákne na pozadí)
+TOOL_LOADING_MODES = ("eager", "lazy", "background")
+
 class LegalAssistantAgent:
     """AI Agent pre právne poradenstvo s ReAct pattern"""
     
-    def __init__(self, model: str = "gpt-4o-mini", temperature: float = 0.1):
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        temperature: float = 0.1,
+        llm: Optional[Any] = None,
+        tools: Optional[List] = None,
+        callbacks: Optional[List] = None,
+        verbose: bool = True,
+        tool_loading: Optional[str] = None,
+        scratchpad: Optional[ScratchpadCompressor] = None,
+        compress_scratchpad: bool = True,
+        session_store: Optional[SessionStore] = None,
+        prefetch: Optional[bool] = None
+    ):
         """
         Inicializácia agenta
         
         Args:
             model: OpenAI model na použitie
             temperature: Teplota pre generovanie (nižšia = konzistentnejšie odpovede)
+            llm: Vlastný LLM namiesto ChatOpenAI (napr. lokálny fake model pre záťažové testy)
+            tools: Už vytvorené nástroje (zdieľanie medzi viacerými agentmi)
+            callbacks: LangChain callback handlery pre každé volanie agenta
+            verbose: Výpis ReAct krokov AgentExecutora
+            tool_loading: "eager", "lazy" alebo "background" (predvolene LEGAL_TOOL_LOADING alebo "background")
+            scratchpad: Vlastný kompresor ReAct scratchpadu (rozpočty tokenov)
+            compress_scratchpad: False = pôvodný nekomprimovaný scratchpad
+            session_store: Úložisko histórie konverzácií (predvolene súkromné v pamäti)
+            prefetch: Špekulatívne predvyhľadávanie počas premýšľania LLM (predvolene LEGAL_PREFETCH alebo zapnuté)
         """
         self.model_name = model
         self.temperature = temperature
+        self.callbacks = list(callbacks or [])
+        self.verbose = verbose
+        self.scratchpad = (scratchpad or ScratchpadCompressor()) if compress_scratchpad else None
+        self.tool_loading = (tool_loading or os.getenv("LEGAL_TOOL_LOADING", "background")).lower()
+        if self.tool_loading not in TOOL_LOADING_MODES:
+            raise ValueError(f"Neznámy režim načítania nástrojov: {self.tool_loading}")
         
-        # Skontroluj API kľúč
-        if not os.getenv("OPENAI_API_KEY"):
-            raise ValueError("OPENAI_API_KEY nie je nastavený v .env súbore")
+        # Spany pre LLM volania, ak je zapnuté trasovanie (LEGAL_TRACE_FILE)
+        if get_tracer().enabled:
+            from agent.tracing_callbacks import TracingCallbackHandler
+            self.callbacks.append(TracingCallbackHandler())
         
-        # Inicializuj LLM  
-        self.llm = ChatOpenAI(
-            model=model,
-            temperature=temperature
-        )
+        if llm is not None:
+            self.llm = llm
+        else:
+            # Skontroluj API kľúč
+            if not os.getenv("OPENAI_API_KEY"):
+                raise ValueError("OPENAI_API_KEY nie je nastavený v .env súbore")
+            
+            # Inicializuj LLM  
+            from langchain_openai import ChatOpenAI
+            self.llm = ChatOpenAI(
+                model=model,
+                temperature=temperature
+            )
         
         # Načítaj nástroje
-        self.tools = self._load_tools()
+        self.tools = tools if tools is not None else self._load_tools()
         
-        # Nastav memory pre konverzáciu - používame jednoduchší prístup
-        self.conversation_history = []
+        # Pojmy a sémantické vyhľadávanie sa spúšťajú už pri prijatí otázky
+        if prefetch is None:
+            prefetch = os.getenv("LEGAL_PREFETCH", "1").lower() not in ("0", "false", "no")
+        self.prefetcher = None
+        if prefetch:
+            from agent.prefetch import PrefetchingTool, SpeculativePrefetcher
+            self.tools = PrefetchingTool.wrap(self.tools)
+            self.prefetcher = SpeculativePrefetcher()
+        
+        # História konverzácií je mimo agenta - store podľa session id
+        self.session_store = session_store if session_store is not None else InMemorySessionStore()
         
         # Vytvor agenta
         self.agent_executor = self._create_agent()
     
     def _load_tools(self) -> List:
-        """Načíta všetky nástroje pre agenta"""
+        """Načíta nástroje podľa zvoleného režimu (eager / lazy / background)"""
+        if self.tool_loading == "eager":
+            return self._load_tools_eager()
+        
+        from agent.tools.lazy import LazyTool
+        from agent.tools.search_tools import TavilySearchTool, LegalWikipediaTool
+        from agent.tools.database_tools import LegalTermSearchTool
+        from agent.tools.enhanced_vector_search import EnhancedVectorSearchTool
+        from agent.tools.legal_tools import get_legal_tools
+        
+        # Rovnaké poradie ako pri eager načítaní
+        all_tools = [
+            LazyTool.for_class(TavilySearchTool),
+            LazyTool.for_class(LegalWikipediaTool),
+            LazyTool.for_class(LegalTermSearchTool),
+            LazyTool.for_class(EnhancedVectorSearchTool),
+        ]
+        all_tools.extend(get_legal_tools())
+        
+        if self.tool_loading == "background":
+            for tool in all_tools:
+                if isinstance(tool, LazyTool):
+                    tool.warm_up(background=True)
+            print(f"🔥 Nástroje sa zahrievajú na pozadí ({len(all_tools)})")
+        else:
+            print(f"💤 Nástroje sa načítajú pri prvom použití ({len(all_tools)})")
+        
+        return all_tools
+    
+    @property
+    def tools_ready(self) -> bool:
+        """Či sú backendy všetkých nástrojov vytvorené"""
+        return all(getattr(tool, "is_ready", True) for tool in self.tools)
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Počká na zahriatie nástrojov (pri lenivom režime ich vytvorí hneď)"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for tool in self.tools:
+            if getattr(tool, "is_ready", True):
+                continue
+            if self.tool_loading == "lazy":
+                tool.get_tool()
+                continue
+            while not tool.is_ready:
+                if deadline is not None and time.monotonic() > deadline:
+                    return False
+                time.sleep(0.05)
+        return True
+    
+    def _load_tools_eager(self) -> List:
+        """Načíta a vytvorí všetky nástroje pre agenta hneď"""
+        from agent.tools.search_tools import get_search_tools
+        from agent.tools.database_tools import get_database_tools
+        from agent.tools.legal_tools import get_legal_tools
+        from agent.tools.enhanced_vector_search import get_enhanced_search_tool
+        
         all_tools = []
         
         try:
@@ -88,8 +189,12 @@ class LegalAssistantAgent:
         print(f"🔧 Celkovo načítaných {len(all_tools)} nástrojov")
         return all_tools
     
-    def _create_agent(self) -> AgentExecutor:
+    def _create_agent(self):
         """Vytvor ReAct agenta s prompt template"""
+        from langchain.agents import create_react_agent, AgentExecutor
+        from langchain.agents.output_parsers import ReActSingleInputOutputParser
+        from langchain.prompts import PromptTemplate
+        from langchain_core.runnables import RunnablePassthrough
         
         # Slovenský prompt pre právneho asistenta
         prompt_template = """
@@ -141,59 +246,88 @@ Váš postup:
         )
         
         # Vytvor ReAct agenta
-        agent = create_react_agent(
-            llm=self.llm,
-            tools=self.tools,
-            prompt=prompt
-        )
+        if self.scratchpad is not None:
+            # Rovnaká kompozícia ako create_react_agent, len scratchpad skladá kompresor
+            agent = (
+                RunnablePassthrough.assign(
+                    agent_scratchpad=lambda x: self.scratchpad.format(x["intermediate_steps"])
+                )
+                | prompt
+                | self.llm.bind(stop=["\nObservation"])
+                | ReActSingleInputOutputParser()
+            )
+        else:
+            agent = create_react_agent(
+                llm=self.llm,
+                tools=self.tools,
+                prompt=prompt
+            )
         
         # Vytvor AgentExecutor s lepším error handling
         return AgentExecutor(
             agent=agent,
             tools=self.tools,
-            verbose=True,  # Pre debugging
+            verbose=self.verbose,  # Pre debugging
             max_iterations=10,  # Zvýšený počet iterácií
             handle_parsing_errors="Check your output and make sure it conforms to the expected format! Use the exact text provided by the user as Action Input.",
             return_intermediate_steps=True,
             early_stopping_method="force"  # Opravená hodnota
         )
     
-    def ask(self, question: str) -> Dict[str, Any]:
+    def ask(self, question: str, session_id: str = DEFAULT_SESSION_ID) -> Dict[str, Any]:
         """
         Položi otázku agentovi
         
         Args:
             question: Otázka používateľa
+            session_id: Identifikátor konverzácie v session store
             
         Returns:
             Slovník s odpoveďou a metadátami
         """
+        with get_tracer().span("agent.ask", question_chars=len(question)) as span:
+            result = self._ask(question, session_id)
+            span.update(
+                success=result["success"],
+                answer_chars=len(result["answer"]),
+                steps=len(result.get("intermediate_steps", [])),
+                prompt_tokens_total=sum(i["prompt_tokens"] for i in result.get("iterations", []))
+            )
+            return result
+    
+    def _ask(self, question: str, session_id: str) -> Dict[str, Any]:
+        """Spracuje otázku cez ReAct agenta s fallbackom na priame nástroje"""
         try:
             print(f"\n🤔 Otázka: {question}")
             print("=" * 50)
             
-            # Priprav chat history ako string
-            chat_history = "\n".join([
-                f"Používateľ: {msg['question']}\nAsistent: {msg['answer']}"
-                for msg in self.conversation_history[-3:]  # Posledné 3 výmeny
-            ])
+            # Predpočítaná história (posledné výmeny) zo session store
+            chat_history = self.session_store.history(session_id)
             
-            result = self.agent_executor.invoke({
-                "input": question,
-                "chat_history": chat_history
-            })
+            from agent.tracing_callbacks import IterationStatsCallback
+            iteration_stats = IterationStatsCallback()
+            
+            with self._prefetching(question) as prefetch:
+                result = self.agent_executor.invoke(
+                    {
+                        "input": question,
+                        "chat_history": chat_history
+                    },
+                    config={"callbacks": self.callbacks + [iteration_stats]}
+                )
             
             # Ulož do histórie
-            self.conversation_history.append({
-                "question": question,
-                "answer": result["output"]
-            })
+            self.session_store.append(session_id, question, result["output"])
             
-            return {
+            response = {
                 "answer": result["output"],
                 "intermediate_steps": result.get("intermediate_steps", []),
+                "iterations": iteration_stats.iterations,
                 "success": True
             }
+            if prefetch is not None:
+                response["prefetch"] = prefetch.summary()
+            return response
             
         except Exception as e:
             print(f"❌ Chyba pri ReAct agente: {e}")
@@ -218,6 +352,97 @@ Váš postup:
                     "error": str(e)
                 }
     
+    @contextmanager
+    def _prefetching(self, question: str) -> Iterator[Optional[Any]]:
+        """Predvyhľadávanie pre otázku aktívne počas behu agenta v aktuálnom kontexte"""
+        if self.prefetcher is None:
+            yield None
+            return
+        
+        from agent.prefetch import activate, deactivate
+        session = self.prefetcher.start(question, self.tools)
+        token = activate(session)
+        try:
+            yield session
+        finally:
+            deactivate(token)
+            session.close()
+    
+    def ask_stream(self, question: str, session_id: str = DEFAULT_SESSION_ID) -> Iterator[Dict[str, Any]]:
+        """
+        Položí otázku a priebežne vracia udalosti ReAct cyklu
+        
+        Udalosti: {"type": "action"} pri výbere nástroja, {"type": "observation"} po jeho
+        výsledku, na konci {"type": "answer"} alebo {"type": "error"}.
+        """
+        from agent.tracing_callbacks import IterationStatsCallback
+        iteration_stats = IterationStatsCallback()
+        
+        # Span sa ukončuje ručne - generátor sa môže posúvať z rôznych vlákien
+        span = get_tracer().start_span("agent.ask", question_chars=len(question), streaming=True)
+        answer = None
+        steps = 0
+        # Generátor sa môže posúvať z rôznych vlákien - predvyhľadávanie sa aktivuje pri každom kroku
+        prefetch = self.prefetcher.start(question, self.tools) if self.prefetcher is not None else None
+        finished = False
+        try:
+            try:
+                stream = self.agent_executor.stream(
+                    {
+                        "input": question,
+                        "chat_history": self.session_store.history(session_id)
+                    },
+                    config={"callbacks": self.callbacks + [iteration_stats]}
+                )
+                for chunk in self._iterate_with_prefetch(stream, prefetch):
+                    for action in chunk.get("actions", []):
+                        yield {"type": "action", "tool": action.tool, "tool_input": str(action.tool_input), "log": action.log}
+                    for step in chunk.get("steps", []):
+                        steps += 1
+                        yield {"type": "observation", "tool": step.action.tool, "observation": str(step.observation)}
+                    if "output" in chunk:
+                        answer = chunk["output"]
+            except Exception as e:
+                span.end(e)
+                finished = True
+                yield {"type": "error", "error": str(e)}
+                return
+            finally:
+                if prefetch is not None:
+                    prefetch.close()
+            
+            self.session_store.append(session_id, question, answer or "")
+            span.update(success=True, answer_chars=len(answer or ""), steps=steps)
+            span.end()
+            finished = True
+            event = {"type": "answer", "answer": answer, "iterations": iteration_stats.iterations}
+            if prefetch is not None:
+                event["prefetch"] = prefetch.summary()
+            yield event
+        finally:
+            # Konzument generátor opustil (GeneratorExit nie je Exception) - span sa ukončí aj tak
+            if not finished:
+                span.update(abandoned=True, steps=steps)
+                span.end()
+    
+    @staticmethod
+    def _iterate_with_prefetch(stream: Iterator, prefetch: Optional[Any]) -> Iterator:
+        """Prechádza stream executora s aktívnym predvyhľadávaním počas každého kroku"""
+        if prefetch is None:
+            yield from stream
+            return
+        
+        from agent.prefetch import activate, deactivate
+        while True:
+            token = activate(prefetch)
+            try:
+                chunk = next(stream, None)
+            finally:
+                deactivate(token)
+            if chunk is None:
+                return
+            yield chunk
+    
     def _fallback_response(self, question: str) -> str:
         """
         Fallback riešenie ak ReAct agent zlyháva
@@ -285,14 +510,14 @@ Váš postup:
         odporúčam konzultáciu s kvalifikovaným advokátom.
         """.format(question=question)
 
-    def reset_memory(self):
+    def reset_memory(self, session_id: str = DEFAULT_SESSION_ID):
         """Vynuluje pamäť konverzácie"""
-        self.conversation_history = []
+        self.session_store.reset(session_id)
         print("🔄 Pamäť konverzácie bola vynulovaná")
     
-    def get_conversation_history(self) -> List[Dict]:
-        """Vráti históriu konverzácie"""
-        return self.conversation_history
+    def get_conversation_history(self, session_id: str = DEFAULT_SESSION_ID) -> List[Dict]:
+        """Vráti históriu konverzácie (posledné uložené výmeny)"""
+        return self.session_store.turns(session_id)
     
     def list_available_tools(self) -> List[Dict[str, str]]:
         """Vráti zoznam dostupných nástrojov"""
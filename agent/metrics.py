@@ -0,0 +1,42 @@
+"""
+Pomocné funkcie pre výkonnostné metriky (percentily latencie)
+"""
+
+from typing import Dict, Iterable, List
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """
+    Vypočíta percentil s lineárnou interpoláciou
+
+    Args:
+        values: Namerané hodnoty
+        pct: Percentil v rozsahu 0-100
+
+    Returns:
+        Hodnota percentilu (0.0 pre prázdny vstup)
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+
+    position = (len(ordered) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    fraction = position - lower
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+
+
+def latency_summary(samples_ms: List[float]) -> Dict[str, float]:
+    """Zhrnie latencie v milisekundách do p50/p95/p99 a priemeru"""
+    if not samples_ms:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+    return {
+        "count": len(samples_ms),
+        "mean_ms": round(sum(samples_ms) / len(samples_ms), 3),
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "max_ms": round(max(samples_ms), 3),
+    }
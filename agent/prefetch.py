@@ -0,0 +1,413 @@
+"""
+Špekulatívne predvyhľadávanie (prefetch) počas premýšľania LLM
+
+Hneď keď príde otázka, spustia sa na pozadí vyhľadávania, ktoré agent pravdepodobne
+zavolá: pojmy z otázky v databáze pojmov a sémantické vyhľadávanie pre kľúčové
+slová otázky. Ďalšie preformulovania sa aspoň predkódujú do cache embeddingov.
+Keď agent neskôr zavolá nástroj so zodpovedajúcim vstupom, výsledok sa vezme
+z predvyhľadávania (na ešte bežiacu úlohu sa počká najviac wait_timeout, úloha,
+ktorá ešte čaká vo fronte, sa zruší a nástroj sa zavolá priamo).
+
+Zbytočná práca je ohraničená: max. počet úloh na otázku, max. počet čakajúcich
+úloh v procese a nevyužité úlohy sa po otázke zrušia.
+
+Prostredie:
+- LEGAL_PREFETCH  "1" (predvolené) zapne, "0" vypne predvyhľadávanie v agentovi
+"""
+
+import re
+import time
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.tools import BaseTool
+from pydantic import Field
+
+from agent.tracing import get_tracer
+
+TERM_TOOL = "legal_term_search"
+VECTOR_TOOL = "enhanced_vector_search"
+PREFETCH_TOOLS = (TERM_TOOL, VECTOR_TOOL)
+
+# Slová otázky, ktoré nie sú právne pojmy
+STOPWORDS = {
+    "aké", "aká", "aký", "akú", "ako", "čo", "kto", "kedy", "kde", "prečo", "môžem", "môže", "musím",
+    "mám", "máme", "treba", "robiť", "urobiť", "funguje", "fungujú", "vysvetli", "vysvetlite", "prosím",
+    "podľa", "zákona", "zákon", "zákonníka", "sú", "je", "pre", "pri", "na", "bez", "alebo", "aj",
+    "slovensku", "slovenskej", "republike", "základné", "udania", "mi", "sa", "si",
+}
+TOKEN_PATTERN = re.compile(r"[\w.]+", re.UNICODE)
+
+_active_session: contextvars.ContextVar = contextvars.ContextVar("legal_prefetch_session", default=None)
+
+
+def normalize_input(text: str) -> str:
+    """Kľúč vstupu nástroja nezávislý od veľkosti písmen, poradia slov a interpunkcie"""
+    tokens = {token.strip(".").lower() for token in TOKEN_PATTERN.findall(text or "")}
+    return " ".join(sorted(t for t in tokens if t))
+
+
+def question_keywords(question: str) -> List[str]:
+    """Slová otázky, ktoré môžu byť právnymi pojmami (v poradí výskytu)"""
+    keywords = []
+    for token in TOKEN_PATTERN.findall(question):
+        word = token.strip(".").lower() if token.count(".") < 2 else token.lower()
+        if len(word) >= 4 and word not in STOPWORDS and not word.isdigit() and word not in keywords:
+            keywords.append(word)
+    return keywords
+
+
+def candidate_terms(question: str, limit: int = 6) -> List[str]:
+    """Pojmy pre legal_term_search - dvojice susedných kľúčových slov a samostatné slová"""
+    words = [t.strip("?!,").lower() for t in question.split()]
+    bigrams = [
+        f"{a} {b}" for a, b in zip(words, words[1:])
+        if len(a) >= 4 and len(b) >= 4 and a not in STOPWORDS and b not in STOPWORDS
+    ]
+    candidates = []
+    for candidate in bigrams + question_keywords(question):
+        if candidate not in candidates:
+            candidates.append(candidate)
+    return candidates[:limit]
+
+
+def candidate_queries(question: str) -> List[str]:
+    """Preformulovania otázky pre sémantické vyhľadávanie (od najpravdepodobnejšieho)"""
+    keywords = question_keywords(question)
+    candidates = [" ".join(keywords), question.strip().rstrip("?")]
+    return [c for i, c in enumerate(candidates) if c and c not in candidates[:i]]
+
+
+class CachedEmbeddingFunction:
+    """LRU cache embeddingov pred skutočnou embedding funkciou"""
+
+    def __init__(self, base, max_entries: int = 512):
+        self.base = base
+        self.max_entries = max_entries
+        self.name = getattr(base, "name", "cached")
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, input):
+        texts = [input] if isinstance(input, str) else list(input)
+        results: List[Optional[List[float]]] = []
+        missing = []
+        with self._lock:
+            for text in texts:
+                vector = self._cache.get(text)
+                if vector is not None:
+                    self._cache.move_to_end(text)
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    missing.append(text)
+                results.append(vector)
+
+        if missing:
+            encoded = dict(zip(missing, self.base(missing)))
+            with self._lock:
+                for text, vector in encoded.items():
+                    self._cache[text] = vector
+                    if len(self._cache) > self.max_entries:
+                        self._cache.popitem(last=False)
+            results = [vector if vector is not None else encoded[text] for text, vector in zip(texts, results)]
+        return results
+
+    def __getattr__(self, name):
+        # Ostatné atribúty (model, model_name...) z pôvodnej funkcie
+        return getattr(self.base, name)
+
+
+class _Job:
+    """Jedna špekulatívna úloha"""
+
+    __slots__ = ("kind", "key", "future", "submitted", "started", "finished", "used")
+
+    def __init__(self, kind: str, key: str):
+        self.kind = kind
+        self.key = key
+        self.future: Optional[Future] = None
+        self.submitted = time.perf_counter()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.used = False
+
+    def run(self, func, *args):
+        self.started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.finished = time.perf_counter()
+
+
+class PrefetchSession:
+    """Predvyhľadávania pre jednu otázku"""
+
+    def __init__(self, prefetcher: "SpeculativePrefetcher", question: str):
+        self.prefetcher = prefetcher
+        self.question = question
+        self.jobs: Dict[Tuple[str, str], _Job] = {}
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self._lock = threading.Lock()
+
+    def _take(self, kind: str, key: str) -> Tuple[Optional[Any], bool]:
+        """Výsledok úlohy (počká ohraničený čas, ak ešte beží) - (výsledok, zásah)"""
+        job = self.jobs.get((kind, key))
+        if job is None or job.future is None or job.future.cancelled():
+            return None, False
+
+        # Úloha ešte čaká vo fronte za predvyhľadávaniami iných otázok - priame volanie je rýchlejšie
+        if job.future.cancel():
+            return None, False
+
+        requested = time.perf_counter()
+        try:
+            result = job.future.result(timeout=self.prefetcher.wait_timeout)
+        except Exception:
+            # Aj vypršaný čas čakania - volajúci zavolá nástroj priamo
+            return None, False
+
+        # Ušetrený čas = práca vykonaná pred tým, ako si ju agent vyžiadal
+        if job.started is not None:
+            saved = (min(job.finished, requested) - job.started) * 1000
+            with self._lock:
+                self.saved_ms += max(0.0, saved)
+        job.used = True
+        return result, True
+
+    def _record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def serve(self, tool_name: str, tool_input: str, tool: BaseTool) -> str:
+        """Odpoveď nástroja s využitím predvyhľadaných výsledkov"""
+        if tool_name == TERM_TOOL:
+            # Po pojmoch - zasiahnuté pojmy z predvyhľadávania, zvyšok z databázy
+            terms = tool._split_terms(tool_input)[:5]
+            if not terms or not any(terms):
+                return tool._run(tool_input)
+            try:
+                all_results = []
+                for term in terms:
+                    rows, hit = self._take("term", normalize_input(term))
+                    self._record(hit)
+                    if not hit:
+                        rows = tool.search_terms([term])
+                    all_results.extend(rows)
+                return tool.format_results(terms, all_results)
+            except Exception:
+                # Chyby databázy ohlási nástroj rovnako ako bez predvyhľadávania
+                return tool._run(tool_input)
+
+        output, hit = self._take("vector", normalize_input(tool_input))
+        self._record(hit)
+        return output if hit else tool._run(tool_input)
+
+    def close(self):
+        """Zruší nespustené úlohy a započíta nevyužitú prácu"""
+        wasted = 0
+        wasted_ms = 0.0
+        cancelled = 0
+        for job in self.jobs.values():
+            if job.used or job.future is None:
+                continue
+            if job.future.cancel():
+                cancelled += 1
+                continue
+            wasted += 1
+            if job.started is not None:
+                wasted_ms += ((job.finished or time.perf_counter()) - job.started) * 1000
+        self.prefetcher._account(self, wasted, wasted_ms, cancelled)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "jobs": len(self.jobs),
+            "hits": self.hits,
+            "misses": self.misses,
+            "saved_ms": round(self.saved_ms, 1),
+        }
+
+
+class SpeculativePrefetcher:
+    """Spúšťa a eviduje špekulatívne vyhľadávania pre otázky"""
+
+    def __init__(self, max_workers: int = 2, max_jobs_per_question: int = 6,
+                 max_pending: int = 16, encode_reformulations: bool = True, wait_timeout: float = 5.0):
+        """
+        Args:
+            max_workers: Počet vlákien pre predvyhľadávanie
+            max_jobs_per_question: Max. počet úloh na otázku (pojmy + sémantické dotazy)
+            max_pending: Pri väčšom počte čakajúcich úloh sa nové nespúšťajú
+            encode_reformulations: Predkódovať ďalšie preformulovania do cache embeddingov
+            wait_timeout: Max. čakanie v sekundách na bežiacu úlohu, potom priame volanie nástroja
+        """
+        self.max_jobs_per_question = max_jobs_per_question
+        self.wait_timeout = wait_timeout
+        self.max_pending = max_pending
+        self.encode_reformulations = encode_reformulations
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.embedding_cache: Optional[CachedEmbeddingFunction] = None
+        self._stats = {"questions": 0, "jobs": 0, "skipped": 0, "hits": 0, "misses": 0,
+                       "saved_ms": 0.0, "wasted": 0, "wasted_ms": 0.0, "cancelled": 0}
+
+    def _submit(self, session: PrefetchSession, kind: str, key: str, func, *args) -> bool:
+        with self._lock:
+            if self._pending >= self.max_pending or len(session.jobs) >= self.max_jobs_per_question:
+                self._stats["skipped"] += 1
+                return False
+            self._pending += 1
+            self._stats["jobs"] += 1
+
+        job = _Job(kind, key)
+        session.jobs[(kind, key)] = job
+        job.future = self._executor.submit(job.run, func, *args)
+        job.future.add_done_callback(self._done)
+        return True
+
+    def _done(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def start(self, question: str, tools: List[BaseTool]) -> PrefetchSession:
+        """Spustí predvyhľadávania pre otázku"""
+        session = PrefetchSession(self, question)
+        with self._lock:
+            self._stats["questions"] += 1
+
+        # Nenačítané nástroje sa kvôli predvyhľadávaniu nevytvárajú
+        by_name = {tool.name: resolve_tool(tool) for tool in tools if getattr(tool, "is_ready", True)}
+        term_tool = by_name.get(TERM_TOOL)
+        vector_tool = by_name.get(VECTOR_TOOL)
+
+        # Sémantický dotaz z kľúčových slov - najdrahší, spúšťa sa prvý
+        queries = candidate_queries(question)
+        if vector_tool is not None and getattr(vector_tool, "collection", None) and queries:
+            self._submit(session, "vector", normalize_input(queries[0]), vector_tool._run, queries[0])
+
+        if term_tool is not None:
+            for term in candidate_terms(question):
+                self._submit(session, "term", normalize_input(term), term_tool.search_terms, [term])
+
+        # Ďalšie preformulovania len predkódovať (lacné, zrýchli prípadný rovnaký dotaz agenta)
+        embedding_function = install_embedding_cache(vector_tool) if vector_tool is not None else None
+        if embedding_function is not None:
+            self.embedding_cache = embedding_function
+        if self.encode_reformulations and isinstance(embedding_function, CachedEmbeddingFunction) and len(queries) > 1:
+            self._submit(session, "embedding", normalize_input(" | ".join(queries[1:])), embedding_function, queries[1:])
+
+        return session
+
+    def _account(self, session: PrefetchSession, wasted: int, wasted_ms: float, cancelled: int):
+        with self._lock:
+            self._stats["hits"] += session.hits
+            self._stats["misses"] += session.misses
+            self._stats["saved_ms"] += session.saved_ms
+            self._stats["wasted"] += wasted
+            self._stats["wasted_ms"] += wasted_ms
+            self._stats["cancelled"] += cancelled
+
+    def stats(self) -> Dict[str, Any]:
+        """Súhrnné štatistiky (hit rate, ušetrený a zbytočný čas)"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else None
+        stats["saved_ms"] = round(stats["saved_ms"], 1)
+        stats["wasted_ms"] = round(stats["wasted_ms"], 1)
+        if self.embedding_cache is not None:
+            stats["embedding_cache"] = {"hits": self.embedding_cache.hits, "misses": self.embedding_cache.misses}
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def resolve_tool(tool: BaseTool) -> BaseTool:
+    """Skutočný nástroj za proxy (PrefetchingTool, LazyTool)"""
+    if isinstance(tool, PrefetchingTool):
+        tool = tool.target
+    if hasattr(tool, "get_tool"):
+        tool = tool.get_tool() or tool
+    return tool
+
+
+def install_embedding_cache(tool: BaseTool) -> Optional[CachedEmbeddingFunction]:
+    """Nahradí embedding funkciu nástroja verziou s LRU cache (raz)"""
+    embedding_function = getattr(tool, "embedding_function", None)
+    if embedding_function is None:
+        return None
+    if not isinstance(embedding_function, CachedEmbeddingFunction):
+        embedding_function = tool.embedding_function = CachedEmbeddingFunction(embedding_function)
+    return embedding_function
+
+
+def activate(session: Optional[PrefetchSession]):
+    """Nastaví predvyhľadávanie pre aktuálny kontext, vráti token pre deactivate"""
+    return _active_session.set(session)
+
+
+def deactivate(token):
+    _active_session.reset(token)
+
+
+class PrefetchingTool(BaseTool):
+    """Proxy nástroja, ktorý najprv skúsi výsledok z predvyhľadávania otázky"""
+
+    name: str = "prefetching_tool"
+    description: str = ""
+
+    # Pydantic fields
+    target: Optional[Any] = Field(default=None, exclude=True)
+
+    def __init__(self, target: BaseTool, **kwargs):
+        super().__init__(name=target.name, description=target.description, target=target, **kwargs)
+
+    @classmethod
+    def wrap(cls, tools: List[BaseTool]) -> List[BaseTool]:
+        """Obalí nástroje, pre ktoré má predvyhľadávanie zmysel (opakované volanie je bezpečné)"""
+        return [
+            cls(tool) if tool.name in PREFETCH_TOOLS and not isinstance(tool, PrefetchingTool) else tool
+            for tool in tools
+        ]
+
+    @property
+    def is_ready(self) -> bool:
+        return getattr(self.target, "is_ready", True)
+
+    def get_tool(self) -> Optional[BaseTool]:
+        return resolve_tool(self.target)
+
+    def _real_tool(self) -> Optional[BaseTool]:
+        tool = resolve_tool(self.target)
+        # Cache embeddingov pre predkódované preformulovania
+        install_embedding_cache(tool)
+        return tool
+
+    def _run(self, query: str) -> str:
+        session = _active_session.get()
+        tool = self._real_tool()
+        # Bez aktívnej otázky alebo s nenačítaným backendom bežné volanie
+        if session is None or tool is None or hasattr(tool, "get_tool"):
+            return self.target._run(query)
+
+        with get_tracer().span(f"tool.{self.name}", input_chars=len(query), prefetch=True) as span:
+            hits = session.hits
+            output = session.serve(self.name, query, tool)
+            span.update(output_chars=len(output), prefetch_hit=session.hits > hits)
+            return output
+
+    async def _arun(self, query: str) -> str:
+        """Async verzia"""
+        return self._run(query)
@@ -0,0 +1,123 @@
+"""
+Kompresia ReAct scratchpadu v tokenovom rozpočte
+
+AgentExecutor pri každej iterácii vloží do promptu všetky predchádzajúce kroky
+(Thought/Action/Observation), takže každé ďalšie volanie LLM je drahšie.
+ScratchpadCompressor skladá scratchpad tak, aby:
+- výsledky (bloky pozorovania), ktoré sa už v behu objavili, neboli zopakované
+- každé pozorovanie sa zmestilo do rozpočtu `step_tokens`
+- staršie kroky (okrem posledných `keep_recent`) boli zhrnuté na pár riadkov
+
+Pôvodné pozorovania v `intermediate_steps` ostávajú nezmenené, mení sa len prompt.
+"""
+
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from agent.tracing import estimate_tokens
+
+# Blok pozorovania = jeden výsledok nástroja (oddelené prázdnym riadkom)
+BLOCK_SEPARATOR = re.compile(r"\n\s*\n")
+# Riadky, ktoré nesú identifikáciu výsledku a zostanú aj v zhrnutí
+KEY_LINE_PATTERN = re.compile(r"^\s*(\*\*|Zákon:|📖|📚|🔍|\d+\.|§)")
+
+
+def _normalize(block: str) -> str:
+    return " ".join(block.lower().split())
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Oreže text na rozpočet tokenov (na hranici slova)"""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > max_chars // 2 else max_chars].rstrip() + "..."
+
+
+class ScratchpadCompressor:
+    """Formátuje intermediate_steps do scratchpadu s deduplikáciou a rozpočtom"""
+
+    def __init__(self, step_tokens: int = 400, keep_recent: int = 2, summary_tokens: int = 60):
+        """
+        Args:
+            step_tokens: Maximálny počet tokenov jedného pozorovania v prompte
+            keep_recent: Počet posledných krokov, ktoré sa nezhŕňajú
+            summary_tokens: Rozpočet zhrnutia staršieho pozorovania
+        """
+        self.step_tokens = step_tokens
+        self.keep_recent = keep_recent
+        self.summary_tokens = summary_tokens
+
+    def _dedupe(self, observation: str, seen: set) -> Tuple[List[str], int]:
+        """Vráti bloky pozorovania, ktoré sa v behu ešte neobjavili"""
+        blocks = []
+        duplicates = 0
+        for block in BLOCK_SEPARATOR.split(observation.strip()):
+            if not block.strip():
+                continue
+            key = _normalize(block)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            blocks.append(block.strip())
+        return blocks, duplicates
+
+    def _fit(self, blocks: List[str], max_tokens: int) -> Tuple[str, int]:
+        """Poskladá bloky do rozpočtu, prvý blok sa v prípade potreby oreže"""
+        output: List[str] = []
+        used = 0
+        for block in blocks:
+            cost = estimate_tokens(block) + 1
+            if used + cost > max_tokens:
+                if not output:
+                    output.append(_truncate(block, max_tokens))
+                break
+            output.append(block)
+            used += cost
+        return "\n\n".join(output), len(blocks) - len(output)
+
+    def _summarize(self, blocks: List[str]) -> str:
+        """Extraktívne zhrnutie staršieho pozorovania - len identifikačné riadky výsledkov"""
+        lines = []
+        for block in blocks:
+            block_lines = block.splitlines()
+            key_lines = [line.strip() for line in block_lines if KEY_LINE_PATTERN.match(line)]
+            lines.extend(key_lines[:2] or block_lines[:1])
+        summary = "; ".join(line for line in lines if line)
+        return _truncate(summary, self.summary_tokens)
+
+    def compress_observation(self, observation: str, seen: set, summarize: bool = False) -> str:
+        """Skomprimuje jedno pozorovanie (seen sa priebežne dopĺňa)"""
+        blocks, duplicates = self._dedupe(str(observation), seen)
+
+        if summarize:
+            text = f"[zhrnutie] {self._summarize(blocks)}" if blocks else ""
+        else:
+            text, omitted = self._fit(blocks, self.step_tokens)
+            if omitted:
+                text += f"\n[{omitted} ďalších výsledkov vynechaných pre rozpočet]"
+
+        if duplicates:
+            text += f"{chr(10) if text else ''}[{duplicates} výsledkov už uvedených v predchádzajúcich krokoch]"
+        return text
+
+    def format(self, intermediate_steps: Sequence[Tuple[object, str]],
+               observation_prefix: str = "Observation: ", llm_prefix: str = "Thought: ") -> str:
+        """Náhrada format_log_to_str z LangChain s kompresiou pozorovaní"""
+        seen: set = set()
+        summarize_until = len(intermediate_steps) - self.keep_recent
+        thoughts = ""
+        for index, (action, observation) in enumerate(intermediate_steps):
+            compressed = self.compress_observation(observation, seen, summarize=index < summarize_until)
+            thoughts += getattr(action, "log", "")
+            thoughts += f"\n{observation_prefix}{compressed}\n{llm_prefix}"
+        return thoughts
+
+
+def scratchpad_tokens(prompt: str, marker: Optional[str] = "Váš postup:") -> int:
+    """Odhad tokenov scratchpadu v hotovom prompte (text za značkou z prompt template)"""
+    if not marker or marker not in prompt:
+        return 0
+    return estimate_tokens(prompt.split(marker, 1)[1])
@@ -0,0 +1,224 @@
+"""
+Úložisko histórie konverzácie podľa session id
+
+Agent si históriu nedrží v sebe - pri každej otázke si vyžiada predpočítaný
+reťazec histórie zo store a po odpovedi doň zapíše novú výmenu. Store drží
+len posledných `max_turns` výmen (kruhový buffer), viac prompt aj tak nepoužije.
+
+- InMemorySessionStore: LRU v pamäti procesu (predvolené)
+- SQLiteSessionStore: perzistentné, zdieľateľné medzi procesmi a reštartmi
+
+Výber cez prostredie (get_session_store):
+- LEGAL_SESSION_STORE  "memory" (predvolené) alebo "sqlite"
+- LEGAL_SESSION_DB     cesta k SQLite súboru (predvolene data/sessions.db)
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+DEFAULT_MAX_TURNS = 3
+DEFAULT_SESSION_ID = "default"
+DEFAULT_SESSION_DB = "data/sessions.db"
+
+
+def format_history(turns: List[Dict[str, str]]) -> str:
+    """Reťazec histórie v tvare, ktorý očakáva prompt agenta"""
+    return "\n".join(
+        f"Používateľ: {turn['question']}\nAsistent: {turn['answer']}"
+        for turn in turns
+    )
+
+
+class SessionStore(ABC):
+    """Spoločné rozhranie úložísk histórie"""
+
+    max_turns: int = DEFAULT_MAX_TURNS
+
+    @abstractmethod
+    def history(self, session_id: str) -> str:
+        """Predpočítaný reťazec histórie pre prompt (prázdny pre novú session)"""
+
+    @abstractmethod
+    def turns(self, session_id: str) -> List[Dict[str, str]]:
+        """Uložené výmeny session (najstaršia prvá)"""
+
+    @abstractmethod
+    def append(self, session_id: str, question: str, answer: str):
+        """Pridá výmenu, najstaršia nad limit max_turns sa zahodí"""
+
+    @abstractmethod
+    def reset(self, session_id: str):
+        """Vymaže históriu session"""
+
+
+class _Session:
+    """Kruhový buffer výmen jednej session s predpočítanou históriou"""
+
+    __slots__ = ("turns", "history")
+
+    def __init__(self, max_turns: int):
+        self.turns = deque(maxlen=max_turns)
+        self.history = ""
+
+
+class InMemorySessionStore(SessionStore):
+    """História v pamäti procesu, najdlhšie nepoužité sessions sa vyraďujú (LRU)"""
+
+    def __init__(self, max_sessions: int = 1000, max_turns: int = DEFAULT_MAX_TURNS):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def history(self, session_id: str) -> str:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return ""
+            self._sessions.move_to_end(session_id)
+            return session.history
+
+    def turns(self, session_id: str) -> List[Dict[str, str]]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return list(session.turns) if session else []
+
+    def append(self, session_id: str, question: str, answer: str):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session(self.max_turns)
+                if len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+            session.turns.append({"question": question, "answer": answer})
+            session.history = format_history(list(session.turns))
+
+    def reset(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Perzistentná história v SQLite
+
+    Výmeny sú v tabuľke session_turns (najviac max_turns na session), predpočítaný
+    reťazec histórie v session_history - čítanie pri otázke je jeden SELECT podľa kľúča.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_SESSION_DB, max_turns: int = DEFAULT_MAX_TURNS,
+                 max_age_days: Optional[float] = 30):
+        self.db_path = db_path
+        self.max_turns = max_turns
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS session_turns (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    question TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS session_history (
+                    session_id TEXT PRIMARY KEY,
+                    history TEXT NOT NULL,
+                    last_seq INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_session_history_updated ON session_history(updated_at)")
+
+    def history(self, session_id: str) -> str:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT history FROM session_history WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else ""
+
+    def turns(self, session_id: str) -> List[Dict[str, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question, answer FROM session_turns WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        return [{"question": question, "answer": answer} for question, answer in rows]
+
+    def append(self, session_id: str, question: str, answer: str):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT last_seq FROM session_history WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            seq = (row[0] if row else 0) + 1
+
+            self._conn.execute(
+                "INSERT INTO session_turns (session_id, seq, question, answer, created_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, seq, question, answer, now)
+            )
+            # Kruhový buffer - staršie výmeny ako max_turns sa zmažú
+            self._conn.execute(
+                "DELETE FROM session_turns WHERE session_id = ? AND seq <= ?", (session_id, seq - self.max_turns)
+            )
+            rows = self._conn.execute(
+                "SELECT question, answer FROM session_turns WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+            history = format_history([{"question": q, "answer": a} for q, a in rows])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO session_history (session_id, history, last_seq, updated_at) VALUES (?, ?, ?, ?)",
+                (session_id, history, seq, now)
+            )
+
+    def reset(self, session_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM session_turns WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM session_history WHERE session_id = ?", (session_id,))
+
+    def prune(self) -> int:
+        """Zmaže sessions neaktívne dlhšie ako max_age_days, vráti ich počet"""
+        if not self.max_age_days:
+            return 0
+        cutoff = time.time() - self.max_age_days * 86400
+        with self._lock, self._conn:
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT session_id FROM session_history WHERE updated_at < ?", (cutoff,)
+            )]
+            self._conn.executemany("DELETE FROM session_turns WHERE session_id = ?", [(s,) for s in expired])
+            self._conn.executemany("DELETE FROM session_history WHERE session_id = ?", [(s,) for s in expired])
+        return len(expired)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_session_store(kind: Optional[str] = None, **kwargs) -> SessionStore:
+    """Vytvorí store podľa parametra alebo LEGAL_SESSION_STORE"""
+    kind = (kind or os.getenv("LEGAL_SESSION_STORE", "memory")).lower()
+    if kind == "sqlite":
+        return SQLiteSessionStore(db_path=kwargs.pop("db_path", os.getenv("LEGAL_SESSION_DB", DEFAULT_SESSION_DB)), **kwargs)
+    if kind == "memory":
+        return InMemorySessionStore(**kwargs)
+    raise ValueError(f"Neznámy typ session store: {kind}")
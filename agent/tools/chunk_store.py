@@ -0,0 +1,275 @@
+"""
+Kompaktné úložisko textov a metadát chunkov mapované do pamäte (mmap)
+
+Jeden súbor zapísaný pri načítaní zákonov (LegalTextLoader), z ktorého ľubovoľný
+nástroj prečíta text chunku podľa id bez prechodu cez ChromaDB:
+
+    hlavička   magic "LCHS", verzia, počet chunkov, počet zákonov, šírky stĺpcov, offsety sekcií
+    zákony     JSON zoznam [law_id, názov] (index = law_index)
+    stĺpce     pevnej šírky, zoradené podľa id (binárne vyhľadávanie priamo v mmap):
+               id (ID_WIDTH B), text_offset (u64), text_bytes (u32), text_chars (u32),
+               law_index (u16), paragraph (PARAGRAPH_WIDTH B), chunk_num (CHUNK_NUM_WIDTH B),
+               paragraphs_offset (u64), paragraphs_bytes (u32)
+    texty      UTF-8 blob textov chunkov
+    paragrafy  UTF-8 blob zoznamov paragrafov ("§ 200, § 201")
+
+Text sa dá získať ako memoryview nad mmap (bez kópie) alebo ako str. Stránky súboru
+zdieľajú všetky procesy cez page cache, v RSS procesu sú len prečítané stránky.
+
+Prostredie:
+- LEGAL_CHUNK_STORE  cesta k súboru (predvolene data/chunk_store.bin), "0" vypne
+"""
+
+import os
+import json
+import mmap
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_CHUNK_STORE_PATH = "data/chunk_store.bin"
+MAGIC = b"LCHS"
+FORMAT_VERSION = 1
+
+ID_WIDTH = 112
+PARAGRAPH_WIDTH = 32
+CHUNK_NUM_WIDTH = 16
+
+# magic, verzia, počet, zákony, šírky (id, paragraf, chunk_num), offsety sekcií (zákony, stĺpce, texty, paragrafy), veľkosť zákonov
+HEADER = struct.Struct("<4sIIIHHHQQQQI")
+# (názov stĺpca, formát jednej hodnoty)
+COLUMNS = (
+    ("id", f"{ID_WIDTH}s"),
+    ("text_offset", "Q"),
+    ("text_bytes", "I"),
+    ("text_chars", "I"),
+    ("law_index", "H"),
+    ("paragraph", f"{PARAGRAPH_WIDTH}s"),
+    ("chunk_num", f"{CHUNK_NUM_WIDTH}s"),
+    ("paragraphs_offset", "Q"),
+    ("paragraphs_bytes", "I"),
+)
+
+
+def _fixed(value: Any, width: int) -> bytes:
+    """Hodnota ako UTF-8 pevnej šírky (orezaná na celé znaky)"""
+    data = str(value or "").encode("utf-8")
+    if len(data) > width:
+        data = data[:width].decode("utf-8", errors="ignore").encode("utf-8")
+    return data
+
+
+def _column_layout(count: int) -> Dict[str, tuple]:
+    """Začiatok (relatívne k sekcii stĺpcov) a Struct každého stĺpca"""
+    layout = {}
+    position = 0
+    for name, fmt in COLUMNS:
+        item = struct.Struct("<" + fmt)
+        layout[name] = (position, item)
+        position += item.size * count
+    layout["_size"] = (position, None)
+    return layout
+
+
+def write_chunk_store(path: Path, chunks: Iterable[Dict[str, Any]], laws: Optional[Dict[str, str]] = None) -> int:
+    """
+    Zapíše úložisko chunkov (atomicky - cez dočasný súbor)
+
+    Texty sa počas zápisu priebežne ukladajú do dočasného blobu, v pamäti zostávajú
+    len metadáta pevnej šírky.
+
+    Args:
+        path: Cieľový súbor
+        chunks: {"id", "text", "metadata": {law_id, title, paragraph, paragraphs, chunk_num}}
+        laws: Voliteľne law_id -> názov (inak z metadát chunkov)
+
+    Returns:
+        Počet zapísaných chunkov
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    laws = dict(laws or {})
+    law_index: Dict[str, int] = {law_id: i for i, law_id in enumerate(laws)}
+    rows = {}
+
+    with tempfile.TemporaryFile() as text_blob, tempfile.TemporaryFile() as paragraphs_blob:
+        text_position = paragraphs_position = 0
+        for chunk in chunks:
+            metadata = chunk.get("metadata") or {}
+            law_id = metadata.get("law_id", "")
+            if law_id not in law_index:
+                law_index[law_id] = len(law_index)
+                laws.setdefault(law_id, metadata.get("title", ""))
+
+            chunk_id = _fixed(chunk["id"], ID_WIDTH)
+            if len(chunk_id) != len(str(chunk["id"]).encode("utf-8")):
+                raise ValueError(f"Id chunku je dlhšie ako {ID_WIDTH} B: {chunk['id']}")
+
+            text = chunk["text"].encode("utf-8")
+            paragraphs = str(metadata.get("paragraphs", "")).encode("utf-8")
+            text_blob.write(text)
+            paragraphs_blob.write(paragraphs)
+            # Duplicitné id - platí posledný zápis (ako upsert v ChromaDB)
+            rows[chunk_id] = (
+                chunk_id, text_position, len(text), len(chunk["text"]), law_index[law_id],
+                _fixed(metadata.get("paragraph", ""), PARAGRAPH_WIDTH),
+                _fixed(metadata.get("chunk_num", ""), CHUNK_NUM_WIDTH),
+                paragraphs_position, len(paragraphs),
+            )
+            text_position += len(text)
+            paragraphs_position += len(paragraphs)
+
+        if len(law_index) > 0xFFFF:
+            raise ValueError("Príliš veľa zákonov pre u16 law_index")
+
+        ordered = [rows[key] for key in sorted(rows)]
+        count = len(ordered)
+        laws_json = json.dumps([[law_id, laws.get(law_id, "")] for law_id in law_index], ensure_ascii=False).encode("utf-8")
+        layout = _column_layout(count)
+
+        laws_offset = HEADER.size
+        columns_offset = laws_offset + len(laws_json)
+        texts_offset = columns_offset + layout["_size"][0]
+        paragraphs_offset = texts_offset + text_position
+
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(HEADER.pack(MAGIC, FORMAT_VERSION, count, len(law_index), ID_WIDTH, PARAGRAPH_WIDTH,
+                                      CHUNK_NUM_WIDTH, laws_offset, columns_offset, texts_offset,
+                                      paragraphs_offset, len(laws_json)))
+                out.write(laws_json)
+                for column, (name, _fmt) in enumerate(COLUMNS):
+                    item = layout[name][1]
+                    out.write(b"".join(item.pack(row[column]) for row in ordered))
+                for blob in (text_blob, paragraphs_blob):
+                    blob.seek(0)
+                    while True:
+                        block = blob.read(1 << 20)
+                        if not block:
+                            break
+                        out.write(block)
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+    return count
+
+
+class ChunkStore:
+    """Čítanie úložiska chunkov cez mmap (bezpečné pre viac vlákien - len čítanie)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        (magic, version, self.count, law_count, id_width, paragraph_width, chunk_num_width,
+         laws_offset, self._columns_offset, self._texts_offset, self._paragraphs_offset,
+         laws_bytes) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{self.path} nie je úložisko chunkov verzie {FORMAT_VERSION}")
+        if (id_width, paragraph_width, chunk_num_width) != (ID_WIDTH, PARAGRAPH_WIDTH, CHUNK_NUM_WIDTH):
+            raise ValueError(f"{self.path} má iné šírky stĺpcov")
+
+        self.laws: List[List[str]] = json.loads(bytes(self._view[laws_offset:laws_offset + laws_bytes]).decode("utf-8"))
+        self._layout = _column_layout(self.count)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def _value(self, name: str, row: int):
+        start, item = self._layout[name]
+        return item.unpack_from(self._mmap, self._columns_offset + start + row * item.size)[0]
+
+    def _id_at(self, row: int) -> bytes:
+        start = self._columns_offset + self._layout["id"][0] + row * ID_WIDTH
+        return self._mmap[start:start + ID_WIDTH].rstrip(b"\0")
+
+    def ids(self) -> List[str]:
+        """Všetky id chunkov (zoradené)"""
+        return [self._id_at(row).decode("utf-8") for row in range(self.count)]
+
+    def row_of(self, chunk_id: str) -> Optional[int]:
+        """Riadok chunku (binárne vyhľadávanie v stĺpci id) alebo None"""
+        key = chunk_id.encode("utf-8")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._id_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.count and self._id_at(low) == key else None
+
+    def text_view(self, chunk_id: str) -> Optional[memoryview]:
+        """UTF-8 text chunku ako memoryview nad mmap (bez kópie)"""
+        row = self.row_of(chunk_id)
+        if row is None:
+            return None
+        start = self._texts_offset + self._value("text_offset", row)
+        return self._view[start:start + self._value("text_bytes", row)]
+
+    def text(self, chunk_id: str) -> Optional[str]:
+        view = self.text_view(chunk_id)
+        return str(view, "utf-8") if view is not None else None
+
+    def text_at(self, row: int) -> str:
+        """Text chunku podľa riadku (poradie ids())"""
+        start = self._texts_offset + self._value("text_offset", row)
+        return str(self._view[start:start + self._value("text_bytes", row)], "utf-8")
+
+    def law_id_at(self, row: int) -> str:
+        return self.laws[self._value("law_index", row)][0]
+
+    def paragraph_at(self, row: int) -> str:
+        return self._value("paragraph", row).rstrip(b"\0").decode("utf-8")
+
+    def _metadata(self, row: int) -> Dict[str, Any]:
+        law_id, title = self.laws[self._value("law_index", row)]
+        start = self._paragraphs_offset + self._value("paragraphs_offset", row)
+        paragraph = self.paragraph_at(row)
+        return {
+            "law_id": law_id,
+            "title": title,
+            "paragraph": paragraph,
+            "paragraphs": str(self._view[start:start + self._value("paragraphs_bytes", row)], "utf-8") or paragraph,
+            "chunk_num": self._value("chunk_num", row).rstrip(b"\0").decode("utf-8"),
+            "text_length": self._value("text_chars", row),
+        }
+
+    def get(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        """Text a metadáta chunku podľa id"""
+        row = self.row_of(chunk_id)
+        if row is None:
+            return None
+        return {
+            "id": chunk_id,
+            "text": self.text_at(row),
+            "metadata": self._metadata(row),
+        }
+
+    def get_many(self, ids: List[str]) -> Dict[str, List]:
+        """Rovnaký tvar ako collection.get (ids, documents, metadatas) v poradí ids; chýbajúce sa vynechajú"""
+        found = [item for item in (self.get(chunk_id) for chunk_id in ids) if item is not None]
+        return {
+            "ids": [item["id"] for item in found],
+            "documents": [item["text"] for item in found],
+            "metadatas": [item["metadata"] for item in found],
+        }
+
+
+def load_configured_store() -> Optional[ChunkStore]:
+    """Úložisko podľa LEGAL_CHUNK_STORE (None, ak je vypnuté alebo neexistuje)"""
+    path = os.getenv("LEGAL_CHUNK_STORE", DEFAULT_CHUNK_STORE_PATH)
+    if path.lower() in ("0", "false", "no", "") or not Path(path).exists():
+        return None
+    return ChunkStore(Path(path))
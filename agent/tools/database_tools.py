@@ -2,7 +2,7 @@
 Databázové nástroje - SQLite a Vector DB s právnymi pojmami
 """
 
-from typing import List, Dict, Any, Optional, Type
+from typing import List, Dict, Any, Optional, Tuple, Type
 from langchain.tools import BaseTool
 from pydantic import Field
 import sqlite3
@@ -10,12 +10,7 @@ import os
 import json
 import re
 
-# Fallback pre ChromaDB ak nie je dostupné
-try:
-    import chromadb
-    CHROMADB_AVAILABLE = True
-except ImportError:
-    CHROMADB_AVAILABLE = False
+from agent.tracing import get_tracer
 
 
 class LegalTermSearchTool(BaseTool):
@@ -42,78 +37,110 @@ class LegalTermSearchTool(BaseTool):
     def __init__(self, db_path: str = "data/legal_terms.db", **kwargs):
         super().__init__(db_path=db_path, **kwargs)
     
-    def _run(self, query: str) -> str:
-        """Vyhľadaj právne pojmy"""
-        try:
-            # Agent môže poslať viacero pojmov oddelených čiarkami alebo slovami "a", "aj"
-            search_terms = []
-            
-            # Rozdeľ na čiarky alebo spojky
-            if ',' in query:
-                search_terms = [term.strip() for term in query.split(',') if term.strip()]
-            elif ' a ' in query or ' aj ' in query:
-                # Nahraď spojky čiarkami a rozdeľ
-                temp_query = query.replace(' a ', ', ').replace(' aj ', ', ')
-                search_terms = [term.strip() for term in temp_query.split(',') if term.strip()]
-            else:
-                # Jeden pojem
-                search_terms = [query.strip()]
-            
-            if not search_terms or not any(search_terms):
-                return "Nebol zadaný žiadny pojem na vyhľadanie."
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            all_results = []
+    def _split_terms(self, query: str) -> List[str]:
+        """Rozdelí vstup agenta na jednotlivé pojmy"""
+        # Agent môže poslať viacero pojmov oddelených čiarkami alebo slovami "a", "aj"
+        search_terms = []
+        
+        # Rozdeľ na čiarky alebo spojky
+        if ',' in query:
+            search_terms = [term.strip() for term in query.split(',') if term.strip()]
+        elif ' a ' in query or ' aj ' in query:
+            # Nahraď spojky čiarkami a rozdeľ
+            temp_query = query.replace(' a ', ', ').replace(' aj ', ', ')
+            search_terms = [term.strip() for term in temp_query.split(',') if term.strip()]
+        else:
+            # Jeden pojem
+            search_terms = [query.strip()]
+        
+        return search_terms
+    
+    def search_terms(self, search_terms: List[str]) -> List[Tuple[str, List[tuple]]]:
+        """
+        Vyhľadá pojmy v databáze a vráti surové riadky
+        
+        Args:
+            search_terms: Zoznam pojmov (max 5 sa spracuje)
             
+        Returns:
+            Zoznam dvojíc (pojem, riadky) pre pojmy s výsledkami
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        all_results = []
+        
+        try:
             # Vyhľadávaj každý pojem samostatne
             for search_term in search_terms[:5]:  # Max 5 pojmov
                 if not search_term:
                     continue
                     
-                cursor.execute("""
-                    SELECT term, definition, law_id, paragraph, confidence, category
-                    FROM legal_terms 
-                    WHERE term LIKE ? OR definition LIKE ?
-                    ORDER BY confidence DESC, LENGTH(term) ASC
-                    LIMIT 3
-                """, (f"%{search_term}%", f"%{search_term}%"))
-                
-                results = cursor.fetchall()
+                with get_tracer().span("sqlite.query", table="legal_terms", term_chars=len(search_term)) as span:
+                    cursor.execute("""
+                        SELECT term, definition, law_id, paragraph, confidence, category
+                        FROM legal_terms 
+                        WHERE term LIKE ? OR definition LIKE ?
+                        ORDER BY confidence DESC, LENGTH(term) ASC
+                        LIMIT 3
+                    """, (f"%{search_term}%", f"%{search_term}%"))
+                    
+                    results = cursor.fetchall()
+                    span.set("rows", len(results))
                 
                 if results:
                     all_results.append((search_term, results))
-            
+        finally:
             conn.close()
+        
+        return all_results
+    
+    def _run(self, query: str) -> str:
+        """Vyhľadaj právne pojmy"""
+        with get_tracer().span(f"tool.{self.name}", input_chars=len(query)) as span:
+            output = self._search_and_format(query)
+            span.set("output_chars", len(output))
+            return output
+    
+    def _search_and_format(self, query: str) -> str:
+        """Vyhľadá pojmy a naformátuje odpoveď pre agenta"""
+        try:
+            search_terms = self._split_terms(query)
             
-            if not all_results:
-                return f"Nenašli sa definície pre pojmy: {', '.join(search_terms)}"
-            
-            # Formátuj výsledky pre každý pojem
-            response = ""
-            
-            for search_term, results in all_results:
-                if response:  # Pridaj oddeľovač ak nie je prvý pojem
-                    response += "\n" + "="*50 + "\n\n"
-                    
-                response += f"🔍 Definície pre pojem: **{search_term}**\n\n"
-                
-                for i, (term, definition, law_id, paragraph, confidence, category) in enumerate(results, 1):
-                    response += f"{i}. **{term}** ({category})\n"
-                    response += f"   📍 {law_id}"
-                    if paragraph:
-                        response += f" {paragraph}"
-                    response += f"\n"
-                    response += f"   📝 {definition}\n"
-                    response += f"   🎯 Spoľahlivosť: {confidence:.1f}/1.0\n\n"
+            if not search_terms or not any(search_terms):
+                return "Nebol zadaný žiadny pojem na vyhľadanie."
             
-            return response.strip()
+            return self.format_results(search_terms, self.search_terms(search_terms))
             
         except sqlite3.Error as e:
             return f"Chyba databázy: {e}"
         except Exception as e:
             return f"Chyba pri vyhľadávaní: {e}"
+    
+    def format_results(self, search_terms: List[str], all_results: List[Tuple[str, List[tuple]]]) -> str:
+        """Naformátuje výsledky search_terms pre agenta"""
+        if not all_results:
+            return f"Nenašli sa definície pre pojmy: {', '.join(search_terms)}"
+        
+        # Formátuj výsledky pre každý pojem
+        response = ""
+        
+        for search_term, results in all_results:
+            if response:  # Pridaj oddeľovač ak nie je prvý pojem
+                response += "\n" + "="*50 + "\n\n"
+                
+            response += f"🔍 Definície pre pojem: **{search_term}**\n\n"
+            
+            for i, (term, definition, law_id, paragraph, confidence, category) in enumerate(results, 1):
+                response += f"{i}. **{term}** ({category})\n"
+                response += f"   📍 {law_id}"
+                if paragraph:
+                    response += f" {paragraph}"
+                response += f"\n"
+                response += f"   📝 {definition}\n"
+                response += f"   🎯 Spoľahlivosť: {confidence:.1f}/1.0\n\n"
+        
+        return response.strip()
 
 
 def get_database_tools():
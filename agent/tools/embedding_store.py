@@ -0,0 +1,86 @@
+"""
+Úložisko embeddingov podľa obsahu - rovnaký text sa tým istým enkóderom enkóduje len raz
+
+Kľúč je sha256 textu a odtlačok enkódera (model a backend - int8 graf dáva mierne iné
+vektory ako PyTorch), hodnota je vektor ako float32. Chunk alebo okno, ktoré už niekedy
+vzniklo (opakovaný ingest, iná konfigurácia chunkovania v scripts/chunking_sweep.py),
+sa načíta zo SQLite namiesto volania modelu. Úložisko zdieľa ingest aj sweep.
+
+Prostredie:
+- LEGAL_EMBEDDING_STORE  cesta k SQLite súboru (predvolene data/embedding_store.db), "0" vypne
+"""
+
+import os
+import sqlite3
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_EMBEDDING_STORE = "data/embedding_store.db"
+# Limit parametrov SQLite dotazu IN (...)
+LOOKUP_BATCH = 500
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Vektory textov v SQLite podľa (odtlačok enkódera, sha256 textu)"""
+
+    def __init__(self, db_path: str = DEFAULT_EMBEDDING_STORE):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        # Tabuľka s rowid - vektory (1,5 kB) by v WITHOUT ROWID B-strome zdvojnásobili súbor
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "encoder TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (encoder, hash))"
+        )
+        self.conn.commit()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0}
+
+    def get_many(self, encoder: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Vektory textov v poradí vstupu (None, ak text tento enkóder ešte neenkódoval)"""
+        hashes = [content_hash(text) for text in texts]
+        found: Dict[str, bytes] = {}
+        unique = list(dict.fromkeys(hashes))
+        for start in range(0, len(unique), LOOKUP_BATCH):
+            part = unique[start:start + LOOKUP_BATCH]
+            rows = self.conn.execute(
+                f"SELECT hash, vector FROM embeddings WHERE encoder = ? AND hash IN ({','.join('?' * len(part))})",
+                [encoder, *part]
+            )
+            found.update(rows)
+        vectors = [np.frombuffer(found[h], dtype=np.float32).tolist() if h in found else None for h in hashes]
+        hits = sum(1 for vector in vectors if vector is not None)
+        self.stats["hits"] += hits
+        self.stats["misses"] += len(vectors) - hits
+        return vectors
+
+    def put_many(self, encoder: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        rows = [(encoder, content_hash(text), np.asarray(vector, dtype=np.float32).tobytes())
+                for text, vector in zip(texts, vectors)]
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany("INSERT OR IGNORE INTO embeddings (encoder, hash, vector) VALUES (?, ?, ?)", rows)
+            self.stats["stored"] += self.conn.total_changes - before
+
+    def count(self, encoder: Optional[str] = None) -> int:
+        if encoder is None:
+            return self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM embeddings WHERE encoder = ?", (encoder,)).fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def load_configured_store() -> Optional[EmbeddingStore]:
+    """Úložisko podľa LEGAL_EMBEDDING_STORE (None, ak je vypnuté)"""
+    path = os.getenv("LEGAL_EMBEDDING_STORE", DEFAULT_EMBEDDING_STORE)
+    if path.lower() in ("0", "false", "no", ""):
+        return None
+    return EmbeddingStore(path)
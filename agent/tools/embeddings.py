@@ -0,0 +1,268 @@
+"""
+Zdieľaná embedding funkcia pre ChromaDB (načítanie textov aj vyhľadávanie)
+
+Backend enkóderu:
+- torch      SentenceTransformer (PyTorch) - referenčné vektory
+- onnx       rovnaký model exportovaný do ONNX (mean pooling v grafe), onnxruntime na CPU
+- onnx-int8  ONNX graf s dynamickou int8 kvantizáciou váh
+
+ONNX súbory vytvorí `python scripts/onnx_encoder.py export`, ktorý zároveň overí
+zhodu vektorov s PyTorch. Ak súbory alebo onnxruntime chýbajú, použije sa torch.
+Názov funkcie (`name`) nezávisí od backendu - vektory sú zameniteľné v jednej kolekcii.
+
+Prostredie:
+- LEGAL_EMBEDDING_BACKEND  torch | onnx | onnx-int8 (predvolene torch)
+- LEGAL_ONNX_ENCODER       adresár exportu (predvolene data/onnx_encoder/<model>)
+- LEGAL_ONNX_THREADS       počet vlákien onnxruntime (predvolene všetky jadrá)
+"""
+
+import os
+import json
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Tuple, TypeVar
+
+from agent.tracing import get_tracer
+
+# Model, ktorým bola vytvorená databáza - pri čítaní musí byť PRESNE ROVNAKÝ
+DEFAULT_EMBEDDING_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+# Plánovač ingestu: tokeny dávky vrátane paddingu, texty zoradené naraz, najväčšia dávka
+DEFAULT_TOKEN_BUDGET = 4096
+SCHEDULER_WINDOW = 512
+MAX_SCHEDULED_BATCH = 256
+
+T = TypeVar("T")
+DEFAULT_ONNX_ENCODER_DIR = "data/onnx_encoder"
+ONNX_META_FILE = "meta.json"
+
+
+def configured_backend() -> str:
+    """Backend enkóderu podľa LEGAL_EMBEDDING_BACKEND"""
+    backend = os.getenv("LEGAL_EMBEDDING_BACKEND", "torch").strip().lower() or "torch"
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Neznámy backend enkóderu '{backend}' (možnosti: {', '.join(EMBEDDING_BACKENDS)})")
+    return backend
+
+
+def onnx_encoder_dir(model_name: str = DEFAULT_EMBEDDING_MODEL) -> Path:
+    """Adresár ONNX exportu modelu"""
+    configured = os.getenv("LEGAL_ONNX_ENCODER")
+    if configured:
+        return Path(configured)
+    return Path(DEFAULT_ONNX_ENCODER_DIR) / Path(model_name).name
+
+
+class OnnxEncoder:
+    """ONNX enkóder s rozhraním SentenceTransformer.encode (tokenizér + onnxruntime)"""
+
+    def __init__(self, model_dir: Path, quantized: bool = False):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = Path(model_dir)
+        with open(model_dir / ONNX_META_FILE, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        path = model_dir / self.meta["int8" if quantized else "fp32"]
+        if not path.exists():
+            raise FileNotFoundError(f"{path} neexistuje - spusti: python scripts/onnx_encoder.py export")
+        # Kontrola zhody s PyTorch z exportu - graf mimo tolerancie sa nepoužije
+        parity = self.meta.get("parity", {}).get("onnx-int8" if quantized else "onnx")
+        if parity is not None and not parity["ok"]:
+            raise ValueError(f"{path.name} sa odchyľuje od PyTorch (min kosínus {parity['min_cosine']})")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("LEGAL_ONNX_THREADS", "0") or 0)
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        self.max_seq_length = self.meta["max_seq_length"]
+        self.dimension = self.meta["dimension"]
+        self.path = path
+
+    def encode(self, sentences, batch_size: int = 32):
+        import numpy as np
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        # Dávky podľa dĺžky textu (ako SentenceTransformer.encode) - menej paddingu
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            tokens = self.tokenizer([texts[row] for row in rows], padding=True, truncation=True,
+                                    max_length=self.max_seq_length, return_tensors="np")
+            feeds = {name: tokens[name].astype(np.int64) for name in self.input_names}
+            embeddings[rows] = self.session.run(None, feeds)[0]
+        return embeddings[0] if single else embeddings
+
+
+class MultilingualEmbeddingFunction:
+    """Sentence-transformers embedding s L2 normalizáciou (kompatibilné s ChromaDB)"""
+    
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, backend: str = None):
+        self.backend = backend or configured_backend()
+        if self.backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Neznámy backend enkóderu '{self.backend}' (možnosti: {', '.join(EMBEDDING_BACKENDS)})")
+        if self.backend != "torch":
+            try:
+                self.model = OnnxEncoder(onnx_encoder_dir(model_name), quantized=self.backend == "onnx-int8")
+            except Exception as e:
+                print(f"⚠️ ONNX enkóder ({self.backend}) nie je dostupný: {e} - používam PyTorch")
+                self.backend = "torch"
+        if self.backend == "torch":
+            from sentence_transformers import SentenceTransformer
+            self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.name = f"multilingual-{model_name}"  # ChromaDB name atribút
+    
+    @property
+    def tokenizer(self):
+        """Tokenizér modelu (veľkosť chunkov a okná v tokenoch)"""
+        return self.model.tokenizer
+    
+    @property
+    def max_seq_length(self) -> int:
+        """Najdlhší vstup v tokenoch - zvyšok textu model oreže"""
+        return self.model.max_seq_length
+    
+    @property
+    def fingerprint(self) -> str:
+        """Odtlačok enkódera pre úložisko embeddingov (backend mení vektory)"""
+        return f"{self.model_name}@{self.backend}"
+    
+    def __call__(self, input):
+        # ChromaDB vyžaduje presne signatúru __call__(self, input)
+        return self.encode(input)
+    
+    def encode(self, input, batch_size: int = 32):
+        """L2-normalizované embeddingy, batch_size je dávka modelu (plánovač ingestu posiela celú dávku naraz)"""
+        import numpy as np
+        
+        texts = [input] if isinstance(input, str) else input
+        with get_tracer().span("embedding.encode", model=self.model_name, backend=self.backend) as span:
+            # Získaj embeddings
+            embeddings = self.model.encode(input, batch_size=batch_size)
+            span.update(texts=len(texts), chars=sum(len(t) for t in texts))
+        
+        # Normalizuj pre konzistenciu
+        if len(embeddings.shape) == 1:
+            # Jeden vektor
+            norm = np.linalg.norm(embeddings)
+            if norm > 0:
+                embeddings = embeddings / norm
+        else:
+            # Viac vektorov
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-8)
+        
+        return embeddings.tolist()
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_embedding_function(model_name: str = DEFAULT_EMBEDDING_MODEL) -> MultilingualEmbeddingFunction:
+    """Jedna inštancia modelu na proces (vektorové vyhľadávanie a offline Wikipédia ho zdieľajú)"""
+    key = (model_name, configured_backend())
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = MultilingualEmbeddingFunction(model_name, key[1])
+        return _shared[key]
+
+
+def plan_batches(lengths: List[int], token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 max_batch: int = MAX_SCHEDULED_BATCH) -> List[List[int]]:
+    """Indexy textov zoradené podľa dĺžky v dávkach, kde počet × najdlhší text <= token_budget"""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for index in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Vzostupné poradie - nový text je najdlhší v dávke
+        if current and (lengths[index] * (len(current) + 1) > token_budget or len(current) >= max_batch):
+            batches.append(current)
+            current = []
+        current.append(index)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class EmbeddingScheduler:
+    """
+    Embedding pri ingeste v dávkach podľa tokenového rozpočtu
+
+    Texty sa po oknách (SCHEDULER_WINDOW položiek) zoradia podľa počtu tokenov
+    po orezaní modelom a rozdelia do dávok s rovnakým počtom tokenov vrátane paddingu.
+    Krátke texty tak idú vo veľkých dávkach a dlhé v malých. Výsledky sa vrátia
+    v pôvodnom poradí.
+
+    S úložiskom embeddingov (agent/tools/embedding_store.py) sa enkódujú len texty,
+    ktoré enkóder ešte nevidel, a rovnaký text v jednom okne len raz.
+    """
+
+    def __init__(self, embedding_function: MultilingualEmbeddingFunction, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 window: int = SCHEDULER_WINDOW, max_batch: int = MAX_SCHEDULED_BATCH, store=None):
+        self.embedding_function = embedding_function
+        self.token_budget = token_budget
+        self.window = window
+        self.max_batch = max_batch
+        self.store = store
+        self.stats = {"texts": 0, "batches": 0, "tokens": 0, "padded_tokens": 0, "encoded": 0, "reused": 0}
+
+    def lengths(self, texts: List[str]) -> List[int]:
+        """Počet tokenov vstupu modelu (so špeciálnymi tokenmi, po orezaní na max_seq_length)"""
+        tokens = self.embedding_function.tokenizer(
+            texts, truncation=True, max_length=self.embedding_function.max_seq_length, verbose=False
+        )["input_ids"]
+        return [len(ids) for ids in tokens]
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if self.store is None:
+            vectors = self._encode(texts)
+        else:
+            fingerprint = self.embedding_function.fingerprint
+            vectors = self.store.get_many(fingerprint, texts)
+            # Chýbajúce texty bez opakovaní - model dostane každý text raz
+            missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+            if missing:
+                encoded = dict(zip(missing, self._encode(missing)))
+                self.store.put_many(fingerprint, missing, [encoded[text] for text in missing])
+                vectors = [encoded[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        self.stats["texts"] += len(texts)
+        self.stats["reused"] = self.stats["texts"] - self.stats["encoded"]
+        return vectors
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        lengths = self.lengths(texts)
+        vectors: List[List[float]] = [None] * len(texts)
+        for batch in plan_batches(lengths, self.token_budget, self.max_batch):
+            embedded = self.embedding_function.encode([texts[index] for index in batch], batch_size=len(batch))
+            for index, vector in zip(batch, embedded):
+                vectors[index] = vector
+            self.stats["batches"] += 1
+            self.stats["tokens"] += sum(lengths[index] for index in batch)
+            self.stats["padded_tokens"] += len(batch) * max(lengths[index] for index in batch)
+        self.stats["encoded"] += len(texts)
+        return vectors
+
+    def stream(self, items: Iterable[T], texts_of: Callable[[T], List[str]]) -> Iterator[Tuple[T, List[List[float]]]]:
+        """(položka, vektory jej textov) v pôvodnom poradí - v pamäti je len jedno okno položiek"""
+        iterator = iter(items)
+        while True:
+            window = list(islice(iterator, self.window))
+            if not window:
+                return
+            texts = [texts_of(item) for item in window]
+            vectors = self.embed([text for item_texts in texts for text in item_texts])
+            position = 0
+            for item, item_texts in zip(window, texts):
+                yield item, vectors[position:position + len(item_texts)]
+                position += len(item_texts)
@@ -2,17 +2,27 @@
 Rozšírený vector search s fulltext možnosťami
 """
 
-from typing import List, Dict, Any, Optional, Type, Union
+from datetime import date
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
 from langchain.tools import BaseTool
 from pydantic import Field
-import re
+import importlib.util
+import threading
+import time
 
-# Fallback pre ChromaDB ak nie je dostupné
-try:
-    import chromadb
-    CHROMADB_AVAILABLE = True
-except ImportError:
-    CHROMADB_AVAILABLE = False
+from agent.tracing import get_tracer
+from agent.tools.snippets import query_terms, kwic_snippet, fit_to_budget
+from agent.tools.law_versions import asof_filter, chroma_where
+from agent.tools.multi_vector import max_pool, window_hits
+from agent.tools.near_duplicates import collapse
+from agent.tools.query_language import (
+    ParsedQuery, QuerySyntaxError, format_expr, leaves, legacy_parse, parse_query, to_chroma
+)
+
+# Fallback pre ChromaDB ak nie je dostupné (samotný import až pri vytvorení nástroja)
+CHROMADB_AVAILABLE = importlib.util.find_spec("chromadb") is not None
+
+_PLANNER_LOCK = threading.Lock()
 
 
 class EnhancedVectorSearchTool(BaseTool):
@@ -35,10 +45,14 @@ class EnhancedVectorSearchTool(BaseTool):
     
     Podporované formáty dotazov:
     1. Sémantické: "povinnosti konateľa zastupovanie spoločnosť"
-    2. Fulltext: "contains:§ 135" 
+    2. Fulltext: "contains:§ 135" alebo presná fráza contains:"štatutárny orgán"
     3. Regex: "regex:§\\s*135[a-z]*"
-    4. Kombinované: "law:513/1991 contains:konateľ"
-    5. Negácia: "not_contains:fyzická osoba"
+    4. Kombinované (slová pred filtrom sú sémantické): "konateľ povinnosti law:513/1991 contains:konateľ"
+    5. Negácia: "not_contains:fyzická osoba" alebo NOT contains:"fyzická osoba"
+    6. Logika a zátvorky: 'law:513/1991 AND (contains:"konateľ" OR contains:"prokurista")'
+    7. Znenie účinné k dátumu: "asof:2025-01-01 konateľ povinnosti"
+    8. Plán vykonania s časmi krokov: "explain: law:40/1964 contains:dedič"
+    9. Celý paragraf výsledku namiesto úryvku: "expand: konateľ povinnosti law:513/1991"
     
     Databáza obsahuje zákony: 40/1964, 513/1991, 530/2003, 300/2005, 160/2015, 161/2015
     
@@ -47,9 +61,22 @@ class EnhancedVectorSearchTool(BaseTool):
     
     # Pydantic fields
     collection_name: str = Field(default="legal_documents")
+    db_path: str = Field(default="data/vector_db")
     client: Optional[Any] = Field(default=None, exclude=True)
     collection: Optional[Any] = Field(default=None, exclude=True)
     embedding_function: Optional[Any] = Field(default=None, exclude=True)
+    quantized_index: Optional[Any] = Field(default=None, exclude=True)
+    index_method: Optional[str] = Field(default=None)
+    shards: Optional[Any] = Field(default=None, exclude=True)
+    chunk_store: Optional[Any] = Field(default=None, exclude=True)
+    versions: Optional[Any] = Field(default=None, exclude=True)
+    planner: Optional[Any] = Field(default=None, exclude=True)
+    duplicates: Optional[Any] = Field(default=None, exclude=True)
+    windows: Optional[Any] = Field(default=None, exclude=True)
+    hierarchy: Optional[Any] = Field(default=None, exclude=True)
+    snippet_chars: int = Field(default=300)
+    observation_tokens: int = Field(default=600)
+    expand_tokens: int = Field(default=2000)
     
     def __init__(self, collection_name: str = "legal_documents", **kwargs):
         super().__init__(collection_name=collection_name, **kwargs)
@@ -57,39 +84,13 @@ class EnhancedVectorSearchTool(BaseTool):
             try:
                 # Vytvor PRESNE ROVNAKÝ embedding model ako pri vytváraní databázy
                 try:
-                    from sentence_transformers import SentenceTransformer
-                    
-                    # Vytvor embedding funkciu IDENTICKÚ s load_law_texts.py
-                    class MultilingualEmbeddingFunction:
-                        def __init__(self, model_name):
-                            from sentence_transformers import SentenceTransformer
-                            self.model = SentenceTransformer(model_name)
-                            self.model_name = model_name
-                            self.name = f"multilingual-{model_name}"
-                        
-                        def __call__(self, input):
-                            import numpy as np
-                            
-                            # Získaj embeddings
-                            embeddings = self.model.encode(input)
-                            
-                            # Normalizuj PRESNE ako v load_law_texts.py
-                            if len(embeddings.shape) == 1:
-                                # Jeden vektor
-                                norm = np.linalg.norm(embeddings)
-                                if norm > 0:
-                                    embeddings = embeddings / norm
-                            else:
-                                # Viac vektorov
-                                norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
-                                embeddings = embeddings / np.maximum(norms, 1e-8)
-                            
-                            return embeddings.tolist()
+                    import chromadb
+                    from agent.tools.embeddings import get_shared_embedding_function
                     
                     # Používame PRESNE ROVNAKÝ model ako v databáze
-                    self.embedding_function = MultilingualEmbeddingFunction("paraphrase-multilingual-MiniLM-L12-v2")
+                    self.embedding_function = get_shared_embedding_function("paraphrase-multilingual-MiniLM-L12-v2")
                     
-                    self.client = chromadb.PersistentClient(path="data/vector_db")
+                    self.client = chromadb.PersistentClient(path=self.db_path)
                     print("✅ Enhanced Vector Search s multilingual embedding modelom")
                     
                 except ImportError:
@@ -98,6 +99,49 @@ class EnhancedVectorSearchTool(BaseTool):
                     self.embedding_function = None
                 
                 self._init_collection()
+                
+                # Kvantizovaný index namiesto HNSW (LEGAL_VECTOR_INDEX=int8|pq)
+                if self.collection is not None:
+                    from agent.tools.quantized_index import load_configured_index
+                    self.quantized_index, self.index_method = load_configured_index()
+                    if self.quantized_index is not None:
+                        print(f"✅ Kvantizovaný index ({self.index_method}) s {self.quantized_index.count} vektormi")
+                    
+                    # Shardy podľa zákona s routerom (LEGAL_SHARDED=1)
+                    from agent.tools.sharding import load_configured_shards
+                    self.shards = load_configured_shards(self.client, self.collection_name)
+                    if self.shards is not None:
+                        print(f"✅ Shardy: {len(self.shards.shards)} zákonov")
+                    
+                    # Texty chunkov z úložiska mapovaného do pamäte (LEGAL_CHUNK_STORE)
+                    from agent.tools.chunk_store import load_configured_store
+                    self.chunk_store = load_configured_store()
+                    if self.chunk_store is not None:
+                        print(f"✅ Úložisko chunkov: {len(self.chunk_store)} chunkov")
+                    
+                    # Bitmapy účinnosti znení pre filter asof: (LEGAL_VERSION_INDEX)
+                    from agent.tools.law_versions import load_configured_versions
+                    self.versions = load_configured_versions()
+                    if self.versions is not None:
+                        print(f"✅ Index verzií: {len(self.versions.versions)} znení")
+                    
+                    # Páry takmer duplicitných chunkov na zlúčenie výsledkov (LEGAL_NEAR_DUPLICATES)
+                    from agent.tools.near_duplicates import load_configured_duplicates
+                    self.duplicates = load_configured_duplicates()
+                    if self.duplicates is not None:
+                        print(f"✅ Takmer duplicitné chunky: {len(self.duplicates.pairs)} párov")
+                    
+                    # Vektory okien dlhých chunkov s max-poolingom skóre (LEGAL_MULTI_VECTOR)
+                    from agent.tools.multi_vector import load_configured_windows
+                    self.windows = load_configured_windows(self.client)
+                    if self.windows is not None:
+                        print(f"✅ Okná dlhých chunkov: {self.windows.count()} vektorov")
+                    
+                    # Odseky na sémantické vyhľadávanie, paragrafy na rozbalenie (LEGAL_HIERARCHY)
+                    from agent.tools.hierarchy import load_configured_hierarchy
+                    self.hierarchy = load_configured_hierarchy(self.client)
+                    if self.hierarchy is not None:
+                        print(f"✅ Hierarchia: {self.hierarchy.children.count()} odsekov, {len(self.hierarchy.parents)} paragrafov")
             except Exception as e:
                 print(f"❌ Chyba pri inicializácii Enhanced Vector Search: {e}")
                 self.client = None
@@ -138,65 +182,38 @@ class EnhancedVectorSearchTool(BaseTool):
             self.collection = None
     
     def _parse_query(self, query: str) -> Dict[str, Any]:
-        """Parsuje pokročilé query príkazy"""
-        parsed = {
-            'semantic_query': None,
-            'where_filters': {},
-            'where_document': {},
-            'search_type': 'semantic'
+        """Parsuje pokročilé query príkazy (pôvodný tvar slovníka pre skripty benchmarkov)"""
+        return legacy_parse(query)
+    
+    def _snippet_context(self, parsed: ParsedQuery) -> Dict[str, Any]:
+        """Čo hľadať v texte pri výreze úryvku (pojmy, prvá fráza, prvý regex)"""
+        matches = [node for node in leaves(parsed.expr) if node.kind != 'law']
+        return {
+            'terms': query_terms(parsed.semantic),
+            'phrase': next((node.value for node in matches if node.kind != 'regex'), None),
+            'pattern': next((node.value for node in matches if node.kind == 'regex'), None),
+        }
+    
+    def _result_entry(self, rank: int, doc: str, metadata: Dict, similarity: str,
+                      search_type: str, context: Optional[Dict] = None, chunk_id: str = "") -> Dict:
+        """Výsledok s úryvkom namiesto celého textu chunku"""
+        paragraph = metadata.get('paragraph', 'N/A')
+        return {
+            'rank': rank,
+            'id': chunk_id,
+            'law_id': metadata.get('law_id', 'N/A'),
+            'paragraph': paragraph,
+            'paragraphs': metadata.get('paragraphs', paragraph),
+            'title': metadata.get('title', ''),
+            'snippet': kwic_snippet(doc, max_chars=self.snippet_chars, **(context or {})),
+            'text_chars': len(doc),
+            'similarity': similarity,
+            'search_type': search_type
         }
-        
-        # Rozpoznaj rôzne typy dotazov
-        query = query.strip()
-        
-        # 1. Fulltext search patterns
-        if query.startswith('contains:'):
-            parsed['search_type'] = 'fulltext'
-            text = query[9:]  # Odstráň 'contains:'
-            parsed['where_document'] = {'$contains': text}
-            return parsed
-        
-        if query.startswith('not_contains:'):
-            parsed['search_type'] = 'fulltext'
-            text = query[13:]  # Odstráň 'not_contains:'
-            parsed['where_document'] = {'$not_contains': text}
-            return parsed
-        
-        if query.startswith('regex:'):
-            parsed['search_type'] = 'fulltext'
-            pattern = query[6:]  # Odstráň 'regex:'
-            parsed['where_document'] = {'$regex': pattern}
-            return parsed
-        
-        # 2. Kombinované queries (law:XXX contains:YYY)
-        if ' ' in query and any(prefix in query for prefix in ['law:', 'contains:', 'regex:', 'not_contains:']):
-            parts = query.split()
-            for part in parts:
-                if part.startswith('law:'):
-                    parsed['where_filters']['law_id'] = part[4:]
-                elif part.startswith('contains:'):
-                    parsed['where_document']['$contains'] = part[9:]
-                    parsed['search_type'] = 'combined'
-                elif part.startswith('not_contains:'):
-                    parsed['where_document']['$not_contains'] = part[13:]
-                    parsed['search_type'] = 'combined'
-                elif part.startswith('regex:'):
-                    parsed['where_document']['$regex'] = part[6:]
-                    parsed['search_type'] = 'combined'
-                else:
-                    # Zvyšné slová sú pre sémantické vyhľadávanie
-                    if parsed['semantic_query'] is None:
-                        parsed['semantic_query'] = part
-                    else:
-                        parsed['semantic_query'] += ' ' + part
-            
-            return parsed
-        
-        # 3. Čistý sémantický dotaz
-        parsed['semantic_query'] = query
-        return parsed
     
-    def _fulltext_search(self, where_filters: Dict, where_document: Dict, limit: int = 5) -> List[Dict]:
+    def _fulltext_search(self, where_filters: Dict, where_document: Dict, limit: int = 5,
+                         context: Optional[Dict] = None, route_text: str = "",
+                         jurisdiction: Optional[str] = None, asof: Optional[date] = None) -> List[Dict]:
         """Vykonaj fulltext search"""
         try:
             # Skontroluj či je collection dostupná
@@ -206,43 +223,56 @@ class EnhancedVectorSearchTool(BaseTool):
             # Základný fulltext search
             kwargs = {'limit': limit, 'include': ['documents', 'metadatas']}
             
+            if asof is not None and self.versions is not None and self.shards is None:
+                # Chunky účinné k dátumu priamo z bitmapy indexu verzií
+                kwargs['ids'] = sorted(self.versions.ids_at(asof))
+                if not kwargs['ids']:
+                    return []
+            elif asof is not None:
+                where_filters = asof_filter(where_filters, asof)
+            
             if where_filters:
-                kwargs['where'] = where_filters
+                kwargs['where'] = chroma_where(where_filters)
             
             if where_document:
                 kwargs['where_document'] = where_document
             
-            results = self.collection.get(**kwargs)
-            
-            # Formátuj výsledky
-            formatted = []
-            for i, (doc, metadata) in enumerate(zip(results['documents'], results['metadatas'])):
-                law_id = metadata.get('law_id', 'N/A')
-                paragraph = metadata.get('paragraph', 'N/A')
-                title = metadata.get('title', '')
-                
-                formatted.append({
-                    'rank': i + 1,
-                    'law_id': law_id,
-                    'paragraph': paragraph,
-                    'title': title,
-                    'text': doc,
-                    'similarity': 'Fulltext match',
-                    'search_type': 'fulltext'
-                })
+            if self.shards is not None:
+                # Router vyberie shardy podľa filtra, citácií a slov dotazu
+                route_text = " ".join([route_text] + [str(value) for value in (where_document or {}).values()])
+                results = self.shards.get(route_text, limit, where_filters, where_document, jurisdiction)
+            else:
+                with get_tracer().span("chroma.get", limit=limit, where=str(where_filters), where_document=str(where_document)) as span:
+                    results = self.collection.get(**kwargs)
+                    span.update(results=len(results['ids']), chars=sum(map(len, results['documents'])))
             
-            return formatted
+            # Formátuj výsledky - z textu sa ponechá len úryvok okolo zásahu
+            context = context if context is not None else {
+                'phrase': where_document.get('$contains'), 'pattern': where_document.get('$regex')
+            }
+            return [
+                self._result_entry(i + 1, doc, metadata, 'Fulltext match', 'fulltext', context, chunk_id)
+                for i, (chunk_id, doc, metadata) in enumerate(zip(results['ids'], results['documents'], results['metadatas']))
+            ]
             
         except Exception as e:
             print(f"Chyba pri fulltext search: {e}")
             return []
     
-    def _semantic_search(self, query: str, where_filters: Optional[Dict] = None, limit: int = 8) -> List[Dict]:
+    def _semantic_search(self, query: str, where_filters: Optional[Dict] = None, limit: int = 8,
+                         context: Optional[Dict] = None, jurisdiction: Optional[str] = None,
+                         asof: Optional[date] = None, where_document: Optional[Dict] = None) -> List[Dict]:
         """Vykonaj sémantické vyhľadávanie"""
         try:
             if not self.embedding_function or not self.collection:
                 return []
             
+            # Kvantizovaný index filtruje účinnosť bitmapou, ChromaDB rozsahom valid_from/valid_to
+            allowed = self.versions.ids_at(asof) if asof is not None and self.versions is not None else None
+            index_filters = where_filters
+            if asof is not None:
+                where_filters = asof_filter(where_filters, asof)
+            
             # Vytvor embedding pre query
             query_embedding = self.embedding_function([query])
             
@@ -254,116 +284,303 @@ class EnhancedVectorSearchTool(BaseTool):
             }
             
             if where_filters:
-                kwargs['where'] = where_filters
+                kwargs['where'] = chroma_where(where_filters)
             
-            results = self.collection.query(**kwargs)
+            if where_document:
+                kwargs['where_document'] = where_document
             
-            # Formátuj výsledky
-            formatted = []
-            for i, (doc, metadata, distance) in enumerate(zip(
-                results['documents'][0],
-                results['metadatas'][0],
-                results['distances'][0]
-            )):
-                similarity = round((1 - distance) * 100, 1)
-                law_id = metadata.get('law_id', 'N/A')
-                paragraph = metadata.get('paragraph', 'N/A')
-                title = metadata.get('title', '')
-                
-                formatted.append({
-                    'rank': i + 1,
-                    'law_id': law_id,
-                    'paragraph': paragraph,
-                    'title': title,
-                    'text': doc,
-                    'similarity': f"{similarity}%",
-                    'search_type': 'semantic'
-                })
+            if self.shards is not None:
+                results = self.shards.query(query, query_embedding, limit, where_filters, jurisdiction, where_document)
+            elif (self.quantized_index is not None and self.quantized_index.supports(index_filters)
+                  and (asof is None or allowed is not None) and not where_document):
+                results = self._quantized_query(query_embedding[0], limit, index_filters, allowed)
+            elif self.hierarchy is not None and not where_document:
+                # Odseky zoskupené podľa paragrafu - výsledok je paragraf so zasiahnutými odsekmi
+                with get_tracer().span("chroma.query", n_results=limit, where=str(where_filters), hierarchy=True) as span:
+                    results = self.hierarchy.query(query_embedding, limit, kwargs.get('where'))
+                    span.update(results=len(results['ids'][0]), chars=sum(map(len, results['documents'][0])))
+            elif self.windows is not None and not where_document:
+                # Okná neobsahujú text, preto len bez where_document
+                results = self._fetch_chunks(*self._pooled_query(query_embedding, limit, kwargs.get('where')))
+            elif self.chunk_store is not None:
+                # Z ChromaDB len id a vzdialenosti, texty z úložiska chunkov
+                kwargs['include'] = ['distances']
+                with get_tracer().span("chroma.query", n_results=limit, where=str(where_filters),
+                                       where_document=str(where_document)) as span:
+                    found = self.collection.query(**kwargs)
+                    span.update(results=len(found['ids'][0]))
+                results = self._fetch_chunks(found['ids'][0], found['distances'][0])
+            else:
+                with get_tracer().span("chroma.query", n_results=limit, where=str(where_filters),
+                                       where_document=str(where_document)) as span:
+                    results = self.collection.query(**kwargs)
+                    span.update(results=len(results['ids'][0]), chars=sum(map(len, results['documents'][0])))
             
-            return formatted
+            # Formátuj výsledky - z textu sa ponechá len úryvok okolo zásahu
+            context = context if context is not None else {'terms': query_terms(query)}
+            search_type = 'combined' if where_document else 'semantic'
+            return [
+                self._result_entry(i + 1, doc, metadata, f"{round((1 - distance) * 100, 1)}%", search_type, context, chunk_id)
+                for i, (chunk_id, doc, metadata, distance) in enumerate(zip(
+                    results['ids'][0],
+                    results['documents'][0],
+                    results['metadatas'][0],
+                    results['distances'][0]
+                ))
+            ]
             
         except Exception as e:
             print(f"Chyba pri semantic search: {e}")
             return []
     
-    def _combined_search(self, parsed_query: Dict, limit: int = 5) -> List[Dict]:
-        """Kombinuje sémantické a fulltext vyhľadávanie"""
-        results = []
-        
-        # Ak máme sémantický dotaz, pridaj sémantické výsledky
-        if parsed_query['semantic_query']:
-            semantic_results = self._semantic_search(
-                parsed_query['semantic_query'],
-                parsed_query['where_filters'],
-                limit // 2 + 1
+    def _quantized_query(self, query_embedding: List[float], limit: int, where_filters: Optional[Dict],
+                         allowed: Optional[FrozenSet[str]] = None) -> Dict:
+        """Vyhľadanie v kvantizovanom indexe, texty a metadáta sa dočítajú podľa id"""
+        ids, distances = self.quantized_index.search(
+            query_embedding, limit=limit, where=where_filters or None, method=self.index_method, allowed=allowed
+        )
+        return self._fetch_chunks(ids, distances)
+    
+    def _pooled_query(self, query_embedding: List[List[float]], limit: int, where: Optional[Dict] = None,
+                      ids: Optional[List[str]] = None) -> Tuple[List[str], List[float]]:
+        """Hlavná kolekcia (prvé okno chunku) a okná 2..n - skóre chunku je maximum cez jeho okná"""
+        window_where = where
+        if ids is not None:
+            restrict = {'chunk_id': {'$in': list(ids)}}
+            window_where = {'$and': [where, restrict]} if where else restrict
+        with get_tracer().span("chroma.query", n_results=limit, where=str(where), windows=True) as span:
+            found = self.collection.query(
+                query_embeddings=query_embedding, n_results=limit, where=where, ids=ids, include=['distances']
             )
-            results.extend(semantic_results)
+            windows = window_hits(self.windows, query_embedding, limit, window_where)
+            span.update(results=len(found['ids'][0]), window_hits=len(windows[0]))
+        return max_pool((found['ids'][0], found['distances'][0]), windows, limit=limit)
+    
+    def _fetch_chunks(self, ids: List[str], distances: List[float]) -> Dict:
+        """Texty a metadáta podľa id (úložisko chunkov, chýbajúce z ChromaDB) v poradí ids"""
+        if not ids:
+            return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+        
+        by_id = {}
+        if self.chunk_store is not None:
+            with get_tracer().span("chunk_store.get", ids=len(ids)) as span:
+                fetched = self.chunk_store.get_many(ids)
+                span.update(results=len(fetched['ids']), chars=sum(map(len, fetched['documents'])))
+            by_id.update((id_, (doc, metadata)) for id_, doc, metadata in zip(fetched['ids'], fetched['documents'], fetched['metadatas']))
+        
+        missing = [id_ for id_ in ids if id_ not in by_id]
+        if missing:
+            with get_tracer().span("chroma.get", ids=len(missing)) as span:
+                fetched = self.collection.get(ids=missing, include=['documents', 'metadatas'])
+                span.update(results=len(fetched['ids']), chars=sum(map(len, fetched['documents'])))
+            by_id.update((id_, (doc, metadata)) for id_, doc, metadata in zip(fetched['ids'], fetched['documents'], fetched['metadatas']))
         
-        # Pridaj fulltext výsledky
-        if parsed_query['where_document']:
-            fulltext_results = self._fulltext_search(
-                parsed_query['where_filters'],
-                parsed_query['where_document'],
-                limit // 2 + 1
+        # collection.get nezachováva poradie - zoraď podľa vzdialenosti z indexu
+        found = [(id_, distance) for id_, distance in zip(ids, distances) if id_ in by_id]
+        return {
+            'ids': [[id_ for id_, _ in found]],
+            'documents': [[by_id[id_][0] for id_, _ in found]],
+            'metadatas': [[by_id[id_][1] for id_, _ in found]],
+            'distances': [[distance for _, distance in found]],
+        }
+    
+    def _get_planner(self):
+        """Plánovač dotazov nad úložiskom chunkov (trigramový index sa vytvorí pri prvom filtri)"""
+        if self.planner is None:
+            with _PLANNER_LOCK:
+                if self.planner is None:
+                    from agent.tools.query_planner import QueryPlanner, TrigramIndex
+                    with get_tracer().span("query_planner.build", chunks=len(self.chunk_store)) as span:
+                        index = TrigramIndex.build(self.chunk_store)
+                        span.update(trigrams=len(index.grams), bytes=index.memory_bytes())
+                    self.planner = QueryPlanner(index, self.versions)
+        return self.planner
+    
+    def _rank_candidates(self, text: str, ids: List[str], limit: int) -> Tuple[List[str], List[float]]:
+        """Sémantické poradie kandidátov z plánu (kvantizovaný index alebo ChromaDB s ids)"""
+        query_embedding = self.embedding_function([text])
+        if self.quantized_index is not None:
+            return self.quantized_index.search(
+                query_embedding[0], limit=limit, method=self.index_method, allowed=frozenset(ids)
+            )
+        if self.windows is not None:
+            return self._pooled_query(query_embedding, limit, ids=ids)
+        with get_tracer().span("chroma.query", n_results=limit, ids=len(ids)) as span:
+            found = self.collection.query(
+                query_embeddings=query_embedding, n_results=limit, ids=ids, include=['distances']
             )
-            results.extend(fulltext_results)
+            span.update(results=len(found['ids'][0]))
+        return found['ids'][0], found['distances'][0]
+    
+    def _planned_search(self, query: str, limit: int) -> Tuple[List[Dict], str]:
+        """Filter vykonaný plánovačom nad úložiskom chunkov, vráti výsledky a plán (explain:)"""
+        planner = self._get_planner()
+        with get_tracer().span("query_planner.execute") as span:
+            plan, cached = planner.compile(query)
+            rank = self._rank_candidates if self.embedding_function is not None else None
+            execution = planner.execute(plan, limit, rank, cached)
+            span.update(cached=cached, candidates=execution.counts['candidates'],
+                        matched=execution.counts['matched'], results=len(execution.ids))
         
-        # Odstráň duplikáty a obmedzi na limit
-        seen_ids = set()
-        unique_results = []
-        for result in results:
-            result_id = f"{result['law_id']}_{result['paragraph']}"
-            if result_id not in seen_ids:
-                seen_ids.add(result_id)
-                unique_results.append(result)
-                if len(unique_results) >= limit:
-                    break
+        context = self._snippet_context(plan.query)
+        if execution.distances is not None:
+            fetched = self._fetch_chunks(execution.ids, execution.distances)
+            results = [
+                self._result_entry(i + 1, doc, metadata, f"{round((1 - distance) * 100, 1)}%", 'combined', context, chunk_id)
+                for i, (chunk_id, doc, metadata, distance) in enumerate(zip(
+                    fetched['ids'][0], fetched['documents'][0], fetched['metadatas'][0], fetched['distances'][0]
+                ))
+            ]
+        else:
+            fetched = self.chunk_store.get_many(execution.ids)
+            by_id = dict(zip(fetched['ids'], zip(fetched['documents'], fetched['metadatas'])))
+            results = [
+                self._result_entry(i + 1, *by_id[chunk_id], 'Fulltext match', 'fulltext', context, chunk_id)
+                for i, chunk_id in enumerate(chunk_id for chunk_id in execution.ids if chunk_id in by_id)
+            ]
         
-        return unique_results
+        explain = planner.explain(plan, execution)
+        explain += f"\n  cache plánov: {planner.stats['hits']} zásahov, {planner.stats['misses']} kompilácií"
+        return results, explain
+    
+    def _chroma_search(self, parsed: ParsedQuery, limit: int) -> Tuple[List[Dict], str]:
+        """Filter preložený na where/where_document pre ChromaDB (bez úložiska chunkov alebo so shardmi)"""
+        where, where_document = to_chroma(parsed.expr)
+        context = self._snippet_context(parsed)
+        if parsed.semantic:
+            results = self._semantic_search(
+                parsed.semantic, where, limit, context, parsed.jurisdiction, parsed.asof, where_document
+            )
+        else:
+            results = self._fulltext_search(
+                where, where_document, limit, context, jurisdiction=parsed.jurisdiction, asof=parsed.asof
+            )
+        explain = "\n".join([
+            "Plán dotazu (ChromaDB, bez plánovača - vyžaduje LEGAL_CHUNK_STORE a nezdieľaný index):",
+            f"  filter: {format_expr(parsed.expr)}",
+            f"  sémantika: {parsed.semantic or '-'}",
+            f"  where: {where or '-'}",
+            f"  where_document: {where_document or '-'}",
+        ] + [f"  ⚠️ {warning}" for warning in parsed.warnings])
+        return results, explain
+    
+    def _search(self, query: str, limit: Optional[int] = None) -> Tuple[ParsedQuery, List[Dict], str]:
+        """Parsovanie a vykonanie dotazu - (dotaz, výsledky, plán pre explain:)"""
+        parsed = parse_query(query)
+        if parsed.expr is None and not parsed.semantic:
+            # Napr. '"', 'NOT konateľ' alebo samotné 'explain:' - bez filtra by sa vrátili náhodné chunky
+            raise QuerySyntaxError(" ".join(["Dotaz neobsahuje hľadaný text ani filter."] + parsed.warnings))
+        start = time.perf_counter()
+        if limit is None:
+            limit = 8 if parsed.semantic else 5
+        # S indexom duplicít sa načíta viac kandidátov, aby po zlúčení ostal plný počet výsledkov
+        fetch = limit * 2 if self.duplicates is not None else limit
+        if parsed.expr is not None and self.chunk_store is not None and self.shards is None:
+            results, explain = self._planned_search(query, fetch)
+        elif parsed.expr is not None or not parsed.semantic:
+            results, explain = self._chroma_search(parsed, fetch)
+        else:
+            results = self._semantic_search(
+                parsed.semantic, limit=fetch, context=self._snippet_context(parsed),
+                jurisdiction=parsed.jurisdiction, asof=parsed.asof
+            )
+            explain = f"Plán dotazu: len sémantické vyhľadávanie \"{parsed.semantic}\""
+        if self.duplicates is not None:
+            fetched = len(results)
+            results = collapse(results, self.duplicates)
+            explain += f"\n  takmer duplicitné: {fetched} kandidátov -> {len(results)} po zlúčení"
+        results = results[:limit]
+        if parsed.expand:
+            expanded = self._expand(results)
+            explain += f"\n  expand: {expanded}/{len(results)} výsledkov rozbalených na celý paragraf"
+        explain += f"\n  spolu: {(time.perf_counter() - start) * 1000:.2f} ms, výsledkov {len(results)}"
+        return parsed, results, explain
+    
+    def _expand(self, results: List[Dict]) -> int:
+        """Doplní k výsledkom celý text paragrafu z úložiska rodičov, vráti počet rozbalených"""
+        if self.hierarchy is None:
+            return 0
+        with get_tracer().span("hierarchy.expand", results=len(results)) as span:
+            for result in results:
+                text = self.hierarchy.expand(result)
+                if text is not None:
+                    result['expanded'] = text
+            expanded = sum(1 for result in results if 'expanded' in result)
+            span.update(expanded=expanded, chars=sum(len(result.get('expanded', '')) for result in results))
+        return expanded
+    
+    @staticmethod
+    def _covered_paragraphs(result: Dict) -> str:
+        """Paragraf výsledku, pri zlúčených duplicitách všetky pokryté paragrafy"""
+        duplicates = result.get('duplicates')
+        if not duplicates:
+            return result['paragraph']
+        return f"{result['paragraphs']} [zlúčených {len(duplicates) + 1} prekrývajúcich sa chunkov]"
     
     def _format_results(self, results: List[Dict]) -> str:
-        """Formátuje výsledky do čitateľného formátu"""
+        """Formátuje výsledky do čitateľného formátu v rámci tokenového rozpočtu"""
         if not results:
             return "Nenašli sa žiadne relevantné dokumenty pre zadaný dotaz."
         
-        formatted_results = []
-        for result in results:
-            formatted_results.append(
-                f"**Výsledok {result['rank']}** (podobnosť: {result['similarity']}, typ: {result['search_type']})\n"
-                f"Zákon: {result['law_id']} - {result['paragraph']}\n"
-                f"Názov: {result['title']}\n"
-                f"Text: {result['text'][:300]}{'...' if len(result['text']) > 300 else ''}\n"
-            )
+        # Rozbalený paragraf nahradí úryvok (expand:), dlhý paragraf sa oreže na rozpočet
+        max_chars = self.expand_tokens * 4
+        formatted_results = [
+            f"**Výsledok {result['rank']}** (podobnosť: {result['similarity']}, typ: {result['search_type']})\n"
+            f"Zákon: {result['law_id']} - {self._covered_paragraphs(result)}"
+            f"{' (' + result['title'] + ')' if result['title'] else ''}\n"
+            + (f"Celý paragraf: {result['expanded'][:max_chars]}{'…' if len(result['expanded']) > max_chars else ''}\n"
+               if 'expanded' in result else f"Text: {result['snippet']}\n")
+            for result in results
+        ]
+        
+        budget = self.expand_tokens if any('expanded' in result for result in results) else self.observation_tokens
+        output, omitted = fit_to_budget(formatted_results, budget)
+        if omitted:
+            output += f"\n({omitted} ďalších výsledkov vynechaných - upresni dotaz)"
+        return output
+    
+    def search(self, query: str, limit: Optional[int] = None) -> Optional[List[Dict]]:
+        """
+        Vykoná vyhľadávanie a vráti štruktúrované výsledky (bez formátovania)
         
-        return "\n".join(formatted_results)
+        Args:
+            query: Dotaz v rovnakom formáte ako pre agenta
+            limit: Max. počet výsledkov (predvolene 8 sémantických, 5 fulltextových)
+            
+        Returns:
+            Zoznam výsledkov alebo None pre prázdny dotaz
+            
+        Raises:
+            QuerySyntaxError: Chybná syntax dotazu (zátvorky, operátor bez výrazu, dátum asof:, regex)
+                alebo dotaz bez hľadaného textu aj filtra
+        """
+        if not query.strip():
+            return None
+        return self._search(query, limit)[1]
     
     def _run(self, query: str) -> str:
         """Hlavná vyhľadávacia funkcia"""
         if not self.collection:
             return f"Enhanced vector search nie je dostupný - kolekcia '{self.collection_name}' neexistuje."
         
-        try:
-            # Parsuj dotaz
-            parsed_query = self._parse_query(query)
-            print(f"🔍 Parsed query: {parsed_query}")  # Debug info
-            
-            # Vykonaj vyhľadávanie podľa typu
-            if parsed_query['search_type'] == 'semantic':
-                results = self._semantic_search(parsed_query['semantic_query'])
-            elif parsed_query['search_type'] == 'fulltext':
-                results = self._fulltext_search(
-                    parsed_query['where_filters'],
-                    parsed_query['where_document']
-                )
-            elif parsed_query['search_type'] == 'combined':
-                results = self._combined_search(parsed_query)
-            else:
-                return "Nerozoznaný typ dotazu."
-            
-            return self._format_results(results)
-            
-        except Exception as e:
-            return f"Chyba pri enhanced vector search: {str(e)}"
+        with get_tracer().span(f"tool.{self.name}", input_chars=len(query)) as span:
+            try:
+                if not query.strip():
+                    return "Nerozoznaný typ dotazu."
+                parsed, results, explain = self._search(query)
+                
+                output = self._format_results(results)
+                if parsed.explain:
+                    output = f"{explain}\n\n{output}"
+                span.update(results=len(results), output_chars=len(output))
+                return output
+                
+            except QuerySyntaxError as e:
+                span.set("error", str(e))
+                return f"Chybný dotaz: {e}"
+            except Exception as e:
+                span.set("error", str(e))
+                return f"Chyba pri enhanced vector search: {str(e)}"
     
     async def _arun(self, query: str) -> str:
         """Async verzia"""
@@ -0,0 +1,126 @@
+"""
+Dvojúrovňový index - odseky na vyhľadávanie, paragraf (§ alebo článok) ako kontext
+
+Kontextové chunky majú desiatky odsekov a posledný paragraf sa opakuje v ďalšom
+chunku, takže index nesie ten istý text viackrát a výsledok je veľký blok textu.
+Pri ingeste s hierarchiou (LegalTextLoader(hierarchy=True)) sa text zákona rozdelí
+na paragrafy podľa nadpisov (§ 135, Čl. 7a - odkazy v texte ako "podľa § 12 ods. 2"
+paragraf nerozdelia) a paragraf na odseky (1), (2), ...:
+
+- dieťa     odseky s nadpisom paragrafu v kolekcii legal_document_children s id rodiča
+            v metadátach - krátke susedné odseky spolu, kým sa zmestia do okna modelu
+            (krátky paragraf je jeden vektor), dlhý odsek po oknách modelu
+- rodič     celý paragraf v úložisku rodičov (formát úložiska chunkov, mmap)
+
+Pri dotaze sa prehľadajú odseky, zásahy sa zoskupia podľa rodiča (skóre rodiča je
+najbližší odsek) a výsledok nesie len zasiahnuté odseky. Celý paragraf sa pošle
+agentovi až na požiadanie (predpona dotazu expand:).
+
+Prostredie:
+- LEGAL_HIERARCHY     "0" vypne vyhľadávanie cez odseky (predvolene zapnuté, ak index existuje)
+- LEGAL_PARENT_STORE  cesta k úložisku rodičov (predvolene data/parent_store.bin)
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from agent.tools.chunk_store import ChunkStore
+
+DEFAULT_CHILDREN_COLLECTION = "legal_document_children"
+DEFAULT_PARENT_STORE_PATH = "data/parent_store.bin"
+# Koľko odsekov na výsledok sa načíta (jeden paragraf môže mať viac zásahov)
+CHILD_FETCH_FACTOR = 4
+# Text pred prvým odsekom dlhší ako toto je obsah paragrafu, nie nadpis
+HEADING_CHARS = 200
+
+ODSEK = re.compile(r'(?:^|\n|[ \t]{2,})[ \t]*\((\d+[a-z]?)\)(?=\s)')
+WHITESPACE = re.compile(r'\s+')
+
+
+def parent_id(law_id: str, marker: str, valid_from: int) -> str:
+    """Id paragrafu v znení (rovnaký tvar ako id chunkov)"""
+    key = f"{law_id}_{marker.replace('§', 'par').replace('Čl.', 'cl')}_{valid_from}"
+    return re.sub(r'[^\w-]', '_', WHITESPACE.sub('_', key))
+
+
+def split_odseks(text: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """Nadpis paragrafu a odseky [(číslo, text)] - paragraf bez odsekov je jeden odsek s číslom ''"""
+    parts = ODSEK.split(text)
+    prefix = WHITESPACE.sub(' ', parts[0]).strip()
+    odseks = [(label, WHITESPACE.sub(' ', body).strip()) for label, body in zip(parts[1::2], parts[2::2])]
+    if not odseks:
+        return "", [("", prefix)]
+    if len(prefix) > HEADING_CHARS:
+        # Úvodný text pred (1) je obsah, nie nadpis
+        return "", [("", prefix)] + odseks
+    return prefix, odseks
+
+
+def child_label(marker: str, odsek: str) -> str:
+    return f"{marker} ods. {odsek}" if odsek else marker
+
+
+class HierarchicalIndex:
+    """Odseky v ChromaDB a paragrafy v úložisku rodičov"""
+
+    def __init__(self, children: Any, parents: ChunkStore):
+        self.children = children
+        self.parents = parents
+        # Paragraf chunku (law_id, § 135) -> najnovšie znenie rodiča (id končí dátumom účinnosti)
+        self._by_paragraph: Dict[Tuple[str, str], str] = {}
+        for row, id_ in enumerate(parents.ids()):
+            key = (parents.law_id_at(row), parents.paragraph_at(row))
+            self._by_paragraph[key] = max(id_, self._by_paragraph.get(key, ""))
+
+    def query(self, query_embeddings: List[List[float]], limit: int, where: Optional[Dict] = None) -> Dict:
+        """Najbližšie paragrafy podľa odsekov (tvar collection.query) - dokument sú zasiahnuté odseky"""
+        found = self.children.query(
+            query_embeddings=query_embeddings, n_results=limit * CHILD_FETCH_FACTOR, where=where,
+            include=['metadatas', 'distances']
+        )
+        groups: Dict[str, Dict[str, Any]] = {}
+        for metadata, distance in zip(found['metadatas'][0], found['distances'][0]):
+            group = groups.setdefault(metadata['parent_id'], {'distance': distance, 'metadata': metadata, 'hits': {}})
+            # Okná jedného odseku sa zlúčia, poradie odsekov podľa textu paragrafu
+            group['hits'].setdefault(metadata['order'], metadata)
+        ranked = list(groups.items())[:limit]
+
+        results = {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+        for id_, group in ranked:
+            hits = [group['hits'][order] for order in sorted(group['hits'])]
+            parent = self.parents.text(id_) or ""
+            marker = group['metadata']['paragraph']
+            odseks = [hit['odsek'] for hit in hits if hit['odsek']]
+            label = f"{marker} ods. {', '.join(odseks)}" if odseks else marker
+            results['ids'][0].append(id_)
+            results['documents'][0].append(" … ".join(parent[hit['start']:hit['end']] for hit in hits))
+            results['metadatas'][0].append({**group['metadata'], 'paragraph': label, 'paragraphs': label})
+            results['distances'][0].append(group['distance'])
+        return results
+
+    def parent_of(self, result: Dict[str, Any]) -> Optional[str]:
+        """Id rodiča výsledku - priamo pre výsledky odsekov, pre chunky podľa hlavného paragrafu"""
+        if self.parents.row_of(result.get('id', '')) is not None:
+            return result['id']
+        paragraph = WHITESPACE.sub(' ', result.get('paragraph') or '').strip()
+        return self._by_paragraph.get((result.get('law_id'), paragraph))
+
+    def expand(self, result: Dict[str, Any]) -> Optional[str]:
+        """Celý text paragrafu výsledku"""
+        id_ = self.parent_of(result)
+        return self.parents.text(id_) if id_ else None
+
+
+def load_configured_hierarchy(client: Any) -> Optional[HierarchicalIndex]:
+    """Index odsekov podľa LEGAL_HIERARCHY a LEGAL_PARENT_STORE (None, ak je vypnutý alebo neexistuje)"""
+    if os.getenv("LEGAL_HIERARCHY", "1").lower() in ("0", "false", "no", ""):
+        return None
+    path = os.getenv("LEGAL_PARENT_STORE", DEFAULT_PARENT_STORE_PATH)
+    if path.lower() in ("0", "false", "no", "") or not Path(path).exists():
+        return None
+    names = [getattr(collection, "name", collection) for collection in client.list_collections()]
+    if DEFAULT_CHILDREN_COLLECTION not in names:
+        return None
+    return HierarchicalIndex(client.get_collection(name=DEFAULT_CHILDREN_COLLECTION), ChunkStore(Path(path)))
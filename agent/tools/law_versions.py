@@ -0,0 +1,292 @@
+"""
+Verzie zákonov - delta ukladanie chunkov a filter účinnosti k dátumu (asof:)
+
+Každý zákon môže mať viac znení (súbory ZZ_<rok>_<číslo>_<účinnosť>.txt, v
+files_metadata.json valid_from/valid_to). Chunky sa identifikujú hashom textu: chunk,
+ktorý sa nezmenil oproti predchádzajúcemu zneniu toho istého zákona, sa neukladá znova,
+len sa predĺži jeho platnosť. Každý uložený chunk má preto jeden súvislý interval
+valid_from..valid_to (metadáta ako celé čísla YYYYMMDD) - chunk, ktorý sa po vypustení
+v neskoršom znení vráti, sa uloží ako nový záznam.
+
+Index verzií (data/law_versions.json) drží pre každý interval medzi hranicami účinnosti
+bitmapu príslušnosti chunkov - dotaz asof:2025-01-01 nájde interval binárnym
+vyhľadávaním a množinu platných chunkov bez duplicitných indexov pre každé znenie.
+
+Prostredie:
+- LEGAL_VERSION_INDEX  cesta k indexu verzií (predvolene data/law_versions.json), "0" vypne
+"""
+
+import os
+import re
+import json
+import base64
+import bisect
+import hashlib
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+DEFAULT_VERSION_INDEX_PATH = "data/law_versions.json"
+OPEN_END = 99991231
+FILENAME_DATE = re.compile(r'_(\d{8})\.txt$')
+
+
+def parse_date(value: Any) -> Optional[date]:
+    """Dátum z '01.11.2024', '2024-11-01' alebo '20241101' (None pre prázdnu hodnotu)"""
+    if not value:
+        return None
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in ("%d.%m.%Y", "%Y-%m-%d", "%Y%m%d"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Neznámy formát dátumu: {value}")
+
+
+def date_key(value: Optional[date], default: int = OPEN_END) -> int:
+    """Dátum ako celé číslo YYYYMMDD (porovnateľné vo filtri ChromaDB)"""
+    return int(value.strftime("%Y%m%d")) if value else default
+
+
+def filename_date(filename: str) -> Optional[date]:
+    """Dátum účinnosti zakódovaný v názve súboru (ZZ_1991_513_20240601.txt)"""
+    match = FILENAME_DATE.search(filename)
+    return parse_date(match.group(1)) if match else None
+
+
+def chunk_hash(law_id: str, text: str) -> str:
+    """Hash obsahu chunku v rámci zákona"""
+    return hashlib.sha1(f"{law_id}\0{text}".encode("utf-8")).hexdigest()[:16]
+
+
+def chroma_where(where: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Plochý filter {kľúč: podmienka} vo formáte ChromaDB (viac podmienok cez $and)"""
+    if not where:
+        return None
+    if len(where) == 1:
+        return dict(where)
+    return {"$and": [{key: value} for key, value in where.items()]}
+
+
+def asof_filter(where: Optional[Dict[str, Any]], day: date) -> Dict[str, Any]:
+    """Pridá k filtru podmienku účinnosti chunku k dátumu"""
+    key = date_key(day)
+    return {**(where or {}), "valid_from": {"$lte": key}, "valid_to": {"$gte": key}}
+
+
+def plan_versions(files: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Znenia zákonov zoradené podľa účinnosti s doplneným valid_from/valid_to
+
+    valid_from chýba -> dátum z názvu súboru; valid_to chýba a existuje novšie znenie ->
+    deň pred jeho účinnosťou; inak otvorený koniec.
+    """
+    by_law: Dict[str, List[Dict[str, Any]]] = {}
+    for info in files:
+        valid_from = parse_date(info.get("valid_from")) or filename_date(info["filename"])
+        by_law.setdefault(info["law_id"], []).append({
+            **info,
+            "valid_from": valid_from,
+            "valid_to": parse_date(info.get("valid_to")),
+        })
+
+    versions = []
+    for law_id, items in by_law.items():
+        items.sort(key=lambda item: item["valid_from"] or date.min)
+        for item, following in zip(items, items[1:] + [None]):
+            if item["valid_to"] is None and following is not None and following["valid_from"]:
+                item["valid_to"] = following["valid_from"] - timedelta(days=1)
+            versions.append(item)
+    return versions
+
+
+class VersionIndexBuilder:
+    """Priraďuje chunky znení k uloženým záznamom (delta podľa hashu)"""
+
+    def __init__(self):
+        self.rows: List[str] = []
+        self.row_ranges: List[List[int]] = []
+        self.versions: List[Dict[str, Any]] = []
+        self.members: List[List[int]] = []
+        self._used_ids: set = set()
+        # (law_id, hash) -> riadok z predchádzajúceho znenia (len ten sa smie predĺžiť)
+        self._previous: Dict[Tuple[str, str], int] = {}
+        self._current: Dict[Tuple[str, str], int] = {}
+        self._law: Optional[str] = None
+
+    def add_version(self, info: Dict[str, Any]) -> int:
+        """Začne nové znenie (znenia jedného zákona musia ísť za sebou podľa účinnosti)"""
+        if info["law_id"] != self._law:
+            self._previous, self._law = {}, info["law_id"]
+        else:
+            self._previous = self._current
+        self._current = {}
+        self.versions.append({
+            "law_id": info["law_id"],
+            "filename": info.get("filename", ""),
+            "valid_from": date_key(info.get("valid_from"), default=0),
+            "valid_to": date_key(info.get("valid_to")),
+        })
+        self.members.append([])
+        return len(self.versions) - 1
+
+    def add_chunk(self, version: int, chunk: Dict[str, Any]) -> Tuple[int, bool]:
+        """
+        Zaradí chunk do znenia
+
+        Returns:
+            (riadok, nový) - nový=False, ak sa chunk len predĺžil z predchádzajúceho znenia
+            alebo sa v tomto znení opakuje
+        """
+        info = self.versions[version]
+        key = (info["law_id"], chunk_hash(info["law_id"], chunk["text"]))
+        row = self._current.get(key)
+        is_new = False
+        if row is None:
+            row = self._previous.get(key)
+            if row is not None:
+                self.row_ranges[row][1] = info["valid_to"]
+            else:
+                row = len(self.rows)
+                chunk_id = self._unique_id(chunk["id"], info["valid_from"])
+                self._used_ids.add(chunk_id)
+                self.rows.append(chunk_id)
+                self.row_ranges.append([info["valid_from"], info["valid_to"]])
+                is_new = True
+            self._current[key] = row
+            self.members[version].append(row)
+        return row, is_new
+
+    def _unique_id(self, chunk_id: str, valid_from: int) -> str:
+        """Id chunku, pri kolízii s iným textom (iné znenie, opakovaný paragraf) so sufixom"""
+        candidate, attempt = chunk_id, 1
+        while candidate in self._used_ids:
+            candidate = f"{chunk_id}_v{valid_from}" + (f"-{attempt}" if attempt > 1 else "")
+            attempt += 1
+        return candidate
+
+    def chunk_metadata(self, row: int) -> Dict[str, Any]:
+        """Metadáta účinnosti záznamu (po spracovaní všetkých znení)"""
+        valid_from, valid_to = self.row_ranges[row]
+        return {"valid_from": valid_from, "valid_to": valid_to}
+
+    def build(self) -> "VersionIndex":
+        """Bitmapy pre intervaly medzi hranicami účinnosti"""
+        boundaries = sorted(
+            {version["valid_from"] for version in self.versions}
+            | {_next_day(version["valid_to"]) for version in self.versions if version["valid_to"] != OPEN_END}
+        )
+        members = [rows_bitmap(rows, len(self.rows)) for rows in self.members]
+        bitmaps = []
+        for start in boundaries:
+            bitmap = 0
+            for version, version_bitmap in zip(self.versions, members):
+                if version["valid_from"] <= start <= version["valid_to"]:
+                    bitmap |= version_bitmap
+            bitmaps.append(bitmap)
+        return VersionIndex(self.rows, self.row_ranges, self.versions, members, boundaries, bitmaps)
+
+
+def rows_bitmap(rows: Iterable[int], size: int) -> int:
+    """Bitmapa riadkov ako celé číslo (bit i = riadok i)"""
+    data = bytearray((size + 7) // 8)
+    for row in rows:
+        data[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(data, "little")
+
+
+def _next_day(key: int) -> int:
+    return date_key(datetime.strptime(str(key), "%Y%m%d").date() + timedelta(days=1))
+
+
+def _encode(bitmap: int) -> str:
+    return base64.b64encode(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")).decode("ascii")
+
+
+def _decode(data: str) -> int:
+    return int.from_bytes(base64.b64decode(data), "little")
+
+
+class VersionIndex:
+    """Bitmapy príslušnosti chunkov k zneniam a k intervalom účinnosti"""
+
+    def __init__(self, rows: List[str], row_ranges: List[List[int]], versions: List[Dict[str, Any]],
+                 members: List[int], boundaries: List[int], bitmaps: List[int]):
+        self.rows = rows
+        self.row_ranges = row_ranges
+        self.versions = versions
+        self.members = members
+        self.boundaries = boundaries
+        self.bitmaps = bitmaps
+        self._sets: Dict[int, FrozenSet[str]] = {}
+
+    def interval(self, day: date) -> Optional[int]:
+        """Index intervalu platného k dátumu (None pred prvou účinnosťou)"""
+        position = bisect.bisect_right(self.boundaries, date_key(day)) - 1
+        return position if position >= 0 else None
+
+    def ids_at(self, day: date) -> FrozenSet[str]:
+        """Id chunkov účinných k dátumu (množina pre interval sa vytvorí raz)"""
+        position = self.interval(day)
+        if position is None:
+            return frozenset()
+        if position not in self._sets:
+            bitmap = self.bitmaps[position]
+            self._sets[position] = frozenset(
+                chunk_id for row, chunk_id in enumerate(self.rows) if bitmap >> row & 1
+            )
+        return self._sets[position]
+
+    def laws_at(self, day: date) -> Dict[str, str]:
+        """Znenie (súbor) každého zákona účinné k dátumu"""
+        key = date_key(day)
+        return {
+            version["law_id"]: version["filename"]
+            for version in self.versions if version["valid_from"] <= key <= version["valid_to"]
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Počty znení, uložených chunkov a chunkov vo všetkých zneniach spolu"""
+        total = sum(bin(bitmap).count("1") for bitmap in self.members)
+        return {
+            "versions": len(self.versions),
+            "stored_chunks": len(self.rows),
+            "chunks_all_versions": total,
+            "saved_ratio": round(1 - len(self.rows) / total, 4) if total else 0.0,
+            "intervals": len(self.boundaries),
+        }
+
+    def save(self, path: Path):
+        """Uloží index (JSON, bitmapy v base64)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "rows": self.rows,
+            "row_ranges": self.row_ranges,
+            "versions": self.versions,
+            "members": [_encode(bitmap) for bitmap in self.members],
+            "boundaries": self.boundaries,
+            "bitmaps": [_encode(bitmap) for bitmap in self.bitmaps],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "VersionIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            data["rows"], data["row_ranges"], data["versions"], [_decode(item) for item in data["members"]],
+            data["boundaries"], [_decode(item) for item in data["bitmaps"]],
+        )
+
+
+def load_configured_versions() -> Optional[VersionIndex]:
+    """Index verzií podľa LEGAL_VERSION_INDEX (None, ak je vypnutý alebo neexistuje)"""
+    path = os.getenv("LEGAL_VERSION_INDEX", DEFAULT_VERSION_INDEX_PATH)
+    if path.lower() in ("0", "false", "no", "") or not Path(path).exists():
+        return None
+    return VersionIndex.load(Path(path))
@@ -0,0 +1,94 @@
+"""
+Lenivé (lazy) proxy nástroje pre rýchly štart agenta
+
+LazyTool má rovnaký názov a popis ako cieľový nástroj, ale ťažký backend
+(embedding model, ChromaDB, HTTP klienti) vytvorí až pri prvom použití,
+prípadne ho zahreje vo vlákne na pozadí.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Optional, Type
+
+from langchain.tools import BaseTool
+from pydantic import Field
+
+from agent.tracing import get_tracer
+
+
+def _field_default(tool_cls: Type[BaseTool], field_name: str) -> str:
+    """Prečíta predvolenú hodnotu poľa triedy nástroja bez jej inštancovania"""
+    fields = getattr(tool_cls, "model_fields", None) or getattr(tool_cls, "__fields__", {})
+    return fields[field_name].default
+
+
+class LazyTool(BaseTool):
+    """Proxy nástroj, ktorý vytvorí skutočný nástroj až pri prvom volaní"""
+
+    name: str = "lazy_tool"
+    description: str = ""
+
+    # Pydantic fields
+    factory: Optional[Any] = Field(default=None, exclude=True)
+    instance: Optional[Any] = Field(default=None, exclude=True)
+    init_error: Optional[str] = Field(default=None, exclude=True)
+    load_ms: Optional[float] = Field(default=None, exclude=True)
+    lock: Optional[Any] = Field(default=None, exclude=True)
+
+    def __init__(self, name: str, description: str, factory: Callable[[], BaseTool], **kwargs):
+        super().__init__(name=name, description=description, factory=factory, **kwargs)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def for_class(cls, tool_cls: Type[BaseTool], *args, **kwargs) -> "LazyTool":
+        """Vytvorí proxy pre triedu nástroja (názov a popis sa prevezmú z triedy)"""
+        return cls(
+            name=_field_default(tool_cls, "name"),
+            description=_field_default(tool_cls, "description"),
+            factory=lambda: tool_cls(*args, **kwargs)
+        )
+
+    @property
+    def is_ready(self) -> bool:
+        """Či je backend už vytvorený (úspešne alebo s chybou)"""
+        return self.instance is not None or self.init_error is not None
+
+    def get_tool(self) -> Optional[BaseTool]:
+        """Vráti skutočný nástroj, pri prvom volaní ho vytvorí (thread-safe)"""
+        if self.is_ready:
+            return self.instance
+
+        with self.lock:
+            if not self.is_ready:
+                start = time.perf_counter()
+                with get_tracer().span("tool.load", tool=self.name) as span:
+                    try:
+                        self.instance = self.factory()
+                    except Exception as e:
+                        self.init_error = str(e)
+                        span.set("error", self.init_error)
+                        print(f"⚠️ Chyba pri načítaní nástroja {self.name}: {e}")
+                self.load_ms = (time.perf_counter() - start) * 1000
+
+        return self.instance
+
+    def warm_up(self, background: bool = True) -> Optional[threading.Thread]:
+        """Vytvorí backend vopred - predvolene vo vlákne na pozadí"""
+        if not background:
+            self.get_tool()
+            return None
+
+        thread = threading.Thread(target=self.get_tool, name=f"warmup-{self.name}", daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self, query: str) -> str:
+        """Deleguje volanie na skutočný nástroj"""
+        tool = self.get_tool()
+        if tool is None:
+            return f"Nástroj {self.name} nie je dostupný: {self.init_error}"
+        return tool._run(query)
+
+    async def _arun(self, query: str) -> str:
+        """Async verzia"""
+        return self._run(query)
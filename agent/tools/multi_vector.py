@@ -0,0 +1,119 @@
+"""
+Veľkosť chunkov v tokenoch a viac vektorov pre dlhé chunky
+
+Embedding model vidí len prvých max_seq_length tokenov (MiniLM: 128 vrátane <s> a </s>).
+Zvyšok dlhšieho chunku sa pri embeddingu ticho zahodí. Chunky sa preto merajú
+tokenizérom modelu a chunk dlhší ako okno modelu dostane pri ingeste ďalšie vektory
+pre okná 2..n (s prekryvom). Tie sa uložia do kolekcie legal_document_windows bez
+textov, s metadátami chunku a jeho id.
+
+Prvé okno je vektor chunku v hlavnej kolekcii (model text oreže rovnako). Pri dotaze
+sa hlavná kolekcia a okná prehľadajú s rovnakým filtrom a skóre chunku je maximum
+podobnosti cez jeho okná (najmenšia vzdialenosť).
+
+Prostredie:
+- LEGAL_MULTI_VECTOR  "0" vypne skórovanie cez okná pri dotaze (predvolene zapnuté, ak kolekcia okien existuje)
+"""
+
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_WINDOWS_COLLECTION = "legal_document_windows"
+WINDOW_OVERLAP_TOKENS = 32
+# Odhad bez tokenizéra (pôvodný token_estimate chunkovania)
+CHARS_PER_TOKEN = 4
+# Koľko okien na výsledok sa načíta z kolekcie okien (chunk môže mať viac zásahov)
+WINDOW_FETCH_FACTOR = 3
+
+
+class TokenWindows:
+    """Počet tokenov textu a okná modelu ako rozsahy znakov (tokenizér embedding modelu)"""
+
+    def __init__(self, tokenizer: Any = None, max_seq_length: int = 128, overlap: int = WINDOW_OVERLAP_TOKENS):
+        self.tokenizer = tokenizer
+        # Špeciálne tokeny (<s>, </s>) zaberajú miesto v okne
+        special = tokenizer.num_special_tokens_to_add() if tokenizer is not None else 2
+        self.window = max_seq_length - special
+        self.overlap = min(overlap, self.window // 2)
+
+    @classmethod
+    def for_embedding(cls, embedding_function: Any) -> "TokenWindows":
+        """Okná podľa tokenizéra a max_seq_length embedding funkcie (bez nej odhad zo znakov)"""
+        if embedding_function is None:
+            return cls()
+        return cls(embedding_function.tokenizer, embedding_function.max_seq_length)
+
+    def count(self, text: str) -> int:
+        if self.tokenizer is None:
+            return len(text) // CHARS_PER_TOKEN
+        return len(self.tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"])
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        """Rozsahy znakov okien - prvé zodpovedá orezaniu modelom, ďalšie sa prekrývajú o overlap tokenov"""
+        if self.tokenizer is None:
+            offsets = [(start, min(start + CHARS_PER_TOKEN, len(text))) for start in range(0, len(text), CHARS_PER_TOKEN)]
+        else:
+            offsets = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True,
+                                     verbose=False)["offset_mapping"]
+        if not offsets:
+            return [(0, len(text))]
+
+        spans = []
+        stride = self.window - self.overlap
+        start = 0
+        while True:
+            end = min(start + self.window, len(offsets))
+            spans.append((offsets[start][0], offsets[end - 1][1]))
+            if end >= len(offsets):
+                return spans
+            start += stride
+
+
+def coverage(token_counts: Iterable[int], window: int, overlap: int = WINDOW_OVERLAP_TOKENS) -> Dict[str, Any]:
+    """Podiel tokenov chunkov, ktoré model vidí s jedným vektorom na chunk, a počet vektorov s oknami"""
+    counts = list(token_counts)
+    total = sum(counts)
+    first = sum(min(count, window) for count in counts)
+    stride = window - min(overlap, window // 2)
+    windows = sum(1 + -(-max(0, count - window) // stride) for count in counts)
+    return {
+        "chunks": len(counts),
+        "tokens": total,
+        "window_tokens": window,
+        "over_window": sum(1 for count in counts if count > window),
+        "single_vector_coverage": round(first / total, 4) if total else 1.0,
+        "vectors": windows,
+        "extra_vectors": windows - len(counts),
+    }
+
+
+def max_pool(*hits: Tuple[List[str], List[float]], limit: int) -> Tuple[List[str], List[float]]:
+    """Zlúči zásahy podľa id chunku - skóre chunku je najmenšia vzdialenosť cez jeho okná"""
+    best: Dict[str, float] = {}
+    for ids, distances in hits:
+        for chunk_id, distance in zip(ids, distances):
+            if distance < best.get(chunk_id, float("inf")):
+                best[chunk_id] = distance
+    ranked = sorted(best.items(), key=lambda item: item[1])[:limit]
+    return [chunk_id for chunk_id, _ in ranked], [distance for _, distance in ranked]
+
+
+def window_hits(collection: Any, query_embeddings: List[List[float]], limit: int,
+                where: Optional[Dict] = None) -> Tuple[List[str], List[float]]:
+    """Zásahy v kolekcii okien ako (id chunku, vzdialenosť)"""
+    kwargs = {"query_embeddings": query_embeddings, "n_results": limit * WINDOW_FETCH_FACTOR,
+              "include": ["metadatas", "distances"]}
+    if where:
+        kwargs["where"] = where
+    found = collection.query(**kwargs)
+    return [metadata["chunk_id"] for metadata in found["metadatas"][0]], found["distances"][0]
+
+
+def load_configured_windows(client: Any) -> Optional[Any]:
+    """Kolekcia okien podľa LEGAL_MULTI_VECTOR (None, ak je vypnutá alebo neexistuje)"""
+    if os.getenv("LEGAL_MULTI_VECTOR", "1").lower() in ("0", "false", "no", ""):
+        return None
+    names = [getattr(collection, "name", collection) for collection in client.list_collections()]
+    if DEFAULT_WINDOWS_COLLECTION not in names:
+        return None
+    return client.get_collection(name=DEFAULT_WINDOWS_COLLECTION)
@@ -0,0 +1,184 @@
+"""
+Takmer duplicitné chunky - MinHash/LSH pri ingeste, zlúčenie výsledkov pri dotaze
+
+Kontextové chunkovanie prenáša posledný paragraf do ďalšieho chunku a malé chunky sa
+spájajú so susedmi, takže susedné chunky zdieľajú veľkú časť textu. Pri ingeste sa pre
+každý chunk vypočíta MinHash podpis slovných shinglov. LSH (pásma podpisu) nájde
+kandidátske páry v rámci zákona a pár sa uloží, ak odhadnuté prekrytie
+|A ∩ B| / min(|A|, |B|) dosiahne prah.
+
+Prekrytie namiesto Jaccardovej podobnosti: chunk A+B a B+C zdieľa celý paragraf B, ale
+Jaccard je len ~1/3. Prekrytie sa odvodí z odhadu Jaccardu J a počtu shinglov:
+|A ∩ B| = J (|A| + |B|) / (1 + J).
+
+Uložia sa len priame páry (susedia), nie tranzitívne skupiny - reťaz A~B~C~D by
+inak zlúčila celý zákon. Pri dotaze sa výsledok pripojí k lepšie hodnotenému
+výsledku, ak je jeho priamym susedom.
+
+Prostredie:
+- LEGAL_NEAR_DUPLICATES  cesta k indexu (predvolene data/near_duplicates.json), "0" vypne
+"""
+
+import os
+import re
+import json
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_NEAR_DUPLICATES_PATH = "data/near_duplicates.json"
+NUM_PERMUTATIONS = 128
+BANDS = 64
+SHINGLE_WORDS = 4
+DEFAULT_THRESHOLD = 0.5
+# Väčšie koše LSH sú spoločné frázy (napr. "v znení neskorších predpisov"), nie duplicity
+MAX_BUCKET = 50
+
+MERSENNE_PRIME = (1 << 31) - 1
+WORD = re.compile(r"\w+", re.UNICODE)
+
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> np.ndarray:
+    """Hashe slovných k-gramov (malé písmená, stabilné medzi procesmi)"""
+    words = WORD.findall(text.lower())
+    if len(words) < size:
+        words = words + [""] * (size - len(words))
+    grams = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(gram.encode()) % MERSENNE_PRIME for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(hashes: np.ndarray) -> np.ndarray:
+    """MinHash podpis (NUM_PERMUTATIONS univerzálnych hashov a*x+b mod p)"""
+    if not len(hashes):
+        return np.full(NUM_PERMUTATIONS, MERSENNE_PRIME, dtype=np.uint32)
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % MERSENNE_PRIME).min(axis=1).astype(np.uint32)
+
+
+def estimated_overlap(signature_a: np.ndarray, signature_b: np.ndarray, size_a: int, size_b: int) -> float:
+    """Odhad |A ∩ B| / min(|A|, |B|) z MinHash podpisov a počtov shinglov"""
+    jaccard = float(np.mean(signature_a == signature_b))
+    smaller = min(size_a, size_b)
+    if not smaller:
+        return 0.0
+    return min(1.0, jaccard * (size_a + size_b) / (1 + jaccard) / smaller)
+
+
+class NearDuplicateIndexBuilder:
+    """Zbiera podpisy chunkov počas ingestu, build() nájde páry"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, bands: int = BANDS):
+        if NUM_PERMUTATIONS % bands:
+            raise ValueError(f"Počet pásiem {bands} musí deliť {NUM_PERMUTATIONS}")
+        self.threshold = threshold
+        self.bands = bands
+        self.ids: List[str] = []
+        self.law_ids: List[str] = []
+        self.sizes: List[int] = []
+        self.signatures: List[np.ndarray] = []
+
+    def add(self, chunk_id: str, law_id: str, text: str):
+        hashes = shingles(text)
+        self.ids.append(chunk_id)
+        self.law_ids.append(law_id)
+        self.sizes.append(len(hashes))
+        self.signatures.append(minhash(hashes))
+
+    def candidates(self) -> Iterable[Tuple[int, int]]:
+        """Kandidátske páry riadkov - zhoda aspoň jedného pásma v rámci zákona"""
+        if not self.signatures:
+            return set()
+        matrix = np.vstack(self.signatures)
+        rows = NUM_PERMUTATIONS // self.bands
+        pairs = set()
+        for band in range(self.bands):
+            buckets: Dict[Tuple, List[int]] = {}
+            keys = matrix[:, band * rows:(band + 1) * rows]
+            for row, key in enumerate(map(bytes, keys)):
+                buckets.setdefault((self.law_ids[row], key), []).append(row)
+            for members in buckets.values():
+                if 1 < len(members) <= MAX_BUCKET:
+                    pairs.update((a, b) for i, a in enumerate(members) for b in members[i + 1:])
+        return pairs
+
+    def build(self) -> "NearDuplicateIndex":
+        pairs = []
+        for a, b in sorted(self.candidates()):
+            overlap = estimated_overlap(self.signatures[a], self.signatures[b], self.sizes[a], self.sizes[b])
+            if overlap >= self.threshold:
+                pairs.append((self.ids[a], self.ids[b], round(overlap, 3)))
+        return NearDuplicateIndex(pairs, len(self.ids), self.threshold)
+
+
+class NearDuplicateIndex:
+    """Páry takmer duplicitných chunkov (id, id, odhad prekrytia)"""
+
+    def __init__(self, pairs: List[Tuple[str, str, float]], chunks: int, threshold: float):
+        self.pairs = [tuple(pair) for pair in pairs]
+        self.chunks = chunks
+        self.threshold = threshold
+        self._neighbours: Dict[str, Dict[str, float]] = {}
+        for a, b, overlap in self.pairs:
+            self._neighbours.setdefault(a, {})[b] = overlap
+            self._neighbours.setdefault(b, {})[a] = overlap
+
+    def neighbours(self, chunk_id: str) -> Dict[str, float]:
+        """Priami susedia chunku s odhadom prekrytia"""
+        return self._neighbours.get(chunk_id, {})
+
+    def stats(self) -> Dict[str, Any]:
+        overlaps = [overlap for _, _, overlap in self.pairs]
+        return {
+            "chunks": self.chunks,
+            "pairs": len(self.pairs),
+            "chunks_with_duplicates": len(self._neighbours),
+            "mean_overlap": round(float(np.mean(overlaps)), 3) if overlaps else 0.0,
+            "threshold": self.threshold,
+        }
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"threshold": self.threshold, "chunks": self.chunks, "pairs": self.pairs}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "NearDuplicateIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["pairs"], data["chunks"], data["threshold"])
+
+
+def collapse(results: List[Dict[str, Any]], index: NearDuplicateIndex) -> List[Dict[str, Any]]:
+    """
+    Zlúči výsledky, ktoré sú priamymi susedmi lepšie hodnoteného výsledku
+
+    Zlúčený výsledok si ponechá úryvok najlepšieho chunku, paragrafy sa zjednotia
+    (v poradí výskytu) a 'duplicates' obsahuje id pripojených chunkov.
+    """
+    kept: List[Dict[str, Any]] = []
+    for result in results:
+        neighbours = index.neighbours(result.get("id", ""))
+        target = next((item for item in kept if item.get("id") in neighbours), None)
+        if target is None:
+            kept.append(dict(result))
+            continue
+        paragraphs = [p.strip() for p in f"{target['paragraphs']}, {result['paragraphs']}".split(",") if p.strip()]
+        target["paragraphs"] = ", ".join(dict.fromkeys(paragraphs))
+        target.setdefault("duplicates", []).append(result["id"])
+    for rank, result in enumerate(kept, 1):
+        result["rank"] = rank
+    return kept
+
+
+def load_configured_duplicates() -> Optional[NearDuplicateIndex]:
+    """Index duplicít podľa LEGAL_NEAR_DUPLICATES (None, ak je vypnutý alebo neexistuje)"""
+    path = os.getenv("LEGAL_NEAR_DUPLICATES", DEFAULT_NEAR_DUPLICATES_PATH)
+    if path.lower() in ("0", "false", "no", "") or not Path(path).exists():
+        return None
+    return NearDuplicateIndex.load(Path(path))
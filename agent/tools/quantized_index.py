@@ -0,0 +1,289 @@
+"""
+Kvantizovaný vektorový index (int8 / product quantization) s presným prepočtom skóre
+
+Index sa exportuje z ChromaDB kolekcie do adresára:
+- index.json         parametre, poradie id a law_id každého vektora
+- int8.npy           skalárne kvantizované vektory (N x D, int8) + int8_scale.npy (N, float32)
+- pq_codes.npy       PQ kódy (N x M, uint8) + pq_codebooks.npy (M x K x D/M, float32)
+- vectors.npy        pôvodné float32 vektory - len pre prepočet skóre, otvárajú sa cez mmap
+
+V pamäti procesu sú len kódy (int8 = 1/4, PQ = 1/32 pri M=48), float32 vektory
+sa čítajú z disku len pre top kandidátov, ktorých skóre sa prepočíta presne.
+Stránky mmap súboru zdieľajú všetky procesy cez page cache.
+
+Vzdialenosti sú kompatibilné s ChromaDB (štvorec L2 normalizovaných vektorov).
+
+Prostredie:
+- LEGAL_VECTOR_INDEX       "int8" alebo "pq" zapne index v EnhancedVectorSearchTool
+- LEGAL_VECTOR_INDEX_PATH  adresár indexu (predvolene data/vector_index/legal_documents)
+"""
+
+import os
+import json
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from agent.tracing import get_tracer
+
+DEFAULT_INDEX_PATH = "data/vector_index/legal_documents"
+INDEX_METHODS = ("int8", "pq")
+# PQ je hrubší - presne sa prepočíta viac kandidátov
+DEFAULT_RESCORE_FACTOR = {"int8": 4, "pq": 16}
+# Počet zapamätaných množín povolených id (intervaly účinnosti, kandidáti z plánovača dotazov)
+ALLOWED_CACHE_SIZE = 32
+FORMAT_VERSION = 1
+
+
+def _kmeans(data: np.ndarray, clusters: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """Jednoduchý Lloydov k-means (centroidy clusters x D)"""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=clusters, replace=False)].copy()
+    for _ in range(iterations):
+        # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2 (||x||^2 je pre argmin konštanta)
+        distances = (centroids ** 2).sum(axis=1) - 2 * data @ centroids.T
+        assignment = distances.argmin(axis=1)
+        for cluster in range(clusters):
+            members = data[assignment == cluster]
+            if len(members):
+                centroids[cluster] = members.mean(axis=0)
+            else:
+                # Prázdny klaster - nový stred z náhodného bodu
+                centroids[cluster] = data[rng.integers(len(data))]
+    return centroids
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symetrická int8 kvantizácia so škálou na vektor"""
+    scale = np.abs(vectors).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scale[:, None]), -127, 127).astype(np.int8)
+    return codes, scale.astype(np.float32)
+
+
+def train_pq(vectors: np.ndarray, subspaces: int, centroids: int = 256,
+             iterations: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+    """Natrénuje PQ codebooky a zakóduje vektory (kódy N x M, codebooky M x K x D/M)"""
+    count, dims = vectors.shape
+    if dims % subspaces:
+        raise ValueError(f"Dimenzia {dims} nie je deliteľná počtom podpriestorov {subspaces}")
+    centroids = min(centroids, count)
+    sub_dims = dims // subspaces
+
+    codebooks = np.zeros((subspaces, centroids, sub_dims), dtype=np.float32)
+    codes = np.zeros((count, subspaces), dtype=np.uint8)
+    for m in range(subspaces):
+        block = vectors[:, m * sub_dims:(m + 1) * sub_dims]
+        codebooks[m] = _kmeans(block, centroids, iterations, seed=m)
+        distances = (codebooks[m] ** 2).sum(axis=1) - 2 * block @ codebooks[m].T
+        codes[:, m] = distances.argmin(axis=1)
+    return codes, codebooks
+
+
+class QuantizedIndex:
+    """Kvantizovaný index s presným prepočtom skóre top kandidátov"""
+
+    def __init__(self, path: Path, info: Dict[str, Any], int8_codes: Optional[np.ndarray],
+                 int8_scale: Optional[np.ndarray], pq_codes: Optional[np.ndarray],
+                 pq_codebooks: Optional[np.ndarray], vectors: np.ndarray):
+        self.path = Path(path)
+        self.info = info
+        self.ids: List[str] = info["ids"]
+        self.law_ids = np.array(info["law_ids"])
+        self.int8_codes = int8_codes
+        self.int8_scale = int8_scale
+        self.pq_codes = pq_codes
+        self.pq_codebooks = pq_codebooks
+        self.vectors = vectors
+        # Riadky platné k dátumu (asof:) podľa množiny id z indexu verzií
+        self._allowed_rows: "OrderedDict[FrozenSet[str], np.ndarray]" = OrderedDict()
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dims(self) -> int:
+        return self.info["dims"]
+
+    @classmethod
+    def build(cls, path: Path, ids: List[str], embeddings: np.ndarray, metadatas: List[Dict],
+              pq_subspaces: Optional[int] = 48, source: str = "") -> "QuantizedIndex":
+        """Vytvorí index z vektorov a uloží ho do adresára"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+        int8_codes, int8_scale = quantize_int8(vectors)
+        np.save(path / "int8.npy", int8_codes)
+        np.save(path / "int8_scale.npy", int8_scale)
+
+        methods = ["int8"]
+        if pq_subspaces:
+            pq_codes, pq_codebooks = train_pq(vectors, pq_subspaces)
+            np.save(path / "pq_codes.npy", pq_codes)
+            np.save(path / "pq_codebooks.npy", pq_codebooks)
+            methods.append("pq")
+
+        np.save(path / "vectors.npy", vectors)
+        info = {
+            "format_version": FORMAT_VERSION,
+            "source": source,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "dims": int(vectors.shape[1]),
+            "methods": methods,
+            "pq_subspaces": pq_subspaces,
+            "ids": list(ids),
+            "law_ids": [(metadata or {}).get("law_id", "") for metadata in metadatas],
+        }
+        with open(path / "index.json", "w", encoding="utf-8") as f:
+            json.dump(info, f, ensure_ascii=False)
+        return cls.load(path)
+
+    @classmethod
+    def export(cls, collection, path: Path, pq_subspaces: Optional[int] = 48,
+               batch_size: int = 1000) -> "QuantizedIndex":
+        """Exportuje vektory ChromaDB kolekcie (po dávkach) do kvantizovaného indexu"""
+        ids, embeddings, metadatas = [], [], []
+        total = collection.count()
+        for offset in range(0, total, batch_size):
+            batch = collection.get(limit=batch_size, offset=offset, include=["embeddings", "metadatas"])
+            ids.extend(batch["ids"])
+            embeddings.extend(batch["embeddings"])
+            metadatas.extend(batch["metadatas"])
+        return cls.build(path, ids, np.asarray(embeddings, dtype=np.float32), metadatas,
+                         pq_subspaces=pq_subspaces, source=collection.name)
+
+    @classmethod
+    def load(cls, path: Path, methods: Optional[List[str]] = None) -> "QuantizedIndex":
+        """
+        Načíta index; kódy do pamäte, float32 vektory cez mmap
+
+        Args:
+            methods: Ktoré kódy načítať (predvolene všetky dostupné)
+        """
+        path = Path(path)
+        with open(path / "index.json", "r", encoding="utf-8") as f:
+            info = json.load(f)
+        if info.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Nepodporovaná verzia indexu: {info.get('format_version')}")
+
+        methods = methods or info["methods"]
+        int8_codes = int8_scale = pq_codes = pq_codebooks = None
+        if "int8" in methods:
+            int8_codes = np.load(path / "int8.npy")
+            int8_scale = np.load(path / "int8_scale.npy")
+        if "pq" in methods and "pq" in info["methods"]:
+            pq_codes = np.load(path / "pq_codes.npy")
+            pq_codebooks = np.load(path / "pq_codebooks.npy")
+        vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        return cls(path, info, int8_codes, int8_scale, pq_codes, pq_codebooks, vectors)
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """Veľkosť jednotlivých reprezentácií v bajtoch"""
+        sizes = {"float32": self.count * self.dims * 4}
+        if self.int8_codes is not None:
+            sizes["int8"] = self.int8_codes.nbytes + self.int8_scale.nbytes
+        if self.pq_codes is not None:
+            sizes["pq"] = self.pq_codes.nbytes + self.pq_codebooks.nbytes
+        return sizes
+
+    def _mask(self, where: Optional[Dict[str, Any]], allowed: Optional[FrozenSet[str]] = None) -> Optional[np.ndarray]:
+        """Indexy vektorov vyhovujúcich filtru a množine povolených id (None = všetky)"""
+        rows = np.flatnonzero(self.law_ids == where["law_id"]) if where else None
+        if allowed is None:
+            return rows
+        if allowed not in self._allowed_rows:
+            self._allowed_rows[allowed] = np.flatnonzero(
+                np.fromiter((chunk_id in allowed for chunk_id in self.ids), dtype=bool, count=self.count)
+            )
+            if len(self._allowed_rows) > ALLOWED_CACHE_SIZE:
+                self._allowed_rows.popitem(last=False)
+        self._allowed_rows.move_to_end(allowed)
+        allowed_rows = self._allowed_rows[allowed]
+        return allowed_rows if rows is None else np.intersect1d(rows, allowed_rows, assume_unique=True)
+
+    @staticmethod
+    def supports(where: Optional[Dict[str, Any]]) -> bool:
+        """Index vie filtrovať len podľa law_id (ostatné filtre rieši ChromaDB)"""
+        return not where or set(where) == {"law_id"} and isinstance(where["law_id"], str)
+
+    def approximate_scores(self, query: np.ndarray, method: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Približný skalárny súčin dotazu s kvantizovanými vektormi"""
+        if method == "int8":
+            codes = self.int8_codes if rows is None else self.int8_codes[rows]
+            scale = self.int8_scale if rows is None else self.int8_scale[rows]
+            return (codes @ query) * scale
+        if method == "pq":
+            codes = self.pq_codes if rows is None else self.pq_codes[rows]
+            subspaces, _, sub_dims = self.pq_codebooks.shape
+            # Tabuľka súčinov dotazu s centroidmi každého podpriestoru (M x K)
+            table = np.einsum("mkd,md->mk", self.pq_codebooks, query.reshape(subspaces, sub_dims))
+            return table[np.arange(subspaces), codes].sum(axis=1)
+        raise ValueError(f"Neznáma metóda indexu: {method}")
+
+    def search(self, query_embedding, limit: int = 8, where: Optional[Dict[str, Any]] = None,
+               method: str = "int8", rescore_factor: Optional[int] = None,
+               allowed: Optional[FrozenSet[str]] = None) -> Tuple[List[str], List[float]]:
+        """
+        Nájde najbližšie vektory
+
+        Args:
+            query_embedding: Normalizovaný vektor dotazu
+            limit: Počet výsledkov
+            where: Filter {"law_id": ...}
+            method: "int8" alebo "pq"
+            rescore_factor: Koľkonásobok limitu kandidátov sa prepočíta presne
+                (0 = bez prepočtu, predvolene DEFAULT_RESCORE_FACTOR podľa metódy)
+            allowed: Len tieto id (napr. chunky účinné k dátumu z indexu verzií)
+
+        Returns:
+            (id, vzdialenosti) zoradené od najbližšieho
+        """
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if rescore_factor is None:
+            rescore_factor = DEFAULT_RESCORE_FACTOR[method]
+        rows = self._mask(where, allowed)
+        if rows is not None and not len(rows):
+            return [], []
+
+        with get_tracer().span("quantized.search", method=method, limit=limit,
+                               rows=self.count if rows is None else len(rows)) as span:
+            scores = self.approximate_scores(query, method, rows)
+            candidates = min(len(scores), max(limit, limit * rescore_factor))
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            positions = top if rows is None else rows[top]
+
+            if rescore_factor:
+                # Presné skóre len pre kandidátov - stránky mmap sa čítajú podľa potreby
+                ordered = np.sort(positions)
+                scores_top = np.asarray(self.vectors[ordered], dtype=np.float32) @ query
+                positions = ordered
+            else:
+                scores_top = scores[top]
+
+            best = np.argsort(-scores_top)[:limit]
+            span.update(candidates=candidates, results=len(best))
+
+        ids = [self.ids[positions[i]] for i in best]
+        # Vzdialenosť ako v ChromaDB (l2): ||q - v||^2 = 2 - 2 q.v pre normalizované vektory
+        distances = [float(max(0.0, 2 - 2 * scores_top[i])) for i in best]
+        return ids, distances
+
+
+def load_configured_index() -> Tuple[Optional[QuantizedIndex], Optional[str]]:
+    """Index podľa LEGAL_VECTOR_INDEX / LEGAL_VECTOR_INDEX_PATH (None, ak je vypnutý alebo chýba)"""
+    method = os.getenv("LEGAL_VECTOR_INDEX", "").lower()
+    if not method or method in ("0", "hnsw", "chroma"):
+        return None, None
+    if method not in INDEX_METHODS:
+        raise ValueError(f"Neznámy LEGAL_VECTOR_INDEX: {method} (podporované: {', '.join(INDEX_METHODS)})")
+
+    path = Path(os.getenv("LEGAL_VECTOR_INDEX_PATH", DEFAULT_INDEX_PATH))
+    if not (path / "index.json").exists():
+        print(f"⚠️ Kvantizovaný index {path} neexistuje - spusti scripts/quantize_index.py export")
+        return None, None
+    return QuantizedIndex.load(path, methods=[method]), method
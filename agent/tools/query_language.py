@@ -0,0 +1,491 @@
+"""
+Dotazovací jazyk enhanced_vector_search - tokenizér, parser do AST a preklad pre ChromaDB
+
+Gramatika (operátory len veľkými písmenami, "a"/"alebo" sú bežné slová):
+
+    dotaz    := [explain:] [expand:] or       # voľby v ľubovoľnom poradí
+    or       := and (OR and)*
+    and      := unary ([AND] unary)*          # bez operátora = AND
+    unary    := NOT unary | primary
+    primary  := ( or ) | pole | "fráza" | slovo
+    pole     := law:513/1991 | asof:2025-01-01 | jurisdiction:sk
+              | contains:text | not_contains:text | regex:vzor
+
+Hodnota contains/not_contains/regex siaha až po ďalšie pole, operátor alebo "(" za
+medzerou, takže contains:fyzická osoba je jedna fráza. V úvodzovkách
+(contains:"fyzická osoba") je hodnota presne ohraničená.
+
+Slová mimo polí sú sémantický dotaz (poradie výsledkov), nie filter. Fráza
+v úvodzovkách mimo poľa je filter presnej zhody a zároveň časť sémantického dotazu.
+asof: a jurisdiction: sú voľby celého dotazu a musia byť na najvyššej úrovni.
+explain: pridá k výsledkom plán dotazu, expand: namiesto úryvkov vráti celé paragrafy.
+
+AST: Term (sémantické slovo), Match (law/contains/regex), And, Or, Not.
+Po normalizácii je not_contains:X = Not(Match contains X) a sémantické slová sú
+z filtra odstránené (None = bez filtra).
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from agent.tools.law_versions import parse_date
+
+FIELDS = ("not_contains", "contains", "regex", "law", "asof", "jurisdiction")
+PHRASE_FIELDS = ("contains", "not_contains", "regex")
+OPTION_FIELDS = ("asof", "jurisdiction")
+OPERATORS = ("AND", "OR", "NOT")
+
+FIELD_START = re.compile(r"(%s):" % "|".join(FIELDS), re.IGNORECASE)
+OPERATOR_WORD = re.compile(r"(?:AND|OR|NOT)(?=[\s()]|$)")
+QUERY_PREFIX = re.compile(r"^\s*(explain|expand):\s*", re.IGNORECASE)
+
+
+class QuerySyntaxError(ValueError):
+    """Chyba v zápise dotazu (správa je určená agentovi)"""
+
+
+@dataclass(frozen=True)
+class Term:
+    text: str
+
+
+@dataclass(frozen=True)
+class Match:
+    # law | contains | phrase | regex (phrase = fráza mimo poľa, filtruje ako contains)
+    kind: str
+    value: str
+
+
+@dataclass(frozen=True)
+class Option:
+    name: str
+    value: str
+
+
+@dataclass(frozen=True)
+class And:
+    children: Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class Or:
+    children: Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class Not:
+    child: Any
+
+
+Node = Union[Term, Match, And, Or, Not]
+
+
+@dataclass
+class ParsedQuery:
+    """Výsledok parsovania - filter (AST), sémantický dotaz a voľby"""
+    text: str
+    expr: Optional[Node]
+    semantic: str
+    asof: Optional[date] = None
+    jurisdiction: Optional[str] = None
+    explain: bool = False
+    expand: bool = False
+    warnings: List[str] = field(default_factory=list)
+
+
+# --- tokenizér ---------------------------------------------------------------------------
+
+def _boundary_after_space(query: str, position: int) -> bool:
+    """Či na pozícii (za medzerou) začína ďalšie pole, operátor alebo skupina"""
+    return (
+        position >= len(query)
+        or query[position] == "("
+        or FIELD_START.match(query, position) is not None
+        or OPERATOR_WORD.match(query, position) is not None
+    )
+
+
+def _quoted(query: str, position: int) -> Tuple[str, int]:
+    """Text v úvodzovkách od pozície úvodzovky (neukončená siaha do konca)"""
+    end = query.find('"', position + 1)
+    if end < 0:
+        return query[position + 1:], len(query)
+    return query[position + 1:end], end + 1
+
+
+def tokenize(query: str) -> List[Tuple[str, Any]]:
+    """Tokeny (typ, hodnota): LPAREN, RPAREN, OP, FIELD (názov, hodnota), PHRASE, WORD"""
+    tokens: List[Tuple[str, Any]] = []
+    depth = 0
+    i = 0
+    n = len(query)
+    while i < n:
+        char = query[i]
+        if char.isspace():
+            i += 1
+            continue
+        if char == "(":
+            tokens.append(("LPAREN", None))
+            depth += 1
+            i += 1
+            continue
+        if char == ")" and depth > 0:
+            tokens.append(("RPAREN", None))
+            depth -= 1
+            i += 1
+            continue
+        if char == '"':
+            text, i = _quoted(query, i)
+            if text.strip():
+                tokens.append(("PHRASE", text.strip()))
+            continue
+
+        operator = OPERATOR_WORD.match(query, i)
+        if operator:
+            tokens.append(("OP", operator.group()))
+            i = operator.end()
+            continue
+
+        field_match = FIELD_START.match(query, i)
+        if field_match:
+            name = field_match.group(1).lower()
+            i = field_match.end()
+            if i < n and query[i] == '"':
+                value, i = _quoted(query, i)
+            elif name in PHRASE_FIELDS:
+                value, i = _phrase_value(query, i, depth)
+            else:
+                start = i
+                while i < n and not query[i].isspace() and not (query[i] == ")" and depth > 0):
+                    i += 1
+                value = query[start:i]
+            if not value.strip():
+                raise QuerySyntaxError(f"Pole {name}: nemá hodnotu")
+            tokens.append(("FIELD", (name, value.strip())))
+            continue
+
+        start = i
+        while i < n and not query[i].isspace() and query[i] not in '("' and not (query[i] == ")" and depth > 0):
+            i += 1
+        tokens.append(("WORD", query[start:i]))
+    return tokens
+
+
+def _phrase_value(query: str, position: int, depth: int) -> Tuple[str, int]:
+    """Hodnota contains/not_contains/regex - po ďalšie pole, operátor alebo koniec skupiny"""
+    i = position
+    balance = 0
+    n = len(query)
+    while i < n:
+        char = query[i]
+        if char == "(":
+            balance += 1
+        elif char == ")":
+            if balance == 0 and depth > 0:
+                break
+            balance = max(balance - 1, 0)
+        elif char.isspace():
+            j = i
+            while j < n and query[j].isspace():
+                j += 1
+            if _boundary_after_space(query, j) or (depth > 0 and balance == 0 and query[j] == ")"):
+                break
+            i = j
+            continue
+        i += 1
+    return query[position:i], i
+
+
+# --- parser ------------------------------------------------------------------------------
+
+class _Parser:
+    def __init__(self, tokens: List[Tuple[str, Any]]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Optional[Tuple[str, Any]]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self) -> Tuple[str, Any]:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse_or(self) -> Node:
+        children = [self.parse_and()]
+        while self.peek() == ("OP", "OR"):
+            self.take()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Or(tuple(children))
+
+    def parse_and(self) -> Node:
+        children = [self.parse_unary()]
+        while True:
+            token = self.peek()
+            if token is None or token[0] == "RPAREN" or token == ("OP", "OR"):
+                break
+            if token == ("OP", "AND"):
+                self.take()
+            children.append(self.parse_unary())
+        return children[0] if len(children) == 1 else And(tuple(children))
+
+    def parse_unary(self) -> Node:
+        if self.peek() == ("OP", "NOT"):
+            self.take()
+            return Not(self.parse_unary())
+        return self.parse_primary()
+
+    def parse_primary(self) -> Node:
+        token = self.peek()
+        if token is None:
+            raise QuerySyntaxError("Neočakávaný koniec dotazu (chýba výraz za operátorom)")
+        kind, value = self.take()
+        if kind == "LPAREN":
+            if self.peek() is None or self.peek()[0] == "RPAREN":
+                raise QuerySyntaxError("Prázdne zátvorky")
+            node = self.parse_or()
+            # Neuzavretá zátvorka sa uzavrie na konci dotazu
+            if self.peek() is not None and self.peek()[0] == "RPAREN":
+                self.take()
+            return node
+        if kind == "OP":
+            raise QuerySyntaxError(f"Operátor {value} bez výrazu")
+        if kind == "WORD":
+            return Term(value)
+        if kind == "PHRASE":
+            return Match("phrase", value)
+        name, text = value
+        if name in OPTION_FIELDS:
+            return Option(name, text)
+        if name == "not_contains":
+            return Not(Match("contains", text))
+        if name == "regex":
+            try:
+                re.compile(text)
+            except re.error as e:
+                raise QuerySyntaxError(f"Neplatný regex '{text}': {e}")
+        return Match(name, text)
+
+
+def _semantic_words(node: Optional[Node], negated: bool = False) -> List[str]:
+    """Sémantické slová a frázy mimo negácie (v poradí dotazu)"""
+    if node is None:
+        return []
+    if isinstance(node, Term):
+        return [] if negated else [node.text]
+    if isinstance(node, Match):
+        return [node.value] if node.kind == "phrase" and not negated else []
+    if isinstance(node, Not):
+        return _semantic_words(node.child, not negated)
+    return [word for child in node.children for word in _semantic_words(child, negated)]
+
+
+def _extract_options(node: Node, parsed: ParsedQuery) -> Optional[Node]:
+    """Vyberie asof:/jurisdiction: z najvyššej úrovne (inde sú chybou)"""
+    children = node.children if isinstance(node, And) else (node,)
+    kept = []
+    for child in children:
+        if isinstance(child, Option):
+            if child.name == "asof":
+                try:
+                    parsed.asof = parse_date(child.value)
+                except ValueError as e:
+                    raise QuerySyntaxError(str(e))
+            else:
+                parsed.jurisdiction = child.value
+        else:
+            if _contains_option(child):
+                raise QuerySyntaxError("asof: a jurisdiction: musia byť na najvyššej úrovni dotazu (nie v OR/NOT)")
+            kept.append(child)
+    if not kept:
+        return None
+    return kept[0] if len(kept) == 1 else And(tuple(kept))
+
+
+def _contains_option(node: Node) -> bool:
+    if isinstance(node, Option):
+        return True
+    if isinstance(node, Not):
+        return _contains_option(node.child)
+    if isinstance(node, (And, Or)):
+        return any(_contains_option(child) for child in node.children)
+    return False
+
+
+def simplify(node: Optional[Node], warnings: Optional[List[str]] = None) -> Optional[Node]:
+    """
+    Filter bez sémantických slov (None = všetky chunky)
+
+    And/Or sa sploštia, Not(Not(x)) = x. Negované sémantické slovo nemá význam
+    (slová len radia výsledky) - ignoruje sa s varovaním.
+    """
+    warnings = warnings if warnings is not None else []
+    if node is None or isinstance(node, Term):
+        return None
+    if isinstance(node, Match):
+        return node
+    if isinstance(node, Not):
+        child = simplify(node.child, warnings)
+        if child is None:
+            warnings.append("NOT pred sémantickým slovom sa ignoruje - použi not_contains:")
+            return None
+        return child.child if isinstance(child, Not) else Not(child)
+
+    children = []
+    for child in node.children:
+        child = simplify(child, warnings)
+        if isinstance(node, Or) and child is None:
+            # OR so sémantickým slovom prepustí všetky chunky
+            return None
+        if child is None:
+            continue
+        if type(child) is type(node):
+            children.extend(child.children)
+        elif child not in children:
+            children.append(child)
+    if not children:
+        return None
+    return children[0] if len(children) == 1 else type(node)(tuple(children))
+
+
+def parse_query(query: str) -> ParsedQuery:
+    """Parsuje dotaz do AST filtra, sémantického textu a volieb"""
+    text = query.strip()
+    options = set()
+    prefix = QUERY_PREFIX.match(text)
+    while prefix:
+        options.add(prefix.group(1).lower())
+        text = text[prefix.end():]
+        prefix = QUERY_PREFIX.match(text)
+
+    parsed = ParsedQuery(text=text, expr=None, semantic="", explain="explain" in options, expand="expand" in options)
+    tokens = tokenize(text)
+    if not tokens:
+        return parsed
+
+    parser = _Parser(tokens)
+    node = parser.parse_or()
+    while parser.peek() is not None:
+        # Nadbytočná ")" - zvyšok je ďalšia časť konjunkcie
+        if parser.peek()[0] == "RPAREN":
+            parser.take()
+            continue
+        node = And((node, parser.parse_or()))
+
+    node = _extract_options(node, parsed)
+    parsed.semantic = " ".join(_semantic_words(node))
+    parsed.expr = simplify(node, parsed.warnings)
+    return parsed
+
+
+def format_expr(node: Optional[Node]) -> str:
+    """Čitateľný zápis filtra (pre explain:)"""
+    if node is None:
+        return "*"
+    if isinstance(node, Match):
+        return f'{node.kind}:"{node.value}"'
+    if isinstance(node, Not):
+        return f"NOT {format_expr(node.child)}"
+    joiner = " AND " if isinstance(node, And) else " OR "
+    return "(" + joiner.join(format_expr(child) for child in node.children) + ")"
+
+
+def leaves(node: Optional[Node]) -> List[Match]:
+    """Listy filtra zľava doprava"""
+    if node is None:
+        return []
+    if isinstance(node, Match):
+        return [node]
+    if isinstance(node, Not):
+        return leaves(node.child)
+    return [leaf for child in node.children for leaf in leaves(child)]
+
+
+# --- preklad pre ChromaDB (bez úložiska chunkov) ---------------------------------------
+
+def is_metadata(node: Node) -> bool:
+    """Filter len nad metadátami (law:)"""
+    if isinstance(node, Match):
+        return node.kind == "law"
+    if isinstance(node, Not):
+        return is_metadata(node.child)
+    return all(is_metadata(child) for child in node.children)
+
+
+def is_document(node: Node) -> bool:
+    """Filter len nad textom (contains/regex)"""
+    if isinstance(node, Match):
+        return node.kind != "law"
+    if isinstance(node, Not):
+        return is_document(node.child)
+    return all(is_document(child) for child in node.children)
+
+
+def _push_not(node: Node, negated: bool) -> Dict[str, Any]:
+    """Preklad s negáciou posunutou k listom (De Morgan)"""
+    if isinstance(node, Not):
+        return _push_not(node.child, not negated)
+    if isinstance(node, Match):
+        if node.kind == "law":
+            return {"law_id": {"$ne": node.value}} if negated else {"law_id": node.value}
+        if node.kind == "regex":
+            return {"$not_regex" if negated else "$regex": node.value}
+        return {"$not_contains" if negated else "$contains": node.value}
+    operator = "$or" if isinstance(node, Or) != negated else "$and"
+    return {operator: [_push_not(child, negated) for child in node.children]}
+
+
+def to_chroma(expr: Optional[Node]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Filter ako (where, where_document) pre ChromaDB
+
+    ChromaDB spája where a where_document cez AND, preto každá časť konjunkcie musí byť
+    čisto metadátová alebo čisto textová (napr. law:X OR contains:Y sa preložiť nedá).
+    Jednoduchý filter law: ostane plochý {"law_id": ...} (kvantizovaný index, shardy).
+    """
+    if expr is None:
+        return {}, {}
+    children = expr.children if isinstance(expr, And) else (expr,)
+    metadata = [child for child in children if is_metadata(child)]
+    document = [child for child in children if not is_metadata(child)]
+    mixed = [child for child in document if not is_document(child)]
+    if mixed:
+        raise QuerySyntaxError(
+            f"Výraz {format_expr(mixed[0])} kombinuje law: a text v OR/NOT - vyžaduje úložisko chunkov (LEGAL_CHUNK_STORE)"
+        )
+
+    where: Dict[str, Any] = {}
+    if len(metadata) == 1 and isinstance(metadata[0], Match):
+        where = {"law_id": metadata[0].value}
+    elif metadata:
+        compiled = [_push_not(child, False) for child in metadata]
+        where = compiled[0] if len(compiled) == 1 else {"$and": compiled}
+
+    where_document: Dict[str, Any] = {}
+    if document:
+        compiled = [_push_not(child, False) for child in document]
+        where_document = compiled[0] if len(compiled) == 1 else {"$and": compiled}
+    return where, where_document
+
+
+def legacy_parse(query: str) -> Dict[str, Any]:
+    """
+    Výsledok v pôvodnom tvare _parse_query (semantic_query, where_filters, where_document,
+    jurisdiction, asof, search_type) pre skripty benchmarkov
+    """
+    parsed = parse_query(query)
+    where, where_document = to_chroma(parsed.expr)
+    has_document = bool(where_document)
+    search_type = "semantic"
+    if has_document:
+        search_type = "combined" if parsed.semantic else "fulltext"
+    return {
+        "semantic_query": parsed.semantic or None,
+        "where_filters": where,
+        "where_document": where_document,
+        "jurisdiction": parsed.jurisdiction,
+        "asof": parsed.asof,
+        "search_type": search_type,
+    }
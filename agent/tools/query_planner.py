@@ -0,0 +1,460 @@
+"""
+Plánovač a vykonávanie dotazov enhanced_vector_search nad úložiskom chunkov
+
+Filter z AST (agent/tools/query_language.py) sa vykoná v krokoch od najlacnejšieho:
+
+1. metadata  - bitmapy zákonov (law:) a účinnosti (asof:) - presné, len bitové operácie
+2. trigram   - bitmapy trigramov textu pre contains: a doslovné časti regex: -
+               nadmnožina zhôd, vylúči väčšinu chunkov bez čítania textu
+3. verify    - presná kontrola podreťazcov (contains/not_contains) na kandidátoch
+4. regex     - regulárne výrazy na kandidátoch, ktoré prešli lacnejšími podmienkami
+5. vector    - sémantické poradie kandidátov (kvantizovaný index alebo ChromaDB s ids)
+
+Deti AND sa zoradia podľa ceny a odhadnutej selektivity (počet kandidátov z bitmáp),
+takže najselektívnejšia lacná podmienka ide prvá a drahý regex sa volá len na tom, čo
+ostane. Bez sémantických slov sa kontrola zastaví po `limit` zhodách.
+
+Skompilované plány (zoradený AST, bitmapa kandidátov, odhady) sa držia v LRU cache
+podľa textu dotazu - opakovaný dotaz preskočí parsovanie aj bitmapové kroky.
+
+Trigramový index sa vytvorí z úložiska chunkov pri prvom dotaze s filtrom
+(pamäť: počet rôznych trigramov x počet chunkov / 8 B).
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agent.tools.law_versions import rows_bitmap
+from agent.tools.query_language import (
+    And, Match, Node, Not, Or, ParsedQuery, format_expr, leaves, parse_query
+)
+
+# Poradie tried ceny (nižšie = lacnejšie)
+COST = {"law": 0, "contains": 1, "phrase": 1, "regex": 2}
+REGEX_META = set(".^$*+?{}[]()|\\")
+
+
+def trigrams(text: str) -> set:
+    """Trigramy textu (malé písmená)"""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def regex_literals(pattern: str) -> List[str]:
+    """
+    Doslovné úseky, ktoré musí obsahovať každá zhoda regexu (pre trigramový prefilter)
+
+    Konzervatívne: alternácia na najvyššej úrovni = žiadne úseky; skupiny, triedy
+    znakov a escape sekvencie úsek ukončia, voliteľný znak (*, ?, {0,) sa z úseku vyradí.
+    """
+    runs, current = [], ""
+    depth, i, n = 0, 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == "\\" and i + 1 < n:
+            escaped = pattern[i + 1]
+            i += 2
+            if escaped.isalnum():
+                # \s, \d, \b, spätné referencie...
+                runs.append(current)
+                current = ""
+                continue
+            char = escaped
+        elif char == "[":
+            runs.append(current)
+            current = ""
+            i += 1
+            if i < n and pattern[i] == "^":
+                i += 1
+            if i < n and pattern[i] == "]":
+                i += 1
+            while i < n and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+            continue
+        elif char == "(":
+            runs.append(current)
+            current = ""
+            # Obsah skupiny môže byť voliteľný - preskočí sa celý
+            depth = 1
+            i += 1
+            while i < n and depth:
+                if pattern[i] == "\\":
+                    i += 1
+                elif pattern[i] == "(":
+                    depth += 1
+                elif pattern[i] == ")":
+                    depth -= 1
+                i += 1
+            continue
+        elif char == "|":
+            return []
+        elif char in ".^$":
+            runs.append(current)
+            current = ""
+            i += 1
+            continue
+        elif char in "*?":
+            current = current[:-1]
+            runs.append(current)
+            current = ""
+            i += 1
+            continue
+        elif char == "+":
+            runs.append(current)
+            current = ""
+            i += 1
+            continue
+        elif char == "{":
+            end = pattern.find("}", i)
+            minimum = pattern[i + 1:end].split(",")[0] if end > 0 else ""
+            if minimum.strip() in ("", "0"):
+                current = current[:-1]
+            runs.append(current)
+            current = ""
+            i = end + 1 if end > 0 else n
+            continue
+        else:
+            i += 1
+        current += char
+    runs.append(current)
+    return [run for run in runs if len(run) >= 3]
+
+
+def bitmap_rows(bitmap: int, size: int) -> np.ndarray:
+    """Riadky nastavených bitov (vzostupne)"""
+    if not bitmap:
+        return np.empty(0, dtype=np.int64)
+    data = np.frombuffer(bitmap.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(data, bitorder="little")[:size])
+
+
+def popcount(bitmap: int) -> int:
+    return bin(bitmap).count("1")
+
+
+class TrigramIndex:
+    """Bitmapy trigramov a zákonov nad riadkami úložiska chunkov"""
+
+    def __init__(self, store, ids: List[str], grams: Dict[str, int], laws: Dict[str, int]):
+        self.store = store
+        self.ids = ids
+        self.count = len(ids)
+        self.all = (1 << self.count) - 1
+        self.grams = grams
+        self.laws = laws
+        self._rows_by_id: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def build(cls, store) -> "TrigramIndex":
+        """
+        Prejde texty úložiska raz - trigram sa zakóduje do int64 (3 x 21 bitov kódu znaku),
+        bity sa nastavia v matici trigram x riadok a každý riadok matice je jedna bitmapa
+        """
+        ids = store.ids()
+        size = len(ids)
+        codes, counts, law_rows = [], np.zeros(size, dtype=np.int64), {}
+        for row in range(size):
+            chars = np.frombuffer(store.text_at(row).lower().encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+            if len(chars) >= 3:
+                row_codes = np.unique((chars[:-2] << 42) | (chars[1:-1] << 21) | chars[2:])
+                codes.append(row_codes)
+                counts[row] = len(row_codes)
+            law_rows.setdefault(store.law_id_at(row), []).append(row)
+
+        grams: Dict[str, int] = {}
+        if codes:
+            unique, gram_index = np.unique(np.concatenate(codes), return_inverse=True)
+            del codes
+            row_index = np.repeat(np.arange(size, dtype=np.int64), counts)
+            matrix = np.zeros((len(unique), (size + 7) // 8), dtype=np.uint8)
+            np.bitwise_or.at(matrix, (gram_index, row_index >> 3), (1 << (row_index & 7)).astype(np.uint8))
+            mask = (1 << 21) - 1
+            for code, bits in zip(unique.tolist(), matrix):
+                gram = chr(code >> 42) + chr(code >> 21 & mask) + chr(code & mask)
+                grams[gram] = int.from_bytes(bits.tobytes(), "little")
+        return cls(store, ids, grams, {law_id: rows_bitmap(law, size) for law_id, law in law_rows.items()})
+
+    def row_of(self, chunk_id: str) -> Optional[int]:
+        if self._rows_by_id is None:
+            self._rows_by_id = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        return self._rows_by_id.get(chunk_id)
+
+    def text_bitmap(self, literals: List[str]) -> int:
+        """Nadmnožina chunkov obsahujúcich všetky úseky (bez trigramov = všetky)"""
+        bitmap = self.all
+        for literal in literals:
+            for gram in trigrams(literal):
+                bitmap &= self.grams.get(gram, 0)
+                if not bitmap:
+                    return 0
+        return bitmap
+
+    def memory_bytes(self) -> int:
+        return sum((bitmap.bit_length() + 7) // 8 for bitmap in self.grams.values())
+
+
+@dataclass
+class PlanStep:
+    kind: str
+    detail: str
+    estimate: int
+
+
+@dataclass
+class Plan:
+    """Skompilovaný dotaz - zoradený filter a kandidáti z bitmapových krokov"""
+    query: ParsedQuery
+    expr: Optional[Node]
+    candidates: int
+    exact: bool
+    steps: List[PlanStep]
+    regexes: Dict[str, Any] = field(default_factory=dict)
+    compile_ms: float = 0.0
+
+
+@dataclass
+class Execution:
+    """Výsledok vykonania plánu - id v poradí, vzdialenosti (pri sémantike) a časy krokov"""
+    ids: List[str]
+    distances: Optional[List[float]]
+    timings: Dict[str, float]
+    counts: Dict[str, int]
+    cached: bool
+
+
+class QueryPlanner:
+    """Kompilácia dotazov do plánov (s cache) a ich vykonanie"""
+
+    def __init__(self, index: TrigramIndex, versions=None, cache_size: int = 256):
+        self.index = index
+        self.versions = versions
+        self.cache_size = cache_size
+        self._plans: "OrderedDict[str, Plan]" = OrderedDict()
+        self._asof_bitmaps: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    # --- odhad a poradie -----------------------------------------------------------------
+
+    def _leaf_bitmap(self, node: Match, phase: str) -> Tuple[int, bool]:
+        """Bitmapa listu v danej fáze (metadata = len law:, trigram = aj text) a presnosť"""
+        if node.kind == "law":
+            return self.index.laws.get(node.value, 0), True
+        if phase == "metadata":
+            return self.index.all, False
+        literals = [node.value] if node.kind in ("contains", "phrase") else regex_literals(node.value)
+        return self.index.text_bitmap(literals), False
+
+    def _bitmap(self, node: Node, phase: str) -> Tuple[int, bool]:
+        if isinstance(node, Match):
+            return self._leaf_bitmap(node, phase)
+        if isinstance(node, Not):
+            bitmap, exact = self._bitmap(node.child, phase)
+            return (self.index.all & ~bitmap, True) if exact else (self.index.all, False)
+        if isinstance(node, And):
+            bitmap, exact = self.index.all, True
+            for child in node.children:
+                child_bitmap, child_exact = self._bitmap(child, phase)
+                bitmap &= child_bitmap
+                exact = exact and child_exact
+                if not bitmap:
+                    return 0, True
+            return bitmap, exact
+        bitmap, exact = 0, True
+        for child in node.children:
+            child_bitmap, child_exact = self._bitmap(child, phase)
+            bitmap |= child_bitmap
+            exact = exact and child_exact
+        return bitmap, exact
+
+    def _cost(self, node: Node) -> int:
+        if isinstance(node, Match):
+            return COST[node.kind]
+        if isinstance(node, Not):
+            return self._cost(node.child)
+        return max(self._cost(child) for child in node.children)
+
+    def _order(self, node: Node) -> Node:
+        """Deti AND podľa (cena, odhad kandidátov), OR podľa ceny - lacné a selektívne prvé"""
+        if isinstance(node, Not):
+            return Not(self._order(node.child))
+        if isinstance(node, (And, Or)):
+            children = [self._order(child) for child in node.children]
+            if isinstance(node, And):
+                children.sort(key=lambda child: (self._cost(child), popcount(self._bitmap(child, "trigram")[0])))
+            else:
+                children.sort(key=self._cost)
+            return type(node)(tuple(children))
+        return node
+
+    def _asof_bitmap(self, parsed: ParsedQuery) -> int:
+        """Chunky účinné k dátumu (bitmapa pre interval sa vytvorí raz)"""
+        if parsed.asof is None or self.versions is None:
+            return self.index.all
+        position = self.versions.interval(parsed.asof)
+        if position is None:
+            return 0
+        if position not in self._asof_bitmaps:
+            rows = (self.index.row_of(chunk_id) for chunk_id in self.versions.ids_at(parsed.asof))
+            self._asof_bitmaps[position] = rows_bitmap((row for row in rows if row is not None), self.index.count)
+        return self._asof_bitmaps[position]
+
+    # --- kompilácia ----------------------------------------------------------------------
+
+    def compile(self, query: str) -> Tuple[Plan, bool]:
+        """Plán pre dotaz z cache alebo nový (druhá hodnota = z cache)"""
+        key = query.strip()
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.stats["hits"] += 1
+                return plan, True
+            self.stats["misses"] += 1
+
+        start = time.perf_counter()
+        parsed = parse_query(query)
+        plan = self._build(parsed)
+        plan.compile_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._plans[key] = plan
+            if len(self._plans) > self.cache_size:
+                self._plans.popitem(last=False)
+        return plan, False
+
+    def _build(self, parsed: ParsedQuery) -> Plan:
+        expr = self._order(parsed.expr) if parsed.expr is not None else None
+        regexes = {}
+        for node in leaves(expr):
+            if node.kind == "regex" and node.value not in regexes:
+                # Platnosť vzoru overil už parse_query
+                regexes[node.value] = re.compile(node.value)
+
+        steps = []
+        asof = self._asof_bitmap(parsed)
+        metadata, _ = self._bitmap(expr, "metadata") if expr is not None else (self.index.all, True)
+        metadata &= asof
+        laws = [f"law:{node.value}" for node in leaves(expr) if node.kind == "law"]
+        if laws or parsed.asof is not None:
+            detail = ", ".join(laws + ([f"asof:{parsed.asof.isoformat()}"] if parsed.asof else []))
+            steps.append(PlanStep("metadata", f"bitmapy {detail}", popcount(metadata)))
+
+        candidates, exact = (self.index.all, True) if expr is None else self._bitmap(expr, "trigram")
+        candidates &= asof
+        texts = [node for node in leaves(expr) if node.kind != "law"]
+        prefilter = [
+            node for node in _positive_leaves(expr) if node.kind != "law"
+            and any(len(literal) >= 3 for literal in ([node.value] if node.kind != "regex" else regex_literals(node.value)))
+        ]
+        if prefilter:
+            steps.append(PlanStep("trigram", "prefilter " + ", ".join(
+                f'{node.kind}:"{node.value}"' for node in prefilter
+            ), popcount(candidates)))
+        if not exact:
+            substrings = [node for node in texts if node.kind != "regex"]
+            if substrings:
+                steps.append(PlanStep("verify", "podreťazce " + ", ".join(f'"{node.value}"' for node in substrings),
+                                      popcount(candidates)))
+            if regexes:
+                steps.append(PlanStep("regex", ", ".join(f"/{pattern}/" for pattern in regexes), popcount(candidates)))
+        if parsed.semantic:
+            steps.append(PlanStep("vector", f'poradie podľa "{parsed.semantic}"', popcount(candidates)))
+        return Plan(parsed, expr, candidates, exact, steps, regexes)
+
+    # --- vykonanie -----------------------------------------------------------------------
+
+    def _matches(self, node: Node, row: int, text: Callable[[], str], regexes: Dict[str, Any],
+                 timings: Dict[str, float]) -> bool:
+        if isinstance(node, Match):
+            if node.kind == "law":
+                return bool(self.index.laws.get(node.value, 0) >> row & 1)
+            start = time.perf_counter()
+            if node.kind == "regex":
+                found = regexes[node.value].search(text()) is not None
+                timings["regex"] = timings.get("regex", 0.0) + (time.perf_counter() - start) * 1000
+            else:
+                found = node.value in text()
+                timings["verify"] = timings.get("verify", 0.0) + (time.perf_counter() - start) * 1000
+            return found
+        if isinstance(node, Not):
+            return not self._matches(node.child, row, text, regexes, timings)
+        if isinstance(node, And):
+            return all(self._matches(child, row, text, regexes, timings) for child in node.children)
+        return any(self._matches(child, row, text, regexes, timings) for child in node.children)
+
+    def execute(self, plan: Plan, limit: int,
+                rank: Optional[Callable[[str, List[str], int], Tuple[List[str], List[float]]]] = None,
+                cached: bool = False) -> Execution:
+        """
+        Vykoná plán: kontrola textu na kandidátoch, potom sémantické poradie
+
+        Args:
+            rank: (sémantický text, id kandidátov, limit) -> (id, vzdialenosti)
+        """
+        timings: Dict[str, float] = {}
+        rows = bitmap_rows(plan.candidates, self.index.count)
+        counts = {"candidates": len(rows)}
+        semantic = plan.query.semantic if rank is not None else ""
+
+        if not plan.exact:
+            matched = []
+            for row in rows:
+                row = int(row)
+                cache: List[str] = []
+
+                def text(row=row, cache=cache) -> str:
+                    if not cache:
+                        cache.append(self.index.store.text_at(row))
+                    return cache[0]
+
+                if self._matches(plan.expr, row, text, plan.regexes, timings):
+                    matched.append(row)
+                    # Bez sémantického poradia stačí prvých limit zhôd
+                    if not semantic and len(matched) >= limit:
+                        break
+            rows = matched
+        counts["matched"] = len(rows)
+
+        ids = [self.index.ids[int(row)] for row in rows]
+        if semantic and ids:
+            start = time.perf_counter()
+            ids, distances = rank(semantic, ids, limit)
+            timings["vector"] = (time.perf_counter() - start) * 1000
+            return Execution(ids, distances, timings, counts, cached)
+        return Execution(ids[:limit], None, timings, counts, cached)
+
+    def explain(self, plan: Plan, execution: Execution) -> str:
+        """Textový plán s odhadmi a skutočnými časmi krokov"""
+        query = plan.query
+        lines = [
+            f"Plán dotazu ({'z cache' if execution.cached else f'kompilácia {plan.compile_ms:.2f} ms'}):",
+            f"  filter: {format_expr(plan.expr)}",
+            f"  sémantika: {query.semantic or '-'}",
+        ]
+        if query.jurisdiction:
+            lines.append(f"  jurisdikcia: {query.jurisdiction}")
+        for warning in query.warnings:
+            lines.append(f"  ⚠️ {warning}")
+        lines.append(f"  chunkov v indexe: {self.index.count}")
+        for number, step in enumerate(plan.steps, 1):
+            spent = execution.timings.get(step.kind)
+            timing = f"{spent:.2f} ms" if spent is not None else ("z cache" if execution.cached else "pri kompilácii")
+            lines.append(f"  {number}. {step.kind:<9} {step.detail} -> odhad {step.estimate} ({timing})")
+        lines.append(f"  kandidáti po bitmapách: {execution.counts['candidates']}, po kontrole textu: {execution.counts['matched']}")
+        return "\n".join(lines)
+
+
+def _positive_leaves(node: Optional[Node]) -> List[Match]:
+    """Listy mimo NOT (len tie zúžia kandidátov cez trigramy)"""
+    if node is None or isinstance(node, Not):
+        return []
+    if isinstance(node, Match):
+        return [node]
+    return [leaf for child in node.children for leaf in _positive_leaves(child)]
@@ -0,0 +1,221 @@
+"""
+Perzistentná cache odpovedí externých služieb (Tavily, Wikipedia)
+
+Právne heslá a výsledky vyhľadávania sa menia zriedka, preto sa odpoveď nástroja
+uloží do SQLite a ďalší rovnaký dotaz sa obslúži bez sieťového volania:
+
+- kľúč: služba, adresa API, normalizovaný dotaz (malé písmená, zlúčené medzery),
+  zoznam domén (bez ohľadu na poradie), jazyk a ďalšie parametre volania
+- čerstvý záznam (vek < ttl) sa vráti priamo
+- zastaraný záznam (ttl <= vek < ttl + stale) sa vráti hneď a na pozadí sa obnoví
+  (stale-while-revalidate); ten istý kľúč sa naraz obnovuje len raz
+- starší záznam alebo chýbajúci kľúč sa načíta synchrónne
+- ukladajú sa len úspešné odpovede (chyba pri načítaní sa neuloží)
+- celková veľkosť je ohraničená - nad limit sa mažú najdlhšie nepoužité záznamy (LRU)
+
+Prostredie (get_response_cache):
+- LEGAL_RESPONSE_CACHE             cesta k SQLite súboru (predvolene data/response_cache.db), "0" vypne
+- LEGAL_RESPONSE_CACHE_TTL_HOURS   čerstvosť záznamu (predvolene 168 = 7 dní)
+- LEGAL_RESPONSE_CACHE_STALE_HOURS ako dlho po ttl sa ešte vracia zastaraný záznam (predvolene 720)
+- LEGAL_RESPONSE_CACHE_MB          limit veľkosti odpovedí (predvolene 64)
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+DEFAULT_RESPONSE_CACHE = "data/response_cache.db"
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Dotaz pre kľúč cache - malé písmená, zlúčené biele znaky"""
+    return WHITESPACE.sub(" ", query).strip().lower()
+
+
+def cache_key(service: str, query: str, domains: Iterable[str] = (), lang: str = "", **params: Any) -> str:
+    """Kľúč záznamu (sha1 z normalizovaných parametrov volania)"""
+    payload = json.dumps({
+        "service": service,
+        "query": normalize_query(query),
+        "domains": sorted(domains),
+        "lang": lang,
+        "params": params,
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Cache odpovedí v SQLite s TTL, obnovou na pozadí a LRU limitom veľkosti"""
+
+    def __init__(self, db_path: str = DEFAULT_RESPONSE_CACHE, ttl_seconds: float = 7 * 24 * 3600,
+                 stale_seconds: float = 30 * 24 * 3600, max_bytes: int = 64 * 1024 * 1024,
+                 refresh_workers: int = 2):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._refreshing: set = set()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0, "evictions": 0}
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    service TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            ''')
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Záznam {value, age} bez ohľadu na vek (None, ak neexistuje)"""
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return {"value": row[0], "age": time.time() - row[1]}
+
+    def is_usable(self, key: str) -> bool:
+        """Či by get_or_fetch vrátil záznam bez synchrónneho načítania"""
+        entry = self.lookup(key)
+        return entry is not None and entry["age"] < self.ttl_seconds + self.stale_seconds
+
+    def put(self, key: str, service: str, value: str):
+        """Uloží odpoveď a podľa potreby vyradí najdlhšie nepoužité záznamy"""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, service, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, service, value, size, now, now)
+            )
+            self.stats["evictions"] += self._evict()
+
+    def _evict(self) -> int:
+        """Zmaže najstaršie použité záznamy nad max_bytes (volá sa pod zámkom)"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        return removed
+
+    def _touch(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+
+    def get_or_fetch(self, key: str, service: str, fetch: Callable[[], str]) -> str:
+        """
+        Odpoveď z cache alebo z fetch()
+
+        Výnimka z fetch() sa neuloží a prepadne volajúcemu (pri obnove na pozadí
+        zostane pôvodný záznam).
+        """
+        entry = self.lookup(key)
+        if entry is not None and entry["age"] < self.ttl_seconds:
+            self._count("hits")
+            self._touch(key)
+            return entry["value"]
+
+        if entry is not None and entry["age"] < self.ttl_seconds + self.stale_seconds:
+            self._count("stale_hits")
+            self._touch(key)
+            self._schedule_refresh(key, service, fetch)
+            return entry["value"]
+
+        self._count("misses")
+        value = fetch()
+        self.put(key, service, value)
+        return value
+
+    def _schedule_refresh(self, key: str, service: str, fetch: Callable[[], str]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._refresh, key, service, fetch)
+
+    def _refresh(self, key: str, service: str, fetch: Callable[[], str]):
+        try:
+            self.put(key, service, fetch())
+            self._count("refreshes")
+        except Exception:
+            self._count("refresh_errors")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def wait_for_refreshes(self, timeout: float = 10.0) -> bool:
+        """Počká na dokončenie obnov na pozadí (pre skripty a meranie)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._lock:
+                if not self._refreshing:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def size(self) -> Dict[str, int]:
+        """Počet záznamov a ich veľkosť v bajtoch"""
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": count, "bytes": total}
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._conn.close()
+
+
+_caches: Dict[str, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Zdieľaná cache podľa prostredia (jedna inštancia na súbor v procese, None ak je vypnutá)"""
+    path = os.getenv("LEGAL_RESPONSE_CACHE", DEFAULT_RESPONSE_CACHE)
+    if path.lower() in ("0", "false", "no", ""):
+        return None
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = ResponseCache(
+                db_path=path,
+                ttl_seconds=float(os.getenv("LEGAL_RESPONSE_CACHE_TTL_HOURS", "168")) * 3600,
+                stale_seconds=float(os.getenv("LEGAL_RESPONSE_CACHE_STALE_HOURS", "720")) * 3600,
+                max_bytes=int(float(os.getenv("LEGAL_RESPONSE_CACHE_MB", "64")) * 1024 * 1024),
+            )
+        return cache
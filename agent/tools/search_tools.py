@@ -4,21 +4,35 @@ Vyhľadávacie nástroje pre agenta - Tavily a Wikipedia
 
 from typing import Optional, Dict, Any, Type
 from langchain.tools import BaseTool
-from langchain_community.tools import WikipediaQueryRun
-from langchain_community.utilities import WikipediaAPIWrapper
 from pydantic import Field
+import importlib.util
 import os
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import warnings
+
+from agent.tracing import get_tracer
+from agent.tools.response_cache import cache_key, get_response_cache
 
 load_dotenv()
 
-# Fallback pre Tavily ak nie je dostupné
-try:
-    from tavily import TavilyClient
-    TAVILY_AVAILABLE = True
-except ImportError:
-    TAVILY_AVAILABLE = False
+# Fallback pre Tavily ak nie je dostupné (samotný import až pri vytvorení nástroja)
+TAVILY_AVAILABLE = importlib.util.find_spec("tavily") is not None
+TAVILY_DOMAINS = ["justice.gov.sk", "zbierka.sk", "epi.sk", "lexforum.cz"]
+
+# Jazyky Wikipédie v poradí preferencie (čeština len ak slovenčina nič nenájde)
+WIKIPEDIA_LANGUAGES = ("sk", "cs")
+WIKIPEDIA_API_URL = "https://{lang}.wikipedia.org/w/api.php"
+WIKIPEDIA_NOT_FOUND = "No good Wikipedia Search Result was found"
+
+
+def format_wikipedia_pages(pages, chars_max: int = 2000) -> str:
+    """Heslá (title, summary) v tvare výstupu WikipediaAPIWrapper.run"""
+    summaries = [f"Page: {title}\nSummary: {summary}" for title, summary in pages if summary]
+    if not summaries:
+        return WIKIPEDIA_NOT_FOUND
+    return "\n\n".join(summaries)[:chars_max]
 
 
 class TavilySearchTool(BaseTool):
@@ -44,40 +58,112 @@ class TavilySearchTool(BaseTool):
             self.client = None
         else:
             try:
-                self.client = TavilyClient(api_key=api_key)
+                from tavily import TavilyClient
+                
+                # Voliteľná vlastná adresa API (napr. lokálny stub pre záťažové testy)
+                base_url = os.getenv("TAVILY_API_BASE_URL")
+                if base_url:
+                    self.client = TavilyClient(api_key=api_key, api_base_url=base_url)
+                else:
+                    self.client = TavilyClient(api_key=api_key)
             except Exception:
                 self.client = None
     
     def _run(self, query: str) -> str:
         """Vykonaj vyhľadávanie cez Tavily"""
+        with get_tracer().span(f"tool.{self.name}", input_chars=len(query)) as span:
+            output = self._search(query)
+            span.set("output_chars", len(output))
+            return output
+    
+    def _search(self, query: str) -> str:
+        """Zavolá Tavily API (cez cache odpovedí) a naformátuje výsledky"""
         if not self.client:
             return f"Tavily search nie je dostupný. Skúste nastaviť TAVILY_API_KEY pre otázku: {query}"
         
         try:
             # Pridáme kontext pre slovenské právo
             enhanced_query = f"{query} slovenské právo zákon"
+            fetch = lambda: self._fetch(enhanced_query)
             
+            cache = get_response_cache()
+            if cache is None:
+                return fetch()
+            key = cache_key(
+                self.name, enhanced_query, domains=TAVILY_DOMAINS,
+                endpoint=os.getenv("TAVILY_API_BASE_URL", ""), search_depth="advanced", max_results=5
+            )
+            return cache.get_or_fetch(key, self.name, fetch)
+            
+        except Exception as e:
+            return f"Chyba pri vyhľadávaní: {str(e)}"
+    
+    def _fetch(self, enhanced_query: str) -> str:
+        """Jedno volanie Tavily API - výnimka sa do cache neuloží"""
+        with get_tracer().span("http.tavily", search_depth="advanced") as span:
             response = self.client.search(
                 query=enhanced_query,
                 search_depth="advanced",
                 max_results=5,
-                include_domains=["justice.gov.sk", "zbierka.sk", "epi.sk", "lexforum.cz"]
+                include_domains=TAVILY_DOMAINS
             )
-            
-            results = []
-            for result in response.get('results', []):
-                results.append(f"**{result['title']}**\n{result['content']}\nZdroj: {result['url']}\n")
-            
-            return "\n".join(results) if results else "Neboli nájdené žiadne relevantné výsledky."
-            
-        except Exception as e:
-            return f"Chyba pri vyhľadávaní: {str(e)}"
+            span.set("results", len(response.get('results', [])))
+        
+        results = []
+        for result in response.get('results', []):
+            results.append(f"**{result['title']}**\n{result['content']}\nZdroj: {result['url']}\n")
+        
+        return "\n".join(results) if results else "Neboli nájdené žiadne relevantné výsledky."
     
     async def _arun(self, query: str) -> str:
         """Async verzia"""
         return self._run(query)
 
 
+class WikipediaClient:
+    """
+    Minimálny klient MediaWiki API bez globálneho stavu
+
+    Knižnica wikipedia prepína jazyk globálnou adresou API, takže slovenské a české
+    vyhľadávanie nemôžu bežať súbežne. Tu je jazyk parametrom každého volania:
+    vyhľadanie titulov (list=search) a úvody hesiel jedným dotazom (prop=extracts).
+    Výstup má rovnaký tvar ako WikipediaAPIWrapper.run.
+    """
+
+    def __init__(self, top_k_results: int = 3, doc_content_chars_max: int = 2000, timeout: float = 10.0):
+        import requests
+        
+        self._requests = requests
+        self.top_k_results = top_k_results
+        self.doc_content_chars_max = doc_content_chars_max
+        self.timeout = timeout
+        # Šablóna adresy API, napr. "http://127.0.0.1:8765/{lang}/w/api.php"
+        self.api_url = os.getenv("WIKIPEDIA_API_URL") or WIKIPEDIA_API_URL
+    
+    def _get(self, lang: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        response = self._requests.get(
+            self.api_url.format(lang=lang),
+            params={"action": "query", "format": "json", **params},
+            headers={"User-Agent": "AI-Legal-Assistant/1.0"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def run(self, query: str, lang: str) -> str:
+        """Úvody najlepších hesiel pre dotaz v danom jazyku"""
+        found = self._get(lang, {"list": "search", "srsearch": query[:300], "srlimit": self.top_k_results, "srprop": ""})
+        titles = [item["title"] for item in found.get("query", {}).get("search", [])][:self.top_k_results]
+        if not titles:
+            return WIKIPEDIA_NOT_FOUND
+        
+        extracts = self._get(lang, {
+            "prop": "extracts", "exintro": 1, "explaintext": 1, "redirects": 1, "titles": "|".join(titles),
+        })
+        pages = {page.get("title"): page.get("extract") for page in extracts.get("query", {}).get("pages", {}).values()}
+        return format_wikipedia_pages([(title, pages.get(title)) for title in titles], self.doc_content_chars_max)
+
+
 class LegalWikipediaTool(BaseTool):
     """Upravený Wikipedia nástroj pre právne pojmy"""
     
@@ -90,48 +176,92 @@ class LegalWikipediaTool(BaseTool):
     
     # Pydantic fields
     wikipedia: Optional[Any] = Field(default=None, exclude=True)
+    offline_index: Optional[Any] = Field(default=None, exclude=True)
+    # "auto" - offline index, sieť len ak v ňom nič nie je; "offline" - nikdy sieť; "online" - bez indexu
+    mode: str = Field(default="auto")
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.mode = os.getenv("LEGAL_WIKIPEDIA_MODE", self.mode).lower()
+        if self.mode != "online":
+            try:
+                from agent.tools.wikipedia_index import load_configured_wikipedia_index
+                self.offline_index = load_configured_wikipedia_index()
+            except Exception:
+                self.offline_index = None
         try:
-            self.wikipedia = WikipediaQueryRun(
-                api_wrapper=WikipediaAPIWrapper(
-                    lang="sk",  # Slovenská wikipedia ako primárna
-                    top_k_results=3,
-                    doc_content_chars_max=2000
-                )
-            )
+            self.wikipedia = WikipediaClient(top_k_results=3, doc_content_chars_max=2000)
         except Exception:
             self.wikipedia = None
     
     def _run(self, query: str) -> str:
         """Vyhľadaj na Wikipédii"""
+        with get_tracer().span(f"tool.{self.name}", input_chars=len(query)) as span:
+            output = self._search(query)
+            span.set("output_chars", len(output))
+            return output
+    
+    def _lookup(self, query: str, lang: str) -> str:
+        """Vyhľadanie v jednom jazyku cez cache odpovedí"""
+        fetch = lambda: self._fetch(query, lang)
+        cache = get_response_cache()
+        if cache is None:
+            return fetch()
+        key = cache_key(self.name, query, lang=lang, endpoint=self.wikipedia.api_url)
+        return cache.get_or_fetch(key, self.name, fetch)
+    
+    def _fetch(self, query: str, lang: str) -> str:
+        with get_tracer().span("http.wikipedia", lang=lang):
+            return self.wikipedia.run(query, lang)
+    
+    def _search_offline(self, query: str) -> str:
+        """Vyhľadanie v offline indexe z dumpu (slovenčina, potom čeština)"""
+        for lang in WIKIPEDIA_LANGUAGES:
+            pages = self.offline_index.search(query, lang, k=3)
+            if pages:
+                return format_wikipedia_pages([(page["title"], page["lead"]) for page in pages])
+        return WIKIPEDIA_NOT_FOUND
+    
+    def _search(self, query: str) -> str:
+        """
+        Vyhľadá pojem na slovenskej a prípadne českej Wikipédii
+        
+        Najprv v offline indexe (ak existuje), potom cez API. Ak slovenská odpoveď nie je
+        v cache, obe jazykové verzie sa hľadajú súbežne - česká je hotová v čase, keď sa
+        ukáže, že slovenská nič nenašla.
+        """
+        if self.offline_index is not None:
+            try:
+                result = self._search_offline(query)
+                if WIKIPEDIA_NOT_FOUND not in result or self.mode == "offline":
+                    return result
+            except Exception as e:
+                if self.mode == "offline":
+                    return f"Chyba pri vyhľadávaní v offline indexe Wikipédie: {str(e)}"
+        elif self.mode == "offline":
+            return f"Offline index Wikipédie nie je dostupný pre otázku: {query}"
+        
         if not self.wikipedia:
             return f"Wikipedia search nie je dostupný pre otázku: {query}"
             
         try:
-            # Ignoruj varovania o parseri
-            # Toto je potrebné pre niektoré verzie Wikipedie, ktoré používajú
-            # BeautifulSoup bez explicitného parsera
-            # a môže spôsobiť varovania pri načítaní stránok.
-            
-            warnings.filterwarnings(
-                "ignore",
-                category=UserWarning,
-                message="No parser was explicitly specified"
-            )
-            
-            # Skús najprv slovensky
-            result = self.wikipedia.run(query)
-            
-            # Ak nič nenájde, skús česky
-            if "No good Wikipedia Search Result was found" in result:
-                self.wikipedia.api_wrapper.lang = "cs"
-                result = self.wikipedia.run(query)
-                
-            # Vráť späť na slovenčinu pre ďalšie vyhľadávania
-            self.wikipedia.api_wrapper.lang = "sk"
+            cache = get_response_cache()
+            primary, fallback = WIKIPEDIA_LANGUAGES
+            if cache is not None and cache.is_usable(cache_key(self.name, query, lang=primary, endpoint=self.wikipedia.api_url)):
+                # Slovenská odpoveď je v cache - česká sa načíta len ak je prázdna
+                result = self._lookup(query, primary)
+                if WIKIPEDIA_NOT_FOUND in result:
+                    result = self._lookup(query, fallback)
+                return result
             
+            # Vlákna zdedia kontext, aby http spany patrili pod span nástroja
+            futures = {
+                lang: _lookup_executor().submit(contextvars.copy_context().run, self._lookup, query, lang)
+                for lang in WIKIPEDIA_LANGUAGES
+            }
+            result = futures[primary].result()
+            if WIKIPEDIA_NOT_FOUND in result:
+                result = futures[fallback].result()
             return result
             
         except Exception as e:
@@ -142,6 +272,19 @@ class LegalWikipediaTool(BaseTool):
         return self._run(query)
 
 
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _lookup_executor() -> ThreadPoolExecutor:
+    """Zdieľaný pool pre súbežné jazykové vyhľadávania Wikipédie"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="wikipedia")
+        return _executor
+
+
 def get_search_tools():
     """Vráti zoznam všetkých vyhľadávacích nástrojov"""
     return [
@@ -0,0 +1,331 @@
+"""
+Rozdelenie vektorovej databázy na shardy podľa zákona a smerovanie dotazov
+
+Namiesto jednej kolekcie legal_documents (kde je law: len filter vnútri jedného
+HNSW grafu) má každý zákon vlastnú kolekcii legal_documents__<law_id>. Metadáta
+kolekcie nesú law_id, názov, kategóriu a jurisdikciu.
+
+Router vyberie shardy pre dotaz:
+1. filter law: (presne jeden shard)
+2. citácie v texte dotazu ("513/1991", "Obchodného zákonníka", "§ 40 OZ")
+3. lacný klasifikátor podľa kľúčových slov zákonov (kmene slov z názvu, opisu a slovníka)
+Bez signálu sa prehľadajú všetky shardy. Voliteľne sa obmedzí na jurisdikciu.
+
+Vybrané shardy sa prehľadajú paralelne a výsledky sa zlúčia podľa vzdialenosti
+do globálneho top-k.
+
+Prostredie:
+- LEGAL_SHARDED  "1" zapne shardy v EnhancedVectorSearchTool (ak existujú)
+"""
+
+import os
+import re
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from agent.tracing import get_tracer
+from agent.tools.law_versions import chroma_where
+
+SHARD_SEPARATOR = "__"
+DEFAULT_JURISDICTION = "SK"
+DEFAULT_METADATA_PATH = "data/law_texts/files_metadata.json"
+
+# Ručne doplnené kľúčové slová (kmene sa porovnávajú podľa prvých STEM_CHARS znakov)
+LAW_KEYWORDS = {
+    "40/1964": ["vlastníctvo", "vlastník", "dedenie", "dedičstvo", "závet", "nájom", "nájomná", "darovacia",
+                "kúpna", "škoda", "náhrada", "spotrebiteľ", "záložné", "vecné bremeno", "premlčanie", "OZ"],
+    "513/1991": ["s.r.o.", "spoločnosť", "konateľ", "akciová", "podnikanie", "podnikateľ", "obchodná",
+                 "základné imanie", "spoločník", "prokúra", "zmluva o dielo", "ObZ"],
+    "530/2003": ["obchodný register", "registrový", "zápis", "výpis"],
+    "460/1992": ["ústava", "ústavný", "základné práva", "slobody", "prezident", "národná rada"],
+    "311/2001": ["pracovný", "pracovnom", "zamestnanec", "zamestnávateľ", "výpoveď", "výpovedné", "mzda",
+                 "dovolenka", "pracovná zmluva", "ZP"],
+    "300/2005": ["trestný", "trestného", "krádež", "trest", "odňatie slobody", "ublíženie", "podvod",
+                 "páchateľ", "obžalovaný", "TZ"],
+    "160/2015": ["žaloba", "sporové", "odvolanie", "rozsudok", "dovolanie", "CSP"],
+    "161/2015": ["mimosporové", "dedičské konanie", "opatrovníctvo", "notár", "CMP"],
+}
+STEM_CHARS = 5
+# Slová, ktoré nerozlišujú zákony
+GENERIC_STEMS = {"zákon", "predp", "upra", "zákla", "práva", "právo", "právn", "vzťah", "osôb", "fyzic",
+                 "niekt", "zmeny", "dopln", "súdmi", "vecia", "civil", "konan", "slove", "repub",
+                 "zmluv"}
+
+CITATION_PATTERN = re.compile(r"\b(\d{1,4})\s*/\s*(\d{4})\b")
+TOKEN_PATTERN = re.compile(r"[\w.]+", re.UNICODE)
+
+
+def shard_name(collection_name: str, law_id: str) -> str:
+    """Názov kolekcie shardu ('legal_documents', '40/1964' -> 'legal_documents__40_1964')"""
+    return f"{collection_name}{SHARD_SEPARATOR}{re.sub(r'[^0-9A-Za-z]', '_', law_id)}"
+
+
+def _stem(word: str) -> str:
+    return word.strip(".").lower()[:STEM_CHARS]
+
+
+class ShardRouter:
+    """Vyberá shardy pre dotaz podľa filtra, citácií a kľúčových slov"""
+
+    def __init__(self, laws: List[Dict[str, Any]], max_shards: int = 3, min_score_ratio: float = 0.5):
+        """
+        Args:
+            laws: Metadáta zákonov (law_id, title, category, description, jurisdiction)
+            max_shards: Max. počet shardov vybraných klasifikátorom
+            min_score_ratio: Shard sa vyberie pri skóre aspoň tento podiel najlepšieho
+        """
+        self.laws = {law["law_id"]: law for law in laws}
+        self.max_shards = max_shards
+        self.min_score_ratio = min_score_ratio
+
+        self._stems: Dict[str, Dict[str, float]] = {}
+        self._title_stems: Dict[str, List[str]] = {}
+        self._abbreviations: Dict[str, str] = {}
+        for law_id, law in self.laws.items():
+            weights: Dict[str, float] = {}
+            text = " ".join([law.get("title", ""), law.get("category", ""), law.get("description", "")])
+            for token in TOKEN_PATTERN.findall(text):
+                stem = _stem(token)
+                if len(stem) >= 4 and stem not in GENERIC_STEMS:
+                    weights[stem] = max(weights.get(stem, 0.0), 1.0)
+            for keyword in LAW_KEYWORDS.get(law_id, []):
+                if keyword.isupper() and len(keyword) <= 3:
+                    # Skratka zákona (OZ, ObZ, TZ) - porovnáva sa presne
+                    self._abbreviations[keyword] = law_id
+                    continue
+                for token in keyword.split():
+                    stem = _stem(token)
+                    if len(stem) >= 3 and stem not in GENERIC_STEMS:
+                        weights[stem] = max(weights.get(stem, 0.0), 2.0)
+            self._stems[law_id] = weights
+            self._title_stems[law_id] = [_stem(t) for t in law.get("title", "").split() if len(t) >= 4]
+
+    @classmethod
+    def from_metadata(cls, path: str = DEFAULT_METADATA_PATH, **kwargs) -> "ShardRouter":
+        """Router zo súboru files_metadata.json"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f).get("files", []), **kwargs)
+
+    def _citations(self, text: str) -> List[str]:
+        """Zákony citované v texte (číslo/rok, skratka, názov)"""
+        cited = []
+        for number, year in CITATION_PATTERN.findall(text):
+            law_id = f"{int(number)}/{year}"
+            if law_id in self.laws and law_id not in cited:
+                cited.append(law_id)
+
+        tokens = TOKEN_PATTERN.findall(text)
+        for token in tokens:
+            law_id = self._abbreviations.get(token.strip("."))
+            if law_id and law_id not in cited:
+                cited.append(law_id)
+
+        # Celý názov zákona vo výraze ("Občianskeho zákonníka", "Trestný zákon")
+        stems = [_stem(t) for t in tokens]
+        for law_id, title_stems in self._title_stems.items():
+            if title_stems and law_id not in cited and all(stem in stems for stem in title_stems):
+                cited.append(law_id)
+        return cited
+
+    def _classify(self, text: str) -> List[Tuple[str, float]]:
+        """Skóre zákonov podľa zhody kmeňov slov dotazu (zostupne)"""
+        stems = {_stem(t) for t in TOKEN_PATTERN.findall(text)}
+        scores = []
+        for law_id, weights in self._stems.items():
+            score = sum(weights.get(stem, 0.0) for stem in stems)
+            if score > 0:
+                scores.append((law_id, score))
+        return sorted(scores, key=lambda item: -item[1])
+
+    def route(self, text: str = "", where: Optional[Dict[str, Any]] = None,
+              jurisdiction: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Vyberie shardy pre dotaz
+
+        Returns:
+            {"law_ids": [...], "reason": "filter" | "citation" | "classifier" | "all"}
+        """
+        candidates = [
+            law_id for law_id, law in self.laws.items()
+            if not jurisdiction or law.get("jurisdiction", DEFAULT_JURISDICTION).upper() == jurisdiction.upper()
+        ]
+
+        if where and where.get("law_id"):
+            law_id = where["law_id"]
+            return {"law_ids": [law_id] if law_id in candidates else [], "reason": "filter"}
+
+        cited = [law_id for law_id in self._citations(text or "") if law_id in candidates]
+        if cited:
+            return {"law_ids": cited, "reason": "citation"}
+
+        scores = [(law_id, score) for law_id, score in self._classify(text or "") if law_id in candidates]
+        if scores:
+            best = scores[0][1]
+            selected = [law_id for law_id, score in scores if score >= best * self.min_score_ratio]
+            return {"law_ids": selected[:self.max_shards], "reason": "classifier"}
+
+        return {"law_ids": candidates, "reason": "all"}
+
+
+class ShardedCollection:
+    """Shardy jednej logickej kolekcie s paralelným dotazom a zlúčením top-k"""
+
+    def __init__(self, client, collection_name: str = "legal_documents",
+                 router: Optional[ShardRouter] = None, max_workers: int = 4):
+        self.client = client
+        self.collection_name = collection_name
+        self.shards: Dict[str, Any] = {}
+        laws = []
+        prefix = collection_name + SHARD_SEPARATOR
+        for collection in client.list_collections():
+            name = getattr(collection, "name", collection)
+            if not name.startswith(prefix):
+                continue
+            shard = client.get_collection(name=name)
+            metadata = dict(shard.metadata or {})
+            if metadata.get("law_id"):
+                self.shards[metadata["law_id"]] = shard
+                laws.append(metadata)
+        # Router z metadát shardov, ručné kľúčové slová z LAW_KEYWORDS
+        self.router = router or ShardRouter(laws)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shard")
+
+    def __bool__(self) -> bool:
+        return bool(self.shards)
+
+    def count(self) -> int:
+        return sum(shard.count() for shard in self.shards.values())
+
+    def _targets(self, text: str, where: Optional[Dict], jurisdiction: Optional[str]) -> Tuple[List[str], str]:
+        route = self.router.route(text, where, jurisdiction)
+        return [law_id for law_id in route["law_ids"] if law_id in self.shards], route["reason"]
+
+    @staticmethod
+    def _shard_where(where: Optional[Dict]) -> Optional[Dict]:
+        """Filter pre shard - law_id je daný shardom"""
+        rest = {key: value for key, value in (where or {}).items() if key != "law_id"}
+        return chroma_where(rest)
+
+    def query(self, text: str, query_embeddings: List[List[float]], n_results: int,
+              where: Optional[Dict] = None, jurisdiction: Optional[str] = None,
+              where_document: Optional[Dict] = None) -> Dict[str, List]:
+        """Sémantický dotaz vo vybraných shardoch, globálne top-k podľa vzdialenosti"""
+        targets, reason = self._targets(text, where, jurisdiction)
+        shard_where = self._shard_where(where)
+
+        def query_shard(law_id):
+            kwargs = {"query_embeddings": query_embeddings, "n_results": n_results,
+                      "include": ["documents", "metadatas", "distances"]}
+            if shard_where:
+                kwargs["where"] = shard_where
+            if where_document:
+                kwargs["where_document"] = where_document
+            result = self.shards[law_id].query(**kwargs)
+            return list(zip(result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0]))
+
+        with get_tracer().span("shards.query", n_results=n_results, shards=len(targets), route=reason) as span:
+            hits = [hit for shard_hits in self._executor.map(query_shard, targets) for hit in shard_hits]
+            hits.sort(key=lambda hit: hit[3])
+            hits = hits[:n_results]
+            span.update(results=len(hits), chars=sum(len(hit[1]) for hit in hits))
+
+        return {
+            "ids": [[hit[0] for hit in hits]],
+            "documents": [[hit[1] for hit in hits]],
+            "metadatas": [[hit[2] for hit in hits]],
+            "distances": [[hit[3] for hit in hits]],
+            "shards": targets,
+            "route": reason,
+        }
+
+    def get(self, text: str, limit: int, where: Optional[Dict] = None, where_document: Optional[Dict] = None,
+            jurisdiction: Optional[str] = None) -> Dict[str, List]:
+        """Fulltext vo vybraných shardoch (výsledky v poradí shardov podľa routera)"""
+        targets, reason = self._targets(text, where, jurisdiction)
+        shard_where = self._shard_where(where)
+
+        def get_shard(law_id):
+            kwargs = {"limit": limit, "include": ["documents", "metadatas"]}
+            if shard_where:
+                kwargs["where"] = shard_where
+            if where_document:
+                kwargs["where_document"] = where_document
+            result = self.shards[law_id].get(**kwargs)
+            return list(zip(result["ids"], result["documents"], result["metadatas"]))
+
+        with get_tracer().span("shards.get", limit=limit, shards=len(targets), route=reason) as span:
+            hits = [hit for shard_hits in self._executor.map(get_shard, targets) for hit in shard_hits][:limit]
+            span.update(results=len(hits), chars=sum(len(hit[1]) for hit in hits))
+
+        return {
+            "ids": [hit[0] for hit in hits],
+            "documents": [hit[1] for hit in hits],
+            "metadatas": [hit[2] for hit in hits],
+            "shards": targets,
+            "route": reason,
+        }
+
+
+def build_shards(client, source, collection_name: str = "legal_documents", laws: Optional[List[Dict]] = None,
+                 batch_size: int = 500) -> Dict[str, int]:
+    """
+    Rozdelí existujúcu kolekciu na shardy podľa law_id (bez prepočtu embeddingov)
+
+    Args:
+        client: ChromaDB klient
+        source: Zdrojová kolekcia
+        laws: Metadáta zákonov (názov, kategória, jurisdikcia) pre metadáta shardov
+
+    Returns:
+        Počet chunkov v každom sharde
+    """
+    law_info = {law["law_id"]: law for law in laws or []}
+    prefix = collection_name + SHARD_SEPARATOR
+    for collection in client.list_collections():
+        name = getattr(collection, "name", collection)
+        if name.startswith(prefix):
+            client.delete_collection(name)
+
+    shards: Dict[str, Any] = {}
+    counts: Dict[str, int] = {}
+    total = source.count()
+    for offset in range(0, total, batch_size):
+        batch = source.get(limit=batch_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+        groups: Dict[str, List[int]] = {}
+        for i, metadata in enumerate(batch["metadatas"]):
+            groups.setdefault((metadata or {}).get("law_id", "unknown"), []).append(i)
+
+        for law_id, rows in groups.items():
+            if law_id not in shards:
+                info = law_info.get(law_id, {})
+                shards[law_id] = client.create_collection(
+                    name=shard_name(collection_name, law_id),
+                    metadata={
+                        "law_id": law_id,
+                        "title": info.get("title", ""),
+                        "category": info.get("category", ""),
+                        "description": info.get("description", ""),
+                        "jurisdiction": info.get("jurisdiction", DEFAULT_JURISDICTION),
+                        "shard_of": collection_name,
+                    },
+                )
+            shards[law_id].add(
+                ids=[batch["ids"][i] for i in rows],
+                embeddings=[batch["embeddings"][i] for i in rows],
+                documents=[batch["documents"][i] for i in rows],
+                metadatas=[batch["metadatas"][i] for i in rows],
+            )
+            counts[law_id] = counts.get(law_id, 0) + len(rows)
+    return counts
+
+
+def load_configured_shards(client, collection_name: str) -> Optional[ShardedCollection]:
+    """Shardy podľa LEGAL_SHARDED (None, ak sú vypnuté alebo neexistujú)"""
+    if os.getenv("LEGAL_SHARDED", "0").lower() in ("0", "false", "no", ""):
+        return None
+    sharded = ShardedCollection(client, collection_name)
+    if not sharded:
+        print(f"⚠️ Shardy kolekcie '{collection_name}' neexistujú - spusti scripts/shard_collection.py build")
+        return None
+    return sharded
@@ -0,0 +1,115 @@
+"""
+Krátke úryvky (keyword-in-context) pre výstupy nástrojov
+
+Namiesto prvých N znakov chunku sa zobrazí okno okolo miesta, kde sa dotaz
+v texte skutočne nachádza, a celý výstup nástroja sa zmestí do tokenového rozpočtu.
+"""
+
+import re
+from typing import Iterable, List, Optional, Tuple
+
+from agent.tracing import estimate_tokens
+
+# Krátke slová (predložky, spojky) nie sú dobré kotvy pre úryvok
+MIN_TERM_LENGTH = 4
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def query_terms(query: Optional[str]) -> List[str]:
+    """Vyberie z dotazu slová vhodné na hľadanie v texte (od najdlhšieho)"""
+    if not query:
+        return []
+    terms = {word.lower() for word in WORD_PATTERN.findall(query) if len(word) >= MIN_TERM_LENGTH}
+    return sorted(terms, key=len, reverse=True)
+
+
+def _stem(term: str) -> str:
+    # Slovenčina skloňuje koncovky - hľadá sa aj podľa kmeňa (konateľ/konateľa/konateľom)
+    return term[:max(MIN_TERM_LENGTH, len(term) - 2)]
+
+
+def find_match(text: str, terms: Iterable[str] = (), pattern: Optional[str] = None,
+               phrase: Optional[str] = None) -> Optional[Tuple[int, int]]:
+    """Nájde prvý výskyt frázy, regexu alebo pojmu v texte, vráti (začiatok, koniec)"""
+    lowered = text.lower()
+
+    if phrase:
+        position = lowered.find(phrase.lower())
+        if position >= 0:
+            return position, position + len(phrase)
+
+    if pattern:
+        try:
+            match = re.search(pattern, text)
+            if match:
+                return match.start(), match.end()
+        except re.error:
+            pass
+
+    for term in terms:
+        for candidate in (term, _stem(term)):
+            position = lowered.find(candidate)
+            if position >= 0:
+                return position, position + len(candidate)
+
+    return None
+
+
+def kwic_snippet(text: str, terms: Iterable[str] = (), pattern: Optional[str] = None,
+                 phrase: Optional[str] = None, max_chars: int = 300) -> str:
+    """
+    Vyreže z textu okno okolo zásahu dotazu (keyword-in-context)
+
+    Args:
+        text: Celý text chunku
+        terms: Pojmy zo sémantického dotazu
+        pattern: Regex z dotazu regex:
+        phrase: Presná fráza z dotazu contains:
+        max_chars: Maximálna dĺžka úryvku
+
+    Returns:
+        Úryvok so zvýrazneným kontextom, bez zásahu začiatok textu
+    """
+    text = text or ""
+    if len(text) <= max_chars:
+        return text
+
+    match = find_match(text, terms, pattern, phrase)
+    if match is None:
+        start = 0
+    else:
+        # Zásah zhruba v prvej tretine okna - viac kontextu za ním ako pred ním
+        start = max(0, match[0] - max_chars // 3)
+    end = min(len(text), start + max_chars)
+    start = max(0, end - max_chars)
+
+    # Zarovnaj na hranice slov
+    if start > 0:
+        space = text.find(" ", start, start + 30)
+        if space >= 0:
+            start = space + 1
+    if end < len(text):
+        space = text.rfind(" ", end - 30, end)
+        if space > start:
+            end = space
+
+    snippet = text[start:end].strip()
+    return f"{'...' if start > 0 else ''}{snippet}{'...' if end < len(text) else ''}"
+
+
+def fit_to_budget(parts: List[str], max_tokens: int, separator: str = "\n") -> Tuple[str, int]:
+    """
+    Spojí časti výstupu, kým sa zmestia do tokenového rozpočtu
+
+    Returns:
+        (výstup, počet vynechaných častí)
+    """
+    output: List[str] = []
+    used = 0
+    for part in parts:
+        cost = estimate_tokens(part + separator)
+        if output and used + cost > max_tokens:
+            break
+        output.append(part)
+        used += cost
+    return separator.join(output), len(parts) - len(output)
@@ -0,0 +1,242 @@
+"""
+Offline index právnych hesiel Wikipédie (názov + úvodná sekcia)
+
+Index v SQLite vytvorí scripts/build_wikipedia_index.py z ľubovoľného dumpu sk/cs
+Wikipédie (pages-articles XML, aj .bz2/.gz) - len články z právnych kategórií
+a z každého len úvod pred prvým nadpisom. LegalWikipediaTool v ňom hľadá bez siete:
+
+- fulltext: FTS5 nad názvom a úvodom (bez diakritiky, predpony slov pre skloňovanie,
+  názov má vyššiu váhu v bm25)
+- sémanticky: normalizované float32 embeddingy (ak boli pri budovaní vypočítané)
+  a skalárny súčin v numpy
+- poradie: reciprocal rank fusion oboch zoznamov
+
+Schéma:
+    articles      id, lang, title, lead, categories
+    articles_fts  FTS5 (title, lead) s externým obsahom v articles - text nie je dvakrát
+    embeddings    id, vector (float32 blob)
+    meta          key, value (model embeddingov, zdroje, čas vytvorenia)
+
+Prostredie:
+- LEGAL_WIKIPEDIA_INDEX  cesta k indexu (predvolene data/wikipedia_index.db), "0" vypne
+"""
+
+import os
+import re
+import json
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from agent.tracing import get_tracer
+
+DEFAULT_WIKIPEDIA_INDEX = "data/wikipedia_index.db"
+RRF_K = 60
+WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(query: str) -> str:
+    """
+    Dotaz pre FTS5 - slová spojené cez OR, dlhšie slová ako predpona
+
+    Koncovky sa odrežú (vlastníckeho -> vlastníck*), aby sa našli aj iné pády.
+    """
+    terms = []
+    for word in WORD.findall(query.lower()):
+        if len(word) < 3:
+            continue
+        stem = word[:max(4, len(word) - 2)] if len(word) > 5 else word
+        terms.append(f'"{stem}"*')
+    return " OR ".join(dict.fromkeys(terms))
+
+
+class WikipediaIndexWriter:
+    """Zápis indexu do dočasného súboru, finish() ho atomicky presunie na miesto"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name + ".")
+        os.close(fd)
+        self._conn = sqlite3.connect(self._tmp_name)
+        self._conn.executescript('''
+            CREATE TABLE articles (
+                id INTEGER PRIMARY KEY,
+                lang TEXT NOT NULL,
+                title TEXT NOT NULL,
+                lead TEXT NOT NULL,
+                categories TEXT NOT NULL,
+                UNIQUE (lang, title)
+            );
+            CREATE VIRTUAL TABLE articles_fts USING fts5(
+                title, lead, content='articles', content_rowid='id',
+                tokenize="unicode61 remove_diacritics 2"
+            );
+            CREATE TABLE embeddings (id INTEGER PRIMARY KEY, vector BLOB NOT NULL);
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        ''')
+        self.count = 0
+
+    def add(self, lang: str, title: str, lead: str, categories: Iterable[str]) -> Optional[int]:
+        """Pridá článok (duplicitný názov v rovnakom jazyku sa preskočí), vráti jeho id"""
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO articles (lang, title, lead, categories) VALUES (?, ?, ?, ?)",
+            (lang, title, lead, json.dumps(sorted(categories), ensure_ascii=False))
+        )
+        if not cursor.rowcount:
+            return None
+        self.count += 1
+        return cursor.lastrowid
+
+    def articles(self) -> Iterable[Tuple[int, str, str]]:
+        """(id, názov, úvod) všetkých článkov - vstup pre výpočet embeddingov"""
+        return self._conn.execute("SELECT id, title, lead FROM articles ORDER BY id").fetchall()
+
+    def add_embeddings(self, ids: List[int], vectors):
+        """Uloží normalizované vektory ako float32"""
+        import numpy as np
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (id, vector) VALUES (?, ?)",
+            [(article_id, row.tobytes()) for article_id, row in zip(ids, matrix)]
+        )
+
+    def set_meta(self, **values: Any):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value, ensure_ascii=False)) for key, value in values.items()]
+        )
+
+    def finish(self) -> int:
+        """Naplní FTS index, zapíše metadáta a nahradí cieľový súbor"""
+        try:
+            self._conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+            self._conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+            self.set_meta(built_at=datetime.now().isoformat(timespec="seconds"), articles=self.count)
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+            self._conn.close()
+            os.replace(self._tmp_name, self.path)
+        except BaseException:
+            self.abort()
+            raise
+        return self.count
+
+    def abort(self):
+        try:
+            self._conn.close()
+        finally:
+            if os.path.exists(self._tmp_name):
+                os.unlink(self._tmp_name)
+
+
+class WikipediaIndex:
+    """Vyhľadávanie v offline indexe (len čítanie, bezpečné pre viac vlákien)"""
+
+    def __init__(self, path: Path, embedding_function: Optional[Any] = None):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.meta = {key: json.loads(value) for key, value in self._conn.execute("SELECT key, value FROM meta")}
+        self._embedding_function = embedding_function
+        self._embedding_failed = False
+        self._matrices: Dict[str, Tuple[Any, Any]] = {}
+        with self._lock:
+            self.has_embeddings = self._conn.execute("SELECT 1 FROM embeddings LIMIT 1").fetchone() is not None
+
+    def close(self):
+        self._conn.close()
+
+    def fulltext(self, query: str, lang: str, k: int = 10) -> List[int]:
+        """Id článkov podľa bm25 (názov má 5x vyššiu váhu ako úvod)"""
+        expression = fts_query(query)
+        if not expression:
+            return []
+        with self._lock:
+            rows = self._conn.execute('''
+                SELECT a.id FROM articles_fts
+                JOIN articles a ON a.id = articles_fts.rowid
+                WHERE articles_fts MATCH ? AND a.lang = ?
+                ORDER BY bm25(articles_fts, 5.0, 1.0) LIMIT ?
+            ''', (expression, lang, k)).fetchall()
+        return [row[0] for row in rows]
+
+    def _embed(self, query: str):
+        """Vektor dotazu (model sa načíta pri prvom sémantickom dotaze, pri chybe sa vypne)"""
+        if self._embedding_function is None and not self._embedding_failed:
+            try:
+                from agent.tools.embeddings import DEFAULT_EMBEDDING_MODEL, get_shared_embedding_function
+                model_name = self.meta.get("embedding_model") or DEFAULT_EMBEDDING_MODEL
+                self._embedding_function = get_shared_embedding_function(model_name)
+            except Exception:
+                self._embedding_failed = True
+        if self._embedding_function is None:
+            return None
+        return self._embedding_function([query])[0]
+
+    def _matrix(self, lang: str):
+        """Matica embeddingov jedného jazyka (načíta sa raz)"""
+        import numpy as np
+
+        if lang not in self._matrices:
+            with self._lock:
+                rows = self._conn.execute('''
+                    SELECT e.id, e.vector FROM embeddings e JOIN articles a ON a.id = e.id
+                    WHERE a.lang = ? ORDER BY e.id
+                ''', (lang,)).fetchall()
+            ids = np.array([row[0] for row in rows], dtype=np.int64)
+            matrix = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32)
+            self._matrices[lang] = (ids, matrix.reshape(len(rows), -1) if rows else matrix)
+        return self._matrices[lang]
+
+    def semantic(self, query: str, lang: str, k: int = 10) -> List[int]:
+        """Id článkov podľa kosínusovej podobnosti (prázdne bez embeddingov)"""
+        import numpy as np
+
+        if not self.has_embeddings:
+            return []
+        vector = self._embed(query)
+        ids, matrix = self._matrix(lang)
+        if vector is None or not len(ids):
+            return []
+        scores = matrix @ np.asarray(vector, dtype=np.float32)
+        top = np.argsort(-scores)[:k]
+        return [int(ids[i]) for i in top]
+
+    def search(self, query: str, lang: str, k: int = 3) -> List[Dict[str, str]]:
+        """Najlepšie články (title, lead) - fúzia fulltextu a sémantického poradia"""
+        with get_tracer().span("wikipedia.offline", lang=lang) as span:
+            rankings = [self.fulltext(query, lang, k * 3), self.semantic(query, lang, k * 3)]
+            scores: Dict[int, float] = {}
+            for ranking in rankings:
+                for rank, article_id in enumerate(ranking):
+                    scores[article_id] = scores.get(article_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+            best = sorted(scores, key=scores.get, reverse=True)[:k]
+            span.update(fulltext=len(rankings[0]), semantic=len(rankings[1]), results=len(best))
+            if not best:
+                return []
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT id, title, lead FROM articles WHERE id IN ({','.join('?' * len(best))})", best
+                ).fetchall()
+            by_id = {row[0]: {"title": row[1], "lead": row[2]} for row in rows}
+            return [by_id[article_id] for article_id in best]
+
+    def stats(self) -> Dict[str, Any]:
+        """Počty článkov podľa jazyka a veľkosť súboru"""
+        with self._lock:
+            langs = dict(self._conn.execute("SELECT lang, COUNT(*) FROM articles GROUP BY lang").fetchall())
+        return {"articles": langs, "embeddings": self.has_embeddings,
+                "size_mb": round(self.path.stat().st_size / 1024 / 1024, 2)}
+
+
+def load_configured_wikipedia_index() -> Optional[WikipediaIndex]:
+    """Offline index podľa LEGAL_WIKIPEDIA_INDEX (None, ak je vypnutý alebo neexistuje)"""
+    path = os.getenv("LEGAL_WIKIPEDIA_INDEX", DEFAULT_WIKIPEDIA_INDEX)
+    if path.lower() in ("0", "false", "no", "") or not Path(path).exists():
+        return None
+    return WikipediaIndex(Path(path))
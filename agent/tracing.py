@@ -0,0 +1,305 @@
+"""
+Štruktúrované trasovanie (spans) pre horúce cesty agenta a nástrojov
+
+Trasovanie sa zapína premennými prostredia a je navrhnuté tak, aby mohlo bežať
+aj v produkcii:
+- LEGAL_TRACE_FILE    cesta k výstupnému súboru (bez nej je trasovanie vypnuté)
+- LEGAL_TRACE_FORMAT  "jsonl" (predvolené, jeden span na riadok) alebo "otlp"
+                      (OpenTelemetry JSON, jeden ExportTraceServiceRequest na riadok)
+- LEGAL_TRACE_SAMPLE  podiel vzorkovaných koreňových spanov 0.0-1.0 (predvolene 1.0)
+
+Keď je trasovanie vypnuté, span() vracia zdieľaný no-op objekt bez alokácií.
+Spany sa zapisujú dávkovo z pozadia, volajúce vlákno len pridá záznam do bufferu.
+"""
+
+import os
+import json
+import time
+import atexit
+import random
+import threading
+import contextvars
+from typing import Any, Dict, List, Optional
+
+
+class Span:
+    """Jeden meraný úsek s trvaním a atribútmi"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "_start_perf", "attributes", "status", "_tracer", "_token", "sampled")
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self._tracer = tracer
+        self.name = name
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else "%032x" % random.getrandbits(128)
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.sampled = parent.sampled if parent else tracer.should_sample()
+        self.attributes = attributes
+        self.status = "ok"
+        self.start_ns = time.time_ns()
+        self._start_perf = time.perf_counter_ns()
+        self.end_ns = None
+        self._token = None
+
+    def set(self, key: str, value: Any) -> "Span":
+        """Nastaví atribút spanu (veľkosti, počty, výsledok cache...)"""
+        self.attributes[key] = value
+        return self
+
+    def update(self, **attributes: Any) -> "Span":
+        """Nastaví viac atribútov naraz"""
+        self.attributes.update(attributes)
+        return self
+
+    def end(self, error: Optional[BaseException] = None):
+        """Ukončí span a odovzdá ho exportéru"""
+        if self.end_ns is not None:
+            return
+        duration_ns = time.perf_counter_ns() - self._start_perf
+        self.end_ns = self.start_ns + duration_ns
+        if error is not None:
+            self.status = "error"
+            self.attributes["error"] = f"{type(error).__name__}: {error}"
+        if self.sampled:
+            self._tracer._export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else self.start_ns + (time.perf_counter_ns() - self._start_perf)
+        return (end_ns - self.start_ns) / 1e6
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self.end(exc)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plochý JSONL záznam"""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Span pre vypnuté trasovanie - všetky operácie sú prázdne"""
+
+    __slots__ = ()
+    duration_ms = 0.0
+
+    def set(self, key: str, value: Any) -> "_NoopSpan":
+        return self
+
+    def update(self, **attributes: Any) -> "_NoopSpan":
+        return self
+
+    def end(self, error: Optional[BaseException] = None):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+_current_span: contextvars.ContextVar = contextvars.ContextVar("legal_trace_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Prevedie hodnotu atribútu na OTLP AnyValue"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class JsonlExporter:
+    """Dávkový zápis spanov do súboru z pozadia"""
+
+    def __init__(self, path: str, fmt: str = "jsonl", flush_interval: float = 1.0,
+                 max_batch: int = 512, max_buffer: int = 50000, service_name: str = "ai-legal-assistant"):
+        self.path = path
+        self.format = fmt
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_buffer = max_buffer
+        self.service_name = service_name
+        self.dropped = 0
+
+        self._buffer: List[Span] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._thread = threading.Thread(target=self._worker, name="legal-trace-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def export(self, span: Span):
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                # Radšej zahodiť span ako blokovať požiadavku
+                self.dropped += 1
+                return
+            self._buffer.append(span)
+            if len(self._buffer) >= self.max_batch:
+                self._wakeup.set()
+
+    def _worker(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _serialize(self, spans: List[Span]) -> List[str]:
+        if self.format != "otlp":
+            return [json.dumps(span.to_dict(), ensure_ascii=False, default=str) for span in spans]
+
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+                "status": {"code": 2 if span.status == "error" else 1},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": "agent.tracing"}, "spans": otlp_spans}],
+            }]
+        }
+        return [json.dumps(request, ensure_ascii=False, default=str)]
+
+    def flush(self):
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+        if not spans:
+            return
+        try:
+            lines = self._serialize(spans)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except Exception as e:
+            print(f"⚠️ Chyba pri zápise trace súboru: {e}")
+
+    def shutdown(self):
+        self._closed = True
+        self._wakeup.set()
+        self.flush()
+
+
+class Tracer:
+    """Vytvára spany a odovzdáva ich exportéru"""
+
+    def __init__(self, exporter: Optional[JsonlExporter] = None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def should_sample(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def span(self, name: str, **attributes: Any):
+        """Vytvorí span ako context manager, rodič sa určí z aktuálneho kontextu"""
+        if self.exporter is None:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if parent is not None and not parent.sampled:
+            return NOOP_SPAN
+        return Span(self, name, parent, attributes)
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes: Any):
+        """Span s manuálnym ukončením (napr. začiatok a koniec v rôznych callbackoch)"""
+        if self.exporter is None:
+            return NOOP_SPAN
+        parent = parent if parent is not None else _current_span.get()
+        if isinstance(parent, _NoopSpan) or (parent is not None and not parent.sampled):
+            return NOOP_SPAN
+        return Span(self, name, parent, attributes)
+
+    def _export(self, span: Span):
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+
+def _tracer_from_env() -> Tracer:
+    path = os.getenv("LEGAL_TRACE_FILE")
+    if not path:
+        return Tracer()
+
+    try:
+        sample_rate = float(os.getenv("LEGAL_TRACE_SAMPLE", "1.0"))
+    except ValueError:
+        sample_rate = 1.0
+    fmt = os.getenv("LEGAL_TRACE_FORMAT", "jsonl").lower()
+    return Tracer(JsonlExporter(path, fmt=fmt), sample_rate=sample_rate)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Vráti globálny tracer (konfigurovaný z prostredia pri prvom použití)"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = _tracer_from_env()
+    return _tracer
+
+
+def configure_tracing(path: Optional[str], fmt: str = "jsonl", sample_rate: float = 1.0) -> Tracer:
+    """Programové zapnutie/vypnutie trasovania (path=None vypne)"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is not None and _tracer.exporter is not None:
+            _tracer.exporter.shutdown()
+        _tracer = Tracer(JsonlExporter(path, fmt=fmt), sample_rate=sample_rate) if path else Tracer()
+    return _tracer
+
+
+def span(name: str, **attributes: Any):
+    """Skratka pre get_tracer().span(...)"""
+    return get_tracer().span(name, **attributes)
+
+
+def current_span():
+    """Aktuálny span (alebo no-op span mimo trasovania)"""
+    return _current_span.get() or NOOP_SPAN
+
+
+def estimate_tokens(text: str) -> int:
+    """Hrubý odhad počtu tokenov (4 znaky na token, rovnako ako chunkovanie bez tokenizéra)"""
+    return len(text) // 4 if text else 0
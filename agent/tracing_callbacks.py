@@ -0,0 +1,124 @@
+"""
+LangChain callback handlery pre meranie agenta
+
+- TracingCallbackHandler premieňa LLM volania a parsovanie na spany
+- IterationStatsCallback zbiera tokeny promptu a latenciu každej ReAct iterácie
+"""
+
+import time
+import threading
+from typing import Any, Dict, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from agent.scratchpad import scratchpad_tokens
+from agent.tracing import current_span, estimate_tokens, get_tracer
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Vytvára spany llm.call a agent.parse v rámci aktuálneho agent.ask spanu"""
+    
+    def __init__(self):
+        self._spans: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def _start_llm(self, run_id, prompt_chars: int, prompt_tokens: int, model: str):
+        span = get_tracer().start_span(
+            "llm.call",
+            parent=current_span(),
+            model=model,
+            prompt_chars=prompt_chars,
+            prompt_tokens_estimate=prompt_tokens
+        )
+        with self._lock:
+            self._spans[run_id] = span
+    
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        text = "".join(prompts)
+        self._start_llm(run_id, len(text), estimate_tokens(text), (serialized or {}).get("name", ""))
+    
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        text = "".join(str(m.content) for batch in messages for m in batch)
+        self._start_llm(run_id, len(text), estimate_tokens(text), (serialized or {}).get("name", ""))
+    
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        
+        completion = "".join(g.text for batch in response.generations for g in batch)
+        span.set("completion_chars", len(completion))
+        
+        # Skutočné počty tokenov, ak ich model vracia
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            span.update(
+                prompt_tokens=usage.get("prompt_tokens", 0),
+                completion_tokens=usage.get("completion_tokens", 0)
+            )
+        span.end()
+        
+        # Parsovanie výstupu trvá od konca LLM po rozpoznanú akciu
+        self._local.parse_span = get_tracer().start_span("agent.parse", parent=current_span())
+    
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.end(error)
+    
+    def _end_parse(self, **attributes):
+        span = getattr(self._local, "parse_span", None)
+        if span is not None:
+            span.update(**attributes)
+            span.end()
+            self._local.parse_span = None
+    
+    def on_agent_action(self, action, *, run_id, **kwargs):
+        self._end_parse(tool=action.tool)
+    
+    def on_agent_finish(self, finish, *, run_id, **kwargs):
+        self._end_parse(final=True)
+
+
+class IterationStatsCallback(BaseCallbackHandler):
+    """Štatistiky jednotlivých iterácií ReAct cyklu pre jednu otázku (nová inštancia na ask)"""
+    
+    def __init__(self):
+        self._pending: Dict[Any, Dict[str, Any]] = {}
+        self.iterations: List[Dict[str, Any]] = []
+    
+    def _start(self, run_id, prompt: str):
+        self._pending[run_id] = {
+            "iteration": len(self._pending) + len(self.iterations) + 1,
+            "prompt_tokens": estimate_tokens(prompt),
+            "scratchpad_tokens": scratchpad_tokens(prompt),
+            "started": time.perf_counter(),
+        }
+    
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, "".join(prompts))
+    
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "".join(str(m.content) for batch in messages for m in batch))
+    
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        stats = self._pending.pop(run_id, None)
+        if stats is None:
+            return
+        started = stats.pop("started")
+        completion = "".join(g.text for batch in response.generations for g in batch)
+        stats["completion_tokens"] = estimate_tokens(completion)
+        stats["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        
+        # Skutočné počty tokenov, ak ich model vracia
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            stats["prompt_tokens"] = usage.get("prompt_tokens", stats["prompt_tokens"])
+            stats["completion_tokens"] = usage.get("completion_tokens", stats["completion_tokens"])
+        self.iterations.append(stats)
+    
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._pending.pop(run_id, None)
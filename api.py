@@ -0,0 +1,340 @@
+"""
+HTTP API (ASGI) pre AI Právneho Asistenta
+
+Endpointy:
+- POST /ask           otázka agentovi, odpoveď naraz
+- POST /ask/stream    otázka agentovi, kroky ReAct cyklu ako Server-Sent Events
+- GET  /terms?q=      vyhľadanie pojmov v databáze (legal_term_search)
+- GET  /search?q=     vyhľadávanie v zákonoch (enhanced_vector_search, rovnaká syntax dotazov)
+- GET  /health        proces beží (liveness)
+- GET  /ready         agent je vytvorený a nástroje zahriate (readiness)
+- GET  /stats         vyťaženie limitov a poolu
+
+Nastavenia (premenné prostredia):
+- LEGAL_MAX_CONCURRENCY     max. súbežných otázok agentovi (predvolene 8)
+- LEGAL_MAX_QUEUE           max. čakajúcich otázok, nad limit 429 (predvolene 32)
+- LEGAL_QUEUE_TIMEOUT       max. čakanie vo fronte v sekundách, potom 503 (predvolene 30)
+- LEGAL_REQUEST_TIMEOUT     max. trvanie otázky v sekundách, potom 504 (predvolene 120)
+- LEGAL_TOOL_CONCURRENCY    max. súbežných volaní /terms a /search (predvolene 16)
+- LEGAL_API_MODEL           OpenAI model (predvolene gpt-4o-mini)
+
+Spustenie:
+    uvicorn api:app --host 0.0.0.0 --port 8000
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+
+from agent.agent_pool import AgentPool
+from agent.tools.query_language import QuerySyntaxError
+
+load_dotenv()
+
+
+class AskRequest(BaseModel):
+    """Telo požiadavky na /ask a /ask/stream"""
+    question: str = Field(..., min_length=1, max_length=4000)
+    session_id: Optional[str] = Field(default=None, max_length=128)
+
+
+class RequestLimiter:
+    """
+    Limit súbežných požiadaviek s ohraničenou frontou (backpressure)
+
+    Keď sú obsadené všetky sloty a vo fronte čaká max_queue požiadaviek, ďalšia
+    sa hneď odmietne (429). Požiadavka, ktorá sa do queue_timeout nedostane
+    na rad, dostane 503.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.queue_timeouts = 0
+
+    async def acquire(self) -> float:
+        """Obsadí slot, vráti čas čakania vo fronte v ms"""
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=429, detail=f"Fronta {self.name} je plná", headers={"Retry-After": "1"})
+
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.queue_timeouts += 1
+            raise HTTPException(status_code=503, detail=f"Vypršal čas čakania vo fronte {self.name}", headers={"Retry-After": "5"})
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return round((time.perf_counter() - start) * 1000, 1)
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "queue_timeouts": self.queue_timeouts,
+        }
+
+
+async def run_limited(limiter: RequestLimiter, timeout: float, func: Callable, *args) -> Any:
+    """
+    Spustí blokujúcu funkciu vo vlákne v rámci limitu a časového limitu
+
+    Pri prekročení timeout klient dostane 504, ale slot sa uvoľní až po skutočnom
+    dobehnutí vlákna - limit tak zodpovedá reálnej záťaži nástrojov a LLM.
+    """
+    await limiter.acquire()
+    task = asyncio.ensure_future(run_in_threadpool(func, *args))
+    try:
+        result = await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+    except asyncio.TimeoutError:
+        task.add_done_callback(lambda _: limiter.release())
+        raise HTTPException(status_code=504, detail=f"Požiadavka trvala dlhšie ako {timeout:.0f} s")
+    except BaseException:
+        if task.done():
+            limiter.release()
+        else:
+            task.add_done_callback(lambda _: limiter.release())
+        raise
+    limiter.release()
+    return result
+
+
+class _CleanupStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse, ktorá po odoslaní, chybe aj odpojení klienta zavolá cleanup
+
+    finally v async generátore nestačí - ak klient odíde pred prvou udalosťou,
+    generátor sa nespustí a jeho finally nikdy nebeží.
+    """
+
+    def __init__(self, content: Any, cleanup: Callable[[], None], **kwargs):
+        super().__init__(content, **kwargs)
+        self._cleanup = cleanup
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._cleanup()
+
+
+def _sse(event: Dict[str, Any]) -> str:
+    """Jedna Server-Sent Event udalosť"""
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+
+def _serialize_steps(steps: List[Any]) -> List[Dict[str, str]]:
+    """intermediate_steps (AgentAction, pozorovanie) na JSON"""
+    serialized = []
+    for step in steps:
+        if isinstance(step, (tuple, list)) and len(step) >= 2:
+            action, observation = step[0], step[1]
+            serialized.append({
+                "tool": getattr(action, "tool", ""),
+                "tool_input": str(getattr(action, "tool_input", "")),
+                "observation": str(observation),
+            })
+        else:
+            serialized.append({"tool": "", "tool_input": "", "observation": str(step)})
+    return serialized
+
+
+def create_app(pool_factory: Optional[Callable[[], AgentPool]] = None) -> FastAPI:
+    """
+    Vytvorí ASGI aplikáciu
+
+    Args:
+        pool_factory: Funkcia vytvárajúca AgentPool (predvolene OpenAI model z LEGAL_API_MODEL);
+            záťažový test sem podstrčí pool s fake LLM
+    """
+    max_concurrency = int(os.getenv("LEGAL_MAX_CONCURRENCY", "8"))
+    request_timeout = float(os.getenv("LEGAL_REQUEST_TIMEOUT", "120"))
+    queue_timeout = float(os.getenv("LEGAL_QUEUE_TIMEOUT", "30"))
+
+    if pool_factory is None:
+        def pool_factory():
+            return AgentPool(model=os.getenv("LEGAL_API_MODEL", "gpt-4o-mini"),
+                             max_concurrency=max_concurrency, verbose=False)
+
+    state: Dict[str, Any] = {"pool": None, "error": None, "started": time.time(), "ready_after_s": None}
+
+    def build_pool():
+        try:
+            # Otázky sa prijímajú hneď, /ready čaká aj na zahriatie nástrojov (embedding model, ChromaDB)
+            pool = state["pool"] = pool_factory()
+            if hasattr(pool.agent, "wait_until_ready"):
+                pool.agent.wait_until_ready()
+            state["ready_after_s"] = round(time.time() - state["started"], 2)
+            print(f"✅ API pripravené za {state['ready_after_s']} s")
+        except Exception as e:
+            state["error"] = str(e)
+            print(f"❌ Chyba pri vytváraní agenta: {e}")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Limity sa vytvárajú v event loope servera
+        app.state.ask_limiter = RequestLimiter(
+            "ask", max_concurrency, int(os.getenv("LEGAL_MAX_QUEUE", "32")), queue_timeout
+        )
+        tool_concurrency = int(os.getenv("LEGAL_TOOL_CONCURRENCY", "16"))
+        app.state.tool_limiter = RequestLimiter("tools", tool_concurrency, tool_concurrency * 4, queue_timeout)
+        # Server odpovedá na /health hneď, agent sa vytvára na pozadí
+        threading.Thread(target=build_pool, name="agent-warmup", daemon=True).start()
+        yield
+
+    app = FastAPI(title="AI Právny Asistent API", version="1.0", lifespan=lifespan)
+
+    def require_pool() -> AgentPool:
+        pool = state["pool"]
+        if pool is None:
+            detail = f"Agent sa nepodarilo vytvoriť: {state['error']}" if state["error"] else "Agent sa ešte zahrieva"
+            raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "5"})
+        return pool
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "uptime_s": round(time.time() - state["started"], 1)}
+
+    @app.get("/ready")
+    async def ready():
+        pool = state["pool"]
+        body = {
+            "ready": pool is not None and pool.ready,
+            "agent": pool is not None,
+            "error": state["error"],
+            "ready_after_s": state["ready_after_s"],
+            "tools": {tool.name: getattr(tool, "is_ready", True) for tool in pool.tools} if pool else {},
+        }
+        return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+    @app.get("/stats")
+    async def stats(request: Request):
+        pool = state["pool"]
+        return {
+            "ask": request.app.state.ask_limiter.stats(),
+            "tools": request.app.state.tool_limiter.stats(),
+            "pool": pool.stats() if pool else None,
+        }
+
+    @app.post("/ask")
+    async def ask(body: AskRequest, request: Request):
+        pool = require_pool()
+        session_id = body.session_id or uuid.uuid4().hex
+        start = time.perf_counter()
+        result = await run_limited(request.app.state.ask_limiter, request_timeout, pool.ask, body.question, session_id)
+        return {
+            "session_id": session_id,
+            "answer": result["answer"],
+            "success": result["success"],
+            "steps": _serialize_steps(result.get("intermediate_steps", [])),
+            "iterations": result.get("iterations", []),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+    @app.post("/ask/stream")
+    async def ask_stream(body: AskRequest, request: Request):
+        pool = require_pool()
+        session_id = body.session_id or uuid.uuid4().hex
+        limiter = request.app.state.ask_limiter
+        queue_ms = await limiter.acquire()
+        stream = pool.ask_stream(body.question, session_id)
+        step = None  # krok agenta bežiaci vo vlákne
+
+        async def events():
+            nonlocal step
+            deadline = time.monotonic() + request_timeout
+            done = object()
+            yield _sse({"type": "session", "session_id": session_id, "queue_ms": queue_ms})
+            while True:
+                # Časový limit platí pre každý krok, nielen medzi udalosťami
+                step = asyncio.ensure_future(run_in_threadpool(next, stream, done))
+                try:
+                    event = await asyncio.wait_for(asyncio.shield(step), timeout=max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    yield _sse({"type": "error", "error": f"Požiadavka trvala dlhšie ako {request_timeout:.0f} s"})
+                    break
+                if event is done:
+                    break
+                yield _sse(event)
+
+        def cleanup():
+            # Slot poolu sa uvoľní po návrate bežiaceho kroku, slot API (ako v run_limited)
+            # až keď vlákno skutočne dobehne
+            stream.cancel()
+            if step is not None and not step.done():
+                step.add_done_callback(lambda _: limiter.release())
+            else:
+                limiter.release()
+
+        return _CleanupStreamingResponse(events(), cleanup, media_type="text/event-stream")
+
+    @app.get("/terms")
+    async def terms(request: Request, q: str = Query(..., min_length=1, max_length=500)):
+        pool = require_pool()
+        tool = pool.get_tool("legal_term_search")
+        if tool is None:
+            raise HTTPException(status_code=503, detail="Databáza pojmov nie je dostupná")
+
+        rows = await run_limited(request.app.state.tool_limiter, request_timeout, tool.search_terms, tool._split_terms(q))
+        return {
+            "query": q,
+            "results": [
+                {
+                    "term": search_term,
+                    "matches": [
+                        {"term": term, "definition": definition, "law_id": law_id,
+                         "paragraph": paragraph, "confidence": confidence, "category": category}
+                        for term, definition, law_id, paragraph, confidence, category in matches
+                    ],
+                }
+                for search_term, matches in rows
+            ],
+        }
+
+    @app.get("/search")
+    async def search(request: Request, q: str = Query(..., min_length=1, max_length=1000),
+                     limit: int = Query(default=8, ge=1, le=50)):
+        pool = require_pool()
+        tool = pool.get_tool("enhanced_vector_search")
+        if tool is None or not tool.collection:
+            raise HTTPException(status_code=503, detail="Vyhľadávanie v zákonoch nie je dostupné")
+
+        try:
+            results = await run_limited(request.app.state.tool_limiter, request_timeout, tool.search, q, limit)
+        except QuerySyntaxError as e:
+            raise HTTPException(status_code=400, detail=f"Chybný dotaz: {e}")
+        if results is None:
+            raise HTTPException(status_code=400, detail="Nerozoznaný typ dotazu")
+        return {"query": q, "results": results}
+
+    return app
+
+
+app = create_app()
@@ -13,6 +13,7 @@ except ImportError:
 import sqlite3
 import streamlit as st
 import os
+import uuid
 from dotenv import load_dotenv
 import sys
 
@@ -20,7 +21,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from agent.legal_agent import create_legal_assistant
+    from agent.agent_pool import AgentPool
 except ImportError as e:
     st.error(f"Chyba pri importovaní agenta: {e}")
     st.stop()
@@ -28,6 +29,12 @@ except ImportError as e:
 load_dotenv()
 
 
+@st.cache_resource(show_spinner=False)
+def get_shared_agent(model: str) -> AgentPool:
+    """Jeden agent (nástroje, LLM klient, executor) zdieľaný všetkými sedeniami procesu"""
+    return AgentPool(model=model)
+
+
 def main():
     """Hlavná funkcia Streamlit aplikácie"""
     
@@ -102,24 +109,18 @@ def main():
         # Inicializácia session state
         if "messages" not in st.session_state:
             st.session_state.messages = []
-            st.session_state.agent = None
+        if "session_id" not in st.session_state:
+            st.session_state.session_id = uuid.uuid4().hex
         
-        # Status agenta
+        # Zdieľaný agent procesu - história sedenia sa odovzdáva cez session_id
+        agent = None
         if not openai_key:
             st.warning("🔑 Vložte OpenAI API kľúč v bočnom paneli pre fungovanie asistenta")
-        elif st.session_state.agent is None:
-            st.info("⏳ Počkajte na inicializáciu AI asistenta...")
         else:
-            st.success("🤖 AI asistent je pripravený!")
-        
-        # Vytvorenie agenta ak ešte neexistuje
-        if st.session_state.agent is None and openai_key:
             with st.spinner("Inicializujem AI asistenta..."):
                 try:
-                    st.session_state.agent = create_legal_assistant(
-                        model=selected_model_name
-                    )
-                    st.success("✅ AI asistent je pripravený!")
+                    agent = get_shared_agent(selected_model_name)
+                    st.success("🤖 AI asistent je pripravený!")
                 except Exception as e:
                     st.error(f"❌ Chyba pri inicializácii: {e}")
                     st.stop()
@@ -167,7 +168,7 @@ def main():
         # Input pre novú otázku
         if prompt := st.chat_input(
             "Napíšte vašu právnu otázku...", 
-            disabled=not openai_key or st.session_state.agent is None
+            disabled=not openai_key or agent is None
         ):
             # Pridaj používateľskú správu
             st.session_state.messages.append({"role": "user", "content": prompt})
@@ -176,8 +177,8 @@ def main():
             with st.spinner("Premýšľam..."):
                 try:
                     # Type check pre Pylance
-                    if st.session_state.agent is not None:
-                        result = st.session_state.agent.ask(prompt)
+                    if agent is not None:
+                        result = agent.ask(prompt, session_id=st.session_state.session_id)
                     else:
                         raise Exception("Agent nie je inicializovaný")
                     
@@ -213,8 +214,8 @@ def main():
         with col_clear:
             if st.button("🗑️ Vymazať históriu", type="secondary"):
                 st.session_state.messages = []
-                if st.session_state.agent:
-                    st.session_state.agent.reset_memory()
+                if agent is not None:
+                    agent.reset_memory(st.session_state.session_id)
                 st.rerun()
         
         with col_export:
@@ -274,7 +275,7 @@ def main():
             if st.button(
                 question, 
                 key=f"example_{hash(question)}",
-                disabled=not openai_key or st.session_state.agent is None,
+                disabled=not openai_key or agent is None,
                 use_container_width=True
             ):
                 # Pridaj otázku do správ
@@ -284,8 +285,8 @@ def main():
                 with st.spinner("Premýšľam..."):
                     try:
                         # Type check pre Pylance
-                        if st.session_state.agent is not None:
-                            result = st.session_state.agent.ask(question)
+                        if agent is not None:
+                            result = agent.ask(question, session_id=st.session_state.session_id)
                         else:
                             raise Exception("Agent nie je inicializovaný")
                         
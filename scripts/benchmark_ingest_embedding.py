@@ -0,0 +1,165 @@
+"""
+Benchmark embeddingu pri ingeste - pevné dávky po 50 vs. plánovač podľa tokenov
+
+Chunky vzniknú chunkerom LegalTextLoader zo zákonov v data/law_texts v poradí ingestu
+(s oknami dlhých chunkov ako pri ingeste). Porovná sa:
+
+- fixed-50:   dávka zápisu po 50 chunkoch, embedding funkcia na texty dávky a potom na
+              okná dávky (ako collection.add; model si dávku delí po 32)
+- budget-N:   EmbeddingScheduler - texty zoradené podľa tokenov, dávky s N tokenmi
+              vrátane paddingu, výsledky v pôvodnom poradí
+
+Pre každý variant sa zmeria čas, texty/s, počet volaní modelu a podiel paddingu
+a overí sa, že vektory v pôvodnom poradí zodpovedajú pevným dávkam.
+
+Použitie:
+    python scripts/benchmark_ingest_embedding.py --limit 1000
+    python scripts/benchmark_ingest_embedding.py --budgets 4096 8192 16384 --no-windows
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Benchmark beží offline - embedding model len z lokálnej cache
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import numpy as np
+
+from agent.tools.embeddings import (
+    DEFAULT_EMBEDDING_MODEL, DEFAULT_TOKEN_BUDGET, EmbeddingScheduler, MultilingualEmbeddingFunction
+)
+from agent.tools.multi_vector import TokenWindows
+from scripts.law_stream import batched, iter_sections, read_blocks
+from scripts.load_law_texts import LegalTextLoader
+
+DEFAULT_RESULTS_DIR = project_root / "data" / "benchmarks" / "results"
+FIXED_BATCH = 50
+MODEL_BATCH = 32
+
+
+def ingest_texts(function: MultilingualEmbeddingFunction, data_dir: Path, limit: int, windows: bool) -> List[List[str]]:
+    """Texty na embedding pre každý chunk v poradí ingestu - [text chunku, okná 2..n]"""
+    loader = LegalTextLoader.chunker(data_dir, token_windows=TokenWindows.for_embedding(function))
+
+    def chunks():
+        for filename, info in loader.load_metadata().items():
+            path = data_dir / filename
+            if path.exists():
+                yield from loader.iter_chunks(iter_sections(read_blocks(path)), info)
+
+    items = []
+    for chunk in islice(chunks(), limit):
+        texts = [chunk['text']]
+        if windows and chunk['metadata']['tokens'] > loader.token_windows.window:
+            texts += [chunk['text'][start:end] for start, end in loader.token_windows.spans(chunk['text'])[1:]]
+        items.append(texts)
+    return items
+
+
+def fixed_padding(lengths: List[int]) -> int:
+    """Tokeny s paddingom pri delení volania modelom (zoradenie podľa dĺžky, dávky po 32)"""
+    ordered = sorted(lengths, reverse=True)
+    return sum(len(ordered[i:i + MODEL_BATCH]) * ordered[i] for i in range(0, len(ordered), MODEL_BATCH))
+
+
+def run_fixed(function: MultilingualEmbeddingFunction, items: List[List[str]]) -> Dict[str, Any]:
+    scheduler = EmbeddingScheduler(function)
+    vectors: List[List[float]] = []
+    tokens = padded = calls = 0
+    start = time.perf_counter()
+    for batch in batched(items, FIXED_BATCH):
+        chunk_texts = [texts[0] for texts in batch]
+        window_texts = [text for texts in batch for text in texts[1:]]
+        embedded = {}
+        for name, texts in (("chunks", chunk_texts), ("windows", window_texts)):
+            if not texts:
+                continue
+            embedded[name] = function(texts)
+            lengths = scheduler.lengths(texts)
+            tokens += sum(lengths)
+            padded += fixed_padding(lengths)
+            calls += -(-len(texts) // MODEL_BATCH)
+        # Pôvodné poradie - chunk a za ním jeho okná
+        windows = iter(embedded.get("windows", []))
+        for texts, vector in zip(batch, embedded["chunks"]):
+            vectors.append(vector)
+            vectors.extend(next(windows) for _ in texts[1:])
+    seconds = time.perf_counter() - start
+    return {"variant": f"fixed-{FIXED_BATCH}", "seconds": seconds, "model_batches": calls,
+            "tokens": tokens, "padded_tokens": padded, "vectors": vectors}
+
+
+def run_scheduled(function: MultilingualEmbeddingFunction, items: List[List[str]], budget: int) -> Dict[str, Any]:
+    scheduler = EmbeddingScheduler(function, budget)
+    vectors: List[List[float]] = []
+    start = time.perf_counter()
+    for _, item_vectors in scheduler.stream(items, lambda texts: texts):
+        vectors.extend(item_vectors)
+    seconds = time.perf_counter() - start
+    return {"variant": f"budget-{budget}", "seconds": seconds, "model_batches": scheduler.stats["batches"],
+            "tokens": scheduler.stats["tokens"], "padded_tokens": scheduler.stats["padded_tokens"], "vectors": vectors}
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Benchmark embeddingu pri ingeste (pevné dávky vs. tokenový rozpočet)")
+    parser.add_argument("--data-dir", default=str(project_root / "data" / "law_texts"), help="Zákony na chunkovanie")
+    parser.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL, help="Embedding model")
+    parser.add_argument("--limit", type=int, default=1000, help="Počet chunkov v poradí ingestu")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[DEFAULT_TOKEN_BUDGET], help="Tokenové rozpočty dávky")
+    parser.add_argument("--no-windows", action="store_true", help="Len texty chunkov bez okien dlhých chunkov")
+    parser.add_argument("--output", help="Cieľový JSON")
+    args = parser.parse_args()
+
+    print("🚀 Benchmark embeddingu pri ingeste")
+    print("=" * 50)
+
+    function = MultilingualEmbeddingFunction(args.model)
+    items = ingest_texts(function, Path(args.data_dir), args.limit, not args.no_windows)
+    total = sum(len(texts) for texts in items)
+    print(f"📄 {len(items)} chunkov, {total} textov na embedding (backend {function.backend})")
+
+    function([texts[0] for texts in items[:8]])  # zahriatie
+    results = [run_fixed(function, items)]
+    for budget in args.budgets:
+        results.append(run_scheduled(function, items, budget))
+
+    reference = np.array(results[0]["vectors"])
+    print(f"\n{'Variant':<14} {'Čas':>8} {'Textov/s':>9} {'Volaní':>7} {'Padding':>8} {'Max |rozdiel|':>14}")
+    for result in results:
+        vectors = np.array(result.pop("vectors"))
+        result["max_abs_diff"] = round(float(np.abs(vectors - reference).max()), 6)
+        result["texts_per_s"] = round(total / result["seconds"], 1)
+        result["padding"] = round(1 - result["tokens"] / max(result["padded_tokens"], 1), 4)
+        result["seconds"] = round(result["seconds"], 2)
+        print(f"{result['variant']:<14} {result['seconds']:>7.1f}s {result['texts_per_s']:>9.1f} "
+              f"{result['model_batches']:>7} {result['padding']:>8.1%} {result['max_abs_diff']:>14.6f}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "parameters": {"model": args.model, "backend": function.backend, "chunks": len(items), "texts": total,
+                       "windows": not args.no_windows, "cpu_count": os.cpu_count()},
+        "results": results,
+    }
+    DEFAULT_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"ingest_embedding_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Výsledky uložené do {output}")
+
+
+if __name__ == "__main__":
+    main()
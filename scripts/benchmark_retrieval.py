@@ -0,0 +1,338 @@
+"""
+Offline benchmark kvality a rýchlosti vyhľadávania
+
+Spustí verziovanú sadu právnych dotazov so zlatými odpoveďami (law_id + paragraf)
+proti EnhancedVectorSearchTool a LegalTermSearchTool a vypočíta recall@k, MRR
+a p50/p95/p99 latenciu pre každý režim vyhľadávania. Výsledok sa uloží ako JSON,
+aby sa dali jednotlivé behy porovnávať.
+
+Použitie:
+    python scripts/benchmark_retrieval.py
+    python scripts/benchmark_retrieval.py --repeat 5 --compare data/benchmarks/results/predchadzajuci.json
+    python scripts/benchmark_retrieval.py --vector-index int8
+    python scripts/benchmark_retrieval.py --sharded
+    python scripts/benchmark_retrieval.py --no-multi-vector
+    python scripts/benchmark_retrieval.py --no-hierarchy
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from pathlib import Path
+
+# Benchmark musí bežať úplne offline - model sa berie len z lokálnej cache
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from agent.metrics import latency_summary
+from agent.tracing import estimate_tokens
+from agent.tools.query_language import QuerySyntaxError
+
+DEFAULT_QUERY_SET = project_root / "data" / "benchmarks" / "legal_queries_v2.json"
+DEFAULT_RESULTS_DIR = project_root / "data" / "benchmarks" / "results"
+DEFAULT_K_VALUES = [1, 3, 5, 8]
+
+PARAGRAPH_PATTERN = re.compile(r'§\s*\d+[a-z]*')
+
+
+def normalize_paragraph(paragraph: Optional[str]) -> str:
+    """Zjednotí zápis paragrafu ('§  135' -> '§ 135')"""
+    if not paragraph:
+        return ""
+    return re.sub(r'§\s*', '§ ', paragraph.strip())
+
+
+def extract_paragraphs(value: Optional[str]) -> List[str]:
+    """Vytiahne všetky paragrafy z metadát ('§ 200, § 201' -> ['§ 200', '§ 201'])"""
+    if not value:
+        return []
+    return [normalize_paragraph(p) for p in PARAGRAPH_PATTERN.findall(value)]
+
+
+def is_relevant(result: Dict[str, Any], gold: Dict[str, str]) -> bool:
+    """Rozhodne, či výsledok zodpovedá zlatej odpovedi"""
+    if result.get('law_id') != gold['law_id']:
+        return False
+
+    gold_paragraph = normalize_paragraph(gold.get('paragraph'))
+    if not gold_paragraph:
+        return True
+
+    covered = extract_paragraphs(result.get('paragraphs')) or extract_paragraphs(result.get('paragraph'))
+    return gold_paragraph in covered
+
+
+def score_query(results: List[Dict[str, Any]], gold: List[Dict[str, str]], k_values: List[int]) -> Dict[str, Any]:
+    """Vypočíta recall@k a reciprocal rank pre jeden dotaz"""
+    first_hit_rank = {}
+    for rank, result in enumerate(results, 1):
+        for gold_index, gold_item in enumerate(gold):
+            if gold_index not in first_hit_rank and is_relevant(result, gold_item):
+                first_hit_rank[gold_index] = rank
+
+    recall = {}
+    for k in k_values:
+        found = sum(1 for rank in first_hit_rank.values() if rank <= k)
+        recall[f"recall@{k}"] = found / len(gold) if gold else 0.0
+
+    best_rank = min(first_hit_rank.values()) if first_hit_rank else None
+    return {
+        **recall,
+        "reciprocal_rank": 1.0 / best_rank if best_rank else 0.0,
+        "first_relevant_rank": best_rank,
+        "returned": len(results),
+    }
+
+
+def term_results_as_ranked(term_results: List) -> List[Dict[str, Any]]:
+    """Prevedie výstup LegalTermSearchTool.search_terms na zoradený zoznam výsledkov"""
+    ranked = []
+    for _search_term, rows in term_results:
+        for term, _definition, law_id, paragraph, _confidence, _category in rows:
+            ranked.append({'law_id': law_id, 'paragraph': paragraph, 'paragraphs': paragraph, 'term': term})
+    return ranked
+
+
+class RetrievalBenchmark:
+    """Spúšťa sadu dotazov proti vyhľadávacím nástrojom a zbiera metriky"""
+
+    def __init__(self, query_set_path: Path, k_values: List[int], repeat: int = 3, vector_tool: Any = None):
+        self.query_set_path = Path(query_set_path)
+        self.k_values = sorted(k_values)
+        self.repeat = max(1, repeat)
+
+        with open(self.query_set_path, 'r', encoding='utf-8') as f:
+            self.query_set = json.load(f)
+
+        # Vlastný nástroj (napr. index konfigurácie chunkovania zo sweepu), inak sa vytvorí v load_tools
+        self.vector_tool = vector_tool
+        self.term_tool = None
+
+    def load_tools(self):
+        """Inicializuje nástroje (len lokálne dáta, bez siete)"""
+        tools_needed = {q['tool'] for q in self.query_set['queries']}
+
+        if 'enhanced_vector_search' in tools_needed and self.vector_tool is None:
+            from agent.tools.enhanced_vector_search import EnhancedVectorSearchTool
+            self.vector_tool = EnhancedVectorSearchTool()
+            if not self.vector_tool.collection:
+                print("⚠️ Vector databáza nie je dostupná - vektorové dotazy budú mať nulové skóre")
+
+        if 'legal_term_search' in tools_needed:
+            from agent.tools.database_tools import LegalTermSearchTool
+            self.term_tool = LegalTermSearchTool(db_path=str(project_root / "data" / "legal_terms.db"))
+
+    def _execute(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Vykoná jeden dotaz a vráti zoradené štruktúrované výsledky"""
+        if query['tool'] == 'legal_term_search':
+            if not self.term_tool:
+                return []
+            return term_results_as_ranked(self.term_tool.search_terms(self.term_tool._split_terms(query['query'])))
+
+        if not self.vector_tool or not self.vector_tool.collection:
+            return []
+        return self.vector_tool.search(query['query']) or []
+
+    def _observation(self, query: Dict[str, Any], results: List[Dict[str, Any]]) -> str:
+        """Text, ktorý by z výsledkov dostal agent ako Observation"""
+        if query['tool'] == 'enhanced_vector_search' and self.vector_tool and results:
+            return self.vector_tool._format_results(results)
+        return ""
+
+    def run(self) -> Dict[str, Any]:
+        """Spustí celý benchmark"""
+        self.load_tools()
+
+        per_query = []
+        latencies_by_mode: Dict[str, List[float]] = {}
+
+        # Chybné dotazy sa preskočia a uvedú vo výsledku
+        queries, skipped = [], []
+        for query in self.query_set['queries']:
+            try:
+                self._execute(query)  # prvé volanie je zároveň zahriatie modelu a databázy
+                queries.append(query)
+            except QuerySyntaxError as e:
+                skipped.append({"id": query['id'], "query": query['query'], "error": str(e)})
+                print(f"   ⚠️ {query['id']:<8} chybný dotaz, preskočený: {e}")
+
+        for query in queries:
+            latencies = []
+            results = []
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                results = self._execute(query)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            scores = score_query(results, query['gold'], self.k_values)
+            observation = self._observation(query, results)
+            latencies_by_mode.setdefault(query['mode'], []).extend(latencies)
+            per_query.append({
+                "id": query['id'],
+                "mode": query['mode'],
+                "tool": query['tool'],
+                "query": query['query'],
+                **scores,
+                "observation_tokens": estimate_tokens(observation),
+                "result_chars": sum(result.get('text_chars', 0) for result in results),
+                "latency": latency_summary(latencies),
+            })
+
+            print(f"   {query['id']:<8} RR={scores['reciprocal_rank']:.2f} "
+                  f"recall@{self.k_values[-1]}={scores[f'recall@{self.k_values[-1]}']:.2f} "
+                  f"p50={latency_summary(latencies)['p50_ms']:.1f} ms")
+
+        return {
+            "query_set": {
+                "path": str(self.query_set_path.relative_to(project_root) if self.query_set_path.is_relative_to(project_root) else self.query_set_path),
+                "version": self.query_set.get('version'),
+                "queries": len(self.query_set['queries']),
+            },
+            "environment": self._environment(),
+            "parameters": {"k_values": self.k_values, "repeat": self.repeat,
+                           "vector_index": getattr(self.vector_tool, 'index_method', None) or "hnsw",
+                           "sharded": getattr(self.vector_tool, 'shards', None) is not None,
+                           "multi_vector": getattr(self.vector_tool, 'windows', None) is not None,
+                           "hierarchy": getattr(self.vector_tool, 'hierarchy', None) is not None},
+            "modes": self._aggregate(per_query, latencies_by_mode),
+            "queries": per_query,
+            "skipped": skipped,
+        }
+
+    def _aggregate(self, per_query: List[Dict], latencies_by_mode: Dict[str, List[float]]) -> Dict[str, Any]:
+        """Agreguje metriky za každý režim vyhľadávania a celkovo"""
+        groups: Dict[str, List[Dict]] = {}
+        for item in per_query:
+            groups.setdefault(item['mode'], []).append(item)
+        groups['all'] = per_query
+
+        aggregated = {}
+        for mode, items in groups.items():
+            if not items:
+                continue
+            samples = latencies_by_mode.get(mode) or [s for ms in latencies_by_mode.values() for s in ms]
+            aggregated[mode] = {
+                "queries": len(items),
+                **{f"recall@{k}": round(sum(i[f'recall@{k}'] for i in items) / len(items), 4) for k in self.k_values},
+                "mrr": round(sum(i['reciprocal_rank'] for i in items) / len(items), 4),
+                "observation_tokens_mean": round(sum(i.get('observation_tokens', 0) for i in items) / len(items), 1),
+                "result_chars_mean": round(sum(i.get('result_chars', 0) for i in items) / len(items), 1),
+                "latency": latency_summary(samples),
+            }
+        return aggregated
+
+    def _environment(self) -> Dict[str, Any]:
+        """Zaznamená prostredie behu pre porovnateľnosť výsledkov"""
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=project_root, capture_output=True, text=True, timeout=5
+            ).stdout.strip()
+        except Exception:
+            commit = ""
+
+        chunk_count = None
+        if self.vector_tool and self.vector_tool.collection:
+            try:
+                chunk_count = self.vector_tool.collection.count()
+            except Exception:
+                pass
+
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "collection": getattr(self.vector_tool, 'collection_name', None),
+            "chunk_count": chunk_count,
+        }
+
+
+def print_report(report: Dict[str, Any]):
+    """Vypíše súhrnnú tabuľku po režimoch"""
+    k_values = report['parameters']['k_values']
+    print("\n📊 Výsledky podľa režimu vyhľadávania:")
+    header = f"{'režim':<10}{'dotazy':>7}" + "".join(f"{'R@' + str(k):>8}" for k in k_values) + f"{'MRR':>8}{'p50':>9}{'p95':>9}{'p99':>9}"
+    print(header)
+    print("-" * len(header))
+    for mode, stats in report['modes'].items():
+        line = f"{mode:<10}{stats['queries']:>7}"
+        line += "".join(f"{stats[f'recall@{k}']:>8.3f}" for k in k_values)
+        line += f"{stats['mrr']:>8.3f}{stats['latency']['p50_ms']:>9.1f}{stats['latency']['p95_ms']:>9.1f}{stats['latency']['p99_ms']:>9.1f}"
+        print(line)
+
+
+def print_comparison(report: Dict[str, Any], baseline: Dict[str, Any]):
+    """Porovná aktuálny beh s predchádzajúcim JSON výsledkom"""
+    print(f"\n🔁 Porovnanie s behom {baseline['environment'].get('timestamp')} ({baseline['environment'].get('git_commit')}):")
+    k_last = report['parameters']['k_values'][-1]
+    for mode, stats in report['modes'].items():
+        old = baseline.get('modes', {}).get(mode)
+        if not old:
+            print(f"   {mode:<10} (nový režim)")
+            continue
+        d_recall = stats.get(f'recall@{k_last}', 0) - old.get(f'recall@{k_last}', 0)
+        d_mrr = stats['mrr'] - old['mrr']
+        d_p95 = stats['latency']['p95_ms'] - old['latency']['p95_ms']
+        print(f"   {mode:<10} ΔR@{k_last}={d_recall:+.3f}  ΔMRR={d_mrr:+.3f}  Δp95={d_p95:+.1f} ms")
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Offline benchmark vyhľadávania v právnych predpisoch")
+    parser.add_argument("--queries", default=str(DEFAULT_QUERY_SET), help="Cesta k sade dotazov (JSON)")
+    parser.add_argument("--k", type=int, nargs="+", default=DEFAULT_K_VALUES, help="Hodnoty k pre recall@k")
+    parser.add_argument("--repeat", type=int, default=3, help="Počet opakovaní každého dotazu pre latenciu")
+    parser.add_argument("--output", help="Cesta k výstupnému JSON (predvolene data/benchmarks/results/)")
+    parser.add_argument("--vector-index", choices=["hnsw", "int8", "pq"], help="Index pre sémantické dotazy (LEGAL_VECTOR_INDEX)")
+    parser.add_argument("--sharded", action="store_true", help="Vyhľadávanie v shardoch podľa zákona (LEGAL_SHARDED)")
+    parser.add_argument("--no-multi-vector", action="store_true", help="Bez okien dlhých chunkov (LEGAL_MULTI_VECTOR=0)")
+    parser.add_argument("--no-hierarchy", action="store_true", help="Bez indexu odsekov a paragrafov (LEGAL_HIERARCHY=0)")
+    parser.add_argument("--compare", help="Predchádzajúci JSON výsledok na porovnanie")
+    args = parser.parse_args()
+
+    print("🚀 Offline benchmark vyhľadávania")
+    print("=" * 50)
+
+    if args.vector_index:
+        os.environ["LEGAL_VECTOR_INDEX"] = args.vector_index
+    if args.sharded:
+        os.environ["LEGAL_SHARDED"] = "1"
+    if args.no_multi_vector:
+        os.environ["LEGAL_MULTI_VECTOR"] = "0"
+    if args.no_hierarchy:
+        os.environ["LEGAL_HIERARCHY"] = "0"
+
+    benchmark = RetrievalBenchmark(Path(args.queries), args.k, args.repeat)
+    report = benchmark.run()
+
+    print_report(report)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print_comparison(report, json.load(f))
+
+    output = Path(args.output) if args.output else (
+        DEFAULT_RESULTS_DIR / f"retrieval_{report['query_set']['version']}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n💾 Výsledky uložené do {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Pamäť procesu pri N sedeniach: agent na sedenie vs. zdieľaný agent (AgentPool)
+
+- per-session: pôvodné správanie app.py - každé sedenie má vlastný LegalAssistantAgent
+  s vlastnými nástrojmi, LLM klientom a executorom
+- pooled: jeden AgentPool na proces, sedenia sa líšia len session_id v session store
+
+Každý režim beží v čerstvom procese s fake LLM a lokálnymi stubmi Tavily/Wikipedia,
+každé sedenie položí jednu otázku. Meria sa rezidentná pamäť (RSS) po každom sedení.
+
+Použitie:
+    python scripts/benchmark_sessions_memory.py --sessions 50
+    python scripts/benchmark_sessions_memory.py --modes per-session --sessions 5
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+import contextlib
+from datetime import datetime
+from typing import Any, Dict, List
+from pathlib import Path
+
+# Benchmark beží offline - embedding model len z lokálnej cache
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+DEFAULT_RESULTS_DIR = project_root / "data" / "benchmarks" / "results"
+MODES = ("per-session", "pooled")
+
+
+def current_rss_mb() -> float:
+    """Aktuálna rezidentná pamäť procesu v MB (Linux /proc, inde maximum z getrusage)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 1)
+    except (OSError, ValueError):
+        from scripts.load_test_agent import peak_rss_mb
+        return peak_rss_mb()
+
+
+def run_worker(mode: str, sessions: int) -> Dict[str, Any]:
+    """Vytvorí N sedení v aktuálnom procese a zmeria RSS po každom"""
+    from scripts.fakes import LocalServiceStubs, ReplayChatModel, load_traces
+    from agent.legal_agent import LegalAssistantAgent
+    from agent.agent_pool import AgentPool
+    from agent.session_store import InMemorySessionStore
+
+    traces = load_traces()
+    questions = [trace["question"] for trace in traces]
+    rss_start = current_rss_mb()
+    samples: List[float] = []
+
+    with LocalServiceStubs() as stubs, open(os.devnull, "w") as devnull:
+        os.environ.update(stubs.environment())
+        llm = ReplayChatModel(traces=traces, latency_scale=0)
+        common = {"llm": llm, "verbose": False, "tool_loading": "eager"}
+
+        with contextlib.redirect_stdout(devnull):
+            if mode == "pooled":
+                pool = AgentPool(session_store=InMemorySessionStore(), **common)
+                for i in range(sessions):
+                    pool.ask(questions[i % len(questions)], session_id=f"session-{i}")
+                    samples.append(current_rss_mb())
+            else:
+                # Referencie sa držia ako v st.session_state - nič sa neuvoľní
+                agents = []
+                for i in range(sessions):
+                    agent = LegalAssistantAgent(**common)
+                    agent.ask(questions[i % len(questions)])
+                    agents.append(agent)
+                    samples.append(current_rss_mb())
+
+    first = samples[0] if samples else rss_start
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "rss_start_mb": rss_start,
+        "rss_first_session_mb": first,
+        "rss_end_mb": samples[-1] if samples else rss_start,
+        "rss_per_additional_session_mb": round((samples[-1] - first) / (sessions - 1), 2) if sessions > 1 else None,
+        "rss_samples_mb": samples,
+    }
+
+
+def measure(mode: str, sessions: int) -> Dict[str, Any]:
+    """Spustí worker v čerstvom procese"""
+    result = subprocess.run(
+        [sys.executable, __file__, "--worker", mode, "--sessions", str(sessions)],
+        cwd=project_root, capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("MEMORY "):
+            return json.loads(line[len("MEMORY "):])
+    raise RuntimeError(f"Režim {mode} zlyhal:\n{result.stderr[-2000:]}")
+
+
+def print_report(results: List[Dict[str, Any]]):
+    """Vypíše porovnanie režimov"""
+    print(f"\n{'režim':<14}{'sedenia':>9}{'1. sedenie MB':>15}{'koniec MB':>12}{'MB/ďalšie sedenie':>20}")
+    for item in results:
+        per_session = item["rss_per_additional_session_mb"]
+        print(f"{item['mode']:<14}{item['sessions']:>9}{item['rss_first_session_mb']:>15.0f}"
+              f"{item['rss_end_mb']:>12.0f}{per_session if per_session is not None else '-':>20}")
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Pamäť procesu pri viacerých sedeniach")
+    parser.add_argument("--sessions", type=int, default=50, help="Počet sedení")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES, help="Merané režimy")
+    parser.add_argument("--output", help="Cesta k výstupnému JSON")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print("MEMORY " + json.dumps(run_worker(args.worker, args.sessions)))
+        return
+
+    print("🚀 Pamäť pri viacerých sedeniach")
+    print("=" * 50)
+
+    results = []
+    for mode in args.modes:
+        print(f"📏 Režim {mode}: {args.sessions} sedení...")
+        results.append(measure(mode, args.sessions))
+    print_report(results)
+
+    report = {"timestamp": datetime.now().isoformat(timespec="seconds"), "results": results}
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"sessions_memory_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Výsledky uložené do {output}")
+
+
+if __name__ == "__main__":
+    main()
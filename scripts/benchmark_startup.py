@@ -0,0 +1,181 @@
+"""
+Benchmark studeného štartu AI právneho asistenta
+
+Meria v čerstvých procesoch:
+- import agent.legal_agent cez `python -X importtime` (najdrahšie balíky)
+- čas do vytvorenia agenta (prvý ask môže začať) a do zahriatia všetkých nástrojov
+  pre režimy načítania nástrojov eager / lazy / background
+
+LLM je nahradený ReplayChatModel, Tavily a Wikipedia sa nevolajú, takže sa meria
+len import a inicializácia nástrojov.
+
+Použitie:
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --repeat 5 --modes eager background --output /tmp/startup.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List
+from pathlib import Path
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from agent.metrics import latency_summary
+
+DEFAULT_RESULTS_DIR = project_root / "data" / "benchmarks" / "results"
+
+# Kód spúšťaný v čerstvom procese - vypíše jeden JSON riadok s časmi
+STARTUP_PROBE = """
+import json, time
+start = time.perf_counter()
+import agent.legal_agent as legal_agent
+imported = time.perf_counter()
+from scripts.fakes import ReplayChatModel, load_traces
+agent = legal_agent.LegalAssistantAgent(llm=ReplayChatModel(traces=load_traces(), latency_scale=0), verbose=False, tool_loading={mode!r})
+constructed = time.perf_counter()
+agent.wait_until_ready()
+ready = time.perf_counter()
+print("STARTUP " + json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "agent_ms": (constructed - start) * 1000,
+    "ready_ms": (ready - start) * 1000,
+}}))
+"""
+
+
+def _probe_environment() -> Dict[str, str]:
+    env = dict(os.environ)
+    # Offline - embedding model len z lokálnej cache, bez telemetrie a trasovania
+    env.setdefault("HF_HUB_OFFLINE", "1")
+    env.setdefault("TRANSFORMERS_OFFLINE", "1")
+    env.setdefault("ANONYMIZED_TELEMETRY", "False")
+    env.pop("LEGAL_TRACE_FILE", None)
+    env["PYTHONPATH"] = str(project_root) + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rozparsuje výstup -X importtime na záznamy (self_us, cumulative_us, modul, hĺbka)"""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            records.append({
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip())) // 2,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+            })
+        except ValueError:
+            continue
+    return records
+
+
+def import_profile(module: str = "agent.legal_agent", top: int = 15) -> Dict[str, Any]:
+    """Spustí import modulu s -X importtime a zoradí balíky najvyššej úrovne podľa času"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=project_root, env=_probe_environment(), capture_output=True, text=True
+    )
+    records = parse_importtime(result.stderr)
+
+    # Súčet vlastného času podľa koreňového balíka (chromadb, langchain, torch...)
+    packages: Dict[str, int] = {}
+    for record in records:
+        package = record["module"].split(".")[0]
+        packages[package] = packages.get(package, 0) + record["self_us"]
+
+    total_us = next((r["cumulative_us"] for r in reversed(records) if r["module"] == module), 0)
+    return {
+        "module": module,
+        "returncode": result.returncode,
+        "total_ms": round(total_us / 1000, 1),
+        "modules_imported": len(records),
+        "top_packages": [
+            {"package": name, "self_ms": round(us / 1000, 1)}
+            for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        ],
+    }
+
+
+def measure_startup(mode: str) -> Dict[str, float]:
+    """Jeden studený štart v čerstvom procese pre daný režim načítania nástrojov"""
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_PROBE.format(mode=mode)],
+        cwd=project_root, env=_probe_environment(), capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return json.loads(line[len("STARTUP "):])
+    raise RuntimeError(f"Štart v režime {mode} zlyhal:\n{result.stderr[-2000:]}")
+
+
+def run_benchmark(modes: List[str], repeat: int) -> Dict[str, Any]:
+    """Zmeria import profil a štart pre všetky režimy"""
+    print("⏱️ Profilujem import agent.legal_agent...")
+    profile = import_profile()
+
+    startup = {}
+    for mode in modes:
+        samples: Dict[str, List[float]] = {"import_ms": [], "agent_ms": [], "ready_ms": []}
+        for i in range(repeat):
+            print(f"🚀 Režim {mode}: štart {i + 1}/{repeat}")
+            for key, value in measure_startup(mode).items():
+                samples[key].append(value)
+        startup[mode] = {key: latency_summary(values) for key, values in samples.items()}
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "import_profile": profile,
+        "startup": startup,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    """Vypíše súhrn benchmarku"""
+    profile = report["import_profile"]
+    print(f"\n📦 import agent.legal_agent: {profile['total_ms']} ms ({profile['modules_imported']} modulov)")
+    for package in profile["top_packages"]:
+        print(f"   {package['package']:<28}{package['self_ms']:>10.1f} ms")
+
+    print(f"\n{'režim':<14}{'import p50':>12}{'agent p50':>12}{'ready p50':>12}{'ready p95':>12}")
+    for mode, stats in report["startup"].items():
+        print(f"{mode:<14}{stats['import_ms']['p50_ms']:>12.0f}{stats['agent_ms']['p50_ms']:>12.0f}"
+              f"{stats['ready_ms']['p50_ms']:>12.0f}{stats['ready_ms']['p95_ms']:>12.0f}")
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Benchmark studeného štartu agenta")
+    parser.add_argument("--modes", nargs="+", default=["eager", "lazy", "background"],
+                        choices=["eager", "lazy", "background"], help="Režimy načítania nástrojov")
+    parser.add_argument("--repeat", type=int, default=3, help="Počet štartov na režim")
+    parser.add_argument("--output", help="Cesta k výstupnému JSON")
+    args = parser.parse_args()
+
+    print("🚀 Benchmark štartu AI Právneho Asistenta")
+    print("=" * 50)
+
+    report = run_benchmark(args.modes, args.repeat)
+    print_report(report)
+
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"startup_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Výsledky uložené do {output}")
+
+
+if __name__ == "__main__":
+    main()
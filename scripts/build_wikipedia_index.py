@@ -0,0 +1,236 @@
+"""
+Vytvorenie offline indexu právnych hesiel z dumpu Wikipédie
+
+Vstupom je ľubovoľný XML dump MediaWiki (skwiki/cswiki pages-articles, export zo
+Special:Export), nekomprimovaný alebo .bz2/.gz. Dump sa číta prúdovo (iterparse,
+spracované elementy sa hneď uvoľňujú), takže stačí aj na dump celej Wikipédie:
+
+1. len články (ns 0), bez presmerovaní a rozlišovacích stránok
+2. len články s aspoň jednou kategóriou zodpovedajúcou právnemu vzoru
+3. z článku len úvod pred prvým nadpisom, očistený od wiki syntaxe
+4. FTS5 index a voliteľne embeddingy (rovnaký model ako vektorová databáza)
+
+Jazyk sa určí z <dbname> dumpu (skwiki -> sk), z názvu súboru alebo z --lang.
+
+Použitie:
+    python scripts/build_wikipedia_index.py data/wikipedia/skwiki-latest-pages-articles.xml.bz2 \\
+        data/wikipedia/cswiki-latest-pages-articles.xml.bz2
+    python scripts/build_wikipedia_index.py              # všetky dumpy v data/wikipedia/
+    python scripts/build_wikipedia_index.py --no-embeddings
+"""
+
+import re
+import sys
+import bz2
+import gzip
+import html
+import time
+import argparse
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Iterator, List, Optional
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from agent.tools.wikipedia_index import DEFAULT_WIKIPEDIA_INDEX, WikipediaIndex, WikipediaIndexWriter
+from scripts.law_stream import batched
+
+DEFAULT_DUMP_DIR = project_root / "data" / "wikipedia"
+
+# Kategórie právnych článkov (sk aj cs)
+LAW_CATEGORY_PATTERN = (
+    r"práv|prav[oa]\b|zákon|zákoník|zákonník|súd|soud|trestn|zmluv|smlouv|ústav|legislat"
+    r"|justí|justic|advokác|advokac|notár|notář|obchodn[ée] spoločnos|obchodní korporac|dedičs|dědic"
+)
+CATEGORY_LINK = re.compile(r"\[\[\s*(?:Kategória|Kategorie|Category)\s*:\s*([^\]|]+)", re.IGNORECASE)
+DISAMBIGUATION = re.compile(r"\{\{\s*(?:Rozlišovacia stránka|Rozcestník|Disambig)", re.IGNORECASE)
+FILE_PREFIXES = ("súbor:", "soubor:", "file:", "image:", "obrázok:", "obrázek:", "kategória:", "kategorie:", "category:")
+
+COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+REF = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.DOTALL | re.IGNORECASE)
+TEMPLATE = re.compile(r"\{\{[^{}]*\}\}")
+TABLE = re.compile(r"\{\|[^{}]*?\|\}", re.DOTALL)
+LINK = re.compile(r"\[\[([^\[\]]*)\]\]")
+EXTERNAL_LINK = re.compile(r"\[(?:https?:)?//[^\s\]]+\s*([^\]]*)\]")
+HTML_TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+EMPHASIS = re.compile(r"'{2,}")
+HEADING = re.compile(r"^=+.*=+\s*$", re.MULTILINE)
+SPACES = re.compile(r"[ \t]+")
+INTERWIKI = re.compile(r"^:?[a-z]{2,3}(?:-[a-z]+)?:")
+
+
+@dataclass
+class Article:
+    lang: str
+    title: str
+    lead: str
+    categories: List[str]
+
+
+def open_dump(path: Path) -> IO[bytes]:
+    """Otvorí dump podľa prípony (bz2 aj multistream, gzip, nekomprimovaný)"""
+    if path.suffix == ".bz2":
+        return bz2.open(path, "rb")
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _strip_nested(pattern: re.Pattern, text: str, replacement="") -> str:
+    """Odstraňuje najvnútornejšie výskyty, kým sa text mení (vnorené šablóny)"""
+    while True:
+        text, count = pattern.subn(replacement, text)
+        if not count:
+            return text
+
+
+def _link_text(match: re.Match) -> str:
+    target, _, label = match.group(1).partition("|")
+    target = target.strip()
+    if target.lower().lstrip(":").startswith(FILE_PREFIXES) or INTERWIKI.match(target):
+        return ""
+    return (label.rsplit("|", 1)[-1] if label else target).strip()
+
+
+def lead_section(wikitext: str, max_chars: int = 2000) -> str:
+    """Úvod článku (text pred prvým nadpisom) ako čistý text"""
+    heading = HEADING.search(wikitext)
+    text = wikitext[:heading.start()] if heading else wikitext
+    text = COMMENT.sub("", text)
+    text = REF.sub("", text)
+    text = _strip_nested(TEMPLATE, text)
+    text = _strip_nested(TABLE, text)
+    text = _strip_nested(LINK, text, _link_text)
+    text = EXTERNAL_LINK.sub(lambda match: match.group(1), text)
+    text = HTML_TAG.sub("", text)
+    text = EMPHASIS.sub("", html.unescape(text))
+
+    lines = [SPACES.sub(" ", line).strip() for line in text.splitlines()]
+    # Zvyšky zoznamov, tabuliek a atribútov šablón na začiatku riadku
+    paragraphs = [line for line in lines if line and not line.startswith(("|", "!", "{", "}", "*", "#", ":", ";"))]
+    lead = "\n".join(paragraphs)
+    if len(lead) > max_chars:
+        cut = lead.rfind(". ", 0, max_chars)
+        lead = lead[:cut + 1] if cut > max_chars // 2 else lead[:max_chars]
+    return lead
+
+
+def _local(tag: str) -> str:
+    """Názov elementu bez menného priestoru (verzia schémy exportu sa líši)"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _lang_from_name(path: Path) -> Optional[str]:
+    match = re.match(r"([a-z]{2,3})wiki", path.name)
+    return match.group(1) if match else None
+
+
+def iter_articles(path: Path, category_pattern: re.Pattern, lang: Optional[str] = None,
+                  max_lead_chars: int = 2000, stats: Optional[dict] = None) -> Iterator[Article]:
+    """Právne články z dumpu (prúdovo)"""
+    stats = stats if stats is not None else {}
+    lang = lang or _lang_from_name(path)
+    with open_dump(path) as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event != "end":
+                continue
+            tag = _local(elem.tag)
+            if tag == "dbname" and not lang and elem.text:
+                lang = elem.text.strip().removesuffix("wiki")
+            if tag != "page":
+                continue
+
+            stats["pages"] = stats.get("pages", 0) + 1
+            fields = {_local(child.tag): child for child in elem}
+            text_elem = None
+            revision = fields.get("revision")
+            if revision is not None:
+                text_elem = next((child for child in revision if _local(child.tag) == "text"), None)
+            wikitext = (text_elem.text or "") if text_elem is not None else ""
+            title = (fields["title"].text or "").strip() if "title" in fields else ""
+            namespace = fields["ns"].text.strip() if "ns" in fields and fields["ns"].text else "0"
+            # Uvoľni spracovaný element aj jeho referenciu v koreni
+            elem.clear()
+            root.clear()
+
+            if namespace != "0" or "redirect" in fields or not wikitext or DISAMBIGUATION.search(wikitext):
+                continue
+            categories = [name.strip() for name in CATEGORY_LINK.findall(wikitext)]
+            if not any(category_pattern.search(name) for name in categories):
+                continue
+            lead = lead_section(wikitext, max_lead_chars)
+            if len(lead) < 40:
+                continue
+            stats["articles"] = stats.get("articles", 0) + 1
+            yield Article(lang or "sk", title, lead, categories)
+
+
+def find_dumps(directory: Path) -> List[Path]:
+    return sorted(p for p in directory.glob("*") if p.name.endswith((".xml", ".xml.bz2", ".xml.gz")))
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Offline index právnych hesiel Wikipédie")
+    parser.add_argument("dumps", nargs="*", help="XML dumpy (predvolene všetky v data/wikipedia/)")
+    parser.add_argument("--output", default=str(project_root / DEFAULT_WIKIPEDIA_INDEX), help="Cieľový index")
+    parser.add_argument("--lang", help="Jazyk dumpu, ak sa nedá určiť z <dbname> ani názvu súboru")
+    parser.add_argument("--category-pattern", default=LAW_CATEGORY_PATTERN, help="Regex právnych kategórií")
+    parser.add_argument("--max-lead-chars", type=int, default=2000, help="Najdlhší uložený úvod")
+    parser.add_argument("--no-embeddings", action="store_true", help="Len fulltext bez embeddingov")
+    parser.add_argument("--batch-size", type=int, default=64, help="Dávka pre embedding")
+    args = parser.parse_args()
+
+    print("🚀 Offline index Wikipédie")
+    print("=" * 50)
+
+    dumps = [Path(p) for p in args.dumps] or find_dumps(DEFAULT_DUMP_DIR)
+    if not dumps:
+        print(f"❌ Žiadny dump - vlož súbor *.xml(.bz2|.gz) do {DEFAULT_DUMP_DIR} alebo zadaj cestu")
+        return
+
+    category_pattern = re.compile(args.category_pattern, re.IGNORECASE)
+    writer = WikipediaIndexWriter(Path(args.output))
+    try:
+        for path in dumps:
+            stats = {}
+            start = time.perf_counter()
+            print(f"📄 {path.name}...")
+            for article in iter_articles(path, category_pattern, args.lang, args.max_lead_chars, stats):
+                writer.add(article.lang, article.title, article.lead, article.categories)
+            print(f"   ✅ {stats.get('articles', 0)} právnych článkov z {stats.get('pages', 0)} stránok "
+                  f"za {time.perf_counter() - start:.1f} s")
+
+        if not args.no_embeddings:
+            try:
+                from agent.tools.embeddings import DEFAULT_EMBEDDING_MODEL, MultilingualEmbeddingFunction
+                embedding_function = MultilingualEmbeddingFunction(DEFAULT_EMBEDDING_MODEL)
+            except Exception as e:
+                print(f"⚠️ Embedding model nie je dostupný ({e}) - index bude len fulltextový")
+            else:
+                print(f"🧮 Embeddingy pre {writer.count} článkov...")
+                for batch in batched(writer.articles(), args.batch_size):
+                    texts = [f"{title}. {lead[:500]}" for _, title, lead in batch]
+                    writer.add_embeddings([article_id for article_id, _, _ in batch], embedding_function(texts))
+                writer.set_meta(embedding_model=DEFAULT_EMBEDDING_MODEL)
+
+        writer.set_meta(sources=[path.name for path in dumps])
+        count = writer.finish()
+    except BaseException:
+        writer.abort()
+        raise
+
+    index = WikipediaIndex(Path(args.output))
+    stats = index.stats()
+    index.close()
+    print(f"\n💾 {count} článkov ({', '.join(f'{lang}: {n}' for lang, n in stats['articles'].items())}), "
+          f"{stats['size_mb']} MB, embeddingy: {'áno' if stats['embeddings'] else 'nie'} -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
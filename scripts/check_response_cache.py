@@ -0,0 +1,130 @@
+"""
+Overenie cache odpovedí Tavily/Wikipedia proti lokálnym HTTP stubom
+
+Nástroje sa presmerujú na LocalServiceStubs so simulovanou latenciou a cache do
+dočasného súboru. Skript meria latenciu studeného a teplého volania, počíta
+požiadavky na stub a kontroluje:
+
+- normalizáciu dotazu (iné medzery a veľkosť písmen = ten istý záznam)
+- súbežné slovenské a české vyhľadávanie (čas ~ jedno kolo namiesto dvoch)
+- stale-while-revalidate (zastaraný záznam sa vráti hneď, obnoví sa na pozadí)
+- perzistenciu (nová inštancia cache nad tým istým súborom)
+- LRU limit veľkosti
+
+Použitie:
+    python scripts/check_response_cache.py --latency-ms 150
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from scripts.fakes import LocalServiceStubs
+from agent.tools.response_cache import ResponseCache, cache_key, get_response_cache
+
+
+def timed(func: Callable[[], str]) -> Tuple[str, float]:
+    start = time.perf_counter()
+    output = func()
+    return output, (time.perf_counter() - start) * 1000
+
+
+def run_checks(stubs: LocalServiceStubs, tmp: Path, latency_ms: float) -> List[Tuple[str, bool, str]]:
+    """Spustí kontroly, vráti (názov, ok, detail)"""
+    from agent.tools.search_tools import LegalWikipediaTool, TavilySearchTool, WIKIPEDIA_LANGUAGES
+
+    checks = []
+    os.environ["LEGAL_RESPONSE_CACHE"] = str(tmp / "cache.db")
+    tavily, wikipedia = TavilySearchTool(), LegalWikipediaTool()
+
+    # Tavily: studené, teplé a normalizované volanie
+    before = stubs.request_counts.get("tavily", 0)
+    cold, cold_ms = timed(lambda: tavily._run("nájomná zmluva výpoveď"))
+    warm, warm_ms = timed(lambda: tavily._run("nájomná zmluva výpoveď"))
+    same, _ = timed(lambda: tavily._run("  Nájomná   ZMLUVA výpoveď "))
+    calls = stubs.request_counts.get("tavily", 0) - before
+    checks.append(("tavily: jedno volanie pre 3 dotazy", calls == 1 and cold == warm == same,
+                   f"požiadavky {calls}, studené {cold_ms:.0f} ms, teplé {warm_ms:.1f} ms"))
+
+    # Wikipedia: heslo len v češtine - sekvenčne (bez cache) vs. súbežne
+    query = "kupní smlouva"
+    client = wikipedia.wikipedia
+    sequential_ms = timed(lambda: [client.run(query, lang) for lang in WIKIPEDIA_LANGUAGES])[1]
+    before = stubs.request_counts.get("wikipedia", 0)
+    result, parallel_ms = timed(lambda: wikipedia._run(query))
+    calls = stubs.request_counts.get("wikipedia", 0) - before
+    checks.append(("wikipedia: sk a cs súbežne", "Kupní smlouva" in result and parallel_ms < sequential_ms * 0.75,
+                   f"sekvenčne {sequential_ms:.0f} ms, súbežne {parallel_ms:.0f} ms, požiadavky {calls}"))
+
+    before = stubs.request_counts.get("wikipedia", 0)
+    warm, warm_ms = timed(lambda: wikipedia._run(query))
+    calls = stubs.request_counts.get("wikipedia", 0) - before
+    checks.append(("wikipedia: teplé volanie bez siete", calls == 0 and warm == result,
+                   f"požiadavky {calls}, {warm_ms:.1f} ms"))
+
+    # Perzistencia - nová inštancia nad tým istým súborom
+    reopened = ResponseCache(db_path=os.environ["LEGAL_RESPONSE_CACHE"])
+    key = cache_key(wikipedia.name, query, lang="cs", endpoint=client.api_url)
+    entry = reopened.lookup(key)
+    checks.append(("perzistencia po reštarte", entry is not None and entry["value"] == result,
+                   f"záznamov {reopened.size()['entries']}"))
+    reopened.close()
+
+    # Stale-while-revalidate - krátke ttl, dlhé okno zastaranosti
+    os.environ["LEGAL_RESPONSE_CACHE"] = str(tmp / "stale.db")
+    os.environ["LEGAL_RESPONSE_CACHE_TTL_HOURS"] = str(0.2 / 3600)
+    cache = get_response_cache()
+    tavily._run("dedenie zo zákona")
+    time.sleep(0.3)
+    before = stubs.request_counts.get("tavily", 0)
+    _, stale_ms = timed(lambda: tavily._run("dedenie zo zákona"))
+    refreshed = cache.wait_for_refreshes()
+    calls = stubs.request_counts.get("tavily", 0) - before
+    checks.append(("stale-while-revalidate", refreshed and calls == 1 and stale_ms < latency_ms / 2
+                   and cache.stats["stale_hits"] == 1 and cache.stats["refreshes"] == 1,
+                   f"zastaraná odpoveď za {stale_ms:.1f} ms, obnova na pozadí {calls}x"))
+    del os.environ["LEGAL_RESPONSE_CACHE_TTL_HOURS"]
+
+    # LRU limit - 50 odpovedí po ~1 kB do limitu 10 kB
+    small = ResponseCache(db_path=str(tmp / "small.db"), max_bytes=10 * 1024)
+    for i in range(50):
+        small.put(cache_key("test", f"dotaz {i}"), "test", "x" * 1000)
+    size = small.size()
+    newest = small.lookup(cache_key("test", "dotaz 49")) is not None
+    oldest = small.lookup(cache_key("test", "dotaz 0")) is not None
+    checks.append(("LRU limit veľkosti", size["bytes"] <= 10 * 1024 and newest and not oldest,
+                   f"{size['entries']} záznamov, {size['bytes']} B, vyradených {small.stats['evictions']}"))
+    small.close()
+    return checks
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Overenie cache odpovedí Tavily/Wikipedia")
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="Simulovaná latencia stubu")
+    args = parser.parse_args()
+
+    print("🚀 Cache odpovedí Tavily/Wikipedia")
+    print("=" * 50)
+
+    with LocalServiceStubs(latency_ms=args.latency_ms) as stubs, tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(stubs.environment())
+        checks = run_checks(stubs, Path(tmp), args.latency_ms)
+
+    for name, ok, detail in checks:
+        print(f"{'✅' if ok else '❌'} {name}: {detail}")
+    failed = sum(1 for _, ok, _ in checks if not ok)
+    print(f"\n{'✅ Všetky kontroly prešli' if not failed else f'❌ Zlyhalo {failed} kontrol'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
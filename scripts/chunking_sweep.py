@@ -0,0 +1,194 @@
+"""
+Sweep parametrov chunkovania - ingest a benchmark vyhľadávania pre každú konfiguráciu
+
+Každá konfigurácia (min_chunk_tokens:chunk_tokens:overlap_paragraphs) sa nahrá
+LegalTextLoader do vlastného adresára (ChromaDB, úložisko chunkov, index verzií,
+takmer duplicitné chunky) a ohodnotí vektorovými dotazmi benchmarku vyhľadávania
+(recall@k, MRR, latencia, tokeny Observation) spolu s veľkosťou indexu.
+
+Embeddingy chunkov aj okien idú cez zdieľané úložisko podľa obsahu
+(agent/tools/embedding_store.py) - text, ktorý už niektorá konfigurácia (alebo
+bežný ingest) enkódovala, sa znova neenkóduje. Konfigurácie sa líšia len hranicami
+chunkov, takže väčšina chunkov a okien sa medzi nimi zopakuje.
+
+Použitie:
+    python scripts/chunking_sweep.py
+    python scripts/chunking_sweep.py --configs 128:512:1 64:512:1 256:512:0 --keep
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Sweep beží offline - embedding model len z lokálnej cache
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from agent.tools.embedding_store import DEFAULT_EMBEDDING_STORE, EmbeddingStore
+from agent.tools.embeddings import DEFAULT_EMBEDDING_MODEL, get_shared_embedding_function
+from scripts.benchmark_retrieval import DEFAULT_K_VALUES, DEFAULT_QUERY_SET, DEFAULT_RESULTS_DIR, RetrievalBenchmark
+from scripts.load_law_texts import ChunkingConfig, LegalTextLoader
+
+DEFAULT_SWEEP_DIR = project_root / "data" / "chunking_sweep"
+# Súčasné nastavenie a odchýlky po jednom parametri
+DEFAULT_CONFIGS = ["128:512:1", "64:512:1", "256:512:1", "128:512:0", "128:512:2", "128:256:1"]
+
+
+def parse_config(value: str) -> ChunkingConfig:
+    """min_chunk_tokens:chunk_tokens:overlap_paragraphs"""
+    try:
+        min_tokens, chunk_tokens, overlap = (int(part) for part in value.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Konfigurácia '{value}' nie je v tvare min:max:prekryv (napr. 128:512:1)")
+    return ChunkingConfig(min_chunk_tokens=min_tokens, chunk_tokens=chunk_tokens, overlap_paragraphs=overlap)
+
+
+def directory_mb(path: Path) -> float:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / 1024 / 1024
+
+
+def vector_queries(query_set_path: Path, output: Path) -> Path:
+    """Sada dotazov len pre enhanced_vector_search (vyhľadávanie pojmov chunkovanie neovplyvní)"""
+    with open(query_set_path, 'r', encoding='utf-8') as f:
+        query_set = json.load(f)
+    query_set['queries'] = [query for query in query_set['queries'] if query['tool'] == 'enhanced_vector_search']
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(query_set, f, ensure_ascii=False, indent=2)
+    return output
+
+
+def run_config(config: ChunkingConfig, args: argparse.Namespace, function: Any, store: EmbeddingStore,
+               queries: Path) -> Dict[str, Any]:
+    """Ingest konfigurácie do vlastného adresára a benchmark nad ním"""
+    from agent.tools.enhanced_vector_search import EnhancedVectorSearchTool
+
+    target = Path(args.sweep_dir) / config.label
+    if target.exists():
+        shutil.rmtree(target)
+    paths = {
+        "db_path": target / "vector_db",
+        "chunk_store_path": target / "chunks.bin",
+        "version_index_path": target / "law_versions.json",
+        "near_duplicates_path": target / "near_duplicates.json",
+    }
+
+    print(f"\n🧩 Konfigurácia {config.label}")
+    print("=" * 50)
+    loader = LegalTextLoader(args.data_dir, **{name: str(path) for name, path in paths.items()},
+                             multi_vector=not args.no_multi_vector, chunking=config,
+                             embedding_function=function, embedding_store=store)
+    start = time.perf_counter()
+    chunks = loader.load_all_files()
+    ingest_seconds = time.perf_counter() - start
+    windows = loader.windows_collection.count() if loader.windows_collection is not None else 0
+    stats = loader.scheduler.stats
+
+    # Nástroj nad artefaktmi konfigurácie (kvantizovaný index a shardy hlavnej databázy sa nepoužijú)
+    os.environ.update({
+        "LEGAL_CHUNK_STORE": str(paths["chunk_store_path"]),
+        "LEGAL_VERSION_INDEX": str(paths["version_index_path"]),
+        "LEGAL_NEAR_DUPLICATES": str(paths["near_duplicates_path"]),
+        "LEGAL_VECTOR_INDEX": "",
+        "LEGAL_SHARDED": "0",
+    })
+    tool = EnhancedVectorSearchTool(db_path=str(paths["db_path"]))
+    report = RetrievalBenchmark(queries, args.k, args.repeat, vector_tool=tool).run()
+
+    result = {
+        "label": config.label,
+        "config": asdict(config),
+        "chunks": chunks,
+        "vectors": chunks + windows,
+        "index_mb": round(directory_mb(target), 2),
+        "vector_db_mb": round(directory_mb(paths["db_path"]), 2),
+        "ingest_seconds": round(ingest_seconds, 1),
+        "texts": stats["texts"],
+        "encoded": stats["encoded"],
+        "reused": stats["reused"],
+        "modes": report["modes"],
+    }
+    if not args.keep:
+        shutil.rmtree(target)
+    return result
+
+
+def print_summary(results: List[Dict[str, Any]], k_values: List[int]):
+    k = k_values[-1]
+    print("\n📊 Konfigurácie chunkovania (vektorové dotazy):")
+    header = (f"{'konfigurácia':<20}{'chunky':>8}{'vektory':>9}{'MB':>8}{'enkód.':>8}{'znovu':>8}"
+              f"{'R@' + str(k):>8}{'MRR':>8}{'p50':>8}{'tokeny':>8}")
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        stats = result["modes"]["all"]
+        print(f"{result['label']:<20}{result['chunks']:>8}{result['vectors']:>9}{result['index_mb']:>8.1f}"
+              f"{result['encoded']:>8}{result['reused']:>8}{stats[f'recall@{k}']:>8.3f}{stats['mrr']:>8.3f}"
+              f"{stats['latency']['p50_ms']:>8.1f}{stats['observation_tokens_mean']:>8.0f}")
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Sweep parametrov chunkovania so zdieľaným úložiskom embeddingov")
+    parser.add_argument("--configs", type=parse_config, nargs="+", default=[parse_config(c) for c in DEFAULT_CONFIGS],
+                        help="Konfigurácie min_chunk_tokens:chunk_tokens:overlap_paragraphs")
+    parser.add_argument("--data-dir", default=str(project_root / "data" / "law_texts"), help="Zákony na chunkovanie")
+    parser.add_argument("--sweep-dir", default=str(DEFAULT_SWEEP_DIR), help="Adresár indexov konfigurácií")
+    parser.add_argument("--store", default=str(project_root / DEFAULT_EMBEDDING_STORE), help="Úložisko embeddingov")
+    parser.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL, help="Embedding model")
+    parser.add_argument("--queries", default=str(DEFAULT_QUERY_SET), help="Sada dotazov benchmarku (JSON)")
+    parser.add_argument("--k", type=int, nargs="+", default=DEFAULT_K_VALUES, help="Hodnoty k pre recall@k")
+    parser.add_argument("--repeat", type=int, default=3, help="Počet opakovaní každého dotazu pre latenciu")
+    parser.add_argument("--no-multi-vector", action="store_true", help="Bez okien dlhých chunkov")
+    parser.add_argument("--keep", action="store_true", help="Ponechať indexy konfigurácií po benchmarku")
+    parser.add_argument("--output", help="Cieľový JSON")
+    args = parser.parse_args()
+
+    print("🚀 Sweep parametrov chunkovania")
+    print("=" * 50)
+
+    # Jeden model pre ingest aj vyhľadávanie všetkých konfigurácií
+    function = get_shared_embedding_function(args.model)
+    store = EmbeddingStore(args.store)
+    before = store.count(function.fingerprint)
+    print(f"💾 Úložisko embeddingov {args.store}: {before} vektorov pre {function.fingerprint}")
+    queries = vector_queries(Path(args.queries), Path(args.sweep_dir) / "queries_vector.json")
+
+    results = [run_config(config, args, function, store, queries) for config in args.configs]
+
+    print_summary(results, args.k)
+    texts = sum(result["texts"] for result in results)
+    encoded = sum(result["encoded"] for result in results)
+    print(f"\n♻️ Enkódovaných {encoded} z {texts} textov ({1 - encoded / max(texts, 1):.0%} z úložiska), "
+          f"úložisko {before} -> {store.count(function.fingerprint)} vektorov")
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "parameters": {"model": args.model, "backend": function.backend, "store": args.store,
+                       "k_values": args.k, "repeat": args.repeat, "multi_vector": not args.no_multi_vector,
+                       "cpu_count": os.cpu_count()},
+        "store": {"vectors_before": before, "vectors_after": store.count(function.fingerprint),
+                  "texts": texts, "encoded": encoded},
+        "results": results,
+    }
+    DEFAULT_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"chunking_sweep_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Výsledky uložené do {output}")
+
+
+if __name__ == "__main__":
+    main()
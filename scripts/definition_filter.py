@@ -0,0 +1,323 @@
+"""
+Lokálny predfilter definícií pred volaním OpenAI pri extrakcii pojmov
+
+LegalTermExtractor posiela modelu každý 2 000-znakový chunk zákona, aj zoznamy
+poznámok pod čiarou, zrušovacie ustanovenia alebo podpisy, v ktorých žiadna
+definícia nie je. Predfilter ohodnotí chunk lokálne skôr, ako sa zavolá API:
+
+- značky definícií  regex na formulácie z promptu ("rozumie sa", "znamená", "je to",
+                    "je definované ako") a bežné legislatívne ("sa považuje",
+                    "ďalej len", "na účely tohto zákona") - chunk so značkou ide vždy
+- klasifikátor      logistická regresia nad hashovanými slovami a dvojicami slov
+                    (numpy, bez ďalších závislostí) - pravdepodobnosť, že model
+                    v chunku nájde pojem
+
+Chunk bez značky s pravdepodobnosťou pod prahom sa pri extrakcii vynechá (drop)
+alebo presunie za všetky ostatné chunky (defer, spolu s --max-calls).
+
+Označená vzorka sú chunky zákonov, z ktorých už predchádzajúca extrakcia uložila
+pojmy do data/legal_terms.db - pojem patrí chunku podľa kontextu (prvých 200 znakov
+chunku). Prah sa volí krížovou validáciou po zákonoch (model sa učí bez
+hodnoteného zákona) tak, aby sa zachoval cieľový podiel pojmov (--target-recall).
+
+Použitie:
+    python scripts/definition_filter.py
+    python scripts/definition_filter.py --target-recall 0.99 --no-save
+
+Prostredie:
+- LEGAL_DEFINITION_FILTER  cesta k modelu (predvolene data/definition_filter.json), "0" vypne
+"""
+
+import os
+import re
+import sys
+import json
+import zlib
+import sqlite3
+import argparse
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from scripts.law_stream import SIMPLE_SECTION_PATTERN, iter_sections, read_blocks
+
+DEFAULT_FILTER_PATH = "data/definition_filter.json"
+DEFAULT_RESULTS_DIR = project_root / "data" / "benchmarks" / "results"
+DEFAULT_TARGET_RECALL = 0.98
+# Počet hashovaných príznakov (crc32 - stabilné medzi behmi, na rozdiel od hash())
+DIMENSIONS = 1 << 14
+# Kontext pojmu v legal_terms.db je začiatok chunku
+CONTEXT_CHARS = 200
+
+DEFINITION_MARKERS = {
+    "rozumie_sa": re.compile(r"\brozumie\s+sa\b|\bsa\b[^.;]{0,80}?\brozumie\b", re.IGNORECASE),
+    "znamena": re.compile(r"\bznamen(?:á|ajú)\b", re.IGNORECASE),
+    "je_to": re.compile(r"\bje\s+to\b", re.IGNORECASE),
+    "definovane_ako": re.compile(r"\bdefinovan\w*\s+ako\b", re.IGNORECASE),
+    "povazuje_sa": re.compile(r"\bpovažuj\w*\s+sa\b|\bsa\s+považuj\w*\b", re.IGNORECASE),
+    "dalej_len": re.compile(r"\(ďalej\s+len\b", re.IGNORECASE),
+    "na_ucely": re.compile(r"\bna\s+účely\s+tohto\s+(?:zákona|zákonníka|paragrafu|ustanovenia)\b", re.IGNORECASE),
+}
+WORD = re.compile(r"[^\W\d_]{2,}|\d+")
+# Odkazy poznámok pod čiarou ("12a) Zákon č. ...") a citácie predpisov
+FOOTNOTE = re.compile(r"(?:^|\n)\s*\d+[a-z]*\)\s", re.IGNORECASE)
+CITATION = re.compile(r"\bč\.\s*\d+/\d{4}", re.IGNORECASE)
+
+
+def definition_markers(text: str) -> List[str]:
+    """Názvy značiek definícií, ktoré sa v texte vyskytujú"""
+    return [name for name, pattern in DEFINITION_MARKERS.items() if pattern.search(text)]
+
+
+def _bucket(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) % DIMENSIONS
+
+
+def features(text: str) -> Dict[int, float]:
+    """Hashované príznaky chunku (L2-normalizované) - slová, dvojice slov, značky, tvar textu"""
+    words = ["0" if word.isdigit() else word for word in WORD.findall(text.lower())]
+    counts = Counter(words)
+    counts.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    for name, pattern in DEFINITION_MARKERS.items():
+        hits = len(pattern.findall(text))
+        if hits:
+            counts[f"marker:{name}"] = hits
+    counts[f"chars:{min(len(text).bit_length(), 12)}"] = 1
+    counts[f"footnotes:{min(len(FOOTNOTE.findall(text)), 5)}"] = 1
+    counts[f"citations:{min(len(CITATION.findall(text)), 5)}"] = 1
+
+    vector: Dict[int, float] = defaultdict(float)
+    for feature, count in counts.items():
+        vector[_bucket(feature)] += float(np.log1p(count))
+    norm = float(np.sqrt(sum(value * value for value in vector.values()))) or 1.0
+    return {index: value / norm for index, value in vector.items()}
+
+
+def _matrix(rows: List[Dict[int, float]]) -> np.ndarray:
+    matrix = np.zeros((len(rows), DIMENSIONS), dtype=np.float32)
+    for i, row in enumerate(rows):
+        matrix[i, list(row)] = list(row.values())
+    return matrix
+
+
+def _sigmoid(values: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(values, -30, 30)))
+
+
+class DefinitionFilter:
+    """Značky definícií a logistická regresia - či sa oplatí poslať chunk modelu"""
+
+    def __init__(self, weights: np.ndarray, bias: float, threshold: float):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.threshold = float(threshold)
+
+    @classmethod
+    def train(cls, texts: List[str], labels: List[int], threshold: float = 0.5,
+              iterations: int = 400, learning_rate: float = 2.0, l2: float = 1e-4) -> "DefinitionFilter":
+        """Logistická regresia gradientným zostupom, triedy vyvážené váhami (negatívnych chunkov je málo)"""
+        matrix = _matrix([features(text) for text in texts])
+        y = np.asarray(labels, dtype=np.float32)
+        positives = max(float(y.sum()), 1.0)
+        negatives = max(float(len(y) - y.sum()), 1.0)
+        sample_weights = np.where(y > 0, len(y) / (2 * positives), len(y) / (2 * negatives)).astype(np.float32)
+
+        weights = np.zeros(DIMENSIONS, dtype=np.float32)
+        bias = 0.0
+        for _ in range(iterations):
+            error = (_sigmoid(matrix @ weights + bias) - y) * sample_weights
+            weights -= learning_rate * (matrix.T @ error / len(y) + l2 * weights)
+            bias -= learning_rate * float(error.mean())
+        return cls(weights, bias, threshold)
+
+    def probability(self, text: str) -> float:
+        """Pravdepodobnosť pojmu v chunku podľa klasifikátora (bez ohľadu na značky)"""
+        row = features(text)
+        return float(_sigmoid(np.float32(sum(self.weights[index] * value for index, value in row.items()) + self.bias)))
+
+    def score(self, text: str) -> float:
+        """Skóre chunku - 1.0 so značkou definície, inak pravdepodobnosť klasifikátora"""
+        return 1.0 if definition_markers(text) else self.probability(text)
+
+    def accepts(self, text: str) -> bool:
+        return self.score(text) >= self.threshold
+
+    def save(self, path: Path, info: Optional[Dict[str, Any]] = None):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "dimensions": DIMENSIONS,
+            "bias": self.bias,
+            "threshold": self.threshold,
+            "weights": [round(float(w), 6) for w in self.weights],
+            "info": info or {},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "DefinitionFilter":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("dimensions") != DIMENSIONS:
+            raise ValueError(f"Model {path} má {data.get('dimensions')} príznakov, očakáva sa {DIMENSIONS}")
+        return cls(np.array(data["weights"], dtype=np.float32), data["bias"], data["threshold"])
+
+
+def load_configured_filter() -> Optional[DefinitionFilter]:
+    """Predfilter podľa LEGAL_DEFINITION_FILTER (None, ak je vypnutý alebo model neexistuje)"""
+    path = os.getenv("LEGAL_DEFINITION_FILTER", DEFAULT_FILTER_PATH)
+    if path.lower() in ("0", "false", "no", "") or not Path(path).exists():
+        return None
+    return DefinitionFilter.load(Path(path))
+
+
+def labelled_chunks(data_dir: Path, db_path: Path) -> List[Dict[str, Any]]:
+    """Chunky extrakcie s počtom pojmov z legal_terms.db (len zákony, z ktorých extrakcia už bežala)"""
+    from scripts.extract_legal_terms import LegalTermExtractor
+
+    conn = sqlite3.connect(db_path)
+    terms: Counter = Counter()
+    for law_id, context in conn.execute("SELECT law_id, context FROM legal_terms"):
+        context = context or ""
+        terms[(law_id, context[:-3] if context.endswith("...") else context)] += 1
+    conn.close()
+    extracted_laws = {law_id for law_id, _ in terms}
+
+    with open(data_dir / "files_metadata.json", "r", encoding="utf-8") as f:
+        files = json.load(f).get("files", [])
+    chunks = []
+    for file_info in files:
+        path = data_dir / file_info["filename"]
+        if not path.exists():
+            continue
+        sections = iter_sections(read_blocks(path), SIMPLE_SECTION_PATTERN)
+        for text in LegalTermExtractor.iter_chunks_for_ai(sections):
+            chunks.append({
+                "law_id": file_info["law_id"],
+                "text": text,
+                "labelled": file_info["law_id"] in extracted_laws,
+                "terms": terms.get((file_info["law_id"], text[:CONTEXT_CHARS]), 0),
+            })
+    return chunks
+
+
+def threshold_for_recall(scores: np.ndarray, terms: np.ndarray, target: float) -> float:
+    """Najvyšší prah, pri ktorom chunky so skóre >= prah nesú aspoň target pojmov"""
+    order = np.argsort(-scores, kind="stable")
+    kept_terms = np.cumsum(terms[order])
+    needed = target * terms.sum()
+    position = int(np.searchsorted(kept_terms, needed - 1e-9))
+    return float(scores[order][min(position, len(order) - 1)])
+
+
+def evaluate(chunks: List[Dict[str, Any]], scores: np.ndarray, threshold: float) -> Dict[str, Any]:
+    """Vynechané volania a recall (chunky s pojmami, pojmy) pri prahu"""
+    terms = np.array([chunk["terms"] for chunk in chunks])
+    kept = scores >= threshold
+    productive = terms > 0
+    return {
+        "chunks": len(chunks),
+        "calls": int(kept.sum()),
+        "avoided_calls": int((~kept).sum()),
+        "avoided_ratio": round(float((~kept).mean()) if len(chunks) else 0.0, 4),
+        "chunk_recall": round(float(kept[productive].mean()) if productive.any() else 1.0, 4),
+        "term_recall": round(float(terms[kept].sum() / terms.sum()) if terms.sum() else 1.0, 4),
+        "lost_terms": int(terms[~kept].sum()),
+    }
+
+
+def cross_validate(chunks: List[Dict[str, Any]]) -> np.ndarray:
+    """Skóre každého chunku z modelu naučeného bez jeho zákona"""
+    laws = sorted({chunk["law_id"] for chunk in chunks})
+    scores = np.zeros(len(chunks))
+    for law_id in laws:
+        train = [chunk for chunk in chunks if chunk["law_id"] != law_id]
+        model = DefinitionFilter.train([c["text"] for c in train], [int(c["terms"] > 0) for c in train])
+        for i, chunk in enumerate(chunks):
+            if chunk["law_id"] == law_id:
+                scores[i] = model.score(chunk["text"])
+    return scores
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Predfilter definícií pre extrakciu pojmov - učenie a vyhodnotenie")
+    parser.add_argument("--data-dir", default=str(project_root / "data" / "law_texts"), help="Zákony")
+    parser.add_argument("--db", default=str(project_root / "data" / "legal_terms.db"), help="Označené pojmy")
+    parser.add_argument("--target-recall", type=float, default=DEFAULT_TARGET_RECALL,
+                        help="Podiel pojmov označenej vzorky, ktorý musí predfilter zachovať")
+    parser.add_argument("--model", default=str(project_root / DEFAULT_FILTER_PATH), help="Cieľový súbor modelu")
+    parser.add_argument("--no-save", action="store_true", help="Len vyhodnotiť, model neukladať")
+    parser.add_argument("--output", help="Cieľový JSON")
+    args = parser.parse_args()
+
+    print("🚀 Predfilter definícií pre extrakciu pojmov")
+    print("=" * 50)
+
+    chunks = labelled_chunks(Path(args.data_dir), Path(args.db))
+    labelled = [chunk for chunk in chunks if chunk["labelled"]]
+    if not labelled:
+        print(f"❌ V {args.db} nie sú pojmy zo žiadneho zákona v {args.data_dir}")
+        return
+    print(f"📄 {len(chunks)} chunkov, označených {len(labelled)} z {len({c['law_id'] for c in labelled})} zákonov "
+          f"({sum(1 for c in labelled if c['terms'])} s pojmami, {sum(c['terms'] for c in labelled)} pojmov)")
+
+    # Len značky definícií (bez klasifikátora) pre porovnanie
+    marker_scores = np.array([1.0 if definition_markers(chunk["text"]) else 0.0 for chunk in labelled])
+    markers_only = evaluate(labelled, marker_scores, 1.0)
+
+    scores = cross_validate(labelled)
+    threshold = threshold_for_recall(scores, np.array([chunk["terms"] for chunk in labelled]), args.target_recall)
+    overall = evaluate(labelled, scores, threshold)
+    by_law = {
+        law_id: evaluate([c for c in labelled if c["law_id"] == law_id],
+                         scores[[i for i, c in enumerate(labelled) if c["law_id"] == law_id]], threshold)
+        for law_id in sorted({chunk["law_id"] for chunk in labelled})
+    }
+    curve = {str(target): evaluate(labelled, scores, threshold_for_recall(
+        scores, np.array([chunk["terms"] for chunk in labelled]), target)) for target in (0.9, 0.95, 0.98, 0.99, 1.0)}
+
+    print(f"\n🧪 Krížová validácia po zákonoch, prah {threshold:.3f} (cieľ {args.target_recall:.0%} pojmov):")
+    print(f"{'zákon':<12}{'chunky':>8}{'volania':>9}{'ušetrené':>10}{'recall ch.':>12}{'recall p.':>11}")
+    for law_id, stats in [*by_law.items(), ("spolu", overall), ("len značky", markers_only)]:
+        print(f"{law_id:<12}{stats['chunks']:>8}{stats['calls']:>9}{stats['avoided_ratio']:>10.1%}"
+              f"{stats['chunk_recall']:>12.1%}{stats['term_recall']:>11.1%}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "parameters": {"db": args.db, "target_recall": args.target_recall, "dimensions": DIMENSIONS},
+        "threshold": threshold,
+        "overall": overall,
+        "markers_only": markers_only,
+        "by_law": by_law,
+        "curve": curve,
+    }
+
+    if not args.no_save:
+        model = DefinitionFilter.train([c["text"] for c in labelled], [int(c["terms"] > 0) for c in labelled], threshold)
+        model.save(Path(args.model), {"trained": report["timestamp"], "chunks": len(labelled),
+                                      "target_recall": args.target_recall})
+        unlabelled = [chunk for chunk in chunks if not chunk["labelled"]]
+        if unlabelled:
+            skipped = sum(1 for chunk in unlabelled if not model.accepts(chunk["text"]))
+            report["unlabelled"] = {"chunks": len(unlabelled), "avoided_calls": skipped}
+            print(f"\n📭 Zákony bez pojmov v databáze: {skipped} z {len(unlabelled)} chunkov by sa neposlalo")
+        print(f"💾 Model uložený do {args.model}")
+
+    DEFAULT_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"definition_filter_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"💾 Výsledky uložené do {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,21 @@
 """
 Skript na extrahovanie právnych pojmov z textov zákonov pomocí OpenAI API
+
+Chunky bez definícií vynechá lokálny predfilter (scripts/definition_filter.py) ešte
+pred volaním API, ak je model predfiltra naučený (data/definition_filter.json).
+
+Použitie:
+    python scripts/extract_legal_terms.py
+    python scripts/extract_legal_terms.py --defer --max-calls 500
+    python scripts/extract_legal_terms.py --no-prefilter
 """
 
 import os
 import json
 import sqlite3
 import re
-from typing import List, Dict, Tuple
+import argparse
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
 import sys
 
@@ -14,6 +23,9 @@ import sys
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
+from scripts.definition_filter import DefinitionFilter, load_configured_filter
+from scripts.law_stream import SIMPLE_SECTION_PATTERN, Section, iter_sections, read_blocks
+
 try:
     from openai import OpenAI
     from dotenv import load_dotenv
@@ -27,9 +39,20 @@ except ImportError:
 class LegalTermExtractor:
     """Extrahuje právne pojmy z textov zákonov pomocí OpenAI API"""
     
-    def __init__(self, data_dir: str = "data/law_texts", db_path: str = "data/legal_terms.db"):
+    def __init__(self, data_dir: str = "data/law_texts", db_path: str = "data/legal_terms.db",
+                 definition_filter: Optional[DefinitionFilter] = None, defer: bool = False,
+                 max_calls: Optional[int] = None):
         self.data_dir = Path(data_dir)
         self.db_path = Path(db_path)
+        self.save_batch_size = 200  # Pojmy sa ukladajú priebežne po dávkach
+        
+        # Predfilter definícií - chunky pod prahom sa vynechajú, s defer sa pošlú až po ostatných
+        self.definition_filter = definition_filter if definition_filter is not None else load_configured_filter()
+        self.defer = defer
+        self.max_calls = max_calls
+        self.prefilter_stats = {"chunks": 0, "calls": 0, "filtered": 0, "deferred_calls": 0, "over_budget": 0}
+        if self.definition_filter is not None:
+            print(f"✅ Predfilter definícií (prah {self.definition_filter.threshold:.3f})")
         
         # Vytvor adresár pre databázu ak neexistuje
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -91,37 +114,37 @@ class LegalTermExtractor:
     
     def chunk_text_for_ai(self, text: str, chunk_size: int = 2000) -> List[str]:
         """Rozdelí text na chunky vhodné pre OpenAI API"""
-        # Rozdeľ podľa paragrafov
-        paragraphs = re.split(r'(§\s*\d+[a-z]*)', text)
-        
-        chunks = []
+        return list(self.iter_chunks_for_ai(iter_sections([text], SIMPLE_SECTION_PATTERN), chunk_size))
+    
+    @staticmethod
+    def iter_chunks_for_ai(sections: Iterable[Section], chunk_size: int = 2000) -> Iterator[str]:
+        """Chunky pre OpenAI API z prúdu paragrafov"""
         current_chunk = ""
         current_paragraph = ""
         
-        for i, part in enumerate(paragraphs):
+        for section in sections:
             # Je to paragraf?
-            if re.match(r'§\s*\d+[a-z]*', part.strip()):
-                current_paragraph = part.strip()
+            if section.marker is not None and not section.continued:
+                current_paragraph = section.marker.strip()
                 # Ak by chunk bol príliš veľký, ulož ho
                 if len(current_chunk) > chunk_size:
                     if current_chunk.strip():
-                        chunks.append(current_chunk.strip())
+                        yield current_chunk.strip()
                     current_chunk = current_paragraph + "\n"
                 else:
                     current_chunk += current_paragraph + "\n"
+            
+            # Obsah paragrafu
+            part = section.text
+            if len(current_chunk) + len(part) > chunk_size and current_chunk:
+                yield current_chunk.strip()
+                current_chunk = current_paragraph + "\n" + part
             else:
-                # Je to obsah paragrafu
-                if len(current_chunk + part) > chunk_size and current_chunk:
-                    chunks.append(current_chunk.strip())
-                    current_chunk = current_paragraph + "\n" + part
-                else:
-                    current_chunk += part
+                current_chunk += part
         
         # Pridaj posledný chunk
         if current_chunk.strip():
-            chunks.append(current_chunk.strip())
-        
-        return chunks
+            yield current_chunk.strip()
     
     def extract_terms_with_ai(self, text_chunk: str, law_info: Dict) -> List[Dict]:
         """Extrahuje právne pojmy z textu pomocí OpenAI"""
@@ -255,34 +278,42 @@ Ak nenájdeš žiadne definície, vráť prázdny array [].
             print(f"❌ Chyba pri ukladaní do databázy: {e}")
             return 0
     
-    def process_file(self, file_info: Dict) -> int:
-        """Spracuje jeden súbor a extrahuje z neho pojmy"""
+    def process_file(self, file_info: Dict, deferred: bool = False) -> int:
+        """Spracuje jeden súbor a extrahuje z neho pojmy (deferred - len chunky, ktoré predfilter odložil)"""
         filepath = self.data_dir / file_info["filename"]
         
         try:
-            print(f"📖 Spracovávam: {file_info['title']} ({file_info['law_id']})")
+            print(f"📖 Spracovávam: {file_info['title']} ({file_info['law_id']})"
+                  f"{' - odložené chunky' if deferred else ''}")
             
-            # Načítaj obsah
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # Prúdovo po paragrafoch - celý zákon sa nedrží v pamäti
+            sections = iter_sections(read_blocks(filepath), SIMPLE_SECTION_PATTERN)
             
-            # Rozdeľ na chunky
-            chunks = self.chunk_text_for_ai(content)
-            print(f"   📄 Vytvorených {len(chunks)} chunkov na analýzu")
-            
-            all_terms = []
-            for i, chunk in enumerate(chunks):
-                print(f"   🤖 Analyzujem chunk {i+1}/{len(chunks)}...")
+            pending_terms = []
+            saved_count = 0
+            chunk_count = 0
+            for chunk in self.iter_chunks_for_ai(sections):
+                chunk_count += 1
+                if not self._should_call(chunk, deferred):
+                    continue
+                print(f"   🤖 Analyzujem chunk {chunk_count}...")
                 
                 # Extrahuj pojmy pomocí AI
                 terms = self.extract_terms_with_ai(chunk, file_info)
-                all_terms.extend(terms)
+                pending_terms.extend(terms)
                 
                 if terms:
-                    print(f"   ✅ Nájdených {len(terms)} pojmov v chunku {i+1}")
+                    print(f"   ✅ Nájdených {len(terms)} pojmov v chunku {chunk_count}")
+                
+                # Ukladaj priebežne, nech sa pojmy celého zákona nedržia v pamäti
+                if len(pending_terms) >= self.save_batch_size:
+                    saved_count += self.save_terms_to_db(pending_terms)
+                    pending_terms = []
+            
+            print(f"   📄 Analyzovaných {chunk_count} chunkov")
             
             # Ulož do databázy
-            saved_count = self.save_terms_to_db(all_terms)
+            saved_count += self.save_terms_to_db(pending_terms)
             
             print(f"   💾 Uložených {saved_count} pojmov z {file_info['law_id']}")
             return saved_count
@@ -291,6 +322,26 @@ Ak nenájdeš žiadne definície, vráť prázdny array [].
             print(f"❌ Chyba pri spracovaní {file_info['filename']}: {e}")
             return 0
     
+    def _should_call(self, chunk: str, deferred: bool) -> bool:
+        """Predfilter a limit volaní - či sa chunk pošle modelu v tomto prechode"""
+        accepted = self.definition_filter is None or self.definition_filter.accepts(chunk)
+        if deferred:
+            # Druhý prechod - len chunky, ktoré prvý prechod odložil
+            if accepted:
+                return False
+        else:
+            self.prefilter_stats["chunks"] += 1
+            if not accepted:
+                self.prefilter_stats["filtered"] += 1
+                return False
+        if self.max_calls is not None and self.prefilter_stats["calls"] >= self.max_calls:
+            self.prefilter_stats["over_budget"] += 1
+            return False
+        self.prefilter_stats["calls"] += 1
+        if deferred:
+            self.prefilter_stats["deferred_calls"] += 1
+        return True
+    
     def extract_all_terms(self) -> int:
         """Extrahuje pojmy zo všetkých súborov"""
         if not self.client:
@@ -308,14 +359,33 @@ Ak nenájdeš žiadne definície, vráť prázdny array [].
             terms_count = self.process_file(file_info)
             total_terms += terms_count
         
+        # Odložené chunky (bez značky definície, nízke skóre) až po všetkých ostatných
+        if self.defer and self.definition_filter is not None and self.prefilter_stats["filtered"]:
+            print(f"⏬ Odložené chunky: {self.prefilter_stats['filtered']}")
+            for file_info in files:
+                total_terms += self.process_file(file_info, deferred=True)
+        
         print("=" * 60)
         print(f"🎉 Celkovo extrahovaných {total_terms} právnych pojmov!")
+        self.show_prefilter_statistics()
         
         # Zobraz štatistiky
         self.show_statistics()
         
         return total_terms
     
+    def show_prefilter_statistics(self):
+        """Koľko volaní API ušetril predfilter a limit volaní"""
+        stats = self.prefilter_stats
+        avoided = stats["chunks"] - stats["calls"]
+        print(f"🧹 Volania API: {stats['calls']} z {stats['chunks']} chunkov, "
+              f"ušetrených {avoided} ({avoided / max(stats['chunks'], 1):.0%})")
+        if self.definition_filter is not None:
+            deferred = f", z toho {stats['deferred_calls']} odoslaných neskôr" if self.defer else ""
+            print(f"   predfilter definícií: {stats['filtered']} chunkov pod prahom{deferred}")
+        if stats["over_budget"]:
+            print(f"   limit --max-calls: {stats['over_budget']} chunkov neodoslaných")
+    
     def show_statistics(self):
         """Zobrazí štatistiky databázy"""
         try:
@@ -396,11 +466,19 @@ Ak nenájdeš žiadne definície, vráť prázdny array [].
 
 def main():
     """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Extrahovanie právnych pojmov z textov zákonov")
+    parser.add_argument("--no-prefilter", action="store_true", help="Poslať modelu všetky chunky (LEGAL_DEFINITION_FILTER=0)")
+    parser.add_argument("--defer", action="store_true", help="Chunky pod prahom predfiltra poslať až po ostatných namiesto vynechania")
+    parser.add_argument("--max-calls", type=int, help="Najviac toľko volaní API (s --defer sa odložené chunky vynechajú ako prvé)")
+    args = parser.parse_args()
+    if args.no_prefilter:
+        os.environ["LEGAL_DEFINITION_FILTER"] = "0"
+    
     print("🚀 Extrahovanie právnych pojmov z textov zákonov")
     print("=" * 50)
     
     # Vytvor extraktor
-    extractor = LegalTermExtractor()
+    extractor = LegalTermExtractor(defer=args.defer, max_calls=args.max_calls)
     
     # Extrahuj pojmy
     count = extractor.extract_all_terms()
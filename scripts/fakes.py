@@ -0,0 +1,225 @@
+"""
+Lokálne náhrady externých služieb pre záťažové testy a benchmarky
+
+- ReplayChatModel: deterministický fake LLM, ktorý prehráva zaznamenané ReAct stopy
+- LocalServiceStubs: lokálny HTTP server napodobňujúci Tavily a Wikipedia API
+"""
+
+import re
+import json
+import time
+import zlib
+import threading
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from langchain_core.language_models.chat_models import SimpleChatModel
+
+project_root = Path(__file__).parent.parent
+DEFAULT_TRACES = project_root / "data" / "benchmarks" / "react_traces_v1.json"
+
+# Značky z prompt template v agent/legal_agent.py
+QUESTION_PATTERN = re.compile(r"Otázka používateľa:\s*(.*?)\n\s*\nVáš postup:", re.DOTALL)
+SCRATCHPAD_MARKER = "Váš postup:"
+
+
+def load_traces(path: Path = DEFAULT_TRACES) -> List[Dict[str, Any]]:
+    """Načíta zaznamenané ReAct stopy zo súboru"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["traces"]
+
+
+class ReplayChatModel(SimpleChatModel):
+    """
+    Fake LLM, ktorý prehráva zaznamenané ReAct stopy
+
+    Model je bezstavový: stopa sa vyberá podľa otázky v prompte a krok podľa počtu
+    pozorovaní v scratchpade, takže jednu inštanciu môže bezpečne zdieľať
+    ľubovoľný počet súbežných sedení.
+    """
+
+    traces: List[Dict[str, Any]]
+    latency_scale: float = 1.0
+    default_latency_ms: float = 800.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay-react-chat-model"
+
+    def _select_trace(self, question: str) -> Dict[str, Any]:
+        """Vyberie stopu podľa presnej otázky, inak deterministicky podľa hashu"""
+        for trace in self.traces:
+            if trace["question"] == question:
+                return trace
+        return self.traces[zlib.crc32(question.encode("utf-8")) % len(self.traces)]
+
+    def _call(self, messages: List[Any], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        prompt = messages[-1].content if messages else ""
+
+        match = QUESTION_PATTERN.search(prompt)
+        question = match.group(1).strip() if match else prompt
+
+        # Krok = počet už vykonaných akcií v scratchpade
+        scratchpad = prompt.split(SCRATCHPAD_MARKER, 1)[-1]
+        step_index = scratchpad.count("Observation:")
+
+        steps = self._select_trace(question)["steps"]
+        step = steps[min(step_index, len(steps) - 1)]
+
+        # Simulované čakanie na LLM (uvoľní GIL rovnako ako sieťové volanie)
+        latency_ms = step.get("latency_ms", self.default_latency_ms) * self.latency_scale
+        if latency_ms > 0:
+            time.sleep(latency_ms / 1000)
+
+        return step["output"]
+
+
+# Fixné heslá pre Wikipedia stub
+WIKI_PAGES = {
+    "sk": {
+        "Spoločnosť s ručením obmedzeným": "Spoločnosť s ručením obmedzeným (s.r.o.) je kapitálová obchodná spoločnosť, ktorej základné imanie tvoria vklady spoločníkov.",
+        "Vlastnícke právo": "Vlastnícke právo je právo vlastníka vec držať, užívať, požívať jej plody a úžitky a nakladať s ňou.",
+        "Dedenie": "Dedenie je prechod majetku zomrelého (poručiteľa) na dedičov zo zákona alebo zo závetu.",
+        "Nájomná zmluva": "Nájomná zmluva je zmluva, ktorou prenajímateľ prenecháva za odplatu nájomcovi vec na dočasné užívanie.",
+        "Krádež": "Krádež je trestný čin, ktorého sa dopustí ten, kto si prisvojí cudziu vec tým, že sa jej zmocní.",
+    },
+    "cs": {
+        "Kupní smlouva": "Kupní smlouva je smlouva, kterou se prodávající zavazuje odevzdat kupujícímu věc a kupující se zavazuje zaplatit kupní cenu.",
+    },
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """HTTP handler napodobňujúci podmnožinu Tavily a MediaWiki API"""
+
+    server_version = "LegalStub/1.0"
+
+    def log_message(self, format, *args):
+        # Tichý režim - záťažový test by inak zahltil výstup
+        pass
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _delay(self):
+        if self.server.latency_ms > 0:
+            time.sleep(self.server.latency_ms / 1000)
+
+    def do_POST(self):
+        """Tavily: POST /search"""
+        self._delay()
+        self.server.record("tavily")
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        query = request.get("query", "")
+
+        results = [
+            {
+                "title": f"{query[:60]} - prehľad {i + 1}",
+                "url": f"https://{domain}/clanok/{zlib.crc32(query.encode('utf-8')) % 10000}-{i}",
+                "content": f"Lokálny stub výsledok {i + 1} pre dotaz '{query}'. Obsah napodobňuje odpoveď Tavily API.",
+                "score": round(0.9 - i * 0.1, 2),
+            }
+            for i, domain in enumerate((request.get("include_domains") or ["epi.sk"])[: request.get("max_results", 5)])
+        ]
+        self._send_json({"query": query, "results": results, "response_time": self.server.latency_ms / 1000})
+
+    def do_GET(self):
+        """Wikipedia: GET /{lang}/w/api.php"""
+        self._delay()
+        self.server.record("wikipedia")
+        parsed = urlparse(self.path)
+        lang = parsed.path.strip("/").split("/")[0] or "sk"
+        params = {key: values[0] for key, values in parse_qs(parsed.query, keep_blank_values=True).items()}
+        pages = WIKI_PAGES.get(lang, {})
+
+        if params.get("list") == "search":
+            words = [w for w in params.get("srsearch", "").lower().split() if len(w) > 3]
+            titles = [t for t in pages if any(w[:5] in t.lower() for w in words)]
+            limit = int(params.get("srlimit", 3))
+            return self._send_json({"query": {"searchinfo": {}, "search": [{"title": t} for t in titles[:limit]]}})
+
+        titles = params.get("titles", "").split("|")
+        found = {str(1000 + list(pages).index(title)): title for title in titles if title in pages}
+        if not found:
+            return self._send_json({"query": {"pages": {"-1": {"title": titles[0], "missing": ""}}}})
+
+        if params.get("prop") == "extracts":
+            return self._send_json({"query": {"pages": {
+                page_id: {"pageid": int(page_id), "title": title, "extract": pages[title]}
+                for page_id, title in found.items()
+            }}})
+
+        return self._send_json({"query": {"pages": {
+            page_id: {
+                "pageid": int(page_id),
+                "title": title,
+                "fullurl": f"https://{lang}.wikipedia.org/wiki/{title.replace(' ', '_')}",
+            }
+            for page_id, title in found.items()
+        }}})
+
+
+class LocalServiceStubs:
+    """
+    Lokálny HTTP server nahrádzajúci Tavily a Wikipedia API
+
+    Použitie:
+        with LocalServiceStubs(latency_ms=150) as stubs:
+            os.environ.update(stubs.environment())
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0):
+        self.server = ThreadingHTTPServer((host, port), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.latency_ms = latency_ms
+        self.server.request_counts = {}
+        self._lock = threading.Lock()
+        self.server.record = self._record
+        self._thread = None
+
+    def _record(self, service: str):
+        with self._lock:
+            self.server.request_counts[service] = self.server.request_counts.get(service, 0) + 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.server.request_counts)
+
+    def environment(self) -> Dict[str, str]:
+        """Premenné prostredia, ktoré presmerujú nástroje na stub"""
+        return {
+            "TAVILY_API_KEY": "local-stub",
+            "TAVILY_API_BASE_URL": self.base_url,
+            "WIKIPEDIA_API_URL": self.base_url + "/{lang}/w/api.php",
+            # Záťažové testy merajú nástroje bez cache odpovedí
+            "LEGAL_RESPONSE_CACHE": "0",
+        }
+
+    def start(self) -> "LocalServiceStubs":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "LocalServiceStubs":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,251 @@
+"""
+Prúdové čítanie textov zákonov po paragrafoch (§) s ohraničenou pamäťou
+
+Náhrada za f.read() + re.split nad celým súborom: súbor sa číta po blokoch, hranice
+paragrafov sa hľadajú v malom posuvnom bufferi a ďalej tečú generátory - paragrafy,
+chunky, čistenie a dávky na embedding. V pamäti je naraz len aktuálny paragraf
+(najviac max_section_chars znakov) a rozpracovaný chunk, nie celý zákon.
+
+    sections = iter_sections(read_blocks(path), SECTION_PATTERN)
+    chunks = chunker(sections)               # LegalTextLoader / LegalTermExtractor
+    for batch in batched(chunks, 50):        # embedding + zápis po dávkach
+        collection.add(...)
+
+Porovnanie pamäte s načítaním celého súboru na syntetickom "konsolidovanom" súbore
+(zákony z data/law_texts zopakované do zadanej veľkosti):
+
+    python scripts/law_stream.py --mb 200
+
+Rozdelenie je zhodné s re.split(pattern, text) nad celým textom, pokiaľ je značka
+kratšia ako lookahead (predvolene 64 znakov) - dlhšiu značku by buffer mohol rozdeliť.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple, TypeVar
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+# Značka paragrafu pre chunky vektorovej databázy (§ 12, § 12a, § 12 a))
+SECTION_PATTERN = re.compile(r'§\s*\d+[a-z]*(?:\s*[a-z]\))?')
+# Jednoduchšia značka pre extrakciu pojmov (§ 12, § 12a)
+SIMPLE_SECTION_PATTERN = re.compile(r'§\s*\d+[a-z]*')
+# Paragraf alebo článok pre dvojúrovňový index (§ 12a, Čl. 7a)
+PARENT_PATTERN = re.compile(r'(?:§|Čl\.)\s*\d+[a-z]*')
+# Nadpis má za značkou koniec riadku alebo dve medzery, odkaz "podľa § 12 ods. 2" pokračuje vetou
+HEADING_GAP = re.compile(r'^(?:[ \t]*\n|[ \t]{2,})')
+
+BLOCK_CHARS = 1 << 16
+MAX_SECTION_CHARS = 1 << 20
+WHITESPACE = re.compile(r'\s+')
+
+T = TypeVar("T")
+
+
+@dataclass
+class Section:
+    """Paragraf: značka (None pre text pred prvým §) a text za ňou"""
+    marker: Optional[str]
+    text: str
+    # Pokračovanie príliš dlhého paragrafu rozdeleného podľa max_section_chars
+    continued: bool = False
+
+
+def read_blocks(path: Path, block_chars: int = BLOCK_CHARS) -> Iterator[str]:
+    """Text súboru po blokoch (dekódovanie UTF-8 rieši textový režim)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            block = f.read(block_chars)
+            if not block:
+                return
+            yield block
+
+
+def iter_parts(blocks: Iterable[str], pattern: Pattern = SECTION_PATTERN,
+               lookahead: int = 64) -> Iterator[Tuple[bool, str]]:
+    """
+    Prúdový ekvivalent re.split s jednou skupinou: (je_značka, text)
+
+    Text medzi značkami môže prísť vo viacerých kúskoch. Značka sa vydá až vtedy,
+    keď za ňou je aspoň lookahead znakov (alebo koniec vstupu) - inak by sa mohla
+    v ďalšom bloku ešte predĺžiť.
+    """
+    buffer = ""
+    for block in blocks:
+        buffer += block
+        position = 0
+        safe = len(buffer) - lookahead
+        for match in pattern.finditer(buffer):
+            if match.end() > safe:
+                safe = match.start()
+                break
+            if match.start() > position:
+                yield False, buffer[position:match.start()]
+            yield True, match.group()
+            position = match.end()
+        if safe > position:
+            yield False, buffer[position:safe]
+            position = safe
+        buffer = buffer[position:]
+
+    position = 0
+    for match in pattern.finditer(buffer):
+        if match.start() > position:
+            yield False, buffer[position:match.start()]
+        yield True, match.group()
+        position = match.end()
+    if position < len(buffer):
+        yield False, buffer[position:]
+
+
+def iter_sections(blocks: Iterable[str], pattern: Pattern = SECTION_PATTERN,
+                  max_section_chars: int = MAX_SECTION_CHARS) -> Iterator[Section]:
+    """Paragrafy zo súboru - text pred prvou značkou má marker None"""
+    marker: Optional[str] = None
+    pieces: List[str] = []
+    size = 0
+    continued = False
+    for is_marker, text in iter_parts(blocks, pattern):
+        if is_marker:
+            if marker is not None or size:
+                yield Section(marker, "".join(pieces), continued)
+            marker, pieces, size, continued = text, [], 0, False
+            continue
+        pieces.append(text)
+        size += len(text)
+        if size >= max_section_chars:
+            yield Section(marker, "".join(pieces), continued)
+            pieces, size, continued = [], 0, True
+    if marker is not None or size:
+        yield Section(marker, "".join(pieces), continued)
+
+
+def iter_parents(blocks: Iterable[str], pattern: Pattern = PARENT_PATTERN) -> Iterator[Tuple[str, str]]:
+    """(značka, text) paragrafov podľa nadpisov - odkazy v texte paragraf nerozdelia, úvod má značku ''"""
+    marker, pieces = "", []
+    for section in iter_sections(blocks, pattern):
+        if section.marker is not None and not section.continued and HEADING_GAP.match(section.text):
+            if marker or "".join(pieces).strip():
+                yield marker, "".join(pieces)
+            marker, pieces = " ".join(section.marker.split()), [section.text]
+        elif section.marker is None or section.continued:
+            pieces.append(section.text)
+        else:
+            # Odkaz na iný paragraf - patrí do textu aktuálneho
+            pieces.append(section.marker + section.text)
+    if marker or "".join(pieces).strip():
+        yield marker, "".join(pieces)
+
+
+def clean_text(text: str) -> str:
+    """Zlúči biele znaky do jednej medzery"""
+    return WHITESPACE.sub(' ', text).strip()
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Dávky po size položkách (posledná môže byť kratšia)"""
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+MODES = ("read", "stream")
+
+
+def build_dump(path: Path, target_mb: int, data_dir: Path) -> int:
+    """Syntetický veľký súbor - texty zákonov za sebou, kým nedosiahne target_mb"""
+    texts = [p.read_text(encoding='utf-8') for p in sorted(data_dir.glob('*.txt'))]
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < target_mb * 1024 * 1024:
+            for text in texts:
+                f.write(text)
+                written += len(text.encode('utf-8'))
+    return written
+
+
+def run_worker(mode: str, path: Path) -> Dict[str, Any]:
+    """Rozchunkuje súbor chunkerom LegalTextLoader a zmeria špičkovú RSS"""
+    from scripts.load_law_texts import LegalTextLoader
+
+    # Len chunkovanie - bez ChromaDB a embedding modelu
+    loader = LegalTextLoader.chunker()
+    law_info = {"law_id": "dump", "title": "Konsolidované znenie", "filename": path.name}
+
+    baseline_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    if mode == "read":
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        chunks = loader.smart_chunk_text(content, law_info)
+        count, chars = len(chunks), sum(len(chunk['text']) for chunk in chunks)
+    else:
+        count = chars = 0
+        for chunk in loader.iter_chunks(iter_sections(read_blocks(path)), law_info):
+            count += 1
+            chars += len(chunk['text'])
+    return {
+        "mode": mode,
+        "chunks": count,
+        "chunk_chars": chars,
+        "seconds": round(time.perf_counter() - start, 2),
+        "baseline_rss_mb": round(baseline_mb, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Pamäť prúdového čítania zákonov")
+    parser.add_argument("--mb", type=int, default=200, help="Veľkosť syntetického súboru v MB")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES, help="Merané režimy")
+    parser.add_argument("--data-dir", default=str(project_root / "data" / "law_texts"), help="Zdrojové zákony")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print("STREAM " + json.dumps(run_worker(args.worker, Path(args.file))))
+        return
+
+    print("🚀 Prúdové čítanie zákonov")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = Path(tmp) / "dump.txt"
+        size = build_dump(dump, args.mb, Path(args.data_dir))
+        print(f"📄 Syntetický súbor: {size / 1024 / 1024:.0f} MB")
+
+        print(f"\n{'režim':<8}{'chunky':>9}{'čas s':>8}{'RSS pred MB':>13}{'špička MB':>11}")
+        for mode in args.modes:
+            result = subprocess.run(
+                [sys.executable, __file__, "--worker", mode, "--file", str(dump)],
+                cwd=project_root, capture_output=True, text=True, env={**os.environ, "ANONYMIZED_TELEMETRY": "False"}
+            )
+            lines = [line for line in result.stdout.splitlines() if line.startswith("STREAM ")]
+            if not lines:
+                print(f"❌ Režim {mode} zlyhal:\n{result.stderr[-2000:]}")
+                continue
+            item = json.loads(lines[0][len("STREAM "):])
+            print(f"{item['mode']:<8}{item['chunks']:>9}{item['seconds']:>8.1f}"
+                  f"{item['baseline_rss_mb']:>13.0f}{item['peak_rss_mb']:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
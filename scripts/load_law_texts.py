@@ -6,7 +6,12 @@ import os
 import re
 import sys
 import json
-from typing import List, Dict, Tuple
+import argparse
+import tempfile
+from collections import deque
+from dataclasses import dataclass
+from itertools import groupby
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
 
 # Pridaj project root do Python path
@@ -25,60 +30,71 @@ except ImportError as e:
     CHROMADB_AVAILABLE = False
     SENTENCE_TRANSFORMERS_AVAILABLE = False
 
+from agent.tools.embeddings import DEFAULT_TOKEN_BUDGET, EmbeddingScheduler, MultilingualEmbeddingFunction
+from agent.tools.embedding_store import EmbeddingStore, load_configured_store
+from agent.tools.chunk_store import DEFAULT_CHUNK_STORE_PATH, write_chunk_store
+from agent.tools.hierarchy import DEFAULT_CHILDREN_COLLECTION, DEFAULT_PARENT_STORE_PATH, parent_id, split_odseks
+from agent.tools.law_versions import DEFAULT_VERSION_INDEX_PATH, VersionIndexBuilder, chunk_hash, date_key, plan_versions
+from agent.tools.multi_vector import DEFAULT_WINDOWS_COLLECTION, TokenWindows, coverage
+from agent.tools.near_duplicates import DEFAULT_NEAR_DUPLICATES_PATH, NearDuplicateIndexBuilder
+from scripts.law_stream import Section, batched, clean_text, iter_parents, iter_sections, read_blocks
+
+
+@dataclass(frozen=True)
+class ChunkingConfig:
+    """Parametre chunkovania v tokenoch tokenizéra embedding modelu"""
+    min_chunk_tokens: int = 128  # Aspoň jedno okno modelu pre zachovanie významu
+    chunk_tokens: int = 512  # Okná textu bez paragrafov (≈2000 znakov)
+    overlap_paragraphs: int = 1  # Posledné paragrafy chunku sa zopakujú na začiatku ďalšieho
+
+    @property
+    def label(self) -> str:
+        return f"min{self.min_chunk_tokens}-max{self.chunk_tokens}-ovl{self.overlap_paragraphs}"
+
 
 class LegalTextLoader:
     """Načítava a spracováva právne texty do ChromaDB s optimálnym chunkovaním"""
     
-    def __init__(self, data_dir: str = "data/law_texts", db_path: str = "data/vector_db"):
+    def __init__(self, data_dir: str = "data/law_texts", db_path: str = "data/vector_db",
+                 chunk_store_path: str = DEFAULT_CHUNK_STORE_PATH,
+                 version_index_path: str = DEFAULT_VERSION_INDEX_PATH,
+                 near_duplicates_path: str = DEFAULT_NEAR_DUPLICATES_PATH,
+                 embedding_backend: str = None, multi_vector: bool = True,
+                 token_budget: int = DEFAULT_TOKEN_BUDGET, chunking: Optional[ChunkingConfig] = None,
+                 embedding_function: Optional[MultilingualEmbeddingFunction] = None,
+                 embedding_store: Optional[EmbeddingStore] = None, hierarchy: bool = False,
+                 parent_store_path: str = DEFAULT_PARENT_STORE_PATH):
         self.data_dir = Path(data_dir)
         self.db_path = Path(db_path)
-        
-        # Nastavenia pre chunkovanie - optimalizované pre zachovanie kontextu
-        self.chunk_size = 2000  # Väčšie chunky pre lepší kontext (≈500 tokenov)
-        self.chunk_overlap = 400  # Veľký prekryv pre zachovanie kontextu
-        self.min_chunk_size = 500  # Minimálna veľkosť chunku pre zachovanie významu
+        self.chunk_store_path = Path(chunk_store_path)
+        self.version_index_path = Path(version_index_path)
+        self.near_duplicates_path = Path(near_duplicates_path)
+        self.parent_store_path = Path(parent_store_path)
+        
+        # Nastavenia pre chunkovanie v tokenoch tokenizéra embedding modelu (bez tokenizéra odhad 4 znaky na token)
+        self._configure_chunking(chunking or ChunkingConfig(), TokenWindows())
+        self.embedding_function = None
+        self.windows_collection = None
+        self.children_collection = None
+        self.scheduler = None
         
         if CHROMADB_AVAILABLE:
             try:
                 # Inicializácia ChromaDB s lepším embedding modelom
                 self.client = chromadb.PersistentClient(path=str(self.db_path))
                 
-                # Pokus o slovenský/multilingual model
-                if SENTENCE_TRANSFORMERS_AVAILABLE:
+                # Pokus o slovenský/multilingual model (sweep chunkovania zdieľa jeden načítaný model)
+                if embedding_function is not None:
+                    print(f"🤖 Embedding model: {embedding_function.model_name} (backend: {embedding_function.backend})")
+                elif SENTENCE_TRANSFORMERS_AVAILABLE:
                     try:
                         # Multilingual model s dobrou podporou slovenčiny
                         embedding_model = "paraphrase-multilingual-MiniLM-L12-v2"
                         print(f"🤖 Načítavam embedding model: {embedding_model}")
                         
-                        # Vytvor embedding funkciu s normalizáciou pre konzistenciu
-                        class MultilingualEmbeddingFunction:
-                            def __init__(self, model_name):
-                                from sentence_transformers import SentenceTransformer
-                                self.model = SentenceTransformer(model_name)
-                                self.model_name = model_name  # Pridaj názov modelu
-                                self.name = f"multilingual-{model_name}"  # ChromaDB name atribút
-                            
-                            def __call__(self, input):
-                                import numpy as np
-                                
-                                # Získaj embeddings
-                                embeddings = self.model.encode(input)
-                                
-                                # Normalizuj pre konzistenciu
-                                if len(embeddings.shape) == 1:
-                                    # Jeden vektor
-                                    norm = np.linalg.norm(embeddings)
-                                    if norm > 0:
-                                        embeddings = embeddings / norm
-                                else:
-                                    # Viac vektorov
-                                    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
-                                    embeddings = embeddings / np.maximum(norms, 1e-8)
-                                
-                                return embeddings.tolist()
-                        
-                        embedding_function = MultilingualEmbeddingFunction(embedding_model)
-                        print("✅ Multilingual embedding model načítaný")
+                        # Backend enkóderu: parameter alebo LEGAL_EMBEDDING_BACKEND (torch | onnx | onnx-int8)
+                        embedding_function = MultilingualEmbeddingFunction(embedding_model, embedding_backend)
+                        print(f"✅ Multilingual embedding model načítaný (backend: {embedding_function.backend})")
                         
                     except Exception as e:
                         print(f"⚠️ Chyba pri načítaní embedding modelu: {e}")
@@ -86,13 +102,23 @@ class LegalTextLoader:
                 else:
                     embedding_function = None
                 
+                if embedding_function:
+                    # Veľkosť chunkov a okná v tokenoch modelu
+                    self.token_windows = TokenWindows.for_embedding(embedding_function)
+                    self.embedding_function = embedding_function
+                    # Embedding v dávkach podľa tokenového rozpočtu (0 = pevné dávky ChromaDB po 50),
+                    # texty z úložiska embeddingov sa neenkódujú znova (LEGAL_EMBEDDING_STORE)
+                    if token_budget:
+                        store = embedding_store if embedding_store is not None else load_configured_store()
+                        self.scheduler = EmbeddingScheduler(embedding_function, token_budget, store=store)
+                
                 # Vymaž existujúcu collection a vytvor novú
                 try:
                     collections = self.client.list_collections()
                     for collection in collections:
-                        if collection.name == "legal_documents":
-                            self.client.delete_collection("legal_documents")
-                            print("🗑️ Vymazaná stará collection")
+                        if collection.name in ("legal_documents", DEFAULT_WINDOWS_COLLECTION, DEFAULT_CHILDREN_COLLECTION):
+                            self.client.delete_collection(collection.name)
+                            print(f"🗑️ Vymazaná stará collection {collection.name}")
                 except:
                     pass
                 
@@ -109,6 +135,23 @@ class LegalTextLoader:
                         metadata={"description": "Slovenské a české právne predpisy"}
                     )
                 
+                # Vektory okien 2..n dlhých chunkov (prvé okno je vektor chunku v legal_documents),
+                # s hierarchiou ich nahradia odseky - tie pokrývajú celý text
+                if embedding_function and multi_vector and not hierarchy:
+                    self.windows_collection = self.client.create_collection(
+                        name=DEFAULT_WINDOWS_COLLECTION,
+                        embedding_function=embedding_function,
+                        metadata={"description": "Ďalšie okná modelu pre chunky dlhšie ako max_seq_length"}
+                    )
+                
+                # Odseky dvojúrovňového indexu (paragrafy sú v úložisku rodičov)
+                if embedding_function and hierarchy:
+                    self.children_collection = self.client.create_collection(
+                        name=DEFAULT_CHILDREN_COLLECTION,
+                        embedding_function=embedding_function,
+                        metadata={"description": "Odseky paragrafov s id rodiča (paragrafu)"}
+                    )
+                
                 print("✅ ChromaDB collection vytvorená s novými nastaveniami")
                 
             except Exception as e:
@@ -145,85 +188,117 @@ class LegalTextLoader:
             print(f"❌ Chyba pri načítavaní metadát: {e}")
             return {}
     
+    @classmethod
+    def chunker(cls, data_dir: str = "data/law_texts", chunking: Optional[ChunkingConfig] = None,
+                token_windows: Optional[TokenWindows] = None) -> "LegalTextLoader":
+        """Loader len na chunkovanie - bez ChromaDB a embedding modelu"""
+        loader = cls.__new__(cls)
+        loader.data_dir = Path(data_dir)
+        loader._configure_chunking(chunking or ChunkingConfig(), token_windows or TokenWindows())
+        return loader
+    
+    def _configure_chunking(self, chunking: ChunkingConfig, token_windows: TokenWindows):
+        self.chunking = chunking
+        self.chunk_tokens = chunking.chunk_tokens
+        self.min_chunk_tokens = chunking.min_chunk_tokens
+        self.overlap_paragraphs = chunking.overlap_paragraphs
+        self.token_windows = token_windows
+    
     def smart_chunk_text(self, text: str, law_info: Dict) -> List[Dict]:
         """
         Inteligentné chunkovanie s dôrazom na zachovanie kontextu
-        - Minimálne 500 tokenov (~2000 znakov) na chunk
-        - Veľký prekryv pre zachovanie kontextu
+        - Minimálne jedno okno modelu (128 tokenov tokenizéra) na chunk
+        - Prekryv posledným paragrafom (overlap_paragraphs) pre zachovanie kontextu
         - Rešpektovanie štruktúry paragrafov ale spájanie malých
         """
-        chunks = []
-        
-        # Najprv skús rozdeliť podľa paragrafov ale spájaj malé
-        paragraph_chunks = self._chunk_by_paragraphs_contextual(text, law_info)
-        
-        if paragraph_chunks:
-            chunks = paragraph_chunks
-        else:
-            # Ak nie sú paragrafy, použij kontextuálne okná
-            chunks = self._contextual_window_chunk(text, law_info)
-        
-        # Filtrovanie príliš malých chunkov
-        chunks = self._merge_small_chunks(chunks, law_info)
-        
-        return chunks
+        return list(self.iter_chunks(iter_sections([text]), law_info))
     
-    def _chunk_by_paragraphs_contextual(self, text: str, law_info: Dict) -> List[Dict]:
+    def iter_chunks(self, sections: Iterable[Section], law_info: Dict) -> Iterator[Dict]:
+        """Chunky z prúdu paragrafov - kontextové chunkovanie a spájanie malých chunkov"""
+        return self._merge_small_chunks(self._chunk_by_paragraphs_contextual(sections, law_info), law_info)
+    
+    def _chunk_by_paragraphs_contextual(self, sections: Iterable[Section], law_info: Dict) -> Iterator[Dict]:
         """Rozdelí text podľa paragrafov ale zachová kontext spájaním malých"""
-        chunks = []
-        
-        # Rozdelenie podľa paragrafov (§ X)
-        paragraph_pattern = r'(§\s*\d+[a-z]*(?:\s*[a-z]\))?)'
-        parts = re.split(paragraph_pattern, text)
-        
         current_paragraphs = []
         current_text = ""
+        current_tokens = 0
+        # Posledné paragrafy (značka, text) na prekryv s ďalším chunkom
+        recent = deque(maxlen=max(self.overlap_paragraphs, 1))
         chunk_counter = 0
-        
-        for i, part in enumerate(parts):
-            if re.match(paragraph_pattern, part.strip()):
-                # Nový paragraf
-                new_paragraph = part.strip()
-                
-                # Ak aktuálny chunk je dosť veľký, ulož ho
-                if current_text and len(current_text) >= self.min_chunk_size:
-                    chunk_counter += 1
-                    chunks.append(self._create_contextual_chunk(
-                        paragraphs=current_paragraphs,
-                        text=current_text.strip(),
-                        law_info=law_info,
-                        chunk_num=chunk_counter
-                    ))
-                    
-                    # Zachovaj prekryv - ponechaj posledný paragraf
-                    if current_paragraphs:
-                        last_para = current_paragraphs[-1]
-                        last_para_text = self._get_paragraph_text(text, last_para)
-                        current_paragraphs = [last_para]
-                        current_text = f"{last_para}\n\n{last_para_text}\n\n"
-                    else:
-                        current_paragraphs = []
-                        current_text = ""
-                
-                current_paragraphs.append(new_paragraph)
+        window_chunks = 0
+        
+        for section in sections:
+            if section.marker is None:
+                # Text pred prvým paragrafom
+                current_text += section.text
+                if section.continued:
+                    # Dlhý text bez paragrafov (napr. ústava s článkami) - kontextové okná po častiach
+                    chunks = self._contextual_window_chunk(current_text, law_info, first_chunk=window_chunks + 1)
+                    window_chunks += len(chunks)
+                    yield from chunks
+                    current_text = ""
+                continue
+            
+            if section.continued:
+                # Extrémne dlhý paragraf - ulož rozpracovaný chunk, nech pamäť neporastie
+                chunk_counter += 1
+                yield self._create_contextual_chunk(
+                    paragraphs=current_paragraphs,
+                    text=current_text.strip(),
+                    law_info=law_info,
+                    chunk_num=chunk_counter
+                )
+                current_text = section.text
+                current_tokens = self.token_windows.count(section.text)
+                if recent:
+                    recent[-1] = (recent[-1][0], section.text)
+                continue
+            
+            # Nový paragraf
+            new_paragraph = section.marker.strip()
+            
+            # Ak aktuálny chunk je dosť veľký, ulož ho
+            if current_text and current_tokens >= self.min_chunk_tokens:
+                chunk_counter += 1
+                yield self._create_contextual_chunk(
+                    paragraphs=current_paragraphs,
+                    text=current_text.strip(),
+                    law_info=law_info,
+                    chunk_num=chunk_counter
+                )
                 
-            else:
-                # Text patriaci k paragrafu
-                current_text += part
+                # Zachovaj prekryv - ponechaj posledné paragrafy
+                carried = min(self.overlap_paragraphs, len(current_paragraphs))
+                if carried:
+                    overlap = list(recent)[-carried:]
+                    current_paragraphs = [marker for marker, _ in overlap]
+                    current_text = "".join(f"{marker}\n\n{text.strip()}\n\n" for marker, text in overlap)
+                    current_tokens = self.token_windows.count(current_text)
+                else:
+                    current_paragraphs = []
+                    current_text = ""
+                    current_tokens = 0
+            
+            current_paragraphs.append(new_paragraph)
+            # Text patriaci k paragrafu (tokeny po častiach - text sa netokenizuje opakovane)
+            current_text += section.text
+            current_tokens += self.token_windows.count(section.text)
+            recent.append((new_paragraph, section.text))
         
         # Ulož posledný chunk
         if current_paragraphs and current_text.strip():
             chunk_counter += 1
-            chunks.append(self._create_contextual_chunk(
+            yield self._create_contextual_chunk(
                 paragraphs=current_paragraphs,
                 text=current_text.strip(),
                 law_info=law_info,
                 chunk_num=chunk_counter
-            ))
-        
-        return chunks
+            )
+        elif not chunk_counter and current_text.strip():
+            # Ak nie sú paragrafy, použij kontextuálne okná
+            yield from self._contextual_window_chunk(current_text, law_info, first_chunk=window_chunks + 1)
     
-    def _contextual_window_chunk(self, text: str, law_info: Dict) -> List[Dict]:
+    def _contextual_window_chunk(self, text: str, law_info: Dict, first_chunk: int = 1) -> List[Dict]:
         """Kontextuálne okná s veľkým prekryvom"""
         chunks = []
         
@@ -232,18 +307,17 @@ class LegalTextLoader:
         sentences = [s.strip() for s in sentences if s.strip()]
         
         current_chunk = ""
-        chunk_num = 1
+        current_tokens = 0
+        chunk_num = first_chunk
         i = 0
         
         while i < len(sentences):
-            # Pridávaj vety pokým nedosiahneš cieľovú veľkosť
-            while i < len(sentences) and len(current_chunk) < self.chunk_size:
-                current_chunk += sentences[i] + ". "
-                i += 1
+            chunk_start = i
             
-            # Ak je chunk príliš malý, pridaj ešte vety
-            while i < len(sentences) and len(current_chunk) < self.min_chunk_size:
+            # Pridávaj vety pokým nedosiahneš cieľovú veľkosť v tokenoch
+            while i < len(sentences) and current_tokens < self.chunk_tokens:
                 current_chunk += sentences[i] + ". "
+                current_tokens += self.token_windows.count(sentences[i] + ". ")
                 i += 1
             
             if current_chunk.strip():
@@ -254,76 +328,57 @@ class LegalTextLoader:
                     chunk_num=chunk_num
                 ))
                 
-                # Veľký prekryv - vráť sa o 1/3 textu
+                # Koniec textu - ďalšie okno by len zopakovalo prekryv
+                if i >= len(sentences):
+                    break
+                
+                # Veľký prekryv - vráť sa o 1/3 textu (vždy aspoň o vetu dopredu)
                 overlap_chars = len(current_chunk) // 3
                 overlap_text = current_chunk[-overlap_chars:]
                 overlap_sentences = len(overlap_text.split('.'))
                 
-                i = max(0, i - overlap_sentences)
+                i = max(chunk_start + 1, i - overlap_sentences)
                 current_chunk = ""
+                current_tokens = 0
                 chunk_num += 1
         
         return chunks
     
-    def _merge_small_chunks(self, chunks: List[Dict], law_info: Dict) -> List[Dict]:
-        """Spája príliš malé chunky so susednými"""
-        if not chunks:
-            return chunks
-        
-        merged_chunks = []
-        i = 0
-        
-        while i < len(chunks):
-            current_chunk = chunks[i]
+    def _merge_small_chunks(self, chunks: Iterable[Dict], law_info: Dict) -> Iterator[Dict]:
+        """Spája príliš malé chunky so susednými (drží len jeden chunk dopredu)"""
+        pending = None
+        
+        for next_chunk in chunks:
+            if pending is None:
+                pending = next_chunk
+                continue
             
-            # Ak je chunk príliš malý a nie je posledný
-            if (len(current_chunk['text']) < self.min_chunk_size and 
-                i < len(chunks) - 1):
-                
-                # Spoj s nasledujúcim
-                next_chunk = chunks[i + 1]
+            # Ak je chunk príliš malý a nie je posledný - spoj s nasledujúcim
+            if pending['metadata']['tokens'] < self.min_chunk_tokens:
+                merged_text = pending['text'] + "\n\n" + next_chunk['text']
+                # Metadáta majú paragrafy ako reťazec "§ 1, § 2" - spoj zoznamy, nie znaky
+                merged_paragraphs = (pending['metadata']['paragraphs'].split(', ') +
+                                     next_chunk['metadata']['paragraphs'].split(', '))
                 
-                merged_text = current_chunk['text'] + "\n\n" + next_chunk['text']
-                merged_paragraphs = (current_chunk['metadata']['paragraphs'] + 
-                                   next_chunk['metadata']['paragraphs'])
-                
-                merged_chunk = self._create_contextual_chunk(
+                yield self._create_contextual_chunk(
                     paragraphs=merged_paragraphs,
                     text=merged_text,
                     law_info=law_info,
-                    chunk_num=f"{current_chunk['metadata']['chunk_num']}-{next_chunk['metadata']['chunk_num']}"
+                    chunk_num=f"{pending['metadata']['chunk_num']}-{next_chunk['metadata']['chunk_num']}"
                 )
-                
-                merged_chunks.append(merged_chunk)
-                i += 2  # Preskočme oba chunky
+                pending = None  # Preskočme oba chunky
             else:
-                merged_chunks.append(current_chunk)
-                i += 1
+                yield pending
+                pending = next_chunk
         
-        return merged_chunks
-    
-    def _get_paragraph_text(self, full_text: str, paragraph: str) -> str:
-        """Extrahuje text patriaci k paragrafu"""
-        # Nájdi pozíciu paragrafu v texte
-        para_pos = full_text.find(paragraph)
-        if para_pos == -1:
-            return ""
-        
-        # Nájdi nasledujúci paragraf
-        next_para_pattern = r'§\s*\d+[a-z]*(?:\s*[a-z]\))?'
-        remaining_text = full_text[para_pos + len(paragraph):]
-        
-        next_match = re.search(next_para_pattern, remaining_text)
-        if next_match:
-            return remaining_text[:next_match.start()].strip()
-        else:
-            return remaining_text.strip()
+        if pending is not None:
+            yield pending
     
     def _create_contextual_chunk(self, paragraphs: List[str], text: str, law_info: Dict, chunk_num) -> Dict:
         """Vytvorí chunk s kontextovými metadátami"""
         
         # Vyčisti text
-        clean_text = re.sub(r'\s+', ' ', text).strip()
+        cleaned = clean_text(text)
         
         # Vytvor unikátne ID
         para_ids = "_".join([p.replace('§', 'par').replace(' ', '_') for p in paragraphs[:3]])
@@ -335,7 +390,7 @@ class LegalTextLoader:
         
         return {
             "id": chunk_id,
-            "text": clean_text,
+            "text": cleaned,
             "metadata": {
                 "law_id": law_info["law_id"],
                 "title": law_info["title"],
@@ -345,9 +400,9 @@ class LegalTextLoader:
                 "filename": law_info["filename"],
                 "type": "legal_text",
                 "chunk_num": str(chunk_num),
-                "text_length": len(clean_text),
+                "text_length": len(cleaned),
                 "chunk_method": "contextual",
-                "token_estimate": len(clean_text) // 4  # Hrubý odhad tokenov
+                "tokens": self.token_windows.count(cleaned)  # Tokeny tokenizéra embedding modelu
             }
         }
     
@@ -363,32 +418,31 @@ class LegalTextLoader:
         
         return "Neurčený právny predpis"
     
-    def load_file(self, filepath: Path, metadata: Dict) -> List[Dict]:
-        """Načíta a spracuje jeden súbor s kontextovým chunkovaním"""
+    def load_file(self, filepath: Path, metadata: Dict) -> Iterator[Dict]:
+        """Prúdovo načíta a spracuje jeden súbor - chunky vznikajú počas čítania po paragrafoch"""
+        print(f"📖 Spracovávam: {filepath.name}")
+        count = total_chars = total_tokens = max_chunk = 0
+        min_chunk = None
+        
         try:
-            print(f"📖 Spracovávam: {filepath.name}")
-            
-            # Načítaj obsah
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Použij kontextové chunkovanie
-            chunks = self.smart_chunk_text(content, metadata)
-            
-            # Štatistiky
-            total_chars = sum(len(chunk['text']) for chunk in chunks)
-            avg_chunk_size = total_chars // len(chunks) if chunks else 0
-            min_chunk = min(len(chunk['text']) for chunk in chunks) if chunks else 0
-            max_chunk = max(len(chunk['text']) for chunk in chunks) if chunks else 0
-            
-            print(f"✅ Vytvorených {len(chunks)} kontextových chunkov pre {metadata['law_id']} - {metadata['title']}")
-            print(f"   📊 Veľkosť chunkov: min={min_chunk}, avg={avg_chunk_size}, max={max_chunk} znakov")
-            
-            return chunks
-            
+            for chunk in self.iter_chunks(iter_sections(read_blocks(filepath)), metadata):
+                size = len(chunk['text'])
+                count += 1
+                total_chars += size
+                total_tokens += chunk['metadata']['tokens']
+                min_chunk = size if min_chunk is None else min(min_chunk, size)
+                max_chunk = max(max_chunk, size)
+                yield chunk
         except Exception as e:
+            # Časť chunkov už odišla ďalej - súbor sa nedá preskočiť, načítanie sa preruší
             print(f"❌ Chyba pri spracovaní {filepath.name}: {e}")
-            return []
+            raise
+        
+        # Štatistiky
+        avg_chunk_size = total_chars // count if count else 0
+        print(f"✅ Vytvorených {count} kontextových chunkov pre {metadata['law_id']} - {metadata['title']}")
+        print(f"   📊 Veľkosť chunkov: min={min_chunk or 0}, avg={avg_chunk_size}, max={max_chunk} znakov, "
+              f"avg {total_tokens // count if count else 0} tokenov")
     
     def clear_collection(self):
         """Vymaže všetky existujúce dáta z ChromaDB kolekcie"""
@@ -424,62 +478,304 @@ class LegalTextLoader:
         
         print(f"📋 Nájdených {len(metadata_map)} súborov na spracovanie")
         
-        all_chunks = []
-        for filename, metadata in metadata_map.items():
-            filepath = self.data_dir / filename
-            if filepath.exists():
-                chunks = self.load_file(filepath, metadata)
-                all_chunks.extend(chunks)
+        # Znenia zákonov podľa účinnosti
+        versions = []
+        for info in plan_versions(metadata_map.values()):
+            if (self.data_dir / info['filename']).exists():
+                versions.append(info)
             else:
-                print(f"⚠️ Súbor {filename} neexistuje")
+                print(f"⚠️ Súbor {info['filename']} neexistuje")
         
-        # Nahraj do ChromaDB s lepším batchingom
-        if all_chunks:
-            print(f"\n🔄 Nahrávam {len(all_chunks)} kontextových chunkov do ChromaDB...")
+        # 1. prechod - chunky sa porovnajú s predchádzajúcimi zneniami, nové sa odložia do
+        # dočasného súboru (konštantná pamäť), takže sa každý súbor číta a tokenizuje raz
+        builder = VersionIndexBuilder()
+        with tempfile.TemporaryFile(mode="w+", encoding="utf-8") as spill:
+            try:
+                for info in versions:
+                    version = builder.add_version(info)
+                    for chunk in self.load_file(self.data_dir / info['filename'], info):
+                        row, is_new = builder.add_chunk(version, chunk)
+                        if is_new:
+                            spill.write(json.dumps([row, chunk], ensure_ascii=False) + "\n")
+            except Exception as e:
+                print(f"❌ Kritická chyba pri chunkovaní: {e}")
+                return 0
+            spill.seek(0)
             
-            # Priprav dáta pre ChromaDB
-            ids = [chunk["id"] for chunk in all_chunks]
-            documents = [chunk["text"] for chunk in all_chunks]
-            metadatas = [chunk["metadata"] for chunk in all_chunks]
+            def all_chunks() -> Iterator[Dict]:
+                # 2. prechod - ukladajú sa len nové chunky (delta), valid_to je známe až po všetkých zneniach
+                for line in spill:
+                    row, chunk = json.loads(line)
+                    chunk['id'] = builder.rows[row]
+                    chunk['metadata'].update(builder.chunk_metadata(row))
+                    yield chunk
+            
+            # Nahraj do ChromaDB prúdovo - embedding a zápis po dávkach
+            print(f"\n🔄 Nahrávam kontextové chunky do ChromaDB...")
+            progress = {"successful": 0, "tokens": [], "windows": 0}
+            duplicates = NearDuplicateIndexBuilder()
             
             try:
-                # Pridaj nové dáta po menších dávkach pre stabilitu
-                batch_size = 50  # Menšie dávky pre lepšiu stabilitu
-                successful_chunks = 0
-                
-                for i in range(0, len(ids), batch_size):
-                    batch_ids = ids[i:i+batch_size]
-                    batch_docs = documents[i:i+batch_size] 
-                    batch_metas = metadatas[i:i+batch_size]
-                    
-                    try:
-                        self.collection.add(
-                            ids=batch_ids,
-                            documents=batch_docs,
-                            metadatas=batch_metas
-                        )
-                        successful_chunks += len(batch_ids)
-                        print(f"✅ Nahraných {successful_chunks}/{len(ids)} chunkov")
-                    except Exception as e:
-                        print(f"⚠️ Chyba pri batch {i//batch_size + 1}: {e}")
-                        continue
-                
-                if successful_chunks > 0:
-                    print(f"🎉 Úspešne nahraných {successful_chunks} kontextových chunkov!")
-                    
-                    # Zobraz štatistiky
-                    self.show_statistics()
-                    
-                    return successful_chunks
-                else:
-                    print("❌ Žiadne chunky neboli úspešne nahrané")
-                    return 0
-                
+                # Texty aj do úložiska mapovaného do pamäte (čítanie bez ChromaDB), MinHash podpisy popri tom
+                stored = write_chunk_store(
+                    self.chunk_store_path, self._track_duplicates(self._add_batches(all_chunks(), progress), duplicates)
+                )
             except Exception as e:
                 print(f"❌ Kritická chyba pri nahrávaní do ChromaDB: {e}")
                 return 0
         
-        return 0
+        successful_chunks = progress["successful"]
+        if successful_chunks > 0:
+            print(f"🎉 Úspešne nahraných {successful_chunks} kontextových chunkov!")
+            print(f"💾 Úložisko chunkov: {self.chunk_store_path} ({stored} chunkov)")
+            
+            # Koľko textu chunkov model vidí - jeden vektor na chunk vs. vektory okien
+            stats = coverage(progress["tokens"], self.token_windows.window, self.token_windows.overlap)
+            print(f"📐 Pokrytie textu embeddingom: {stats['single_vector_coverage']:.0%} tokenov jedným vektorom na chunk, "
+                  f"{stats['over_window']} chunkov dlhších ako okno {self.token_windows.window} tokenov")
+            if self.windows_collection is not None:
+                print(f"🪟 Okná: +{progress['windows']} vektorov v {DEFAULT_WINDOWS_COLLECTION}, pokrytie 100 %")
+            if self.scheduler is not None:
+                stats = self.scheduler.stats
+                print(f"⚙️ Plánovač embeddingu: {stats['texts']} textov v {stats['batches']} dávkach, "
+                      f"padding {1 - stats['tokens'] / stats['padded_tokens'] if stats['padded_tokens'] else 0:.1%} tokenov")
+                if self.scheduler.store is not None:
+                    print(f"♻️ Úložisko embeddingov: {stats['reused']} textov bez enkódovania, "
+                          f"{stats['encoded']} enkódovaných ({self.scheduler.store.db_path})")
+            
+            # Index verzií pre filter asof: (bitmapy platných chunkov podľa dátumu)
+            version_index = builder.build()
+            version_index.save(self.version_index_path)
+            stats = version_index.stats()
+            print(f"🗓️ Index verzií: {stats['versions']} znení, {stats['stored_chunks']} uložených chunkov "
+                  f"z {stats['chunks_all_versions']} ({stats['saved_ratio']:.0%} ušetrených delta ukladaním)")
+            
+            # Páry takmer duplicitných chunkov (prekryv kontextových chunkov) na zlúčenie pri dotaze
+            duplicate_index = duplicates.build()
+            duplicate_index.save(self.near_duplicates_path)
+            stats = duplicate_index.stats()
+            print(f"🧬 Takmer duplicitné chunky: {stats['pairs']} párov, "
+                  f"{stats['chunks_with_duplicates']} chunkov má aspoň jedného suseda")
+            
+            # Dvojúrovňový index - odseky na vyhľadávanie, paragrafy ako kontext
+            if self.children_collection is not None:
+                self._load_hierarchy(versions)
+            
+            # Zobraz štatistiky
+            self.show_statistics()
+            
+            return successful_chunks
+        else:
+            print("❌ Žiadne chunky neboli úspešne nahrané")
+            return 0
+    
+    def _load_hierarchy(self, versions: List[Dict]):
+        """Odseky do legal_document_children, celé paragrafy do úložiska rodičov"""
+        progress = {"children": 0, "chars": 0}
+        try:
+            stored = write_chunk_store(self.parent_store_path, self._add_children(self._iter_parents(versions), progress))
+        except Exception as e:
+            print(f"❌ Chyba pri nahrávaní odsekov: {e}")
+            return
+        print(f"🌳 Hierarchia: {stored} paragrafov v {self.parent_store_path}, "
+              f"{progress['children']} odsekov v {DEFAULT_CHILDREN_COLLECTION} ({progress['chars']} znakov)")
+    
+    def _iter_parents(self, versions: List[Dict]) -> Iterator[Dict]:
+        """Paragrafy všetkých znení - nezmenený paragraf v nasledujúcom znení len predĺži účinnosť"""
+        for law_id, law_versions in groupby(versions, key=lambda info: info['law_id']):
+            parents: List[Dict] = []
+            previous: Dict[Tuple[str, str], Dict] = {}
+            ids = set()
+            for info in law_versions:
+                current: Dict[Tuple[str, str], Dict] = {}
+                for marker, raw in iter_parents(read_blocks(self.data_dir / info['filename'])):
+                    marker = marker or "Úvod"
+                    key = (marker, chunk_hash(law_id, raw))
+                    if key in previous and key not in current:
+                        parent = previous[key]
+                        parent['metadata']['valid_to'] = date_key(info['valid_to'])
+                    else:
+                        valid_from = date_key(info['valid_from'], default=0)
+                        id_ = parent_id(law_id, marker, valid_from)
+                        # Rovnaký nadpis dvakrát v jednom znení (napr. prechodné ustanovenia)
+                        suffix = 2
+                        while id_ in ids:
+                            id_, suffix = f"{parent_id(law_id, marker, valid_from)}_{suffix}", suffix + 1
+                        ids.add(id_)
+                        parent = {
+                            "id": id_,
+                            "text": clean_text(f"{marker} {raw}"),
+                            "raw": raw,
+                            "metadata": {
+                                "law_id": law_id,
+                                "title": info["title"],
+                                "category": info.get("category", ""),
+                                "paragraph": marker,
+                                "paragraphs": marker,
+                                "filename": info["filename"],
+                                "type": "legal_section",
+                                "valid_from": valid_from,
+                                "valid_to": date_key(info['valid_to']),
+                            }
+                        }
+                        parents.append(parent)
+                    current[key] = parent
+                previous = current
+            yield from parents
+    
+    def _children(self, parent: Dict) -> List[Dict]:
+        """Odseky paragrafu s jeho značkou a nadpisom - krátke susedné odseky spolu do okna modelu, dlhý odsek po oknách"""
+        metadata = parent['metadata']
+        heading, odseks = split_odseks(parent.pop('raw'))
+        prefix = " ".join(part for part in (metadata['paragraph'], heading) if part)
+        
+        # Skupiny susedných odsekov, ktorých text s nadpisom sa zmestí do jedného vektora
+        groups: List[List[Tuple[str, str]]] = []
+        for odsek, body in odseks:
+            if not body:
+                continue
+            part = f"({odsek}) {body}" if odsek else body
+            if groups:
+                candidate = " ".join([prefix] + [text for _, text in groups[-1]] + [part])
+                if self.token_windows.count(candidate) <= self.token_windows.window:
+                    groups[-1].append((odsek, part))
+                    continue
+            groups.append([(odsek, part)])
+        
+        children = []
+        cursor = 0
+        for order, group in enumerate(groups):
+            text = " ".join([prefix] + [part for _, part in group]) if prefix else " ".join(part for _, part in group)
+            # Rozsah odsekov v texte rodiča - ChromaDB text odseku neukladá
+            start = parent['text'].find(group[0][1], cursor)
+            end = start + len(" ".join(part for _, part in group)) if start >= 0 else len(parent['text'])
+            start, cursor = max(start, 0), max(end, cursor)
+            spans = [(0, len(text))]
+            if self.token_windows.count(text) > self.token_windows.window:
+                spans = self.token_windows.spans(text)
+            for number, (window_start, window_end) in enumerate(spans, start=1):
+                children.append({
+                    "id": f"{parent['id']}#{order}.{number}",
+                    "text": text[window_start:window_end],
+                    "metadata": {
+                        "law_id": metadata["law_id"],
+                        "title": metadata["title"],
+                        "category": metadata["category"],
+                        "paragraph": metadata["paragraph"],
+                        "odsek": ", ".join(odsek for odsek, _ in group if odsek),
+                        "parent_id": parent["id"],
+                        "order": order,
+                        "window": number,
+                        "start": start,
+                        "end": end,
+                        "valid_from": metadata["valid_from"],
+                        "valid_to": metadata["valid_to"],
+                    }
+                })
+        return children
+    
+    def _add_children(self, parents: Iterable[Dict], progress: Dict) -> Iterator[Dict]:
+        """Odseky do ChromaDB po dávkach paragrafov, ďalej posiela paragrafy s nahranými odsekmi"""
+        with_children = ((parent, self._children(parent)) for parent in parents)
+        if self.scheduler is not None:
+            embedded = self.scheduler.stream(with_children, lambda item: [child['text'] for child in item[1]])
+        else:
+            embedded = ((item, None) for item in with_children)
+        
+        for batch in batched(embedded, 50):
+            children = [child for (_, item_children), _ in batch for child in item_children]
+            if children:
+                try:
+                    if self.scheduler is not None:
+                        embeddings = [vector for _, vectors in batch for vector in vectors]
+                    else:
+                        embeddings = self.embedding_function([child["text"] for child in children])
+                    # Bez textov - odsek je len vektor, text sa číta z rodiča podľa start/end
+                    self.children_collection.add(
+                        ids=[child["id"] for child in children],
+                        embeddings=embeddings,
+                        metadatas=[child["metadata"] for child in children]
+                    )
+                except Exception as e:
+                    print(f"⚠️ Chyba pri dávke odsekov: {e}")
+                    continue
+            progress["children"] += len(children)
+            progress["chars"] += sum(len(child["text"]) for child in children)
+            for (parent, _), _ in batch:
+                yield parent
+    
+    def _track_duplicates(self, chunks: Iterable[Dict], builder: NearDuplicateIndexBuilder) -> Iterator[Dict]:
+        """MinHash podpis každého nahraného chunku (páry sa hľadajú až po ingeste)"""
+        for chunk in chunks:
+            builder.add(chunk['id'], chunk['metadata']['law_id'], chunk['text'])
+            yield chunk
+    
+    def _add_batches(self, chunks: Iterable[Dict], progress: Dict) -> Iterator[Dict]:
+        """Pridáva chunky do ChromaDB po dávkach a ďalej posiela len úspešne nahrané"""
+        # Menšie dávky pre lepšiu stabilitu
+        batch_size = 50
+        
+        if self.scheduler is not None:
+            # Embeddingy chunkov aj okien z plánovača (dávky podľa tokenov), zápis v pôvodnom poradí
+            embedded = self.scheduler.stream(chunks, lambda chunk: [chunk['text']] + self._window_texts(chunk))
+        else:
+            # ChromaDB počíta embeddingy sama po dávkach zápisu
+            embedded = ((chunk, None) for chunk in chunks)
+        
+        for batch_num, batch in enumerate(batched(embedded, batch_size), start=1):
+            chunks_batch = [chunk for chunk, _ in batch]
+            try:
+                kwargs = {}
+                if self.scheduler is not None:
+                    kwargs['embeddings'] = [vectors[0] for _, vectors in batch]
+                self.collection.add(
+                    ids=[chunk["id"] for chunk in chunks_batch],
+                    documents=[chunk["text"] for chunk in chunks_batch],
+                    metadatas=[chunk["metadata"] for chunk in chunks_batch],
+                    **kwargs
+                )
+            except Exception as e:
+                print(f"⚠️ Chyba pri batch {batch_num}: {e}")
+                continue
+            
+            progress["successful"] += len(batch)
+            self._add_windows(batch, progress)
+            print(f"✅ Nahraných {progress['successful']} chunkov")
+            yield from chunks_batch
+    
+    def _window_texts(self, chunk: Dict) -> List[str]:
+        """Texty okien 2..n chunku dlhšieho ako okno modelu (prázdne, ak sa okná neukladajú)"""
+        if self.windows_collection is None or chunk['metadata']['tokens'] <= self.token_windows.window:
+            return []
+        return [chunk['text'][start:end] for start, end in self.token_windows.spans(chunk['text'])[1:]]
+    
+    def _add_windows(self, batch: List[Tuple[Dict, Optional[List]]], progress: Dict):
+        """Vektory okien 2..n chunkov dlhších ako okno modelu (pri dotaze max-pooling podľa chunku)"""
+        ids, texts, embeddings, metadatas = [], [], [], []
+        for chunk, vectors in batch:
+            progress["tokens"].append(chunk['metadata']['tokens'])
+            if vectors is None:
+                window_texts = self._window_texts(chunk)
+                texts.extend(window_texts)
+                count = len(window_texts)
+            else:
+                # Vektory okien už spočítal plánovač spolu s chunkom
+                embeddings.extend(vectors[1:])
+                count = len(vectors) - 1
+            for number in range(2, count + 2):
+                ids.append(f"{chunk['id']}#{number}")
+                metadatas.append({**chunk['metadata'], "chunk_id": chunk['id'], "window": number})
+        if not ids:
+            return
+        
+        try:
+            # Bez textov - okno je len vektor, text sa číta z chunku
+            if texts:
+                embeddings = self.embedding_function(texts)
+            self.windows_collection.add(ids=ids, embeddings=embeddings, metadatas=metadatas)
+            progress["windows"] += len(ids)
+        except Exception as e:
+            print(f"⚠️ Chyba pri oknách dávky: {e}")
     
     def show_statistics(self):
         """Zobrazí štatistiky nahraných dát"""
@@ -534,11 +830,16 @@ class LegalTextLoader:
 
 def main():
     """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Načítanie právnych textov do ChromaDB")
+    parser.add_argument("--hierarchy", action="store_true",
+                        help="Dvojúrovňový index - odseky na vyhľadávanie, paragrafy ako kontext (namiesto okien)")
+    args = parser.parse_args()
+    
     print("🚀 Načítavanie právnych textov do ChromaDB")
     print("=" * 50)
     
     # Vytvor loader
-    loader = LegalTextLoader()
+    loader = LegalTextLoader(hierarchy=args.hierarchy)
     
     # Načítaj všetky súbory
     count = loader.load_all_files()
@@ -0,0 +1,317 @@
+"""
+End-to-end záťažový test LegalAssistantAgent bez volaní OpenAI
+
+ChatOpenAI sa nahradí deterministickým fake LLM (ReplayChatModel), ktorý prehráva
+zaznamenané ReAct stopy, a Tavily/Wikipedia sa presmerujú na lokálny HTTP stub.
+Skutočné zostávajú len lokálne nástroje (ChromaDB, SQLite), takže výsledky ukazujú
+skutočné úzke miesta vrstvy nástrojov.
+
+Použitie:
+    python scripts/load_test_agent.py --sessions 8 --questions 5
+    python scripts/load_test_agent.py --sessions 32 --llm-latency-scale 0 --output /tmp/load.json
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import threading
+import contextlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Záťažový test beží offline - embedding model len z lokálnej cache
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from agent.metrics import latency_summary
+from scripts.fakes import DEFAULT_TRACES, LocalServiceStubs, ReplayChatModel, load_traces
+
+DEFAULT_RESULTS_DIR = project_root / "data" / "benchmarks" / "results"
+
+
+class StepTimingCallback(BaseCallbackHandler):
+    """Zbiera trvanie jednotlivých krokov ReAct cyklu (LLM, nástroje, parsovanie)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._starts: Dict[Any, float] = {}
+        self._tool_names: Dict[Any, str] = {}
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def _record(self, step: str, duration_ms: float):
+        with self._lock:
+            self.samples.setdefault(step, []).append(duration_ms)
+
+    def _start(self, run_id):
+        with self._lock:
+            self._starts[run_id] = time.perf_counter()
+
+    def _stop(self, run_id) -> float:
+        with self._lock:
+            started = self._starts.pop(run_id, None)
+        return (time.perf_counter() - started) * 1000 if started else 0.0
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._record("llm", self._stop(run_id))
+        self._local.last_llm_end = time.perf_counter()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._stop(run_id)
+        with self._lock:
+            self.errors["llm"] = self.errors.get("llm", 0) + 1
+
+    def _record_parsing(self):
+        # Čas od konca LLM volania po rozparsovanú akciu = parsovanie výstupu
+        last_end = getattr(self._local, "last_llm_end", None)
+        if last_end is not None:
+            self._record("parsing", (time.perf_counter() - last_end) * 1000)
+            self._local.last_llm_end = None
+
+    def on_agent_action(self, action, *, run_id, **kwargs):
+        self._record_parsing()
+
+    def on_agent_finish(self, finish, *, run_id, **kwargs):
+        self._record_parsing()
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        with self._lock:
+            self._tool_names[run_id] = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._start(run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        with self._lock:
+            name = self._tool_names.pop(run_id, "unknown")
+        self._record(f"tool:{name}", self._stop(run_id))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            name = self._tool_names.pop(run_id, "unknown")
+            self.errors[f"tool:{name}"] = self.errors.get(f"tool:{name}", 0) + 1
+        self._stop(run_id)
+
+
+def peak_rss_mb() -> float:
+    """Maximálna rezidentná pamäť procesu v MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux vracia KB, macOS bajty
+    return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+
+
+class AgentLoadTest:
+    """Spustí N súbežných sedení, každé s M otázkami cez LegalAssistantAgent.ask"""
+
+    def __init__(self, sessions: int, questions_per_session: int, traces_path: Path,
+                 llm_latency_scale: float = 1.0, stub_latency_ms: float = 150.0, quiet: bool = True,
+                 compress_scratchpad: bool = True, prefetch: bool = True):
+        self.sessions = sessions
+        self.questions_per_session = questions_per_session
+        self.traces = load_traces(traces_path)
+        self.llm_latency_scale = llm_latency_scale
+        self.stub_latency_ms = stub_latency_ms
+        self.quiet = quiet
+        self.compress_scratchpad = compress_scratchpad
+        self.prefetch = prefetch
+
+        self.timing = StepTimingCallback()
+        self.ask_latencies: List[float] = []
+        self.iterations: Dict[int, List[Dict[str, Any]]] = {}
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def _questions_for(self, session_index: int) -> List[str]:
+        questions = [trace["question"] for trace in self.traces]
+        return [questions[(session_index + i) % len(questions)] for i in range(self.questions_per_session)]
+
+    def _run_session(self, agent, session_index: int):
+        for question in self._questions_for(session_index):
+            start = time.perf_counter()
+            result = agent.ask(question)
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.ask_latencies.append(elapsed)
+                if not result.get("success"):
+                    self.failures += 1
+                for stats in result.get("iterations", []):
+                    self.iterations.setdefault(stats["iteration"], []).append(stats)
+
+    def run(self) -> Dict[str, Any]:
+        from agent.legal_agent import LegalAssistantAgent
+
+        rss_before_tools = peak_rss_mb()
+
+        with LocalServiceStubs(latency_ms=self.stub_latency_ms) as stubs:
+            os.environ.update(stubs.environment())
+
+            llm = ReplayChatModel(traces=self.traces, latency_scale=self.llm_latency_scale)
+
+            # Nástroje sa vytvoria raz a zdieľajú medzi sedeniami
+            tools_start = time.perf_counter()
+            base_agent = LegalAssistantAgent(llm=llm, verbose=False, prefetch=self.prefetch)
+            base_agent.wait_until_ready()
+            tools_ready_ms = (time.perf_counter() - tools_start) * 1000
+            rss_after_tools = peak_rss_mb()
+
+            agents = [
+                LegalAssistantAgent(llm=llm, tools=base_agent.tools, callbacks=[self.timing], verbose=False,
+                                    compress_scratchpad=self.compress_scratchpad, prefetch=self.prefetch)
+                for _ in range(self.sessions)
+            ]
+
+            print(f"🏃 Spúšťam {self.sessions} súbežných sedení x {self.questions_per_session} otázok...")
+            output = open(os.devnull, "w") if self.quiet else None
+            run_start = time.perf_counter()
+            with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+                with ThreadPoolExecutor(max_workers=self.sessions) as pool:
+                    futures = [pool.submit(self._run_session, agent, i) for i, agent in enumerate(agents)]
+                    for future in futures:
+                        future.result()
+            wall_seconds = time.perf_counter() - run_start
+            if output:
+                output.close()
+
+            stub_requests = stubs.request_counts
+
+        total_questions = len(self.ask_latencies)
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "parameters": {
+                "sessions": self.sessions,
+                "questions_per_session": self.questions_per_session,
+                "llm_latency_scale": self.llm_latency_scale,
+                "stub_latency_ms": self.stub_latency_ms,
+                "compress_scratchpad": self.compress_scratchpad,
+                "prefetch": self.prefetch,
+                "tools": [tool.name for tool in base_agent.tools],
+            },
+            "throughput": {
+                "questions": total_questions,
+                "failures": self.failures,
+                "wall_seconds": round(wall_seconds, 3),
+                "questions_per_second": round(total_questions / wall_seconds, 3) if wall_seconds else 0.0,
+            },
+            "ask_latency": latency_summary(self.ask_latencies),
+            "steps": {step: latency_summary(samples) for step, samples in sorted(self.timing.samples.items())},
+            "step_errors": self.timing.errors,
+            "iterations": {
+                str(index): {
+                    "count": len(samples),
+                    "prompt_tokens_mean": round(sum(s["prompt_tokens"] for s in samples) / len(samples), 1),
+                    "scratchpad_tokens_mean": round(sum(s["scratchpad_tokens"] for s in samples) / len(samples), 1),
+                    "latency": latency_summary([s["latency_ms"] for s in samples]),
+                }
+                for index, samples in sorted(self.iterations.items())
+            },
+            "prefetch": self._prefetch_stats(agents),
+            "stub_requests": stub_requests,
+            "memory": {
+                "peak_rss_mb_before_tools": rss_before_tools,
+                "peak_rss_mb_after_tools": rss_after_tools,
+                "peak_rss_mb": peak_rss_mb(),
+                "tools_ready_ms": round(tools_ready_ms, 1),
+            },
+        }
+
+
+    @staticmethod
+    def _prefetch_stats(agents) -> Optional[Dict[str, Any]]:
+        """Súčet štatistík predvyhľadávania všetkých sedení"""
+        all_stats = [agent.prefetcher.stats() for agent in agents if agent.prefetcher is not None]
+        if not all_stats:
+            return None
+        keys = ("questions", "jobs", "skipped", "hits", "misses", "saved_ms", "wasted", "wasted_ms", "cancelled")
+        total = {key: round(sum(stats[key] for stats in all_stats), 1) for key in keys}
+        lookups = total["hits"] + total["misses"]
+        total["hit_rate"] = round(total["hits"] / lookups, 4) if lookups else None
+        return total
+
+
+def print_report(report: Dict[str, Any]):
+    """Vypíše súhrn záťažového testu"""
+    throughput = report["throughput"]
+    print(f"\n📊 Priepustnosť: {throughput['questions_per_second']} otázok/s "
+          f"({throughput['questions']} otázok, {throughput['failures']} zlyhaní, {throughput['wall_seconds']} s)")
+    print(f"⏱️ ask(): p50={report['ask_latency']['p50_ms']:.0f} ms  p95={report['ask_latency']['p95_ms']:.0f} ms  "
+          f"p99={report['ask_latency']['p99_ms']:.0f} ms")
+
+    print(f"\n{'krok':<32}{'počet':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'súčet s':>10}")
+    for step, stats in report["steps"].items():
+        total_s = stats["mean_ms"] * stats["count"] / 1000
+        print(f"{step:<32}{stats['count']:>7}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{total_s:>10.1f}")
+
+    if report.get("iterations"):
+        print(f"\n{'iterácia':<10}{'počet':>7}{'prompt tok.':>13}{'scratchpad tok.':>17}{'p50 ms':>10}")
+        for index, stats in report["iterations"].items():
+            print(f"{index:<10}{stats['count']:>7}{stats['prompt_tokens_mean']:>13.0f}"
+                  f"{stats['scratchpad_tokens_mean']:>17.0f}{stats['latency']['p50_ms']:>10.1f}")
+
+    prefetch = report.get("prefetch")
+    if prefetch:
+        hit_rate = f"{prefetch['hit_rate']:.0%}" if prefetch["hit_rate"] is not None else "-"
+        print(f"\n🔮 Predvyhľadávanie: {prefetch['jobs']} úloh, zásahy {prefetch['hits']}/{prefetch['hits'] + prefetch['misses']} "
+              f"({hit_rate}), ušetrené {prefetch['saved_ms']:.0f} ms, zbytočné {prefetch['wasted']} úloh "
+              f"({prefetch['wasted_ms']:.0f} ms), zrušené {prefetch['cancelled']}, preskočené {prefetch['skipped']}")
+
+    memory = report["memory"]
+    print(f"\n💾 Peak RSS: {memory['peak_rss_mb']} MB (pred nástrojmi {memory['peak_rss_mb_before_tools']} MB, "
+          f"po nástrojoch {memory['peak_rss_mb_after_tools']} MB, nástroje pripravené za {memory['tools_ready_ms']} ms)")
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Záťažový test AI právneho asistenta s fake LLM")
+    parser.add_argument("--sessions", type=int, default=4, help="Počet súbežných sedení")
+    parser.add_argument("--questions", type=int, default=3, help="Počet otázok na sedenie")
+    parser.add_argument("--traces", default=str(DEFAULT_TRACES), help="Súbor so zaznamenanými ReAct stopami")
+    parser.add_argument("--llm-latency-scale", type=float, default=1.0, help="Násobok zaznamenanej latencie LLM (0 = bez čakania)")
+    parser.add_argument("--stub-latency-ms", type=float, default=150.0, help="Simulovaná latencia Tavily/Wikipedia stubu")
+    parser.add_argument("--raw-scratchpad", action="store_true", help="Vypnúť kompresiu ReAct scratchpadu (porovnanie)")
+    parser.add_argument("--no-prefetch", action="store_true", help="Vypnúť špekulatívne predvyhľadávanie (porovnanie)")
+    parser.add_argument("--verbose", action="store_true", help="Nepotláčať výpisy agenta")
+    parser.add_argument("--output", help="Cesta k výstupnému JSON")
+    args = parser.parse_args()
+
+    print("🚀 Záťažový test AI Právneho Asistenta (fake LLM, lokálne stuby)")
+    print("=" * 50)
+
+    load_test = AgentLoadTest(
+        sessions=args.sessions,
+        questions_per_session=args.questions,
+        traces_path=Path(args.traces),
+        llm_latency_scale=args.llm_latency_scale,
+        stub_latency_ms=args.stub_latency_ms,
+        quiet=not args.verbose,
+        compress_scratchpad=not args.raw_scratchpad,
+        prefetch=not args.no_prefetch,
+    )
+    report = load_test.run()
+    print_report(report)
+
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"load_agent_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Výsledky uložené do {output}")
+
+
+if __name__ == "__main__":
+    main()
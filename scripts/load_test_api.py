@@ -0,0 +1,248 @@
+"""
+Záťažový test HTTP API (api.py)
+
+Predvolene spustí API v rovnakom procese (uvicorn vo vlákne) s fake LLM a lokálnymi
+stubmi Tavily/Wikipedia a zasiela naň súbežné požiadavky. S --url testuje už bežiaci
+server (napr. `uvicorn api:app` so skutočným modelom).
+
+Výstup: priepustnosť, latencie p50/p95/p99 po endpointoch a počty stavových kódov
+(429 = plná fronta, 503 = čakanie vo fronte vypršalo, 504 = timeout požiadavky).
+
+Použitie:
+    python scripts/load_test_api.py --clients 16 --requests 200
+    python scripts/load_test_api.py --mix ask --clients 64 --max-concurrency 4 --max-queue 8
+    python scripts/load_test_api.py --url http://localhost:8000 --mix terms,search
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import contextlib
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Záťažový test beží offline - embedding model len z lokálnej cache
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from agent.metrics import latency_summary
+from scripts.fakes import DEFAULT_TRACES, LocalServiceStubs, load_traces
+
+DEFAULT_RESULTS_DIR = project_root / "data" / "benchmarks" / "results"
+TERM_QUERIES = ["vlastníctvo", "dedenie", "s.r.o.", "nájom", "kúpna zmluva", "konateľ"]
+SEARCH_QUERIES = ["povinnosti konateľa zastupovanie", "contains:§ 135", "law:40/1964 vlastníctvo"]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class InProcessServer:
+    """uvicorn s api.create_app() a fake LLM vo vlákne aktuálneho procesu"""
+
+    def __init__(self, traces: List[Dict[str, Any]], llm_latency_scale: float):
+        self.traces = traces
+        self.llm_latency_scale = llm_latency_scale
+        self.port = _free_port()
+        self.server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "InProcessServer":
+        import uvicorn
+        from api import create_app
+        from agent.agent_pool import AgentPool
+        from agent.session_store import InMemorySessionStore
+        from scripts.fakes import ReplayChatModel
+
+        def pool_factory():
+            llm = ReplayChatModel(traces=self.traces, latency_scale=self.llm_latency_scale)
+            return AgentPool(llm=llm, verbose=False, session_store=InMemorySessionStore())
+
+        config = uvicorn.Config(create_app(pool_factory), host="127.0.0.1", port=self.port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.should_exit = True
+            self._thread.join(timeout=10)
+
+
+def http_request(url: str, method: str = "GET", body: Optional[Dict] = None,
+                 timeout: float = 300) -> Tuple[int, bytes]:
+    """Jedna HTTP požiadavka, vráti (status, telo)"""
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method,
+                                     headers={"Content-Type": "application/json"} if data else {})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return 0, b""
+
+
+def wait_until_ready(base_url: str, timeout: float = 600) -> float:
+    """Počká na /ready, vráti čas v sekundách"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        status, _ = http_request(base_url + "/ready", timeout=5)
+        if status == 200:
+            return time.perf_counter() - start
+        time.sleep(0.5)
+    raise TimeoutError(f"API nie je pripravené ani po {timeout} s")
+
+
+class ApiLoadTest:
+    """Posiela požiadavky zo zmesi endpointov z N súbežných klientov"""
+
+    def __init__(self, base_url: str, clients: int, requests: int, mix: List[str],
+                 questions: List[str], stream: bool = False):
+        self.base_url = base_url.rstrip("/")
+        self.clients = clients
+        self.requests = requests
+        self.mix = mix
+        self.questions = questions
+        self.stream = stream
+
+        self.latencies: Dict[str, List[float]] = {}
+        self.status_counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _request_for(self, index: int) -> Tuple[str, str, str, Optional[Dict]]:
+        endpoint = self.mix[index % len(self.mix)]
+        if endpoint == "ask":
+            path = "/ask/stream" if self.stream else "/ask"
+            question = self.questions[index % len(self.questions)]
+            return endpoint, "POST", path, {"question": question, "session_id": f"load-{index % self.clients}"}
+        if endpoint == "terms":
+            return endpoint, "GET", "/terms?" + urllib.parse.urlencode({"q": TERM_QUERIES[index % len(TERM_QUERIES)]}), None
+        return endpoint, "GET", "/search?" + urllib.parse.urlencode({"q": SEARCH_QUERIES[index % len(SEARCH_QUERIES)]}), None
+
+    def _send(self, index: int):
+        endpoint, method, path, body = self._request_for(index)
+        start = time.perf_counter()
+        status, _ = http_request(self.base_url + path, method, body)
+        elapsed = (time.perf_counter() - start) * 1000
+        with self._lock:
+            counts = self.status_counts.setdefault(endpoint, {})
+            counts[str(status)] = counts.get(str(status), 0) + 1
+            if status == 200:
+                self.latencies.setdefault(endpoint, []).append(elapsed)
+
+    def run(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.clients) as pool:
+            list(pool.map(self._send, range(self.requests)))
+        wall_seconds = time.perf_counter() - start
+
+        _, stats_body = http_request(self.base_url + "/stats", timeout=10)
+        ok = sum(counts.get("200", 0) for counts in self.status_counts.values())
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "parameters": {"clients": self.clients, "requests": self.requests, "mix": self.mix, "stream": self.stream},
+            "throughput": {
+                "wall_seconds": round(wall_seconds, 3),
+                "ok": ok,
+                "ok_per_second": round(ok / wall_seconds, 3) if wall_seconds else 0.0,
+            },
+            "latency": {endpoint: latency_summary(samples) for endpoint, samples in sorted(self.latencies.items())},
+            "status_counts": self.status_counts,
+            "server_stats": json.loads(stats_body) if stats_body else None,
+        }
+
+
+def print_report(report: Dict[str, Any]):
+    """Vypíše súhrn záťažového testu"""
+    throughput = report["throughput"]
+    print(f"\n📊 {throughput['ok_per_second']} úspešných požiadaviek/s ({throughput['ok']} za {throughput['wall_seconds']} s)")
+    print(f"\n{'endpoint':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}   stavové kódy")
+    for endpoint, counts in sorted(report["status_counts"].items()):
+        stats = report["latency"].get(endpoint)
+        codes = ", ".join(f"{code}: {count}" for code, count in sorted(counts.items()))
+        if stats:
+            print(f"{endpoint:<10}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}   {codes}")
+        else:
+            print(f"{endpoint:<10}{'-':>10}{'-':>10}{'-':>10}   {codes}")
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Záťažový test HTTP API AI právneho asistenta")
+    parser.add_argument("--url", help="Bežiaci server (bez neho sa spustí lokálny s fake LLM)")
+    parser.add_argument("--clients", type=int, default=16, help="Počet súbežných klientov")
+    parser.add_argument("--requests", type=int, default=100, help="Celkový počet požiadaviek")
+    parser.add_argument("--mix", default="ask,terms,search", help="Endpointy oddelené čiarkou (ask, terms, search)")
+    parser.add_argument("--stream", action="store_true", help="Otázky cez /ask/stream")
+    parser.add_argument("--traces", default=str(DEFAULT_TRACES), help="ReAct stopy pre fake LLM")
+    parser.add_argument("--llm-latency-scale", type=float, default=1.0, help="Násobok latencie fake LLM")
+    parser.add_argument("--stub-latency-ms", type=float, default=150.0, help="Latencia Tavily/Wikipedia stubu")
+    parser.add_argument("--max-concurrency", type=int, help="LEGAL_MAX_CONCURRENCY lokálneho servera")
+    parser.add_argument("--max-queue", type=int, help="LEGAL_MAX_QUEUE lokálneho servera")
+    parser.add_argument("--request-timeout", type=float, help="LEGAL_REQUEST_TIMEOUT lokálneho servera")
+    parser.add_argument("--output", help="Cesta k výstupnému JSON")
+    args = parser.parse_args()
+
+    print("🚀 Záťažový test HTTP API")
+    print("=" * 50)
+
+    traces = load_traces(Path(args.traces))
+    mix = [endpoint.strip() for endpoint in args.mix.split(",") if endpoint.strip()]
+
+    print(f"🏃 {args.requests} požiadaviek z {args.clients} klientov ({', '.join(mix)})...")
+    with contextlib.ExitStack() as stack:
+        base_url = args.url
+        if not base_url:
+            for name, value in (("LEGAL_MAX_CONCURRENCY", args.max_concurrency), ("LEGAL_MAX_QUEUE", args.max_queue),
+                                ("LEGAL_REQUEST_TIMEOUT", args.request_timeout)):
+                if value is not None:
+                    os.environ[name] = str(value)
+            stubs = stack.enter_context(LocalServiceStubs(latency_ms=args.stub_latency_ms))
+            os.environ.update(stubs.environment())
+            server = InProcessServer(traces, args.llm_latency_scale).start()
+            stack.callback(server.stop)
+            base_url = server.url
+            # Výpisy agenta by zahltili výstup
+            devnull = stack.enter_context(open(os.devnull, "w"))
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+
+        ready_s = wait_until_ready(base_url)
+        report = ApiLoadTest(base_url, args.clients, args.requests, mix,
+                             [trace["question"] for trace in traces], stream=args.stream).run()
+        report["ready_seconds"] = round(ready_s, 2)
+
+    print(f"✅ API pripravené za {ready_s:.1f} s ({base_url})")
+    print_report(report)
+
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"load_api_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Výsledky uložené do {output}")
+
+
+if __name__ == "__main__":
+    main()
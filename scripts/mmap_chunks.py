@@ -0,0 +1,218 @@
+"""
+Úložisko chunkov mapované do pamäte - export z ChromaDB a porovnanie s collection.get
+
+- export:    zapíše data/chunk_store.bin z existujúcej kolekcie (bez opätovného načítania
+             zákonov; LegalTextLoader ho inak zapisuje sám)
+- benchmark: načítanie textov podľa id v dávkach ako pri dotaze (k id) - collection.get
+             vs. ChunkStore.get_many; každý variant v čerstvom procese kvôli RSS,
+             navyše kontrola zhody textov a metadát
+
+Použitie:
+    python scripts/mmap_chunks.py export
+    python scripts/mmap_chunks.py benchmark --batches 500 --k 8
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List
+from pathlib import Path
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from agent.metrics import latency_summary
+from agent.tools.chunk_store import DEFAULT_CHUNK_STORE_PATH, ChunkStore, write_chunk_store
+from scripts.benchmark_sessions_memory import current_rss_mb
+
+DEFAULT_RESULTS_DIR = project_root / "data" / "benchmarks" / "results"
+DEFAULT_DB_PATH = project_root / "data" / "vector_db"
+VARIANTS = ("chroma", "store")
+
+
+def _collection(name: str):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=str(DEFAULT_DB_PATH))
+    return client.get_collection(name=name)
+
+
+def _iter_collection(collection, batch_size: int = 500):
+    """Chunky kolekcie po dávkach (texty sa nedržia v pamäti naraz)"""
+    offset = 0
+    while True:
+        batch = collection.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+        if not batch["ids"]:
+            return
+        for chunk_id, text, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+            yield {"id": chunk_id, "text": text or "", "metadata": metadata or {}}
+        offset += len(batch["ids"])
+
+
+def export(collection_name: str, path: Path):
+    """Zapíše úložisko chunkov z existujúcej kolekcie"""
+    collection = _collection(collection_name)
+    print(f"📦 Exportujem {collection.count()} chunkov z '{collection_name}'...")
+    start = time.perf_counter()
+    count = write_chunk_store(path, _iter_collection(collection))
+    print(f"✅ {count} chunkov, {path.stat().st_size / 1024 / 1024:.1f} MB za {time.perf_counter() - start:.1f} s")
+
+
+def _sample_batches(store_path: Path, batches: int, k: int, seed: int) -> List[List[str]]:
+    """Rovnaké náhodné dávky id pre oba varianty"""
+    store = ChunkStore(store_path)
+    try:
+        all_ids = store.ids()
+    finally:
+        store.close()
+    rng = random.Random(seed)
+    return [rng.sample(all_ids, min(k, len(all_ids))) for _ in range(batches)]
+
+
+def run_worker(variant: str, collection_name: str, store_path: Path, batches: List[List[str]]) -> Dict[str, Any]:
+    """Načíta všetky dávky jedným variantom a zmeria latenciu a RSS"""
+    rss_start = current_rss_mb()
+    start = time.perf_counter()
+    if variant == "chroma":
+        collection = _collection(collection_name)
+        fetch = lambda ids: collection.get(ids=ids, include=["documents", "metadatas"])
+    else:
+        store = ChunkStore(store_path)
+        fetch = store.get_many
+    open_ms = (time.perf_counter() - start) * 1000
+    rss_open = current_rss_mb()
+
+    latencies, chars = [], 0
+    for ids in batches:
+        start = time.perf_counter()
+        fetched = fetch(ids)
+        latencies.append((time.perf_counter() - start) * 1000)
+        chars += sum(map(len, fetched["documents"]))
+
+    return {
+        "variant": variant,
+        "open_ms": round(open_ms, 1),
+        "latency": latency_summary(latencies),
+        "chars": chars,
+        "rss_start_mb": rss_start,
+        "rss_open_mb": rss_open,
+        "rss_end_mb": current_rss_mb(),
+    }
+
+
+def measure(variant: str, collection_name: str, store_path: Path, batches_path: Path) -> Dict[str, Any]:
+    """Spustí worker v čerstvom procese"""
+    result = subprocess.run(
+        [sys.executable, __file__, "benchmark", "--worker", variant, "--collection", collection_name,
+         "--store", str(store_path), "--batches-file", str(batches_path)],
+        cwd=project_root, capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("FETCH "):
+            return json.loads(line[len("FETCH "):])
+    raise RuntimeError(f"Variant {variant} zlyhal:\n{result.stderr[-2000:]}")
+
+
+def check_parity(collection_name: str, store_path: Path, ids: List[str]) -> Dict[str, int]:
+    """Porovná texty a kľúčové metadáta zo store a z ChromaDB"""
+    collection = _collection(collection_name)
+    store = ChunkStore(store_path)
+    try:
+        fetched = collection.get(ids=ids, include=["documents", "metadatas"])
+        mismatches = 0
+        for chunk_id, text, metadata in zip(fetched["ids"], fetched["documents"], fetched["metadatas"]):
+            item = store.get(chunk_id)
+            if item is None or item["text"] != text or any(
+                str(item["metadata"][key]) != str(metadata.get(key, item["metadata"][key]))
+                for key in ("law_id", "paragraph", "chunk_num")
+            ):
+                mismatches += 1
+        return {"checked": len(fetched["ids"]), "mismatches": mismatches}
+    finally:
+        store.close()
+
+
+def print_report(report: Dict[str, Any]):
+    """Vypíše porovnanie variantov"""
+    print(f"\n{'variant':<9}{'open ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'RSS open MB':>13}{'RSS koniec MB':>15}")
+    for item in report["results"]:
+        stats = item["latency"]
+        print(f"{item['variant']:<9}{item['open_ms']:>9.1f}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}"
+              f"{stats['p99_ms']:>9.2f}{item['rss_open_mb'] - item['rss_start_mb']:>13.1f}"
+              f"{item['rss_end_mb'] - item['rss_start_mb']:>15.1f}")
+    parity = report["parity"]
+    print(f"\n🔎 Zhoda s ChromaDB: {parity['checked'] - parity['mismatches']}/{parity['checked']} chunkov")
+    print(f"💾 Súbor: {report['parameters']['store_mb']} MB")
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Úložisko chunkov mapované do pamäte")
+    parser.add_argument("command", choices=["export", "benchmark"], help="Čo spustiť")
+    parser.add_argument("--collection", default="legal_documents", help="Zdrojová kolekcia")
+    parser.add_argument("--store", default=str(project_root / DEFAULT_CHUNK_STORE_PATH), help="Súbor úložiska")
+    parser.add_argument("--batches", type=int, default=500, help="Počet dávok (dotazov)")
+    parser.add_argument("--k", type=int, default=8, help="Počet id v dávke")
+    parser.add_argument("--seed", type=int, default=13, help="Seed výberu id")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=VARIANTS, help="Merané varianty")
+    parser.add_argument("--output", help="Cesta k výstupnému JSON")
+    parser.add_argument("--worker", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--batches-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    store_path = Path(args.store)
+
+    if args.worker:
+        with open(args.batches_file, "r", encoding="utf-8") as f:
+            batches = json.load(f)
+        print("FETCH " + json.dumps(run_worker(args.worker, args.collection, store_path, batches)))
+        return
+
+    print("🚀 Úložisko chunkov mapované do pamäte")
+    print("=" * 50)
+
+    if args.command == "export":
+        export(args.collection, store_path)
+        return
+
+    if not store_path.exists():
+        print(f"❌ Úložisko {store_path} neexistuje - spusti najprv: python scripts/mmap_chunks.py export")
+        return
+
+    batches = _sample_batches(store_path, args.batches, args.k, args.seed)
+    batches_path = DEFAULT_RESULTS_DIR / ".chunk_batches.json"
+    batches_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(batches_path, "w", encoding="utf-8") as f:
+        json.dump(batches, f)
+    try:
+        results = []
+        for variant in args.variants:
+            print(f"📏 Variant {variant}: {len(batches)} dávok po {args.k} id...")
+            results.append(measure(variant, args.collection, store_path, batches_path))
+    finally:
+        batches_path.unlink()
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "parameters": {"batches": len(batches), "k": args.k, "seed": args.seed,
+                       "store_mb": round(store_path.stat().st_size / 1024 / 1024, 2)},
+        "results": results,
+        "parity": check_parity(args.collection, store_path, sorted({i for ids in batches for i in ids})),
+    }
+    print_report(report)
+
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"chunk_store_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Výsledky uložené do {output}")
+
+
+if __name__ == "__main__":
+    main()
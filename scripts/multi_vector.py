@@ -0,0 +1,81 @@
+"""
+Pokrytie textu chunkov embeddingom a veľkosť indexu s oknami
+
+Tokenizérom embedding modelu spočíta tokeny všetkých chunkov v úložisku a vypíše,
+koľko textu model vidí s jedným vektorom na chunk (orezanie na max_seq_length)
+a koľko vektorov pridajú okná. Ak existuje vektorová databáza, vypíše aj skutočný
+počet vektorov v legal_documents a legal_document_windows a veľkosť na disku.
+
+Vplyv na recall zmeria benchmark vyhľadávania s oknami a bez nich:
+    python scripts/benchmark_retrieval.py
+    python scripts/benchmark_retrieval.py --no-multi-vector
+
+Použitie:
+    python scripts/multi_vector.py
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+# Skript beží offline - embedding model len z lokálnej cache
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import numpy as np
+
+from agent.tools.chunk_store import DEFAULT_CHUNK_STORE_PATH, ChunkStore
+from agent.tools.embeddings import DEFAULT_EMBEDDING_MODEL, MultilingualEmbeddingFunction
+from agent.tools.multi_vector import DEFAULT_WINDOWS_COLLECTION, TokenWindows, coverage
+
+
+def directory_mb(path: Path) -> float:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / 1024 / 1024
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Pokrytie textu embeddingom a okná dlhých chunkov")
+    parser.add_argument("--store", default=str(project_root / DEFAULT_CHUNK_STORE_PATH), help="Úložisko chunkov")
+    parser.add_argument("--db", default=str(project_root / "data" / "vector_db"), help="Vektorová databáza")
+    parser.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL, help="Embedding model (tokenizér)")
+    args = parser.parse_args()
+
+    print("🚀 Pokrytie textu embeddingom")
+    print("=" * 50)
+
+    store_path = Path(args.store)
+    if not store_path.exists():
+        print(f"❌ Úložisko {store_path} neexistuje - spusti najprv: python scripts/load_law_texts.py")
+        return
+    store = ChunkStore(store_path)
+    windows = TokenWindows.for_embedding(MultilingualEmbeddingFunction(args.model))
+
+    counts = [windows.count(store.text_at(row)) for row in range(len(store))]
+    stats = coverage(counts, windows.window, windows.overlap)
+    p50, p95 = np.percentile(counts, [50, 95]) if counts else (0, 0)
+    print(f"📏 {stats['chunks']} chunkov, {stats['tokens']} tokenov (p50 {p50:.0f}, p95 {p95:.0f}, max {max(counts, default=0)})")
+    print(f"   okno modelu {windows.window} tokenov (+ špeciálne), prekryv okien {windows.overlap}")
+    print(f"   dlhších ako okno: {stats['over_window']} ({stats['over_window'] / max(stats['chunks'], 1):.0%})")
+    print(f"📐 Pokrytie jedným vektorom na chunk: {stats['single_vector_coverage']:.1%} tokenov, s oknami 100 %")
+    print(f"🪟 Vektorov: {stats['chunks']} -> {stats['vectors']} (+{stats['extra_vectors']})")
+
+    db_path = Path(args.db)
+    if db_path.exists():
+        import chromadb
+        client = chromadb.PersistentClient(path=str(db_path))
+        names = [getattr(collection, "name", collection) for collection in client.list_collections()]
+        for name in ("legal_documents", DEFAULT_WINDOWS_COLLECTION):
+            count = client.get_collection(name).count() if name in names else 0
+            print(f"💾 {name}: {count} vektorov")
+        print(f"💾 Veľkosť {db_path}: {directory_mb(db_path):.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
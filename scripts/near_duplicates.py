@@ -0,0 +1,146 @@
+"""
+Takmer duplicitné chunky - vytvorenie indexu z úložiska chunkov a kontrola
+
+- build:   MinHash/LSH nad úložiskom chunkov (bez nového ingestu; LegalTextLoader
+           index zapisuje sám) -> data/near_duplicates.json
+- check:   presné prekrytie všetkých párov chunkov v rámci zákona vs. páry z LSH
+           (úplnosť, presnosť, chyba odhadu) a pri dostupnej kolekcii dotazy benchmarku
+           bez zlúčenia a so zlúčením (počet rôznych paragrafov, znaky výstupu, gold)
+
+Použitie:
+    python scripts/near_duplicates.py build --threshold 0.5
+    python scripts/near_duplicates.py check
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from itertools import combinations
+from pathlib import Path
+from typing import Any, Dict, List
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from agent.tools.chunk_store import DEFAULT_CHUNK_STORE_PATH, ChunkStore
+from agent.tools.near_duplicates import (
+    DEFAULT_NEAR_DUPLICATES_PATH, DEFAULT_THRESHOLD, NearDuplicateIndex, NearDuplicateIndexBuilder, shingles
+)
+
+DEFAULT_QUERIES = project_root / "data" / "benchmarks" / "legal_queries_v2.json"
+
+
+def build(store: ChunkStore, threshold: float) -> NearDuplicateIndexBuilder:
+    """MinHash podpisy všetkých chunkov úložiska"""
+    builder = NearDuplicateIndexBuilder(threshold)
+    for row, chunk_id in enumerate(store.ids()):
+        builder.add(chunk_id, store.law_id_at(row), store.text_at(row))
+    return builder
+
+
+def exact_pairs(store: ChunkStore, threshold: float) -> Dict[tuple, float]:
+    """Presné prekrytie |A ∩ B| / min(|A|, |B|) všetkých párov v rámci zákona"""
+    ids = store.ids()
+    by_law: Dict[str, List[int]] = {}
+    sets = []
+    for row in range(len(store)):
+        sets.append(set(shingles(store.text_at(row)).tolist()))
+        by_law.setdefault(store.law_id_at(row), []).append(row)
+
+    pairs = {}
+    for rows in by_law.values():
+        for a, b in combinations(rows, 2):
+            smaller = min(len(sets[a]), len(sets[b]))
+            if smaller and len(sets[a] & sets[b]) / smaller >= threshold:
+                pairs[(ids[a], ids[b])] = len(sets[a] & sets[b]) / smaller
+    return pairs
+
+
+def compare_queries(tool, index: NearDuplicateIndex, queries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Dotazy benchmarku bez zlúčenia a so zlúčením duplicít"""
+    totals = {variant: {"results": 0, "paragraphs": 0, "chars": 0, "gold": 0} for variant in ("plain", "collapsed")}
+    for query in queries:
+        for variant, duplicates in (("plain", None), ("collapsed", index)):
+            tool.duplicates = duplicates
+            results = tool.search(query["query"]) or []
+            covered = {(result["law_id"], paragraph.strip())
+                       for result in results for paragraph in result["paragraphs"].split(",")}
+            totals[variant]["results"] += len(results)
+            totals[variant]["paragraphs"] += len(covered)
+            totals[variant]["chars"] += len(tool._format_results(results))
+            totals[variant]["gold"] += any((gold["law_id"], gold["paragraph"]) in covered for gold in query["gold"])
+    return totals
+
+
+def check(store: ChunkStore, index: NearDuplicateIndex, queries_path: Path):
+    start = time.perf_counter()
+    exact = exact_pairs(store, index.threshold)
+    found = {(a, b): overlap for a, b, overlap in index.pairs}
+    found.update({(b, a): overlap for (a, b), overlap in list(found.items())})
+    hits = [pair for pair in exact if pair in found]
+    recall = len(hits) / len(exact) if exact else 1.0
+    precision = sum(1 for a, b, _ in index.pairs if (a, b) in exact or (b, a) in exact) / len(index.pairs) if index.pairs else 1.0
+    error = sum(abs(found[pair] - exact[pair]) for pair in hits) / len(hits) if hits else 0.0
+    print(f"📏 Presné páry: {len(exact)} ({time.perf_counter() - start:.1f} s), LSH páry: {len(index.pairs)}")
+    print(f"   úplnosť {recall:.1%}, presnosť {precision:.1%}, priemerná chyba odhadu prekrytia {error:.3f}")
+
+    try:
+        from agent.tools.enhanced_vector_search import EnhancedVectorSearchTool
+        tool = EnhancedVectorSearchTool()
+    except Exception as e:
+        print(f"⚠️ Vyhľadávací nástroj nie je dostupný ({e}) - porovnanie dotazov sa preskočí")
+        return
+    if tool.collection is None:
+        print("⚠️ Kolekcia nie je dostupná - porovnanie dotazov sa preskočí")
+        return
+
+    with open(queries_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    queries = [query for query in data["queries"] if query["tool"] == "enhanced_vector_search"]
+    totals = compare_queries(tool, index, queries)
+    for variant, values in totals.items():
+        print(f"   {variant:<10} výsledkov {values['results']}, rôznych paragrafov {values['paragraphs']}, "
+              f"znakov výstupu {values['chars']}, gold {values['gold']}/{len(queries)}")
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Takmer duplicitné chunky (MinHash/LSH)")
+    parser.add_argument("command", choices=["build", "check"], help="Čo spustiť")
+    parser.add_argument("--store", default=str(project_root / DEFAULT_CHUNK_STORE_PATH), help="Súbor úložiska chunkov")
+    parser.add_argument("--output", default=str(project_root / DEFAULT_NEAR_DUPLICATES_PATH), help="Index duplicít")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Prah prekrytia páru")
+    parser.add_argument("--queries", default=str(DEFAULT_QUERIES), help="Dotazy benchmarku pre check")
+    args = parser.parse_args()
+
+    print("🚀 Takmer duplicitné chunky")
+    print("=" * 50)
+
+    store_path = Path(args.store)
+    if not store_path.exists():
+        print(f"❌ Úložisko {store_path} neexistuje - spusti najprv: python scripts/mmap_chunks.py export")
+        return
+    store = ChunkStore(store_path)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        index = build(store, args.threshold).build()
+        index.save(Path(args.output))
+        stats = index.stats()
+        print(f"✅ {stats['pairs']} párov, {stats['chunks_with_duplicates']} z {stats['chunks']} chunkov má suseda, "
+              f"priemerné prekrytie {stats['mean_overlap']} za {time.perf_counter() - start:.1f} s -> {args.output}")
+        return
+
+    if not Path(args.output).exists():
+        print(f"❌ Index {args.output} neexistuje - spusti najprv: python scripts/near_duplicates.py build")
+        return
+    check(store, NearDuplicateIndex.load(Path(args.output)), Path(args.queries))
+
+
+if __name__ == "__main__":
+    main()
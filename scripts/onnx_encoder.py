@@ -0,0 +1,295 @@
+"""
+ONNX / int8 enkóder embedding modelu - export a benchmark
+
+- export:    SentenceTransformer -> ONNX graf (transformer + mean pooling) a jeho
+             dynamická int8 kvantizácia, tokenizér a meta.json do data/onnx_encoder/<model>;
+             overí zhodu vektorov s PyTorch a výsledok zapíše do meta.json
+             (backend, ktorý toleranciu nesplní, sa pri načítaní odmietne)
+- benchmark: torch / onnx / onnx-int8 na textoch chunkov a dotazoch benchmarku -
+             priepustnosť dávkového embeddingu (ingest), latencia jedného dotazu,
+             zhoda vektorov a recall@k top-k oproti PyTorch
+
+Backend pre ingest a vyhľadávanie sa vyberie cez LEGAL_EMBEDDING_BACKEND=onnx-int8.
+
+Použitie:
+    python scripts/onnx_encoder.py export
+    python scripts/onnx_encoder.py benchmark --texts 512 --k 8
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Skript beží offline - embedding model len z lokálnej cache
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import numpy as np
+
+from agent.metrics import latency_summary
+from agent.tools.chunk_store import DEFAULT_CHUNK_STORE_PATH, ChunkStore
+from agent.tools.embeddings import (
+    DEFAULT_EMBEDDING_MODEL, EMBEDDING_BACKENDS, ONNX_META_FILE, MultilingualEmbeddingFunction, onnx_encoder_dir
+)
+from scripts.law_stream import iter_sections, read_blocks
+
+DEFAULT_QUERY_SET = project_root / "data" / "benchmarks" / "legal_queries_v2.json"
+DEFAULT_RESULTS_DIR = project_root / "data" / "benchmarks" / "results"
+DEFAULT_LAW_TEXTS = project_root / "data" / "law_texts"
+OPSET = 17
+
+# Najmenšia kosínusová podobnosť s PyTorch vektorom, pri ktorej sa backend použije
+PARITY_MIN_COSINE = {"onnx": 0.9999, "onnx-int8": 0.98}
+
+
+def load_texts(store_path: Path, count: int) -> List[str]:
+    """Texty chunkov z úložiska, bez neho paragrafy zo zákonov v data/law_texts"""
+    if store_path.exists():
+        store = ChunkStore(store_path)
+        step = max(1, len(store) // count)
+        return [store.text_at(row) for row in range(0, len(store), step)][:count]
+    sections = (section.text.strip() for path in sorted(DEFAULT_LAW_TEXTS.glob("*.txt"))
+                for section in iter_sections(read_blocks(path)))
+    return list(islice((text for text in sections if len(text) > 100), count))
+
+
+def load_queries(path: Path) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [query["query"] for query in data["queries"] if query["tool"] == "enhanced_vector_search"]
+
+
+def parity(reference: np.ndarray, vectors: np.ndarray) -> Dict[str, float]:
+    """Zhoda L2-normalizovaných vektorov s referenciou"""
+    cosines = np.sum(reference * vectors, axis=1)
+    return {
+        "min_cosine": round(float(cosines.min()), 6),
+        "mean_cosine": round(float(cosines.mean()), 6),
+        "max_abs_diff": round(float(np.abs(reference - vectors).max()), 6),
+    }
+
+
+def pooling_mode(pooling) -> str:
+    """Režim poolingu (starší sentence-transformers má príznak na každý režim)"""
+    config = pooling.get_config_dict()
+    if "pooling_mode" in config:
+        return config["pooling_mode"]
+    active = [key for key, value in config.items() if key.startswith("pooling_mode_") and value]
+    return "mean" if active == ["pooling_mode_mean_tokens"] else ",".join(active)
+
+
+def export(model_name: str, output: Path, texts: List[str]) -> Dict[str, Any]:
+    """Export do ONNX, int8 kvantizácia a kontrola zhody s PyTorch"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Pooling, Transformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    modules = list(model)
+    if (len(modules) != 2 or not isinstance(modules[0], Transformer) or not isinstance(modules[1], Pooling)
+            or pooling_mode(modules[1]) != "mean"):
+        raise ValueError(f"Export podporuje len Transformer + mean Pooling, model má: {[type(m).__name__ for m in modules]}")
+
+    transformer = modules[0]
+    tokenizer = transformer.tokenizer
+    input_names = list(tokenizer.model_input_names)
+
+    class MeanPooledEncoder(torch.nn.Module):
+        """Transformer s mean poolingom cez attention_mask (ako sentence_transformers.models.Pooling)"""
+
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            features = dict(zip(input_names, inputs))
+            hidden = self.auto_model(**features).last_hidden_state
+            mask = features["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            return (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+
+    output.mkdir(parents=True, exist_ok=True)
+    fp32_path = output / "model.onnx"
+    int8_path = output / "model.int8.onnx"
+    encoder = MeanPooledEncoder(transformer.auto_model).eval()
+    sample = tokenizer(["Vlastník je v medziach zákona oprávnený predmet svojho vlastníctva držať."],
+                       padding=True, return_tensors="pt")
+    axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    axes["sentence_embedding"] = {0: "batch"}
+
+    start = time.perf_counter()
+    with torch.no_grad():
+        torch.onnx.export(encoder, tuple(sample[name] for name in input_names), str(fp32_path),
+                          input_names=input_names, output_names=["sentence_embedding"],
+                          dynamic_axes=axes, opset_version=OPSET, dynamo=False)
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(str(output))
+    print(f"✅ Export za {time.perf_counter() - start:.1f} s: {fp32_path.stat().st_size / 1024 / 1024:.1f} MB, "
+          f"int8 {int8_path.stat().st_size / 1024 / 1024:.1f} MB")
+
+    meta = {
+        "model_name": model_name,
+        "max_seq_length": model.max_seq_length,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "pooling": "mean",
+        "fp32": fp32_path.name,
+        "int8": int8_path.name,
+        "opset": OPSET,
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+        "parity": {},
+    }
+    with open(output / ONNX_META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    # Zhoda s PyTorch na vzorke textov - zapíše sa do meta.json, načítanie ju kontroluje
+    reference = np.array(MultilingualEmbeddingFunction(model_name, "torch")(texts))
+    for backend in ("onnx", "onnx-int8"):
+        values = parity(reference, np.array(MultilingualEmbeddingFunction(model_name, backend)(texts)))
+        values["texts"] = len(texts)
+        values["ok"] = values["min_cosine"] >= PARITY_MIN_COSINE[backend]
+        meta["parity"][backend] = values
+        status = "✅" if values["ok"] else "❌"
+        print(f"{status} {backend}: min kosínus {values['min_cosine']}, priemer {values['mean_cosine']}, "
+              f"max |rozdiel| {values['max_abs_diff']} (tolerancia {PARITY_MIN_COSINE[backend]})")
+    with open(output / ONNX_META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    scores = queries @ corpus.T
+    return [set(np.argsort(-row, kind="stable")[:k].tolist()) for row in scores]
+
+
+def measure(model_name: str, backend: str, texts: List[str], queries: List[str],
+            batch_size: int, rounds: int) -> Dict[str, Any]:
+    """Načítanie, dávkový embedding textov a latencia jedného dotazu"""
+    start = time.perf_counter()
+    function = MultilingualEmbeddingFunction(model_name, backend)
+    load_s = time.perf_counter() - start
+    if function.backend != backend:
+        return {"backend": backend, "error": "nedostupný"}
+
+    function(texts[:batch_size])  # zahriatie
+    start = time.perf_counter()
+    corpus = np.vstack([function(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)])
+    encode_s = time.perf_counter() - start
+
+    samples = []
+    vectors = []
+    for round_index in range(rounds):
+        for query in queries:
+            start = time.perf_counter()
+            vector = function(query)
+            samples.append((time.perf_counter() - start) * 1000)
+            if not round_index:
+                vectors.append(vector)
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "texts_per_s": round(len(texts) / encode_s, 1),
+        "encode_s": round(encode_s, 2),
+        "query_latency": latency_summary(samples),
+        "corpus": corpus.astype(np.float32),
+        "queries": np.array(vectors, dtype=np.float32),
+    }
+
+
+def benchmark(args, texts: List[str], queries: List[str]) -> Dict[str, Any]:
+    results = []
+    for backend in args.backends:
+        print(f"📏 {backend}: {len(texts)} textov v dávkach po {args.batch_size}, {len(queries)} dotazov × {args.rounds}...")
+        results.append(measure(args.model, backend, texts, queries, args.batch_size, args.rounds))
+
+    reference = next((result for result in results if result["backend"] == "torch" and "error" not in result), None)
+    if reference is not None:
+        expected = top_k(reference["corpus"], reference["queries"], args.k)
+        for result in results:
+            if "error" in result or result is reference:
+                continue
+            found = top_k(result["corpus"], result["queries"], args.k)
+            result["parity"] = {
+                "corpus": parity(reference["corpus"], result["corpus"]),
+                "queries": parity(reference["queries"], result["queries"]),
+                f"recall@{args.k}": round(float(np.mean([len(a & b) / args.k for a, b in zip(expected, found)])), 4),
+            }
+    for result in results:
+        result.pop("corpus", None)
+        result.pop("queries", None)
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "parameters": {"model": args.model, "texts": len(texts), "queries": len(queries), "k": args.k,
+                       "batch_size": args.batch_size, "rounds": args.rounds, "cpu_count": os.cpu_count(),
+                       "onnx_threads": os.getenv("LEGAL_ONNX_THREADS", "")},
+        "results": results,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n{'Backend':<10} {'Načítanie':>10} {'Textov/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'Min kosínus':>12} {'Recall':>7}")
+    for result in report["results"]:
+        if "error" in result:
+            print(f"{result['backend']:<10} {result['error']}")
+            continue
+        latency = result["query_latency"]
+        values = result.get("parity", {})
+        cosine = values.get("corpus", {}).get("min_cosine", 1.0)
+        recall = next((value for key, value in values.items() if key.startswith("recall@")), 1.0)
+        print(f"{result['backend']:<10} {result['load_s']:>9.2f}s {result['texts_per_s']:>9.1f} "
+              f"{latency['p50_ms']:>8.2f} {latency['p95_ms']:>8.2f} {cosine:>12.6f} {recall:>7.2%}")
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="ONNX / int8 enkóder embedding modelu")
+    parser.add_argument("command", choices=["export", "benchmark"], help="Čo spustiť")
+    parser.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL, help="Model SentenceTransformer")
+    parser.add_argument("--output", help="Adresár exportu (predvolene data/onnx_encoder/<model>)")
+    parser.add_argument("--store", default=str(project_root / DEFAULT_CHUNK_STORE_PATH), help="Úložisko chunkov s textami")
+    parser.add_argument("--queries", default=str(DEFAULT_QUERY_SET), help="Sada dotazov benchmarku")
+    parser.add_argument("--texts", type=int, default=512, help="Počet textov chunkov")
+    parser.add_argument("--backends", nargs="+", choices=EMBEDDING_BACKENDS, default=list(EMBEDDING_BACKENDS))
+    parser.add_argument("--batch-size", type=int, default=32, help="Dávka embeddingu textov")
+    parser.add_argument("--rounds", type=int, default=3, help="Opakovania dotazov pre latenciu")
+    parser.add_argument("--k", type=int, default=8, help="Top-k pre recall oproti PyTorch")
+    parser.add_argument("--results", help="Cieľový JSON benchmarku")
+    args = parser.parse_args()
+
+    print("🚀 ONNX enkóder embedding modelu")
+    print("=" * 50)
+
+    if args.output:
+        os.environ["LEGAL_ONNX_ENCODER"] = args.output
+    texts = load_texts(Path(args.store), args.texts)
+    queries = load_queries(Path(args.queries))
+
+    if args.command == "export":
+        output = onnx_encoder_dir(args.model)
+        meta = export(args.model, output, texts[:128] + queries)
+        if not all(values["ok"] for values in meta["parity"].values()):
+            print("⚠️ Backend mimo tolerancie sa pri načítaní odmietne (použije sa PyTorch)")
+        print(f"💾 {output}")
+        return
+
+    report = benchmark(args, texts, queries)
+    print_report(report)
+    DEFAULT_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    output = Path(args.results) if args.results else DEFAULT_RESULTS_DIR / f"encoder_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Výsledky uložené do {output}")
+
+
+if __name__ == "__main__":
+    main()
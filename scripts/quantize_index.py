@@ -0,0 +1,180 @@
+"""
+Export a vyhodnotenie kvantizovaného vektorového indexu
+
+- export:   vektory z ChromaDB kolekcie legal_documents -> data/vector_index/legal_documents
+- evaluate: pamäť int8 / PQ oproti float32 a strata recall oproti presnému float
+            vyhľadávaniu na sémantických dotazoch z benchmarku (s prepočtom skóre aj bez)
+
+Kvalitu voči zlatým odpovediam zmeria benchmark vyhľadávania:
+    python scripts/benchmark_retrieval.py --vector-index int8
+
+Použitie:
+    python scripts/quantize_index.py export --pq-subspaces 48
+    python scripts/quantize_index.py evaluate --k 8
+    python scripts/quantize_index.py evaluate --k 8 --rescore-factor 8
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List
+from pathlib import Path
+
+# Skript beží offline - embedding model len z lokálnej cache
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import numpy as np
+
+from agent.metrics import latency_summary
+from agent.tools.quantized_index import DEFAULT_INDEX_PATH, DEFAULT_RESCORE_FACTOR, QuantizedIndex
+
+DEFAULT_QUERY_SET = project_root / "data" / "benchmarks" / "legal_queries_v2.json"
+DEFAULT_RESULTS_DIR = project_root / "data" / "benchmarks" / "results"
+
+
+def export_index(index_path: Path, pq_subspaces: int, collection_name: str = "legal_documents") -> QuantizedIndex:
+    """Exportuje kolekciu do kvantizovaného indexu"""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=str(project_root / "data" / "vector_db"))
+    collection = client.get_collection(name=collection_name)
+    print(f"📦 Exportujem {collection.count()} vektorov z '{collection_name}'...")
+
+    start = time.perf_counter()
+    index = QuantizedIndex.export(collection, index_path, pq_subspaces=pq_subspaces or None)
+    print(f"✅ Index uložený do {index_path} za {time.perf_counter() - start:.1f} s ({', '.join(index.info['methods'])})")
+    return index
+
+
+def benchmark_queries(query_set_path: Path) -> List[Dict[str, Any]]:
+    """Sémantické a kombinované dotazy benchmarku (text dotazu + prípadný law filter)"""
+    from agent.tools.enhanced_vector_search import EnhancedVectorSearchTool
+    from agent.tools.query_language import QuerySyntaxError
+
+    with open(query_set_path, "r", encoding="utf-8") as f:
+        query_set = json.load(f)
+
+    parse = EnhancedVectorSearchTool.model_construct()._parse_query
+    queries = []
+    for query in query_set["queries"]:
+        if query["tool"] != "enhanced_vector_search":
+            continue
+        try:
+            parsed = parse(query["query"])
+        except QuerySyntaxError as e:
+            print(f"⚠️ Dotaz {query['id']} preskočený - chybný dotaz: {e}")
+            continue
+        if parsed["semantic_query"]:
+            queries.append({"id": query["id"], "text": parsed["semantic_query"], "where": parsed["where_filters"] or None})
+    return queries
+
+
+def exact_top_k(index: QuantizedIndex, query: np.ndarray, k: int, where) -> List[str]:
+    """Presné float32 vyhľadávanie hrubou silou (referencia)"""
+    rows = np.flatnonzero(index.law_ids == where["law_id"]) if where else np.arange(index.count)
+    scores = np.asarray(index.vectors[rows], dtype=np.float32) @ query
+    return [index.ids[rows[i]] for i in np.argsort(-scores)[:k]]
+
+
+def evaluate(index_path: Path, query_set_path: Path, k: int, rescore_factor: int, repeat: int) -> Dict[str, Any]:
+    """Pamäť a recall@k kvantizovaných metód oproti presnému vyhľadávaniu"""
+    from agent.tools.embeddings import MultilingualEmbeddingFunction
+
+    index = QuantizedIndex.load(index_path)
+    queries = benchmark_queries(query_set_path)
+    embedding_function = MultilingualEmbeddingFunction()
+    vectors = np.asarray(embedding_function([q["text"] for q in queries]), dtype=np.float32)
+    references = [exact_top_k(index, vector, k, q["where"]) for q, vector in zip(queries, vectors)]
+
+    variants = [
+        (method, factor)
+        for method in index.info["methods"]
+        for factor in (0, rescore_factor or DEFAULT_RESCORE_FACTOR[method])
+    ]
+    results = {}
+    for method, factor in variants:
+        recalls, latencies = [], []
+        for query, vector, reference in zip(queries, vectors, references):
+            for _ in range(repeat):
+                start = time.perf_counter()
+                ids, _ = index.search(vector, limit=k, where=query["where"], method=method, rescore_factor=factor)
+                latencies.append((time.perf_counter() - start) * 1000)
+            recalls.append(len(set(ids) & set(reference)) / len(reference) if reference else 1.0)
+        results[f"{method}{'+rescore' if factor else ''}"] = {
+            "method": method,
+            "rescore_factor": factor,
+            f"recall@{k}": round(sum(recalls) / len(recalls), 4),
+            "min_recall": round(min(recalls), 4),
+            "latency": latency_summary(latencies),
+        }
+
+    memory = index.memory_bytes()
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "index": {"path": str(index_path), "vectors": index.count, "dims": index.dims,
+                  "pq_subspaces": index.info.get("pq_subspaces")},
+        "parameters": {"k": k, "rescore_factor": rescore_factor or "default", "queries": len(queries), "repeat": repeat},
+        "memory_bytes": memory,
+        "memory_ratio": {name: round(size / memory["float32"], 4) for name, size in memory.items()},
+        "variants": results,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    """Vypíše pamäť a recall jednotlivých variantov"""
+    k = report["parameters"]["k"]
+    print(f"\n💾 Pamäť indexu ({report['index']['vectors']} x {report['index']['dims']}):")
+    for name, size in report["memory_bytes"].items():
+        print(f"   {name:<8}{size / 1024 / 1024:>10.2f} MB  ({report['memory_ratio'][name]:.1%} z float32)")
+
+    print(f"\n{'variant':<16}{'R@' + str(k) + ' vs float':>14}{'min':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, stats in report["variants"].items():
+        print(f"{name:<16}{stats[f'recall@{k}']:>14.3f}{stats['min_recall']:>8.2f}"
+              f"{stats['latency']['p50_ms']:>10.2f}{stats['latency']['p95_ms']:>10.2f}")
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Export a vyhodnotenie kvantizovaného vektorového indexu")
+    parser.add_argument("command", choices=["export", "evaluate"], help="Čo spustiť")
+    parser.add_argument("--index", default=str(project_root / DEFAULT_INDEX_PATH), help="Adresár indexu")
+    parser.add_argument("--pq-subspaces", type=int, default=48, help="Počet PQ podpriestorov (0 = bez PQ)")
+    parser.add_argument("--queries", default=str(DEFAULT_QUERY_SET), help="Sada dotazov benchmarku")
+    parser.add_argument("--k", type=int, default=8, help="Počet výsledkov")
+    parser.add_argument("--rescore-factor", type=int, help="Kandidáti na presný prepočet (násobok k, predvolene int8 4, pq 16)")
+    parser.add_argument("--repeat", type=int, default=5, help="Opakovania dotazu pre latenciu")
+    parser.add_argument("--output", help="Cesta k výstupnému JSON")
+    args = parser.parse_args()
+
+    print("🚀 Kvantizovaný vektorový index")
+    print("=" * 50)
+
+    if args.command == "export":
+        export_index(Path(args.index), args.pq_subspaces)
+        return
+
+    if not (Path(args.index) / "index.json").exists():
+        print(f"❌ Index {args.index} neexistuje - najprv spusti: python scripts/quantize_index.py export")
+        return
+
+    report = evaluate(Path(args.index), Path(args.queries), args.k, args.rescore_factor, args.repeat)
+    print_report(report)
+
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"quantized_index_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Výsledky uložené do {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Shardy vektorovej databázy podľa zákona - vytvorenie a porovnanie s jednou kolekciou
+
+- build:     rozdelí legal_documents na kolekcie legal_documents__<law_id> (embeddingy sa
+             kopírujú, neprepočítavajú); metadáta shardov z files_metadata.json
+- benchmark: dotazy z benchmarku vyhľadávania proti jednej kolekcii aj shardom -
+             latencia, zhoda top-k, počet prehľadaných shardov a dôvod smerovania
+
+Použitie:
+    python scripts/shard_collection.py build
+    python scripts/shard_collection.py benchmark --k 8
+    python scripts/benchmark_retrieval.py --sharded
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from typing import Any, Dict
+from pathlib import Path
+
+# Skript beží offline - embedding model len z lokálnej cache
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from agent.metrics import latency_summary
+from agent.tools.sharding import DEFAULT_METADATA_PATH, ShardedCollection, build_shards
+
+DEFAULT_QUERY_SET = project_root / "data" / "benchmarks" / "legal_queries_v2.json"
+DEFAULT_RESULTS_DIR = project_root / "data" / "benchmarks" / "results"
+DEFAULT_DB_PATH = project_root / "data" / "vector_db"
+
+
+def build(collection_name: str, metadata_path: Path):
+    """Vytvorí shardy z existujúcej kolekcie"""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=str(DEFAULT_DB_PATH))
+    source = client.get_collection(name=collection_name)
+    with open(metadata_path, "r", encoding="utf-8") as f:
+        laws = json.load(f).get("files", [])
+
+    print(f"📦 Rozdeľujem {source.count()} chunkov z '{collection_name}' podľa zákona...")
+    start = time.perf_counter()
+    counts = build_shards(client, source, collection_name, laws)
+    print(f"✅ {len(counts)} shardov za {time.perf_counter() - start:.1f} s")
+    for law_id, count in sorted(counts.items(), key=lambda item: -item[1]):
+        print(f"   {law_id:<12}{count:>7} chunkov")
+
+
+def benchmark(collection_name: str, query_set_path: Path, k: int, repeat: int) -> Dict[str, Any]:
+    """Porovná jednu kolekciu so shardami na dotazoch benchmarku"""
+    import chromadb
+    from agent.tools.embeddings import MultilingualEmbeddingFunction
+    from agent.tools.enhanced_vector_search import EnhancedVectorSearchTool
+    from agent.tools.query_language import QuerySyntaxError
+
+    client = chromadb.PersistentClient(path=str(DEFAULT_DB_PATH))
+    single = client.get_collection(name=collection_name)
+    sharded = ShardedCollection(client, collection_name)
+    if not sharded:
+        raise RuntimeError("Shardy neexistujú - spusti najprv: python scripts/shard_collection.py build")
+    embedding_function = MultilingualEmbeddingFunction()
+    parse = EnhancedVectorSearchTool.model_construct()._parse_query
+
+    with open(query_set_path, "r", encoding="utf-8") as f:
+        queries = [q for q in json.load(f)["queries"] if q["tool"] == "enhanced_vector_search"]
+
+    per_query, skipped = [], []
+    latencies = {"single": [], "sharded": []}
+    for query in queries:
+        try:
+            parsed = parse(query["query"])
+        except QuerySyntaxError as e:
+            print(f"⚠️ Dotaz {query['id']} preskočený - chybný dotaz: {e}")
+            skipped.append({"id": query["id"], "query": query["query"], "error": str(e)})
+            continue
+        where = parsed["where_filters"] or None
+        text = parsed["semantic_query"]
+        embedding = embedding_function([text]) if text else None
+
+        def run_single():
+            if embedding is not None:
+                kwargs = {"query_embeddings": embedding, "n_results": k, "where": where}
+                return single.query(**{key: value for key, value in kwargs.items() if value is not None})["ids"][0]
+            kwargs = {"limit": k, "where": where, "where_document": parsed["where_document"] or None}
+            return single.get(**{key: value for key, value in kwargs.items() if value is not None})["ids"]
+
+        def run_sharded():
+            if embedding is not None:
+                return sharded.query(text, embedding, k, where, parsed["jurisdiction"])
+            route_text = " ".join(str(value) for value in parsed["where_document"].values())
+            return sharded.get(route_text, k, where, parsed["where_document"] or None, parsed["jurisdiction"])
+
+        single_ids, sharded_result = [], {}
+        for name, func in (("single", run_single), ("sharded", run_sharded)):
+            for _ in range(repeat):
+                start = time.perf_counter()
+                output = func()
+                latencies[name].append((time.perf_counter() - start) * 1000)
+            if name == "single":
+                single_ids = output
+            else:
+                sharded_result = output
+
+        sharded_ids = sharded_result["ids"][0] if embedding is not None else sharded_result["ids"]
+        # Pri fulltexte bez poradia sa porovnáva len, či sa našlo aspoň toľko zhôd
+        overlap = len(set(single_ids) & set(sharded_ids)) / len(single_ids) if single_ids else 1.0
+        per_query.append({
+            "id": query["id"],
+            "mode": query["mode"],
+            "route": sharded_result["route"],
+            "shards": sharded_result["shards"],
+            f"overlap@{k}": round(overlap, 4),
+        })
+
+    routes: Dict[str, int] = {}
+    for item in per_query:
+        routes[item["route"]] = routes.get(item["route"], 0) + 1
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "parameters": {"k": k, "repeat": repeat, "queries": len(per_query), "shards": len(sharded.shards)},
+        "latency": {name: latency_summary(samples) for name, samples in latencies.items()},
+        f"overlap@{k}_mean": round(sum(item[f"overlap@{k}"] for item in per_query) / max(len(per_query), 1), 4),
+        "shards_per_query_mean": round(sum(len(item["shards"]) for item in per_query) / max(len(per_query), 1), 2),
+        "routes": routes,
+        "queries": per_query,
+        "skipped": skipped,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    """Vypíše porovnanie jednej kolekcie a shardov"""
+    k = report["parameters"]["k"]
+    print(f"\n{'variant':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in report["latency"].items():
+        print(f"{name:<10}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    print(f"\n🎯 Zhoda top-{k} so single kolekciou: {report[f'overlap@{k}_mean']:.3f}")
+    print(f"🧭 Shardov na dotaz: {report['shards_per_query_mean']} z {report['parameters']['shards']} "
+          f"(smerovanie: {', '.join(f'{reason} {count}' for reason, count in report['routes'].items())})")
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Shardy vektorovej databázy podľa zákona")
+    parser.add_argument("command", choices=["build", "benchmark"], help="Čo spustiť")
+    parser.add_argument("--collection", default="legal_documents", help="Zdrojová kolekcia")
+    parser.add_argument("--metadata", default=str(project_root / DEFAULT_METADATA_PATH), help="files_metadata.json")
+    parser.add_argument("--queries", default=str(DEFAULT_QUERY_SET), help="Sada dotazov benchmarku")
+    parser.add_argument("--k", type=int, default=8, help="Počet výsledkov")
+    parser.add_argument("--repeat", type=int, default=3, help="Opakovania dotazu pre latenciu")
+    parser.add_argument("--output", help="Cesta k výstupnému JSON")
+    args = parser.parse_args()
+
+    print("🚀 Shardy vektorovej databázy")
+    print("=" * 50)
+
+    if args.command == "build":
+        build(args.collection, Path(args.metadata))
+        return
+
+    report = benchmark(args.collection, Path(args.queries), args.k, args.repeat)
+    print_report(report)
+
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"shards_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Výsledky uložené do {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Súhrn trace súboru do rozpisu latencie po jednotlivých fázach
+
+Podporuje oba formáty z agent/tracing.py (JSONL spany aj OTLP JSON).
+
+Použitie:
+    LEGAL_TRACE_FILE=data/traces/agent.jsonl streamlit run app.py
+    python scripts/trace_summary.py data/traces/agent.jsonl
+    python scripts/trace_summary.py data/traces/agent.jsonl --root agent.ask --json
+"""
+
+import sys
+import json
+import argparse
+from typing import Any, Dict, Iterator, List
+from pathlib import Path
+
+# Pridaj project root do Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from agent.metrics import latency_summary
+
+
+def _otlp_attribute(value: Dict[str, Any]) -> Any:
+    """Prevedie OTLP AnyValue späť na Python hodnotu"""
+    if "intValue" in value:
+        return int(value["intValue"])
+    if "doubleValue" in value:
+        return value["doubleValue"]
+    if "boolValue" in value:
+        return value["boolValue"]
+    return value.get("stringValue")
+
+
+def read_spans(path: Path) -> Iterator[Dict[str, Any]]:
+    """Načíta spany z JSONL alebo OTLP JSON súboru do jednotného tvaru"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+
+            if "resourceSpans" not in record:
+                yield record
+                continue
+
+            for resource_spans in record["resourceSpans"]:
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    for span in scope_spans.get("spans", []):
+                        start_ns = int(span["startTimeUnixNano"])
+                        yield {
+                            "name": span["name"],
+                            "trace_id": span["traceId"],
+                            "span_id": span["spanId"],
+                            "parent_id": span.get("parentSpanId"),
+                            "start_ns": start_ns,
+                            "duration_ms": (int(span["endTimeUnixNano"]) - start_ns) / 1e6,
+                            "status": "error" if span.get("status", {}).get("code") == 2 else "ok",
+                            "attributes": {a["key"]: _otlp_attribute(a["value"]) for a in span.get("attributes", [])},
+                        }
+
+
+def summarize(spans: List[Dict[str, Any]], root_name: str) -> Dict[str, Any]:
+    """Vypočíta štatistiky po fázach a podiel na čase koreňových spanov"""
+    children_ms: Dict[str, float] = {}
+    for span in spans:
+        if span.get("parent_id"):
+            children_ms[span["parent_id"]] = children_ms.get(span["parent_id"], 0.0) + span["duration_ms"]
+
+    durations: Dict[str, List[float]] = {}
+    self_time: Dict[str, float] = {}
+    errors: Dict[str, int] = {}
+    for span in spans:
+        name = span["name"]
+        durations.setdefault(name, []).append(span["duration_ms"])
+        # Vlastný čas = trvanie mínus priame deti (zdieľané medzi vláknami môže byť záporné)
+        self_time[name] = self_time.get(name, 0.0) + max(0.0, span["duration_ms"] - children_ms.get(span["span_id"], 0.0))
+        if span.get("status") == "error":
+            errors[name] = errors.get(name, 0) + 1
+
+    roots = [s for s in spans if s["name"] == root_name]
+    root_total = sum(s["duration_ms"] for s in roots)
+
+    stages = {}
+    for name, samples in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        stages[name] = {
+            **latency_summary(samples),
+            "total_ms": round(sum(samples), 3),
+            "self_ms": round(self_time[name], 3),
+            "share_of_root": round(self_time[name] / root_total, 4) if root_total else None,
+            "errors": errors.get(name, 0),
+        }
+
+    return {
+        "spans": len(spans),
+        "traces": len({s["trace_id"] for s in spans}),
+        "root": {"name": root_name, "count": len(roots), **latency_summary([s["duration_ms"] for s in roots])},
+        "stages": stages,
+    }
+
+
+def print_summary(summary: Dict[str, Any]):
+    """Vypíše tabuľku rozpisu latencie"""
+    root = summary["root"]
+    print(f"📄 {summary['spans']} spanov v {summary['traces']} trasách")
+    print(f"⏱️ {root['name']}: {root['count']}x  p50={root['p50_ms']:.1f} ms  p95={root['p95_ms']:.1f} ms  p99={root['p99_ms']:.1f} ms")
+
+    header = f"{'fáza':<32}{'počet':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'vlastný s':>11}{'podiel':>9}{'chyby':>7}"
+    print("\n" + header)
+    print("-" * len(header))
+    for name, stats in summary["stages"].items():
+        share = f"{stats['share_of_root'] * 100:.1f}%" if stats["share_of_root"] is not None else "-"
+        print(f"{name:<32}{stats['count']:>7}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+              f"{stats['self_ms'] / 1000:>11.2f}{share:>9}{stats['errors']:>7}")
+
+
+def main():
+    """Hlavná funkcia"""
+    parser = argparse.ArgumentParser(description="Rozpis latencie z trace súboru")
+    parser.add_argument("trace_file", help="Súbor vytvorený cez LEGAL_TRACE_FILE")
+    parser.add_argument("--root", default="agent.ask", help="Názov koreňového spanu pre výpočet podielu")
+    parser.add_argument("--json", action="store_true", help="Výstup ako JSON")
+    args = parser.parse_args()
+
+    spans = list(read_spans(Path(args.trace_file)))
+    if not spans:
+        print("❌ Trace súbor neobsahuje žiadne spany")
+        return
+
+    summary = summarize(spans, args.root)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    else:
+        print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()